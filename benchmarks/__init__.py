@@ -0,0 +1,29 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Performance benchmarks of the archive operations.
+
+The benchmarks generate synthetic corpora and time the create, extract,
+list and test operations of each installed archive program, including the
+py_* backends, and the repack, search and diff operations of each archive
+format. Each run of a benchmark is a separate worker process, which records
+the wall time, the CPU time of the worker and of the archive programs, and
+the peak resident set size.
+
+Run all benchmarks with `make benchmark` or `python -m benchmarks`, and see
+`python -m benchmarks --help` for the options. The results are compared with
+a baseline stored by `make benchmark-baseline`.
+Without the resource module, e.g. on Windows, the CPU times are less
+precise and the peak resident set size is not measured.
+"""
@@ -0,0 +1,105 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Synthetic corpora to archive.
+
+Each corpus is a directory with one member, which is either a single file
+or a directory tree. The contents are generated from a fixed random seed,
+so every run archives the same data.
+"""
+
+import os
+import random
+
+MiB = 1024 * 1024
+
+# The corpora with the number of files, the size of each file in bytes and
+# the kind of the file contents. The scale factor multiplies the number of
+# files, or the size of single files.
+Corpora: dict[str, tuple[int, int, str]] = {
+    # many tiny text files in a directory tree
+    "tiny": (2000, 256, "text"),
+    # one huge file with text and random data
+    "huge": (1, 64 * MiB, "mixed"),
+    # one file with incompressible data
+    "random": (1, 16 * MiB, "random"),
+    # text files of medium size
+    "text": (64, 256 * 1024, "text"),
+}
+
+# the number of files in each directory of a directory tree
+DirectorySize: int = 100
+
+# generate file contents in chunks of this size
+ChunkSize: int = MiB
+
+# the seed of the random generator for the corpus contents
+Seed: int = 42
+
+
+def get_words(rng: random.Random) -> list[str]:
+    """Get a vocabulary of random words."""
+    letters = "etaoinshrdlucmfwypvbgkqjxz"
+    weights = range(len(letters), 0, -1)
+    return [
+        "".join(rng.choices(letters, weights=weights, k=rng.randint(1, 10)))
+        for i in range(2000)
+    ]
+
+
+def get_text(rng: random.Random, words: list[str], size: int) -> bytes:
+    """Get text lines of random words with the given size."""
+    lines = []
+    length = 0
+    while length < size:
+        line = " ".join(rng.choices(words, k=12)) + "\n"
+        lines.append(line)
+        length += len(line)
+    return "".join(lines).encode("ascii")[:size]
+
+
+def write_file(
+    filename: str, size: int, kind: str, rng: random.Random, words: list[str]
+) -> None:
+    """Write a file with generated contents."""
+    with open(filename, "wb") as fileobj:
+        for offset in range(0, size, ChunkSize):
+            length = min(ChunkSize, size - offset)
+            if kind == "random" or (kind == "mixed" and offset // ChunkSize % 2):
+                data = rng.randbytes(length)
+            else:
+                data = get_text(rng, words, length)
+            fileobj.write(data)
+
+
+def create_corpus(directory: str, name: str, scale: float = 1.0) -> None:
+    """Create a corpus in the given directory, which must not exist."""
+    count, size, kind = Corpora[name]
+    rng = random.Random(f"{Seed}-{name}")
+    words = get_words(rng)
+    os.makedirs(directory)
+    if count == 1:
+        size = max(1, int(size * scale))
+        write_file(os.path.join(directory, name), size, kind, rng, words)
+        return
+    count = max(1, round(count * scale))
+    for i in range(count):
+        subdir = os.path.join(directory, name, f"dir{i // DirectorySize}")
+        os.makedirs(subdir, exist_ok=True)
+        write_file(os.path.join(subdir, f"file{i}.txt"), size, kind, rng, words)
+
+
+def is_single_file(name: str) -> bool:
+    """Check if the member of a corpus is a single file."""
+    return Corpora[name][0] == 1
@@ -0,0 +1,351 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Run the benchmarks and compare the results with a baseline."""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections.abc import Sequence
+from typing import Any
+from patoolib.util import PatoolError
+from . import corpus, suite
+
+# the directory of the benchmarks package and the patoolib package
+RootDir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# increase this when the layout of the result data changes
+ResultVersion: int = 1
+
+# The compared measurements, with the minimum difference to the baseline
+# that is reported. Smaller differences of short runs are mostly noise.
+CompareMeasurements: dict[str, float] = {
+    "wall": 0.05,
+    "cpu_self": 0.05,
+    "cpu_children": 0.05,
+    "maxrss": 4 * corpus.MiB,
+}
+
+
+def create_corpora(workdir: str, corpora: Sequence[str], scale: float) -> None:
+    """Create the corpora that do not exist yet."""
+    for name in corpora:
+        directory = get_corpus_dir(workdir, name, scale)
+        if not os.path.isdir(directory):
+            print(f"creating corpus {name}")
+            corpus.create_corpus(directory, name, scale=scale)
+
+
+def get_corpus_dir(workdir: str, name: str, scale: float) -> str:
+    """Get the directory of a corpus."""
+    return os.path.join(workdir, f"corpus-{scale:g}", name)
+
+
+def get_archive(workdir: str, name: str, corpus_name: str, scale: float) -> str:
+    """Get the reference archive of a corpus."""
+    return os.path.join(
+        workdir, f"archives-{scale:g}", name, suite.get_archive_name(name, corpus_name)
+    )
+
+
+def get_archive_copy(archive: str) -> str:
+    """Get the copy of a reference archive, which is compared by diff."""
+    directory, filename = os.path.split(archive)
+    return os.path.join(directory + "-copy", filename)
+
+
+def create_archives(
+    workdir: str, formats: Sequence[str], corpora: Sequence[str], scale: float
+) -> list[str]:
+    """Create the missing reference archives of the corpora with the default
+    programs.
+    @return: the formats whose archives could be created
+    """
+    created = []
+    for name in formats:
+        try:
+            for corpus_name in suite.get_corpora(name, corpora):
+                archive = get_archive(workdir, name, corpus_name, scale)
+                copy = get_archive_copy(archive)
+                if os.path.isfile(copy):
+                    continue
+                print(f"creating archive {archive}")
+                os.makedirs(os.path.dirname(archive), exist_ok=True)
+                os.makedirs(os.path.dirname(copy), exist_ok=True)
+                corpusdir = get_corpus_dir(workdir, corpus_name, scale)
+                suite.create_archive(archive, name, corpusdir, corpus_name)
+                shutil.copyfile(archive, copy)
+        except PatoolError as msg:
+            print(f"skipping format {name}: {msg}")
+            continue
+        created.append(name)
+    return created
+
+
+def run_worker(workdir: str, spec: dict[str, Any]) -> dict[str, Any]:
+    """Run a benchmark once in a worker process.
+    @return: the measurements, or an error
+    """
+    tmpdir = tempfile.mkdtemp(dir=workdir)
+    try:
+        specfile = os.path.join(tmpdir, "spec.json")
+        resultfile = os.path.join(tmpdir, "result.json")
+        with open(specfile, "w") as fileobj:
+            json.dump(spec, fileobj)
+        rundir = os.path.join(tmpdir, "run")
+        os.mkdir(rundir)
+        cmd = [sys.executable, "-m", "benchmarks.worker", specfile, rundir, resultfile]
+        proc = subprocess.run(
+            cmd,
+            cwd=RootDir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if proc.returncode:
+            lines = proc.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+        with open(resultfile) as fileobj:
+            return json.load(fileobj)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def summarize(runs: list[dict[str, Any]]) -> dict[str, Any]:
+    """Summarize the measurements of the runs of a benchmark."""
+    for run in runs:
+        if "error" in run:
+            return run
+    return {
+        "runs": len(runs),
+        "wall": statistics.median(run["wall"] for run in runs),
+        "wall_min": min(run["wall"] for run in runs),
+        "cpu_self": statistics.median(run["cpu_self"] for run in runs),
+        "cpu_children": statistics.median(run["cpu_children"] for run in runs),
+        "maxrss": max(run["maxrss"] for run in runs),
+    }
+
+
+def format_result(key: str, result: dict[str, Any]) -> str:
+    """Format the result of a benchmark as a table row."""
+    if "error" in result:
+        return f"{key:<40} error: {result['error']}"
+    return (
+        f"{key:<40} {result['wall']:9.3f} {result['cpu_self']:9.3f} "
+        f"{result['cpu_children']:9.3f} {result['maxrss'] / corpus.MiB:9.1f}"
+    )
+
+
+def run_benchmarks(
+    workdir: str,
+    benchmarks: Sequence[suite.Benchmark],
+    scale: float,
+    repeat: int,
+) -> dict[str, dict[str, Any]]:
+    """Run the benchmarks and print their results.
+    @return: the results of the benchmarks by their key
+    """
+    print(f"{'benchmark':<40} {'wall s':>9} {'cpu s':>9} {'child s':>9} {'rss MiB':>9}")
+    results = {}
+    for benchmark in benchmarks:
+        archive = get_archive(workdir, benchmark.format, benchmark.corpus, scale)
+        spec = {
+            "benchmark": list(benchmark),
+            "corpusdir": get_corpus_dir(workdir, benchmark.corpus, scale),
+            "archive": archive,
+            "archive_copy": get_archive_copy(archive),
+        }
+        runs = []
+        for i in range(repeat):
+            runs.append(run_worker(workdir, spec))
+            if "error" in runs[-1]:
+                break
+        results[benchmark.key] = summarize(runs)
+        print(format_result(benchmark.key, results[benchmark.key]), flush=True)
+    return results
+
+
+def compare_results(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    tolerance: float,
+) -> list[str]:
+    """Compare the results with the baseline.
+    @return: descriptions of the measurements that are worse than the
+      baseline by more than the tolerance
+    """
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None or "error" in old or "error" in result:
+            continue
+        for name, mindiff in CompareMeasurements.items():
+            diff = result[name] - old[name]
+            if diff > mindiff and diff > old[name] * tolerance:
+                regressions.append(
+                    f"{key} {name}: {old[name]:.3f} -> {result[name]:.3f}"
+                    f" ({diff / old[name]:+.0%})"
+                )
+    return regressions
+
+
+def read_results(filename: str) -> dict[str, Any] | None:
+    """Read a results file, or return None if it does not exist."""
+    if not os.path.isfile(filename):
+        return None
+    with open(filename) as fileobj:
+        data = json.load(fileobj)
+    if data.get("version") != ResultVersion:
+        return None
+    return data
+
+
+def write_results(filename: str, data: dict[str, Any]) -> None:
+    """Write a results file."""
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, "w") as fileobj:
+        json.dump(data, fileobj, indent=2, sort_keys=True)
+
+
+def compare_baseline(data: dict[str, Any], filename: str, tolerance: float) -> int:
+    """Compare results with the baseline file and print regressions.
+    @return: 1 if there are regressions, else 0
+    """
+    baseline = read_results(filename)
+    if baseline is None:
+        print(f"no baseline {filename}, run with --save-baseline to store one")
+        return 0
+    if baseline["scale"] != data["scale"]:
+        print(f"not comparing with baseline {filename} of scale {baseline['scale']}")
+        return 0
+    regressions = compare_results(data["results"], baseline["results"], tolerance)
+    if not regressions:
+        print(f"no regressions compared to baseline {filename}")
+        return 0
+    print(f"{len(regressions)} regressions compared to baseline {filename}:")
+    for regression in regressions:
+        print(f"  {regression}")
+    return 1
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Get the parser of the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the archive operations of patool.",
+    )
+    parser.add_argument(
+        "--format",
+        action="append",
+        choices=list(suite.Formats),
+        help="benchmark only this archive format; can be given multiple times",
+    )
+    parser.add_argument(
+        "--corpus",
+        action="append",
+        choices=list(corpus.Corpora),
+        help="benchmark only this corpus; can be given multiple times",
+    )
+    parser.add_argument(
+        "--operation",
+        action="append",
+        choices=suite.Operations,
+        help="benchmark only this operation; can be given multiple times",
+    )
+    parser.add_argument(
+        "--program",
+        action="append",
+        help="benchmark only this archive program; can be given multiple times",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiply the number of files or the file size of the corpora "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="run each benchmark this many times (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--workdir",
+        help="keep the corpora and archives in this directory for later runs",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join("build", "benchmark.json"),
+        help="write the results to this file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=os.path.join("build", "benchmark-baseline.json"),
+        help="compare the results with this file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing them",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="report measurements that are worse than the baseline by more "
+        "than this fraction (default: %(default)s)",
+    )
+    return parser
+
+
+def main(args: Sequence[str] | None = None) -> int:
+    """Run the benchmarks.
+    @return: 1 if results are worse than the baseline, else 0
+    """
+    options = get_parser().parse_args(args=args)
+    formats = options.format or list(suite.Formats)
+    corpora = options.corpus or list(corpus.Corpora)
+    operations = options.operation or suite.Operations
+    workdir = options.workdir or tempfile.mkdtemp(prefix="patool-benchmarks-")
+    workdir = os.path.abspath(workdir)
+    try:
+        create_corpora(workdir, corpora, options.scale)
+        formats = create_archives(workdir, formats, corpora, options.scale)
+        benchmarks = list(
+            suite.iter_benchmarks(formats, corpora, operations, options.program)
+        )
+        results = run_benchmarks(workdir, benchmarks, options.scale, options.repeat)
+    finally:
+        if not options.workdir:
+            shutil.rmtree(workdir)
+    data = {
+        "version": ResultVersion,
+        "python": sys.version,
+        "scale": options.scale,
+        "results": results,
+    }
+    write_results(options.output, data)
+    if options.save_baseline:
+        write_results(options.baseline, data)
+        print(f"stored baseline {options.baseline}")
+        return 0
+    return compare_baseline(data, options.baseline, options.tolerance)
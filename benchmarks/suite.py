@@ -0,0 +1,211 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""The benchmarked archive formats and operations."""
+
+import os
+from collections.abc import Iterator, Sequence
+from typing import Any, NamedTuple
+import patoolib
+from patoolib.util import PatoolError
+from . import corpus
+
+# The benchmarked archive formats with their filename extension, archive
+# format and compression.
+Formats: dict[str, tuple[str, str, str | None]] = {
+    "tar": (".tar", "tar", None),
+    "tar.gz": (".tar.gz", "tar", "gzip"),
+    "tar.bz2": (".tar.bz2", "tar", "bzip2"),
+    "tar.xz": (".tar.xz", "tar", "xz"),
+    "tar.zst": (".tar.zst", "tar", "zstd"),
+    "zip": (".zip", "zip", None),
+    "7z": (".7z", "7z", None),
+    "rar": (".rar", "rar", None),
+    "gzip": (".gz", "gzip", None),
+    "bzip2": (".bz2", "bzip2", None),
+    "xz": (".xz", "xz", None),
+    "lzma": (".lzma", "lzma", None),
+    "zstd": (".zst", "zstd", None),
+    "lzip": (".lz", "lzip", None),
+    "lz4": (".lz4", "lz4", None),
+}
+
+# formats that compress a single file
+SingleFileFormats: tuple[str, ...] = patoolib.ArchiveCompressions + ("lz4",)
+
+# operations that are benchmarked for each archive program
+ProgramOperations: tuple[str, ...] = ("create", "extract", "list", "test")
+
+# operations that are benchmarked for each archive format
+FormatOperations: tuple[str, ...] = ("repack", "search", "diff")
+
+Operations: tuple[str, ...] = ProgramOperations + FormatOperations
+
+# a pattern that matches nothing, so that search reads all data
+SearchPattern: str = "patool-benchmark-pattern"
+
+
+class Benchmark(NamedTuple):
+    """One benchmarked operation. The program is None for format operations."""
+
+    operation: str
+    format: str
+    corpus: str
+    program: str | None
+
+    @property
+    def key(self) -> str:
+        """Get the unique name of the benchmark."""
+        return "/".join((self.operation, self.format, self.corpus, self.program or "-"))
+
+
+def is_single_file_format(name: str) -> bool:
+    """Check if an archive format compresses only a single file."""
+    return Formats[name][1] in SingleFileFormats
+
+
+def get_corpora(name: str, corpora: Sequence[str]) -> list[str]:
+    """Get the corpora that can be archived in a format."""
+    if is_single_file_format(name):
+        return [c for c in corpora if corpus.is_single_file(c)]
+    return list(corpora)
+
+
+def get_program_name(program: str) -> str:
+    """Get the program name of an executable or Python module."""
+    return os.path.splitext(os.path.basename(program))[0].lower()
+
+
+def get_programs(name: str, command: str) -> list[str]:
+    """Get the installed programs that can run an archive command on a
+    format.
+    """
+    suffix, format, compression = Formats[name]
+    commands = patoolib.ArchivePrograms[format]
+    programs = []
+    for key in (None, command):
+        for program in commands.get(key, ()):
+            if program in programs:
+                continue
+            try:
+                found = patoolib.find_archive_program(
+                    format,
+                    command,
+                    program=program,
+                    compression=compression,
+                    verbosity=-1,
+                )
+            except PatoolError:
+                continue
+            # another program is found when the program is not installed
+            if get_program_name(found) == program:
+                programs.append(program)
+    return programs
+
+
+def iter_benchmarks(
+    formats: Sequence[str],
+    corpora: Sequence[str],
+    operations: Sequence[str],
+    programs: Sequence[str] | None = None,
+) -> Iterator[Benchmark]:
+    """Iterate over the benchmarks of the formats, corpora and operations.
+    If programs are given, only these programs are benchmarked.
+    """
+    for name in formats:
+        for operation in operations:
+            if operation in FormatOperations:
+                candidates: list[str | None] = [None]
+            else:
+                candidates = [
+                    program
+                    for program in get_programs(name, operation)
+                    if programs is None or program in programs
+                ]
+            for corpus_name in get_corpora(name, corpora):
+                for program in candidates:
+                    yield Benchmark(operation, name, corpus_name, program)
+
+
+def get_archive_name(name: str, corpus_name: str) -> str:
+    """Get the filename of an archive of a corpus."""
+    return corpus_name + Formats[name][0]
+
+
+def create_archive(
+    archive: str,
+    name: str,
+    corpusdir: str,
+    corpus_name: str,
+    program: str | None = None,
+) -> None:
+    """Create an archive of a corpus."""
+    suffix, format, compression = Formats[name]
+    patoolib._create_archive(
+        archive,
+        [corpus_name],
+        verbosity=-1,
+        interactive=False,
+        program=program,
+        format=format,
+        compression=compression,
+        cwd=corpusdir,
+    )
+
+
+def run(spec: dict[str, Any], tmpdir: str) -> None:
+    """Run the operation of a benchmark. The specification has the
+    benchmark values, the corpus directory, the archive of the corpus and
+    a copy of the archive. The temporary directory is empty.
+    """
+    benchmark = Benchmark(*spec["benchmark"])
+    suffix, format, compression = Formats[benchmark.format]
+    archive = spec["archive"]
+    kwargs = dict(verbosity=-1, interactive=False)
+    if benchmark.operation == "create":
+        create_archive(
+            os.path.join(tmpdir, os.path.basename(archive)),
+            benchmark.format,
+            spec["corpusdir"],
+            benchmark.corpus,
+            program=benchmark.program,
+        )
+    elif benchmark.operation == "extract":
+        patoolib._extract_archive(
+            archive,
+            outdir=tmpdir,
+            program=benchmark.program,
+            format=format,
+            compression=compression,
+            **kwargs,
+        )
+    elif benchmark.operation in ("list", "test"):
+        patoolib._handle_archive(
+            archive,
+            benchmark.operation,
+            program=benchmark.program,
+            format=format,
+            compression=compression,
+            **kwargs,
+        )
+    elif benchmark.operation == "repack":
+        target = "zip" if benchmark.format == "tar.gz" else "tar.gz"
+        archive_new = os.path.join(tmpdir, get_archive_name(target, benchmark.corpus))
+        patoolib.repack_archive(archive, archive_new, **kwargs)
+    elif benchmark.operation == "search":
+        patoolib.search_archive(SearchPattern, archive, stream=True, **kwargs)
+    elif benchmark.operation == "diff":
+        patoolib.diff_archives(archive, spec["archive_copy"], **kwargs)
+    else:
+        raise PatoolError(f"unknown benchmark operation `{benchmark.operation}'")
@@ -0,0 +1,97 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Run one benchmark in a worker process and measure it.
+
+Usage: python -m benchmarks.worker <specfile> <tmpdir> <resultfile>
+
+A separate process for each run measures the peak memory of this run
+only, and the CPU time of the archive programs it started.
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Any
+from patoolib.stats import get_maxrss
+from . import suite
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+
+def get_cpu(usage: Any) -> float:
+    """Get the user and system CPU time of a resource usage in seconds."""
+    return usage.ru_utime + usage.ru_stime
+
+
+def get_cpu_times() -> tuple[float, float]:
+    """Get the CPU seconds of this process and of its child processes
+    that have been waited for.
+    """
+    if resource is None:
+        times = os.times()
+        return (
+            times.user + times.system,
+            times.children_user + times.children_system,
+        )
+    return (
+        get_cpu(resource.getrusage(resource.RUSAGE_SELF)),
+        get_cpu(resource.getrusage(resource.RUSAGE_CHILDREN)),
+    )
+
+
+def get_peak_memory() -> int:
+    """Get the maximum resident set size of this process and of its child
+    processes in bytes, or 0 if it is not known.
+    """
+    if resource is None:
+        return 0
+    return max(
+        get_maxrss(resource.getrusage(resource.RUSAGE_SELF)),
+        get_maxrss(resource.getrusage(resource.RUSAGE_CHILDREN)),
+    )
+
+
+def measure(spec: dict[str, Any], tmpdir: str) -> dict[str, Any]:
+    """Run a benchmark and return its measurements."""
+    self_before, children_before = get_cpu_times()
+    start = time.perf_counter()
+    suite.run(spec, tmpdir)
+    wall = time.perf_counter() - start
+    self_after, children_after = get_cpu_times()
+    return {
+        "wall": wall,
+        "cpu_self": self_after - self_before,
+        "cpu_children": children_after - children_before,
+        "maxrss": get_peak_memory(),
+    }
+
+
+def main(args: list[str]) -> None:
+    """Run the benchmark of a specification file."""
+    specfile, tmpdir, resultfile = args
+    with open(specfile) as fileobj:
+        spec = json.load(fileobj)
+    result = measure(spec, tmpdir)
+    with open(resultfile, "w") as fileobj:
+        json.dump(result, fileobj)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -21,30 +21,45 @@ import sys
 # check for compatible Python version before importing other packages
 if not hasattr(sys, "version_info") or sys.version_info < (3, 11, 0, "final", 0):
     raise SystemExit("This program requires Python 3.11 or later.")
+import contextlib
 import functools
-import inspect
 import os
 import shutil
 import importlib
-import subprocess
-from collections.abc import Sequence, Callable
+import io
+from collections.abc import Sequence, Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, BinaryIO
 
 # PEP 396: supply __version__
 from .configuration import App, Version as __version__  # noqa: F401
-from . import fileutil, log, util
+from . import cache, fileutil, log, util, parallel, progress, stats
+from .entries import ArchiveEntry, EntryFile, format_entry, select_members
+
+# modules that are only needed by some commands are imported on first use
+# in the functions using them
+if TYPE_CHECKING:
+    from . import tarindex
 
 # export API functions
 __all__ = [
+    'collect_stats',
     'create_archive',
     'diff_archives',
     'extract_archive',
+    'extract_archives',
+    'index_archive',
     'is_archive',
+    'iter_archive',
     'list_archive',
+    'list_archives',
     'list_formats',
+    'open_member',
     'repack_archive',
+    'report_progress',
     'search_archive',
     'supported_formats',
     'test_archive',
+    'test_archives',
 ]
 
 
@@ -212,7 +227,7 @@ ArchivePrograms: dict[str, dict[str | None, tuple[str, ...]]] = {
     'bzip2': {
         None: ('7z', '7za', '7zz', '7zzs'),
         'extract': ('pbzip2', 'lbzip2', 'bzip2', 'unar', 'py_bz2'),
-        'test': ('pbzip2', 'lbzip2', 'bzip2'),
+        'test': ('pbzip2', 'lbzip2', 'bzip2', 'py_bz2'),
         'create': ('pbzip2', 'lbzip2', 'bzip2', 'py_bz2'),
         'list': ('py_echo',),
     },
@@ -263,6 +278,7 @@ ArchivePrograms: dict[str, dict[str | None, tuple[str, ...]]] = {
             'unar',
             'py_gzip',
         ),
+        'test': ('py_gzip',),
         'create': ('zopfli', 'py_gzip'),
     },
     'iso': {
@@ -289,7 +305,7 @@ ArchivePrograms: dict[str, dict[str | None, tuple[str, ...]]] = {
     'lzma': {
         'extract': ('7z', '7zz', '7zzs', 'lzma', 'xz', 'unar', 'py_lzma'),
         'list': ('7z', '7zz', '7zzs', 'py_echo'),
-        'test': ('7z', '7zz', '7zzs', 'lzma', 'xz'),
+        'test': ('7z', '7zz', '7zzs', 'lzma', 'xz', 'py_lzma'),
         'create': ('lzma', 'xz', 'py_lzma'),
     },
     'lrzip': {
@@ -371,6 +387,7 @@ ArchivePrograms: dict[str, dict[str | None, tuple[str, ...]]] = {
             'unar',
             'py_lzma',
         ),
+        'test': ('py_lzma',),
         'create': ('py_lzma',),
     },
     'zip': {
@@ -394,9 +411,102 @@ ArchivePrograms: dict[str, dict[str | None, tuple[str, ...]]] = {
         None: ("zstd",),
         "create": ("py_zstd",),
         "extract": ("py_zstd",),
+        "test": ("py_zstd",),
     },
 }
 
+# List of programs that can generate the members of an archive for
+# iter_archive(), in order of preference.
+# Compressed archives are only supported if the program handles the
+# compression natively.
+# {<format>: (<program>,...)}
+IterArchivePrograms: dict[str, tuple[str, ...]] = {
+    '7z': ('7z', '7za', '7zr', '7zz', '7zzs'),
+    'ape': ('py_echo',),
+    'arj': ('7z', '7zz', '7zzs'),
+    'bzip2': ('py_echo',),
+    'bzip3': ('py_echo',),
+    'cab': ('7z', '7za', '7zz', '7zzs'),
+    'chm': ('7z', '7zz', '7zzs'),
+    'compress': ('py_echo',),
+    'cpio': ('7z', '7zz', '7zzs'),
+    'deb': ('7z', '7zz', '7zzs'),
+    'flac': ('py_echo',),
+    'gzip': ('py_echo',),
+    'iso': ('7z', '7zz', '7zzs'),
+    'lrzip': ('py_echo',),
+    'lzip': ('py_echo',),
+    'lzma': ('py_echo',),
+    'rar': ('7z', '7za', '7zz', '7zzs'),
+    'rpm': ('7z', '7za', '7zz', '7zzs'),
+    'rzip': ('py_echo',),
+    'shn': ('py_echo',),
+    'tar': ('py_tarfile', 'tar'),
+    'udf': ('7z', '7zz', '7zzs'),
+    'vhd': ('7z', '7zz', '7zzs'),
+    'wim': ('7z', '7zz', '7zzs'),
+    'xz': ('py_echo',),
+    'zip': ('py_zipfile', '7z', '7za', '7zz', '7zzs', 'unzip'),
+    'zstd': ('py_echo',),
+}
+
+# List of programs that can open an archive member for reading with
+# open_member(), in order of preference. The programs either use a Python
+# module or write the member contents to standard output.
+# {<format>: (<program>,...)}
+OpenArchivePrograms: dict[str, tuple[str, ...]] = {
+    '7z': ('7z', '7za', '7zr', '7zz', '7zzs'),
+    'arj': ('7z', '7zz', '7zzs'),
+    'bzip2': ('py_bz2', '7z', '7za', '7zz', '7zzs', 'lbzip2', 'pbzip2', 'bzip2'),
+    'cab': ('7z', '7za', '7zz', '7zzs'),
+    'chm': ('7z', '7zz', '7zzs'),
+    'compress': ('7z', '7za', '7zz', '7zzs', 'gzip'),
+    'cpio': ('7z', '7zz', '7zzs'),
+    'deb': ('7z', '7zz', '7zzs'),
+    'gzip': ('py_gzip', '7z', '7za', '7zz', '7zzs', 'pigz', 'gzip'),
+    'iso': ('7z', '7zz', '7zzs'),
+    'lzip': ('plzip', 'lzip', 'clzip', 'pdlzip'),
+    'lzma': ('py_lzma', '7z', '7zz', '7zzs'),
+    'rar': ('7z', '7za', '7zz', '7zzs'),
+    'rpm': ('7z', '7za', '7zz', '7zzs'),
+    'tar': ('py_tarfile', 'tar'),
+    'udf': ('7z', '7zz', '7zzs'),
+    'vhd': ('7z', '7zz', '7zzs'),
+    'wim': ('7z', '7zz', '7zzs'),
+    'xz': ('py_lzma', 'xz', '7z', '7zz', '7zzs'),
+    'zip': ('py_zipfile', '7z', '7za', '7zz', '7zzs', 'unzip'),
+    'zstd': ('py_zstd', 'zstd'),
+}
+
+# Programs for the commands of archive member streams.
+StreamArchivePrograms: dict[str, dict[str, tuple[str, ...]]] = {
+    'iter': IterArchivePrograms,
+    'open': OpenArchivePrograms,
+}
+
+# Programs that can compress or decompress with multiple threads, in order
+# of preference. These programs are preferred when a number of threads is given.
+# The Python modules compress single file archives in independent blocks.
+ParallelPrograms: dict[str, tuple[str, ...]] = {
+    'bzip2': ('lbzip2', 'pbzip2', 'py_bz2'),
+    'gzip': ('pigz', 'py_gzip'),
+    'lzip': ('plzip',),
+    'xz': ('xz', 'py_lzma'),
+    'zip': ('py_zipfile',),
+    'zstd': ('zstd', 'py_zstd'),
+}
+
+# Compression methods of archive members that can be selected when creating
+# archives. The supported methods depend on the archive format and program.
+CompressionMethods: tuple[str, ...] = ('store', 'deflate', 'bzip2', 'lzma', 'zstd')
+
+# Compression levels of the compression methods without level 0
+CompressionMethodLevels: dict[str, range] = {'bzip2': range(1, 10)}
+
+# The fraction of the extracted size of an archive that must be free in
+# addition before extracting it.
+DefaultSpaceMargin: float = 0.1
+
 # List of programs by archive type, which don't support password use
 NoPasswordSupportArchivePrograms: dict[str, dict[str | None, tuple[str, ...]]] = {
     'bzip2': {
@@ -524,8 +634,8 @@ def program_supports_compression(
         # * tar programs exit with error on unsupported options
         # * tar programs allow long option --<compression> for supported compressions
         # This way running "tar --<compression> --help" determines, if the compression is supported
-        cmd = [exe, f"--{compression}", "--help"]
-        if util.run(cmd, stderr=subprocess.DEVNULL, verbosity=-1) != 0:
+        # The result of this check is stored in the capabilities cache.
+        if not util.program_supports_options(exe, [f"--{compression}"]):
             # compression is not supported by this tar implementation
             return False
         # in addition to the commandline option, tar also needs the corresponding compression program
@@ -608,8 +718,15 @@ def find_archive_program(
     password: str | None = None,
     compression: str | None = None,
     verbosity: int = 0,
+    threads: int | None = None,
+    keywords: Sequence[str] = (),
 ) -> str:
-    """Find suitable archive program for given format and mode."""
+    """Find suitable archive program for given format and mode.
+    If a number of threads is given, programs that can use multiple threads
+    are preferred.
+    If keywords are given, only programs whose archive function supports
+    these keyword arguments are used.
+    """
     commands = ArchivePrograms[format]
     programs = []
     if program is not None:
@@ -619,6 +736,17 @@ def find_archive_program(
     for key in (None, command):
         if key in commands:
             programs.extend(commands[key])
+    if threads and format in ParallelPrograms:
+        programs = _prefer_parallel_programs(programs, format, command, program)
+    if keywords:
+        programs = [
+            p
+            for p in programs
+            if _program_supports_keywords(p, command, format, keywords)
+        ]
+        if not programs:
+            msg = f"no program can {command} format `{format}' with the options "
+            raise util.PatoolError(msg + ", ".join(keywords))
     if password is not None:
         programs = _remove_command_without_password_support(programs, format, command)
     if not programs:
@@ -697,6 +825,59 @@ def check_program_compression(
     return False
 
 
+def _prefer_parallel_programs(
+    programs: Sequence[str], format: str, command: str, program: str | None
+) -> list[str]:
+    """Move programs that can use multiple threads to the front, but after
+    a specific program given by the user.
+    Python modules are only preferred if they support threads for the command.
+    """
+    preferred = [
+        p
+        for p in ParallelPrograms[format]
+        if p in programs
+        and (
+            not p.startswith('py_')
+            or _program_supports_keywords(p, command, format, ('threads',))
+        )
+    ]
+    if program is not None:
+        preferred = [program] + [p for p in preferred if p != program]
+    return preferred + [p for p in programs if p not in preferred]
+
+
+def _program_supports_keywords(
+    program: str, command: str, format: str, keywords: Sequence[str]
+) -> bool:
+    """Check if the archive function of a program has all given keyword
+    parameters.
+    """
+    try:
+        module = get_patool_program_module(program)
+    except ImportError:
+        return False
+    func = getattr(module, f'{command}_{format}', None)
+    if func is None:
+        return False
+    parameters = get_parameters(func)
+    return all(key in parameters for key in keywords)
+
+
+@functools.cache
+def get_parameters(func: Callable) -> frozenset[str]:
+    """Get the parameter names of an archive function. The names are read
+    from the code object of the function, which avoids importing the
+    inspect module.
+    """
+    code = getattr(func, '__code__', None)
+    if code is None:
+        import inspect  # noqa: PLC0415
+
+        return frozenset(inspect.signature(func).parameters)
+    count = code.co_argcount + code.co_kwonlyargcount
+    return frozenset(code.co_varnames[:count])
+
+
 def _remove_command_without_password_support(
     programs: Sequence[str], format: str, command: str
 ) -> Sequence[str]:
@@ -720,6 +901,53 @@ def _remove_command_without_password_support(
     return programs_with_support
 
 
+def find_stream_program(
+    command: str,
+    format: str,
+    program: str | None = None,
+    compression: str | None = None,
+) -> str:
+    """Find a program for the given archive member stream command
+    ('iter' or 'open'), format and compression.
+    """
+    programs = list(StreamArchivePrograms[command].get(format, ()))
+    if program is not None:
+        # try a specific program first
+        programs.insert(0, program)
+    if not programs:
+        raise util.PatoolError(f"{command} archive format `{format}' is not supported")
+    for program in programs:
+        if program.startswith('py_'):
+            try:
+                get_patool_program_module(program)
+            except ImportError:
+                continue
+            exe = program
+        else:
+            exe = util.find_program(program)
+            if not exe:
+                continue
+            if program in ('7z', '7zz', '7zzs', '7za'):
+                if format == 'rar' and not util.p7zip_supports_rar(program):
+                    continue
+                if format == 'compress' and not util.p7zip_supports_compress(program):
+                    continue
+            elif program == 'tar':
+                # only the listing format of GNU tar is parsed
+                if not util.program_supports_options(exe, ['--full-time']):
+                    continue
+        if compression and not program_supports_compression(
+            'extract', program, exe, compression
+        ):
+            continue
+        return exe
+    msg = f"could not find an executable program to {command} format {format}"
+    if compression is not None:
+        msg += f" and compression {compression}"
+    msg += "; candidates are " + ",".join(programs)
+    raise util.PatoolError(msg)
+
+
 def list_formats() -> None:
     """Print information about available archive formats to stdout.
 
@@ -761,6 +989,36 @@ def list_formats() -> None:
                 )
 
 
+def warm_cache() -> None:
+    """Search all archive programs and run all capability checks, so that
+    the results are stored in the capabilities cache.
+
+    :return: None
+    :rtype:  None
+    """
+    for format in ArchiveFormats:
+        for command in ArchiveCommands:
+            programs = ArchivePrograms[format]
+            if command not in programs and None not in programs:
+                continue
+            try:
+                find_archive_program(format, command)
+            except util.PatoolError:
+                pass
+    for program in ('7z', '7za', '7zz', '7zzs'):
+        util.p7zip_supports_rar(program)
+        util.p7zip_supports_compress(program)
+    for program in ('tar', 'star', 'bsdtar'):
+        exe = util.find_program(program)
+        if not exe:
+            continue
+        for compression in ArchiveCompressions:
+            program_supports_compression('extract', program, exe, compression)
+        if program == 'tar':
+            get_patool_program_module(program).get_tar_opts(exe, None, 0)
+    cache.flush()
+
+
 def supported_formats(operations: Sequence[str] = ArchiveCommands) -> list[str]:
     """Return a list of supported archive formats for an iterable of operations.
 
@@ -804,8 +1062,10 @@ def run_archive_cmdlist(
     archive_cmdlist: Sequence[str] | tuple[Sequence[str], dict],
     verbosity: int = 0,
     interactive: bool = True,
+    cwd: str | None = None,
 ) -> int:
-    """Run archive command.
+    """Run archive command. If cwd is given, the command runs in that
+    directory unless the archive program chose its own directory.
 
     @return: exit code
     """
@@ -814,6 +1074,8 @@ def run_archive_cmdlist(
         cmdlist, runkwargs = archive_cmdlist
     else:
         cmdlist, runkwargs = archive_cmdlist, {}
+    if cwd is not None:
+        runkwargs = {'cwd': cwd, **runkwargs}
     return util.run_checked(
         cmdlist,
         verbosity=verbosity,
@@ -827,19 +1089,22 @@ def cleanup_outdir(outdir: str, archive: str) -> tuple[str, str]:
     result string.
     """
     fileutil.make_user_readable(outdir)
-    # move single directory or file in outdir
-    (success, msg) = move_outdir_orphan(outdir)
-    if success:
-        # msg is a single directory or filename
-        return msg, f"`{msg}'"
-    # outdir remains unchanged
-    # rename it to something more user-friendly (basically the archive
-    # name without extension)
-    outdir2 = fileutil.get_single_outfile("", archive)
-    os.rename(outdir, outdir2)
+    # parallel extractions must not choose the same target names
+    with parallel.worker_lock():
+        # move single directory or file in outdir
+        (success, msg) = move_outdir_orphan(outdir)
+        if success:
+            # msg is a single directory or filename
+            return msg, f"`{msg}'"
+        # outdir remains unchanged
+        # rename it to something more user-friendly (basically the archive
+        # name without extension)
+        outdir2 = fileutil.get_single_outfile("", archive)
+        os.rename(outdir, outdir2)
     return outdir2, f"`{outdir2}' ({msg})"
 
 
+@stats.timed("extract")
 def _extract_archive(
     archive: str,
     verbosity: int = 0,
@@ -849,23 +1114,63 @@ def _extract_archive(
     format: str | None = None,
     compression: str | None = None,
     password: str | None = None,
+    threads: int | None = None,
+    members: Sequence[str] | None = None,
+    space_margin: float | None = None,
 ) -> str:
     """Extract an archive.
+    If members are given, only the matching archive members are extracted.
+    Members of TAR archives with an index are extracted without
+    decompressing the whole archive.
+    If a space margin is given and all members are extracted, an error is
+    raised before anything is written if the extracted size plus this
+    fraction of it is larger than the free disk space of the output
+    directory.
 
     @return: output directory
     """
     if format is None:
-        format, compression = get_archive_format(archive, verbosity=verbosity)
+        with stats.phase("format"):
+            format, compression = get_archive_format(archive, verbosity=verbosity)
     check_archive_format(format, compression)
-    program = find_archive_program(
-        format,
-        'extract',
-        program=program,
-        password=password,
-        compression=compression,
-        verbosity=verbosity,
-    )
-    get_archive_cmdlist = get_archive_cmdlist_func(program, 'extract', format)
+    if space_margin is not None and members is None:
+        from . import space  # noqa: PLC0415
+
+        with stats.phase("space"):
+            space.check_space(
+                archive,
+                format,
+                compression,
+                outdir or os.curdir,
+                space_margin,
+                password=password,
+                verbosity=verbosity,
+            )
+    index = None
+    if members is not None:
+        from . import tarindex  # noqa: PLC0415
+
+        with stats.phase("members"):
+            if program is None:
+                index = tarindex.get_index(archive, format, compression, password)
+            members = _select_members(
+                archive, members, format, compression, password, verbosity, index=index
+            )
+            if index is not None and tarindex.has_hardlinks(index, members):
+                index = None
+    if index is None:
+        with stats.phase("program"):
+            program = find_archive_program(
+                format,
+                'extract',
+                program=program,
+                password=password,
+                compression=compression,
+                verbosity=verbosity,
+                threads=threads,
+                keywords=() if members is None else ('members',),
+            )
+            get_archive_cmdlist = get_archive_cmdlist_func(program, 'extract', format)
     if outdir is None:
         outdir = fileutil.tmpdir(dir=".")
         do_cleanup_outdir = True
@@ -880,22 +1185,33 @@ def _extract_archive(
                 log.log_info(f"... creating output directory `{outdir}'.")
             os.makedirs(outdir)
     try:
-        cmdlist = get_archive_cmdlist(
-            archive,
-            compression,
-            program,
-            verbosity,
-            interactive,
-            outdir,
-            password=password,
-        )
-        if cmdlist:
-            # an empty command list means the get_archive_cmdlist() function
-            # already handled the command (e.g. when it's a builtin Python
-            # function)
-            run_archive_cmdlist(cmdlist, verbosity=verbosity, interactive=interactive)
+        with stats.phase("run"), progress.operation("extract", archive, output=outdir):
+            if index is not None:
+                if verbosity >= 0:
+                    log.log_info(f"... using index {tarindex.get_index_file(archive)}")
+                tarindex.extract_members(archive, index, members, outdir)
+            else:
+                cmdlist = get_archive_cmdlist(
+                    archive,
+                    compression,
+                    program,
+                    verbosity,
+                    interactive,
+                    outdir,
+                    password=password,
+                    threads=threads,
+                    members=members,
+                )
+                if cmdlist:
+                    # an empty command list means the get_archive_cmdlist()
+                    # function already handled the command (e.g. when it's a
+                    # builtin Python function)
+                    run_archive_cmdlist(
+                        cmdlist, verbosity=verbosity, interactive=interactive
+                    )
         if do_cleanup_outdir:
-            target, msg = cleanup_outdir(outdir, archive)
+            with stats.phase("cleanup"):
+                target, msg = cleanup_outdir(outdir, archive)
         else:
             target, msg = outdir, f"`{outdir}'"
         if verbosity >= 0:
@@ -915,6 +1231,42 @@ def _extract_archive(
                     log.log_error(msg)
 
 
+def _select_members(
+    archive: str,
+    patterns: Sequence[str],
+    format: str,
+    compression: str | None,
+    password: str | None,
+    verbosity: int,
+    index: "tarindex.TarIndex | None" = None,
+) -> list[str]:
+    """Get the names of archive members matching the given patterns.
+    If an index of the archive is given, the members are searched there.
+    """
+    if not patterns:
+        raise util.PatoolError("no archive members to extract given")
+    if index is not None:
+        from . import tarindex  # noqa: PLC0415
+
+        names = tarindex.select_index_members(index, patterns)
+    else:
+        entries = _iter_archive(
+            archive,
+            verbosity=verbosity - 1,
+            format=format,
+            compression=compression,
+            password=password,
+        )
+        names = select_members(entries, patterns)
+    if not names:
+        msg = f"no members of {archive} match " + ", ".join(map(repr, patterns))
+        raise util.PatoolError(msg)
+    if verbosity >= 1:
+        log.log_info(f"selected {len(names)} members of {archive}")
+    return names
+
+
+@stats.timed("create")
 def _create_archive(
     archive: str,
     filenames: Sequence[str],
@@ -924,34 +1276,83 @@ def _create_archive(
     format: str | None = None,
     compression: str | None = None,
     password: str | None = None,
+    threads: int | None = None,
+    method: str | None = None,
+    level: int | None = None,
+    cwd: str | None = None,
 ) -> None:
-    """Create an archive."""
+    """Create an archive.
+    If a compression method or level is given, only programs supporting
+    them are used.
+    If cwd is given, the filenames are relative to this directory, which
+    is the working directory of the archive program. The current working
+    directory of the process is never changed.
+    """
+    if cwd is not None:
+        archive = os.path.abspath(archive)
     if format is None:
-        format, compression = get_archive_format(archive, verbosity=verbosity)
+        with stats.phase("format"):
+            format, compression = get_archive_format(archive, verbosity=verbosity)
     check_archive_format(format, compression)
-    program = find_archive_program(
-        format,
-        'create',
-        program=program,
-        password=password,
-        compression=compression,
-        verbosity=verbosity,
-    )
-    get_archive_cmdlist = get_archive_cmdlist_func(program, 'create', format)
-    cmdlist = get_archive_cmdlist(
-        archive,
-        compression,
-        program,
-        verbosity,
-        interactive,
-        filenames,
-        password=password,
-    )
-    if cmdlist:
-        # an empty command list means the get_archive_cmdlist() function
-        # already handled the command (e.g. when it's a builtin Python
-        # function)
-        run_archive_cmdlist(cmdlist, verbosity=verbosity, interactive=interactive)
+    check_compression_options(method, level)
+    options = (('method', method), ('level', level))
+    keywords = [key for key, value in options if value is not None]
+    with stats.phase("program"):
+        program = find_archive_program(
+            format,
+            'create',
+            program=program,
+            password=password,
+            compression=compression,
+            verbosity=verbosity,
+            threads=threads,
+            keywords=keywords,
+        )
+        get_archive_cmdlist = get_archive_cmdlist_func(program, 'create', format)
+    with (
+        stats.phase("run"),
+        progress.operation(
+            "create", archive, inputs=filenames, cwd=cwd, output=archive
+        ),
+    ):
+        cmdlist = get_archive_cmdlist(
+            archive,
+            compression,
+            program,
+            verbosity,
+            interactive,
+            filenames,
+            password=password,
+            threads=threads,
+            method=method,
+            level=level,
+            cwd=cwd,
+        )
+        if cmdlist:
+            # an empty command list means the get_archive_cmdlist() function
+            # already handled the command (e.g. when it's a builtin Python
+            # function)
+            run_archive_cmdlist(
+                cmdlist, verbosity=verbosity, interactive=interactive, cwd=cwd
+            )
+
+
+def check_compression_options(method: str | None, level: int | None) -> None:
+    """Check the compression method and level for creating archives."""
+    if method is not None and method not in CompressionMethods:
+        msg = f"unknown compression method `{method}'; choose one of " + ", ".join(
+            CompressionMethods
+        )
+        raise util.PatoolError(msg)
+    if level is not None and not 0 <= level <= 9:
+        raise util.PatoolError(f"compression level must be 0 to 9, got {level}")
+    levels = CompressionMethodLevels.get(method or '')
+    if level is not None and levels is not None and level not in levels:
+        msg = (
+            f"compression level for {method} must be {levels[0]} to {levels[-1]},"
+            f" got {level}"
+        )
+        raise util.PatoolError(msg)
 
 
 def _handle_archive(
@@ -963,31 +1364,177 @@ def _handle_archive(
     format: str | None = None,
     compression: str | None = None,
     password: str | None = None,
+    threads: int | None = None,
 ) -> None:
     """Test and list archives."""
+    if command not in ('list', 'test'):
+        raise util.PatoolError(f"invalid archive command `{command}'")
+    with stats.phase(command):
+        if format is None:
+            with stats.phase("format"):
+                format, compression = get_archive_format(archive, verbosity=verbosity)
+        check_archive_format(format, compression)
+        with stats.phase("program"):
+            program = find_archive_program(
+                format,
+                command,
+                program=program,
+                password=password,
+                compression=compression,
+                verbosity=verbosity,
+                threads=threads,
+            )
+            get_archive_cmdlist = get_archive_cmdlist_func(program, command, format)
+        with stats.phase("run"), progress.operation(command, archive):
+            # prepare keyword arguments for command list
+            cmdlist = get_archive_cmdlist(
+                archive,
+                compression,
+                program,
+                verbosity,
+                interactive,
+                password=password,
+                threads=threads,
+            )
+            if cmdlist:
+                # an empty command list means the get_archive_cmdlist() function
+                # already handled the command (e.g. when it's a builtin Python
+                # function)
+                run_archive_cmdlist(
+                    cmdlist, verbosity=verbosity, interactive=interactive
+                )
+
+
+def _index_archive(
+    archive: str, verbosity: int = 0, format: str | None = None
+) -> None:
+    """Write the index of a TAR archive."""
+    from . import tarindex  # noqa: PLC0415
+
+    compression = None
     if format is None:
         format, compression = get_archive_format(archive, verbosity=verbosity)
     check_archive_format(format, compression)
-    if command not in ('list', 'test'):
-        raise util.PatoolError(f"invalid archive command `{command}'")
-    program = find_archive_program(
-        format,
-        command,
+    if not tarindex.can_index(format, compression):
+        msg = f"cannot index {archive}: only TAR archives that are uncompressed or compressed with gzip, xz or zstd are supported"
+        raise util.PatoolError(msg)
+    tarindex.index_archive(archive, compression, verbosity=verbosity)
+
+
+def _iter_archive(
+    archive: str,
+    verbosity: int = 0,
+    program: str | None = None,
+    format: str | None = None,
+    compression: str | None = None,
+    password: str | None = None,
+    cached: bool = False,
+) -> Iterator[ArchiveEntry]:
+    """Find the program to iterate over archive members and return its
+    entry iterator. If cached is True, the entries are read from and
+    stored in the listing cache.
+    """
+    if format is None:
+        format, compression = get_archive_format(archive, verbosity=verbosity)
+    check_archive_format(format, compression)
+    # listings of encrypted archives are not stored
+    cached = cached and password is None
+    if cached:
+        from . import listcache  # noqa: PLC0415
+
+        entries = listcache.read_listing(archive, format, compression)
+        if entries is not None:
+            if verbosity >= 0:
+                log.log_info(f"... using cached listing of {archive}")
+            return iter(entries)
+    program = find_stream_program(
+        'iter', format, program=program, compression=compression
+    )
+    iter_archive_func = get_archive_cmdlist_func(program, 'iter', format)
+    # archive members are generated without user interaction
+    entries = iter_archive_func(
+        archive, compression, program, verbosity, False, password=password
+    )
+    if cached:
+        return listcache.iter_listing(archive, format, compression, entries)
+    return entries
+
+
+def _list_cached(
+    archive: str,
+    verbosity: int = 0,
+    program: str | None = None,
+    password: str | None = None,
+    format: str | None = None,
+) -> None:
+    """Print the archive entries from the listing cache, or store them
+    in the cache.
+    """
+    for entry in _iter_archive(
+        archive,
+        verbosity=verbosity - 1,
         program=program,
         password=password,
-        compression=compression,
-        verbosity=verbosity,
+        format=format,
+        cached=True,
+    ):
+        if verbosity >= 0:
+            print(format_entry(entry))
+
+
+def _open_member(
+    archive: str,
+    name: str | None = None,
+    verbosity: int = 0,
+    program: str | None = None,
+    format: str | None = None,
+    compression: str | None = None,
+    password: str | None = None,
+) -> BinaryIO:
+    """Open an archive member for reading."""
+    if format is None:
+        format, compression = get_archive_format(archive, verbosity=verbosity)
+    check_archive_format(format, compression)
+    if name is None:
+        names = [
+            entry.name
+            for entry in _iter_archive(
+                archive,
+                verbosity=verbosity,
+                format=format,
+                compression=compression,
+                password=password,
+            )
+            if entry.type == EntryFile
+        ]
+        if len(names) != 1:
+            msg = f"archive {archive} has {len(names)} files, a member name is required"
+            raise util.PatoolError(msg)
+        name = names[0]
+    if program is None and format == 'tar':
+        from . import tarindex  # noqa: PLC0415
+
+        index = tarindex.get_index(archive, format, compression, password)
+        if (
+            index is not None
+            and tarindex.has_member(index, name)
+            and not tarindex.has_hardlinks(index, [name])
+        ):
+            return tarindex.open_member(archive, index, name)
+    program = find_stream_program(
+        'open', format, program=program, compression=compression
     )
-    get_archive_cmdlist = get_archive_cmdlist_func(program, command, format)
-    # prepare keyword arguments for command list
-    cmdlist = get_archive_cmdlist(
-        archive, compression, program, verbosity, interactive, password=password
+    open_member_func = get_archive_cmdlist_func(program, 'open', format)
+    # archive members are read without user interaction
+    result = open_member_func(
+        archive, compression, program, verbosity, False, name, password=password
     )
-    if cmdlist:
-        # an empty command list means the get_archive_cmdlist() function
-        # already handled the command (e.g. when it's a builtin Python
-        # function)
-        run_archive_cmdlist(cmdlist, verbosity=verbosity, interactive=interactive)
+    if isinstance(result, io.IOBase):
+        # the Python module opened the member
+        return result
+    from . import stream  # noqa: PLC0415
+
+    return stream.PipeFile(result, verbosity=verbosity)
 
 
 def get_patool_program_module(program):
@@ -999,6 +1546,17 @@ def get_patool_program_module(program):
     return importlib.import_module(modulename, __name__)
 
 
+# Keyword arguments of archive functions that are ignored by programs
+# that do not support them. Commands of programs without a cwd parameter
+# are run in the cwd directory, so all builtin Python functions creating
+# archives must support it.
+OptionalCmdlistKeywords: tuple[str, ...] = ('threads', 'cwd')
+
+# Keyword arguments of archive functions for the compression of created
+# archive members. They are an error for programs that do not support them.
+CompressionCmdlistKeywords: tuple[str, ...] = ('method', 'level')
+
+
 def get_archive_cmdlist_func(program: str, command: str, format: str) -> Callable:
     """Get the Python function that executes the given program."""
     # get python module for given archive program
@@ -1018,12 +1576,30 @@ def get_archive_cmdlist_func(program: str, command: str, format: str) -> Callabl
         """If password is None, or not set, run command as usual.
         If password is set, but can't be accepted raise appropriate
         message.
+        Optional keyword arguments are only passed if they are set and
+        supported by the archive function.
+        Selected members are an error for functions that cannot extract them.
         """
+        parameters = get_parameters(archive_cmdlist_func)
+        for key in OptionalCmdlistKeywords:
+            if key in kwargs and (kwargs[key] is None or key not in parameters):
+                kwargs.pop(key)
+        for key in CompressionCmdlistKeywords:
+            if kwargs.get(key) is None:
+                kwargs.pop(key, None)
+            elif key not in parameters:
+                msg = f'There is no support for the compression {key} in {program}'
+                raise util.PatoolError(msg)
+        if kwargs.get('members') is None:
+            kwargs.pop('members', None)
+        elif 'members' not in parameters:
+            msg = f'There is no support for extracting selected members in {program}'
+            raise util.PatoolError(msg)
         if 'password' in kwargs and kwargs['password'] is None:
             kwargs.pop('password')
         if 'password' not in kwargs:
             return archive_cmdlist_func(*args, **kwargs)
-        if 'password' in inspect.signature(archive_cmdlist_func).parameters:
+        if 'password' in parameters:
             return archive_cmdlist_func(*args, **kwargs)
         msg = f'There is no support for password in {program}'
         raise util.PatoolError(msg)
@@ -1031,65 +1607,83 @@ def get_archive_cmdlist_func(program: str, command: str, format: str) -> Callabl
     return check_for_password_before_cmdlist_func_call
 
 
+@stats.timed("diff")
 def _diff_archives(
-    archive1: str, archive2: str, verbosity: int = 0, interactive: bool = True
+    archive1: str,
+    archive2: str,
+    verbosity: int = 0,
+    interactive: bool = True,
+    summary: bool = False,
 ) -> int:
     """Show differences between two archives.
     @return 0 if archives are the same, else 1
     @raises: PatoolError on errors
     """
+    from . import compare  # noqa: PLC0415
+
     if fileutil.is_same_file(archive1, archive2):
         return 0
-    diff = util.find_program("diff")
-    if not diff:
-        msg = "The diff(1) program is required for showing archive differences, please install it."
-        raise util.PatoolError(msg)
-    tmpdir1 = fileutil.tmpdir()
-    try:
-        path1 = _extract_archive(archive1, outdir=tmpdir1, verbosity=-1)
-        entries1 = os.listdir(tmpdir1)
-        tmpdir2 = fileutil.tmpdir()
-        try:
-            path2 = _extract_archive(archive2, outdir=tmpdir2, verbosity=-1)
-            entries2 = os.listdir(tmpdir2)
-            if len(entries1) == 1 and len(entries2) == 1:
-                # when both archives only have one single entry, compare those
-                diffpath1 = os.path.join(path1, entries1[0])
-                diffpath2 = os.path.join(path2, entries2[0])
-            else:
-                diffpath1 = path1
-                diffpath2 = path2
-            return util.run_checked(
-                [diff, "-urN", diffpath1, diffpath2], verbosity=1, ret_ok=(0, 1)
-            )
-        finally:
-            fileutil.rmtree(tmpdir2)
-    finally:
-        fileutil.rmtree(tmpdir1)
+    with stats.phase("compare"):
+        return compare.diff_archives(
+            archive1,
+            archive2,
+            summary=summary,
+            verbosity=verbosity,
+            interactive=interactive,
+        )
 
 
+@stats.timed("search")
 def _search_archive(
     pattern: str,
     archive: str,
     verbosity: int = 0,
     interactive: bool = True,
     password: str | None = None,
+    stream: bool = False,
+    max_count: int | None = None,
+    jobs: int | None = None,
 ) -> int:
     """Search for given pattern in an archive."""
+    from . import search  # noqa: PLC0415
+
+    if stream:
+        with stats.phase("format"):
+            format, compression = get_archive_format(archive, verbosity=verbosity)
+        if search.can_search(format, compression):
+            with stats.phase("stream"):
+                return search.search_archive(
+                    pattern,
+                    archive,
+                    format,
+                    compression,
+                    password=password,
+                    max_count=max_count,
+                    jobs=jobs,
+                    verbosity=verbosity - 1,
+                )
+        if verbosity >= 0:
+            log.log_info(
+                f"format {format} cannot be searched without extraction, extracting {archive}"
+            )
     grep = util.find_program("grep")
     if not grep:
         msg = "The grep(1) program is required for searching archive contents, please install it."
         raise util.PatoolError(msg)
+    cmdlist = [grep, "-r"]
+    if max_count is not None:
+        cmdlist.append(f"--max-count={max_count}")
+    cmdlist.extend(["-e", pattern, "."])
     tmpdir = fileutil.tmpdir()
     try:
         path = _extract_archive(archive, outdir=tmpdir, verbosity=-1, password=password)
-        return util.run_checked(
-            [grep, "-r", "-e", pattern, "."], ret_ok=(0, 1), verbosity=1, cwd=path
-        )
+        with stats.phase("grep"):
+            return util.run_checked(cmdlist, ret_ok=(0, 1), verbosity=1, cwd=path)
     finally:
         fileutil.rmtree(tmpdir)
 
 
+@stats.timed("repack")
 def _repack_archive(
     archive1: str,
     archive2: str,
@@ -1098,17 +1692,52 @@ def _repack_archive(
     password: str | None = None,
 ) -> None:
     """Repackage an archive to a different format."""
-    format1, compression1 = get_archive_format(archive1, verbosity=verbosity)
-    format2, compression2 = get_archive_format(archive2, verbosity=verbosity)
+    from . import repack  # noqa: PLC0415
+
+    with stats.phase("format"):
+        format1, compression1 = get_archive_format(archive1, verbosity=verbosity)
+        format2, compression2 = get_archive_format(archive2, verbosity=verbosity)
     if format1 == format2 and compression1 == compression2:
         # same format and compression allows to copy the file
         if verbosity >= 0:
             log.log_info(
                 f"copy `{archive1}' -> `{archive2}' in same format {format1} and compression {compression1}"
             )
-        fileutil.link_or_copy(archive1, archive2, verbosity=verbosity)
+        with stats.phase("copy"):
+            fileutil.link_or_copy(archive1, archive2, verbosity=verbosity)
         return
-    tmpdir = fileutil.tmpdir()
+    if password is None and repack.can_repack(
+        format1, compression1, format2, compression2
+    ):
+        with (
+            stats.phase("stream"),
+            progress.operation("repack", archive1, output=archive2),
+        ):
+            repacked = repack.repack_archive(
+                archive1,
+                archive2,
+                format1,
+                compression1,
+                format2,
+                compression2,
+                verbosity=verbosity,
+            )
+        if repacked:
+            # the archive was repacked without a temporary directory
+            return
+    from . import space  # noqa: PLC0415
+
+    with stats.phase("space"):
+        # extract next to the new archive if the temporary directory is full
+        scratch = space.get_scratch_dir(
+            archive1,
+            format1,
+            compression1,
+            (None, os.path.dirname(os.path.abspath(archive2))),
+            DefaultSpaceMargin,
+            password=password,
+        )
+    tmpdir = fileutil.tmpdir(dir=scratch)
     try:
         same_format = format1 == format2 and compression1 and compression2
         if same_format:
@@ -1122,31 +1751,38 @@ def _repack_archive(
             outdir=tmpdir,
             password=password,
             format=format,
+            space_margin=DefaultSpaceMargin,
         )
-        archive = os.path.abspath(archive2)
         files = tuple(os.listdir(path))
-        olddir = os.getcwd()
-        os.chdir(path)
-        try:
-            if same_format:
-                # only compress since the format is the same
-                format = compression2
-            else:
-                format = None
-            _create_archive(
-                archive,
-                files,
-                verbosity=verbosity,
-                interactive=interactive,
-                password=password,
-                format=format,
-            )
-        finally:
-            os.chdir(olddir)
+        if same_format:
+            # only compress since the format is the same
+            format = compression2
+        else:
+            format = None
+        _create_archive(
+            archive2,
+            files,
+            verbosity=verbosity,
+            interactive=interactive,
+            password=password,
+            format=format,
+            cwd=path,
+        )
     finally:
         fileutil.rmtree(tmpdir)
 
 
+def get_threads(threads: int | None) -> int | None:
+    """Return the number of threads for compression programs.
+    A value of 0 means to use the number of CPUs.
+    """
+    if threads is None:
+        return None
+    if threads < 0:
+        raise util.PatoolError(f"invalid number of threads {threads}")
+    return threads or os.cpu_count() or 1
+
+
 # the patool library API
 
 
@@ -1158,6 +1794,10 @@ def extract_archive(
     interactive: bool = True,
     password: str | None = None,
     format: str | None = None,
+    threads: int | None = None,
+    members: Sequence[str] | None = None,
+    incremental: bool = False,
+    space_margin: float | None = DefaultSpaceMargin,
 ) -> str:
     """Extract an archive file.
 
@@ -1190,14 +1830,54 @@ def extract_archive(
     :type password: str or None
     :param format: If given, use this archive format instead of auto-detection.
     :type format: str or None
-    :raise patoolib.PatoolError: If an archive does not exist or is not a regular file, or on errors while
-         extracting.
+    :param threads: If given, prefer compression programs that can use multiple threads (e.g. pigz
+         instead of gzip) and use this number of threads. A value of 0 uses the number of CPUs.
+         Programs that do not support multiple threads ignore this option.
+    :type threads: int or None
+    :param members: If given, only extract archive members matching one of these names or glob
+         patterns (e.g. "docs/*.txt"). Members inside of a matching directory are extracted, too.
+         The archive members are listed first, and only the matching names are passed to the
+         archive program.
+    :type members: sequence of str or None
+    :param incremental: If True, extract directly to the output directory and skip members that
+         are already extracted, which are files with the member size and CRC32 checksum, or the
+         member size and modification time if the archive listing has no checksums. A journal file
+         ".patool-<archive name>.journal" in the output directory records the extracted files,
+         so an unchanged archive is not even listed again, and files of an interrupted
+         extraction are replaced. Other existing files are never overwritten.
+    :type incremental: bool
+    :param space_margin: Before extracting all members, the extracted size is read from the archive
+         metadata where this is cheap, e.g. from the ZIP central directory, the GZIP size trailer,
+         the XZ index, the ZSTD frame headers or the totals of "7z l". If the extracted size plus
+         this fraction of it (default: 0.1) is larger than the free disk space of the output
+         directory, an error is raised before anything is written. None disables the check.
+         Incremental extractions are not checked.
+    :type space_margin: float or None
+    :raise patoolib.PatoolError: If an archive does not exist or is not a regular file, on errors while
+         extracting, if no archive member matches the given members, if incremental is True
+         and no output directory is given, or if the disk space is too small.
     :return: The directory where the archive has been extracted.
     :rtype: str
     """
     fileutil.check_existing_filename(archive)
     if verbosity >= 0:
         log.log_info(f"Extracting {archive} ...")
+    if incremental:
+        if outdir is None:
+            raise util.PatoolError("incremental extraction needs an output directory")
+        from . import incremental as _incremental  # noqa: PLC0415
+
+        return _incremental.extract_archive(
+            archive,
+            outdir,
+            verbosity=verbosity,
+            interactive=interactive,
+            program=program,
+            format=format,
+            password=password,
+            threads=get_threads(threads),
+            members=members,
+        )
     return _extract_archive(
         archive,
         verbosity=verbosity,
@@ -1206,6 +1886,9 @@ def extract_archive(
         program=program,
         password=password,
         format=format,
+        threads=get_threads(threads),
+        members=members,
+        space_margin=space_margin,
     )
 
 
@@ -1216,6 +1899,7 @@ def list_archive(
     interactive: bool = True,
     password: str | None = None,
     format: str | None = None,
+    cached: bool = False,
 ) -> None:
     """List given archive.
 
@@ -1242,6 +1926,12 @@ def list_archive(
     :type password: str or None
     :param format: If given, use this archive format instead of auto-detection.
     :type format: str or None
+    :param cached: If True, use the persistent listing cache. A cached listing is used if the
+         archive has the same device, inode, size and modification time as when it was listed.
+         Otherwise the archive entries are read and stored in the cache. Listings of
+         encrypted archives with a password are never cached. Cached listings have the same
+         format for all archives, with mode, size, modification time and name of each member.
+    :type cached: bool
     :raise patoolib.PatoolError: If an archive does not exist or is not a regular file, or on errors while
          listing.
     :return: None
@@ -1251,6 +1941,14 @@ def list_archive(
     fileutil.check_existing_filename(archive)
     if verbosity >= 0:
         log.log_info(f"Listing {archive} ...")
+    if cached:
+        return _list_cached(
+            archive,
+            verbosity=verbosity,
+            program=program,
+            password=password,
+            format=format,
+        )
     return _handle_archive(
         archive,
         'list',
@@ -1262,6 +1960,110 @@ def list_archive(
     )
 
 
+def iter_archive(
+    archive: str,
+    verbosity: int = -1,
+    program: str | None = None,
+    password: str | None = None,
+    format: str | None = None,
+    cached: bool = False,
+) -> Iterator[ArchiveEntry]:
+    """Iterate over the members of given archive without extracting it.
+
+    The members are generated while the archive is read, either with a Python
+    module or by parsing the listing output of an archive program incrementally.
+
+    Example: sum(entry.size or 0 for entry in patoolib.iter_archive("dist.tar.gz"))
+
+    :param archive: The archive filename. Can be relative to the current working directory or absolute.
+    :type archive: str
+    :param verbosity: larger values print more information. -1 is the default and means no output.
+    :type verbosity: int
+    :param program: If None (the default), a list of suitable archive programs are checked if they
+         exist in the system search path (defined by the PATH environment variable).
+         If a program name is given, it is added to the list of programs that is searched for.
+         The program should be a relative or absolute path name to an executable.
+    :type program: str or None
+    :param password: If an archive is encrypted, set the given password with command line options.
+         Archive programs are run without user input, so without a password encrypted member
+         lists cannot be read.
+    :type password: str or None
+    :param format: If given, use this archive format instead of auto-detection.
+    :type format: str or None
+    :param cached: If True, use the persistent listing cache. A cached listing is used if the
+         archive has the same device, inode, size and modification time as when it was listed.
+         Otherwise the archive is listed and the entries are stored in the cache. Listings of
+         encrypted archives with a password are never cached.
+    :type cached: bool
+    :raise patoolib.PatoolError: If an archive does not exist or is not a regular file, if no
+         program can iterate over the archive format, or on errors while reading the archive.
+         Read errors are raised while iterating.
+    :return: An iterator of archive entries. Values that the archive format or program does
+         not provide are None.
+    :rtype: iterator of patoolib.entries.ArchiveEntry
+    """
+    fileutil.check_existing_filename(archive)
+    return _iter_archive(
+        archive,
+        verbosity=verbosity,
+        program=program,
+        password=password,
+        format=format,
+        cached=cached,
+    )
+
+
+def open_member(
+    archive: str,
+    name: str | None = None,
+    verbosity: int = -1,
+    program: str | None = None,
+    password: str | None = None,
+    format: str | None = None,
+) -> BinaryIO:
+    """Open an archive member for reading without extracting it to disk.
+
+    The member is decompressed while reading, with a Python module or by reading the
+    output of an archive program (e.g. "7z e -so", "tar --to-stdout" or "unzip -p")
+    from a pipe.
+
+    Example: with patoolib.open_member("dist.tar.gz", "dist/MANIFEST") as f: data = f.read()
+
+    :param archive: The archive filename. Can be relative to the current working directory or absolute.
+    :type archive: str
+    :param name: The member name. If None (the default), the archive must contain exactly one file.
+         For single file archives (e.g. GZIP or XZ) the name is not needed.
+    :type name: str or None
+    :param verbosity: larger values print more information. -1 is the default and means no output.
+    :type verbosity: int
+    :param program: If None (the default), a list of suitable archive programs are checked if they
+         exist in the system search path (defined by the PATH environment variable).
+         If a program name is given, it is added to the list of programs that is searched for.
+         The program should be a relative or absolute path name to an executable.
+    :type program: str or None
+    :param password: If an archive is encrypted, set the given password with command line options.
+         Archive programs are run without user input.
+    :type password: str or None
+    :param format: If given, use this archive format instead of auto-detection.
+    :type format: str or None
+    :raise patoolib.PatoolError: If an archive does not exist or is not a regular file, if no
+         program can open the archive format, or if the member cannot be opened. Errors of
+         archive programs are raised when the end of the member data is read.
+    :return: A readable binary file object. Close it to release the archive, or to stop the
+         archive program.
+    :rtype: io.BufferedIOBase
+    """
+    fileutil.check_existing_filename(archive)
+    return _open_member(
+        archive,
+        name=name,
+        verbosity=verbosity,
+        program=program,
+        password=password,
+        format=format,
+    )
+
+
 def test_archive(
     archive: str,
     verbosity: int = 0,
@@ -1269,6 +2071,7 @@ def test_archive(
     interactive: bool = True,
     password: str | None = None,
     format: str | None = None,
+    threads: int | None = None,
 ) -> None:
     """Test given archive.
 
@@ -1295,6 +2098,10 @@ def test_archive(
     :type password: str or None
     :param format: If given, use this archive format instead of auto-detection.
     :type format: str or None
+    :param threads: If given, prefer programs that can use multiple threads and use this number
+         of threads. A value of 0 uses the number of CPUs. The Python modules test GZIP, BZIP2,
+         XZ and ZSTD archives with multiple members, streams, blocks or frames in parallel.
+    :type threads: int or None
     :raise patoolib.PatoolError: If an archive does not exist or is not a regular file, or on errors while
          testing.
     :return: None
@@ -1311,6 +2118,7 @@ def test_archive(
         program=program,
         password=password,
         format=format,
+        threads=get_threads(threads),
     )
     if verbosity >= 0:
         log.log_info("... tested ok.")
@@ -1325,6 +2133,9 @@ def create_archive(
     interactive: bool = True,
     password: str | None = None,
     format: str | None = None,
+    threads: int | None = None,
+    method: str | None = None,
+    level: int | None = None,
 ) -> None:
     """Create given archive with given files.
 
@@ -1354,6 +2165,21 @@ def create_archive(
     :type password: str or None
     :param format: If given, use this archive format instead of auto-detection.
     :type format: str or None
+    :param threads: If given, prefer compression programs that can use multiple threads (e.g. pigz
+         instead of gzip) and use this number of threads. A value of 0 uses the number of CPUs.
+         Programs that do not support multiple threads ignore this option.
+         ZIP archives are compressed by that many threads with the Python zipfile module.
+    :type threads: int or None
+    :param method: If given, compress the archive members with this method, one of
+         'store', 'deflate', 'bzip2', 'lzma' or 'zstd'. Only programs supporting the method
+         for the archive format are used, e.g. for ZIP archives zip(1), 7z(1) or the Python
+         zipfile module.
+    :type method: str or None
+    :param level: If given, compress the archive members with this level from 0 (fastest)
+         to 9 (best compression). Only programs supporting compression levels are used.
+         The bzip2 method supports levels 1 to 9. The Python zipfile module does not
+         support levels for the lzma method.
+    :type level: int or None
     :raise patoolib.PatoolError: on errors while creating the archive
     :return: None
     :rtype: None
@@ -1370,6 +2196,9 @@ def create_archive(
         program=program,
         password=password,
         format=format,
+        threads=get_threads(threads),
+        method=method,
+        level=level,
     )
     if verbosity >= 0:
         log.log_info(f"... {archive} created.")
@@ -1377,12 +2206,21 @@ def create_archive(
 
 
 def diff_archives(
-    archive1: str, archive2: str, verbosity: int = 0, interactive: bool = True
+    archive1: str,
+    archive2: str,
+    verbosity: int = 0,
+    interactive: bool = True,
+    summary: bool = False,
 ) -> int:
     """Compare two archives and print their differences.
 
-    Both archives will be extracted in temporary directories. Both directory contents will be compared
-    recursively with the diff(1) tool.
+    The member listings of both archives are compared first. Members with the same size and
+    CRC32 checksum, or the same size and modification time if the archive format stores no
+    checksums, are equal. When all files of both archives have the same modification time,
+    like in reproducible builds, the modification times are not compared. The other
+    members will be extracted in temporary directories and compared recursively with the
+    diff(1) tool.
+    Archives whose members cannot be listed will be extracted completely.
 
     Example: patoolib.diff_archives("release1.0.tar.gz", "release2.0.zip")
 
@@ -1398,16 +2236,23 @@ def diff_archives(
          If set to False, standard input will be set to an empty string to prevent simple hangs from
          programs requiring input.
     :type interactive: bool
+    :param summary: If True, only print one line for each added (A), removed (D) or changed (M)
+         member without reading any member content.
+    :type summary: bool
     :raise patoolib.PatoolError: on errors while comparing the archives.
-    :return: None
-    :rtype: None
+    :return: 0 if the archives are the same, else 1
+    :rtype: int
     """
     fileutil.check_existing_filename(archive1)
     fileutil.check_existing_filename(archive2)
     if verbosity >= 0:
         log.log_info(f"Comparing {archive1} with {archive2} ...")
     res = _diff_archives(
-        archive1, archive2, verbosity=verbosity, interactive=interactive
+        archive1,
+        archive2,
+        verbosity=verbosity,
+        interactive=interactive,
+        summary=summary,
     )
     if res == 0 and verbosity >= 0:
         log.log_info("... no differences found.")
@@ -1420,6 +2265,9 @@ def search_archive(
     verbosity: int = 0,
     interactive: bool = True,
     password: str | None = None,
+    stream: bool = False,
+    max_count: int | None = None,
+    jobs: int | None = None,
 ) -> int:
     """Search pattern in archive members.
 
@@ -1444,12 +2292,25 @@ def search_archive(
          Note that the password might be written to logs that keep track of your command line
          history. If an archive program does not support passwords this option is ignored by patool.
     :type password: str or None
+    :param stream: If True, search the archive members while decompressing them in chunks, without
+         extracting the archive and without the grep(1) program. The output and the return value
+         are the same as with grep(1), but binary members are skipped.
+         Archive formats that cannot be searched this way (other than ZIP, TAR and single file
+         compressions) are extracted and searched with grep(1).
+    :type stream: bool
+    :param max_count: If given, stop searching a member after this number of matching lines.
+    :type max_count: int or None
+    :param jobs: The number of ZIP members to search in parallel when stream is True.
+         A value of None (the default) uses the number of CPUs.
+    :type jobs: int or None
     :raise patoolib.PatoolError: on errors while extracting or searching the archive
-    :return: exit code of the grep program
+    :return: exit code of the grep program: 0 if the pattern has been found, else 1
     :rtype: int
     """
     if not pattern:
         raise util.PatoolError("empty search pattern")
+    if max_count is not None and max_count < 1:
+        raise util.PatoolError(f"invalid max count {max_count}, must be at least 1")
     fileutil.check_existing_filename(archive)
     if verbosity >= 0:
         log.log_info(f"Searching {pattern!r} in {archive} ...")
@@ -1459,6 +2320,9 @@ def search_archive(
         verbosity=verbosity,
         interactive=interactive,
         password=password,
+        stream=stream,
+        max_count=max_count,
+        jobs=jobs,
     )
     if res == 1 and verbosity >= 0:
         log.log_info(f"... {pattern!r} not found")
@@ -1475,6 +2339,10 @@ def repack_archive(
     """Repack archive to different file and/or format.
 
     The archive will be extracted and recompressed to archive_new.
+    Without a password, ZIP and TAR archives and single file compressions
+    are repacked without a temporary directory: the members are copied
+    directly from the old to the new archive, and when only the compression
+    changes the decompressor output is piped into the compressor.
 
     Example: patoolib.repack_archive("linux-2.6.33.tar.gz", "linux-2.6.33.tar.bz2")
 
@@ -1512,3 +2380,252 @@ def repack_archive(
     if verbosity >= 0:
         log.log_info("... repacking successful.")
     return res
+
+
+def index_archive(
+    archive: str,
+    verbosity: int = 0,
+    format: str | None = None,
+) -> None:
+    """Write an index of a TAR archive for reading single members.
+
+    The index is written next to the archive with the file extension
+    ".patoolidx". It has the offsets of all members and checkpoints where
+    decompression can start, so that extracting members with the members
+    parameter of extract_archive() and open_member() do not decompress
+    the whole archive. Uncompressed TAR archives and TAR archives compressed
+    with gzip, xz or zstd are supported. GZIP archives only have
+    checkpoints at member starts and flush points, e.g. when written with
+    pigz --independent or bgzip. XZ archives have checkpoints at blocks,
+    e.g. when written with xz --threads. ZSTD archives have checkpoints at
+    frames, e.g. when written with pzstd.
+    An index is also written when listing compressed TAR archives
+    of at least 16MB, unless the PATOOL_NO_CACHE environment variable is set.
+    The index is ignored when the archive changes.
+
+    Example: patoolib.index_archive("linux-2.6.33.tar.xz")
+
+    :param archive: The archive filename. Can be relative to the current working directory or absolute.
+    :type archive: str
+    :param verbosity: larger values print more information. 0 is the default, -1 or lower means no output,
+         values >= 1 prints command output
+    :type verbosity: int
+    :param format: If given, use this archive format instead of auto-detection.
+    :type format: str or None
+    :raise patoolib.PatoolError: If an archive does not exist or is not a regular file, if the
+         archive is not a supported TAR archive, or on errors while reading it.
+    :return: None
+    :rtype: None
+    """
+    fileutil.check_existing_filename(archive)
+    if verbosity >= 0:
+        log.log_info(f"Indexing {archive} ...")
+    _index_archive(archive, verbosity=verbosity, format=format)
+
+
+def extract_archives(
+    archives: Iterable[str],
+    jobs: int | None = None,
+    verbosity: int = 0,
+    outdir: str | None = None,
+    program: str | None = None,
+    interactive: bool = True,
+    password: str | None = None,
+    format: str | None = None,
+    threads: int | None = None,
+    members: Sequence[str] | None = None,
+    incremental: bool = False,
+    space_margin: float | None = DefaultSpaceMargin,
+) -> list[parallel.ArchiveResult]:
+    """Extract multiple archive files in parallel.
+
+    The output of each archive is printed after the archive has been extracted, so the
+    output of different archives does not interleave.
+
+    Example: patoolib.extract_archives(["a.zip", "b.tar.gz"], jobs=4, outdir="/tmp")
+
+    :param archives: The archive filenames.
+    :type archives: iterable of str
+    :param jobs: The number of archives to extract in parallel. A value of None (the default)
+         uses the number of CPUs. With more than one job, the interactive parameter is ignored
+         and no user input is queried.
+    :type jobs: int or None
+    :param verbosity: see extract_archive()
+    :param outdir: see extract_archive()
+    :param program: see extract_archive()
+    :param interactive: see extract_archive()
+    :param password: see extract_archive()
+    :param format: see extract_archive()
+    :param threads: see extract_archive()
+    :param members: see extract_archive()
+    :param incremental: see extract_archive()
+    :param space_margin: see extract_archive()
+    :raise patoolib.PatoolError: If jobs is less than one. Errors while extracting are
+         stored in the results.
+    :return: The results in the order the archives have been extracted. The result
+         value of each successfully extracted archive is its output directory.
+    :rtype: list of patoolib.parallel.ArchiveResult
+    """
+    return list(
+        parallel.run_archives(
+            extract_archive,
+            archives,
+            jobs=jobs,
+            verbosity=verbosity,
+            outdir=outdir,
+            program=program,
+            interactive=interactive,
+            password=password,
+            format=format,
+            threads=threads,
+            members=members,
+            incremental=incremental,
+            space_margin=space_margin,
+        )
+    )
+
+
+def list_archives(
+    archives: Iterable[str],
+    jobs: int | None = None,
+    verbosity: int = 1,
+    program: str | None = None,
+    interactive: bool = True,
+    password: str | None = None,
+    format: str | None = None,
+    cached: bool = False,
+) -> list[parallel.ArchiveResult]:
+    """List multiple archive files in parallel.
+
+    The output of each archive is printed after the archive has been listed, so the
+    output of different archives does not interleave.
+
+    Example: patoolib.list_archives(["a.zip", "b.tar.gz"], jobs=4)
+
+    :param archives: The archive filenames.
+    :type archives: iterable of str
+    :param jobs: The number of archives to list in parallel. A value of None (the default)
+         uses the number of CPUs. With more than one job, the interactive parameter is ignored
+         and no user input is queried.
+    :type jobs: int or None
+    :param verbosity: see list_archive()
+    :param program: see list_archive()
+    :param interactive: see list_archive()
+    :param password: see list_archive()
+    :param format: see list_archive()
+    :param cached: see list_archive()
+    :raise patoolib.PatoolError: If jobs is less than one. Errors while listing are
+         stored in the results.
+    :return: The results in the order the archives have been listed.
+    :rtype: list of patoolib.parallel.ArchiveResult
+    """
+    return list(
+        parallel.run_archives(
+            list_archive,
+            archives,
+            jobs=jobs,
+            verbosity=verbosity,
+            program=program,
+            interactive=interactive,
+            password=password,
+            format=format,
+            cached=cached,
+        )
+    )
+
+
+def test_archives(
+    archives: Iterable[str],
+    jobs: int | None = None,
+    verbosity: int = 0,
+    program: str | None = None,
+    interactive: bool = True,
+    password: str | None = None,
+    format: str | None = None,
+    threads: int | None = None,
+) -> list[parallel.ArchiveResult]:
+    """Test multiple archive files in parallel.
+
+    The output of each archive is printed after the archive has been tested, so the
+    output of different archives does not interleave.
+
+    Example: patoolib.test_archives(["a.zip", "b.tar.gz"], jobs=4)
+
+    :param archives: The archive filenames.
+    :type archives: iterable of str
+    :param jobs: The number of archives to test in parallel. A value of None (the default)
+         uses the number of CPUs. With more than one job, the interactive parameter is ignored
+         and no user input is queried.
+    :type jobs: int or None
+    :param verbosity: see test_archive()
+    :param program: see test_archive()
+    :param interactive: see test_archive()
+    :param password: see test_archive()
+    :param format: see test_archive()
+    :param threads: see test_archive()
+    :raise patoolib.PatoolError: If jobs is less than one. Errors while testing are
+         stored in the results.
+    :return: The results in the order the archives have been tested.
+    :rtype: list of patoolib.parallel.ArchiveResult
+    """
+    return list(
+        parallel.run_archives(
+            test_archive,
+            archives,
+            jobs=jobs,
+            verbosity=verbosity,
+            program=program,
+            interactive=interactive,
+            password=password,
+            format=format,
+            threads=threads,
+        )
+    )
+
+
+def collect_stats() -> contextlib.AbstractContextManager[stats.Stats]:
+    """Collect timing and resource usage statistics of the archive functions
+    called in the returned context manager.
+
+    The wall time of each phase of the archive functions is recorded, for example
+    guessing the archive format, finding the archive program, running it and cleaning
+    up the output directory. For archive programs the user and system CPU time and the
+    maximum resident set size are recorded on systems supporting os.wait4().
+    The statistics of archives handled in parallel worker processes are included.
+
+    Example:
+      with patoolib.collect_stats() as stats:
+          patoolib.extract_archive("foo.tar.gz")
+      print(stats.format_text())
+
+    :return: A context manager returning the statistics. They are complete when the
+         context manager exits.
+    :rtype: context manager of patoolib.stats.Stats
+    """
+    return stats.collect()
+
+
+def report_progress(
+    callback: Callable[[progress.ProgressEvent], object],
+) -> contextlib.AbstractContextManager[None]:
+    """Report the progress of the archive functions called in the returned
+    context manager to a callback.
+
+    The callback receives patoolib.progress.ProgressEvent tuples with the
+    operation, the archive, the current member, the number of handled members,
+    the bytes read and written, the input size, and the elapsed time. The rate
+    and eta properties give the bytes per second and the estimated remaining
+    seconds. Events are sent at most five times per second per operation, the
+    last one with finished set to True. The callback can be called from other
+    threads. Archives handled in parallel worker processes are not reported.
+
+    Example:
+      with patoolib.report_progress(print):
+          patoolib.extract_archive("foo.tar.gz")
+
+    :param callback: The function receiving the progress events.
+    :type callback: callable
+    :return: A context manager reporting the progress.
+    :rtype: context manager
+    """
+    return progress.report(callback)
@@ -0,0 +1,241 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Asyncio versions of the archive functions.
+
+The coroutines run the patoolib library functions in a thread of the
+default executor of the event loop, so neither archive programs nor the
+builtin Python archive functions block the event loop. Archive programs
+are started in the event loop with asyncio.create_subprocess_exec() or
+asyncio.create_subprocess_shell().
+
+When a coroutine is cancelled, the running archive programs are killed,
+no more programs are started, and the temporary directories of the call
+are removed when the library function has returned. Builtin Python
+archive functions cannot be interrupted, so cancelling waits for them.
+
+The number of concurrent calls of each event loop is limited to
+MaxConcurrency, or by an asyncio.Semaphore given as limiter argument.
+"""
+
+import asyncio
+import functools
+import os
+import subprocess
+import threading
+import weakref
+from collections.abc import Callable, Sequence
+from typing import Any
+import patoolib
+from . import fileutil, util
+
+# the default maximum number of concurrent calls of each event loop
+MaxConcurrency: int = os.cpu_count() or 1
+
+# the default limiters of the event loops
+_limiters: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_limiter() -> asyncio.Semaphore:
+    """Get the default limiter of the running event loop."""
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = _limiters[loop] = asyncio.Semaphore(MaxConcurrency)
+    return limiter
+
+
+def kill_process(process: Any) -> None:
+    """Kill an asyncio or subprocess process if it still runs."""
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+class CommandRunner:
+    """Run the commands of one library call in the event loop and clean
+    up when the call is cancelled.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the runner for the given event loop."""
+        self.loop = loop
+        self.cancelled = False
+        self.lock = threading.Lock()
+        self.processes: list[Any] = []
+        self.tmpdirs: list[str] = []
+
+    def call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Call a library function with this runner. Runs in a worker thread."""
+        token = util.command_runner.set(self)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            util.command_runner.reset(token)
+
+    def run(self, cmd: Sequence[str] | str, **kwargs: Any) -> int:
+        """Run a command in the event loop and return its exit code.
+        Runs in a worker thread.
+        """
+        if self.cancelled:
+            raise util.PatoolError(f"not running `{cmd}' of a cancelled call")
+        coro = self.run_async(cmd, **kwargs)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def run_async(
+        self,
+        cmd: Sequence[str] | str,
+        input: str | None = None,
+        shell: bool = False,
+        **kwargs: Any,
+    ) -> int:
+        """Run a command with the keyword arguments of subprocess.run()."""
+        if input is not None:
+            # the input is always empty to prevent hangs of programs
+            kwargs["stdin"] = subprocess.DEVNULL
+        if shell:
+            process = await asyncio.create_subprocess_shell(cmd, **kwargs)
+        else:
+            process = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+        self.add_process(process)
+        return await process.wait()
+
+    def add_process(self, process: Any) -> None:
+        """Add a started process, which is killed when the call is cancelled."""
+        with self.lock:
+            self.processes.append(process)
+            cancelled = self.cancelled
+        if cancelled:
+            kill_process(process)
+
+    def add_tmpdir(self, directory: str) -> None:
+        """Add a temporary directory, which is removed when the call is
+        cancelled.
+        """
+        with self.lock:
+            self.tmpdirs.append(directory)
+
+    def cancel(self) -> None:
+        """Kill all processes and start no more processes."""
+        with self.lock:
+            self.cancelled = True
+            processes = list(self.processes)
+        for process in processes:
+            kill_process(process)
+
+    def remove_tmpdirs(self) -> None:
+        """Remove the temporary directories that still exist."""
+        for directory in self.tmpdirs:
+            if os.path.isdir(directory):
+                fileutil.rmtree(directory)
+
+
+async def run_call(
+    func: Callable,
+    *args: Any,
+    limiter: asyncio.Semaphore | None = None,
+    **kwargs: Any,
+) -> Any:
+    """Call a library function in a thread of the default executor."""
+    loop = asyncio.get_running_loop()
+    if limiter is None:
+        limiter = get_limiter()
+    async with limiter:
+        runner = CommandRunner(loop)
+        future = loop.run_in_executor(
+            None, functools.partial(runner.call, func, *args, **kwargs)
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            runner.cancel()
+            await wait_finished(future)
+            runner.remove_tmpdirs()
+            raise
+
+
+async def wait_finished(future: asyncio.Future) -> None:
+    """Wait until the library function of a cancelled call has returned."""
+    while not future.done():
+        try:
+            await asyncio.wait([future])
+        except asyncio.CancelledError:
+            # the call is already being cancelled
+            pass
+    if not future.cancelled():
+        # errors of cancelled calls are expected
+        future.exception()
+
+
+async def extract_archive(
+    archive: str, limiter: asyncio.Semaphore | None = None, **kwargs: Any
+) -> str:
+    """Extract an archive. See patoolib.extract_archive() for the arguments,
+    except that interactive defaults to False.
+    """
+    kwargs.setdefault("interactive", False)
+    return await run_call(patoolib.extract_archive, archive, limiter=limiter, **kwargs)
+
+
+async def list_archive(
+    archive: str, limiter: asyncio.Semaphore | None = None, **kwargs: Any
+) -> None:
+    """List an archive. See patoolib.list_archive() for the arguments,
+    except that interactive defaults to False.
+    """
+    kwargs.setdefault("interactive", False)
+    await run_call(patoolib.list_archive, archive, limiter=limiter, **kwargs)
+
+
+async def test_archive(
+    archive: str, limiter: asyncio.Semaphore | None = None, **kwargs: Any
+) -> None:
+    """Test an archive. See patoolib.test_archive() for the arguments,
+    except that interactive defaults to False.
+    """
+    kwargs.setdefault("interactive", False)
+    await run_call(patoolib.test_archive, archive, limiter=limiter, **kwargs)
+
+
+async def create_archive(
+    archive: str,
+    filenames: Sequence[str],
+    limiter: asyncio.Semaphore | None = None,
+    **kwargs: Any,
+) -> None:
+    """Create an archive. See patoolib.create_archive() for the arguments,
+    except that interactive defaults to False.
+    """
+    kwargs.setdefault("interactive", False)
+    await run_call(
+        patoolib.create_archive, archive, filenames, limiter=limiter, **kwargs
+    )
+
+
+async def repack_archive(
+    archive: str,
+    archive_new: str,
+    limiter: asyncio.Semaphore | None = None,
+    **kwargs: Any,
+) -> None:
+    """Repack an archive. See patoolib.repack_archive() for the arguments,
+    except that interactive defaults to False.
+    """
+    kwargs.setdefault("interactive", False)
+    await run_call(
+        patoolib.repack_archive, archive, archive_new, limiter=limiter, **kwargs
+    )
@@ -0,0 +1,551 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Compress and decompress single file archives in independent blocks
+with multiple threads.
+
+For compression, the input is split into blocks that are compressed in
+a thread pool. Each block becomes a complete GZIP member, BZIP2 stream,
+XZ stream or ZSTD frame. The compressed blocks are written in input order,
+and the concatenation is a valid archive that every decompressor reads.
+
+For decompression, the boundaries of the GZIP members, BZIP2 streams,
+XZ blocks or ZSTD frames of an archive are searched without decompressing
+it, e.g. in archives of pigz --independent, bgzip, pbzip2, xz --threads
+or pzstd. The parts are decompressed in a thread pool and the output is
+written in order. GZIP and BZIP2 boundaries are found by their magic
+bytes, which can also occur inside of compressed data. A part must
+therefore decompress to its exact end, else the archive is decompressed
+by one thread.
+
+The decompressed data of a part is held in memory until it is written.
+Parts that decompress to more than MaxPartOutput bytes are therefore
+decompressed by one thread. The output size is known from the GZIP member
+trailers, the XZ indexes and the ZSTD frame headers, and else the
+decompressor stops at the limit.
+
+The zlib, bz2, lzma and zstd modules release the global interpreter
+lock while compressing or decompressing, so the threads run on
+multiple CPUs.
+"""
+
+import bz2
+import collections
+import concurrent.futures
+import functools
+import lzma
+import mmap
+import os
+import re
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, BinaryIO, NamedTuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Size of the uncompressed blocks by format. Larger blocks compress better
+# since no data is shared between blocks. XZ blocks are three times the
+# dictionary size of the default preset, like "xz --threads" uses.
+BlockSizes: dict[str, int] = {
+    'bzip2': 4 * 1024 * 1024,
+    'gzip': 4 * 1024 * 1024,
+    'xz': 24 * 1024 * 1024,
+    'zstd': 4 * 1024 * 1024,
+}
+
+# Number of blocks per thread that are read or compressed at the same time.
+PendingBlocksPerThread: int = 2
+
+# Small parts of an archive are decompressed together in groups of at least
+# this compressed size, e.g. the 64KB members of bgzip archives.
+GroupSize: int = 1024 * 1024
+
+# Groups are also closed when their parts decompress to this size.
+GroupOutputSize: int = 4 * 1024 * 1024
+
+# Archives with larger compressed parts are decompressed by one thread.
+MaxPartSize: int = 64 * 1024 * 1024
+
+# Archives with parts that decompress to more data are decompressed by one
+# thread, so that the memory usage stays bounded. This fits the XZ blocks
+# of "xz --threads" with the default preset.
+MaxPartOutput: int = 32 * 1024 * 1024
+
+# Limit of the decompressed data of a group
+MaxGroupOutput: int = GroupOutputSize + MaxPartOutput
+
+# The start of a GZIP member with deflate compression and valid flags
+GzipMagic: re.Pattern[bytes] = re.compile(rb'\x1f\x8b\x08[\x00-\x1f]')
+
+# The start of a BZIP2 stream with its first block or its end of stream marker
+Bzip2Magic: re.Pattern[bytes] = re.compile(rb'BZh[1-9](?:1AY&SY|\x17rE8P\x90)')
+
+XzHeaderMagic: bytes = b'\xfd7zXZ\x00'
+XzFooterMagic: bytes = b'YZ'
+ZstdMagic: int = 0xFD2FB528
+# the range of magic numbers of skippable ZSTD frames
+ZstdSkippableMagic: range = range(0x184D2A50, 0x184D2A60)
+
+
+class Part(NamedTuple):
+    """An independently decompressible part of an archive."""
+
+    # offset of the first byte
+    start: int
+    # offset after the last byte
+    end: int
+    # function returning the decompressed data of the part, with an
+    # optional maximum output size
+    decompress: Callable[..., bytes]
+    # uncompressed size if known from the archive
+    size: int | None = None
+
+
+class PartError(Exception):
+    """A part did not decompress to its exact end or within its size limit."""
+
+
+def map_ordered(
+    func: Callable[[T], R], items: Iterable[T], threads: int
+) -> Iterator[R]:
+    """Call func for the items with a pool of threads and generate the
+    results in order. Items are consumed as the results are generated,
+    so at most PendingBlocksPerThread items per thread are in memory.
+    """
+    limit = PendingBlocksPerThread * threads
+    pending: collections.deque[concurrent.futures.Future[R]] = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= limit:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def compress_file(
+    filename: str,
+    archive: str,
+    compress: Callable[[bytes], bytes],
+    threads: int,
+    block_size: int,
+) -> None:
+    """Compress a file in blocks of the given size with a pool of threads.
+    Function compress must return the complete compressed data of a block.
+    """
+    with open(filename, 'rb') as srcfile, open(archive, 'wb') as targetfile:
+        for data in map_ordered(compress, read_blocks(srcfile, block_size), threads):
+            targetfile.write(data)
+
+
+def read_blocks(fileobj: BinaryIO, block_size: int) -> Iterator[bytes]:
+    """Read blocks of a file. An empty file has one empty block."""
+    data = fileobj.read(block_size)
+    yield data
+    while data := fileobj.read(block_size):
+        yield data
+
+
+def decompress_file(
+    archive: str,
+    targetname: str | None,
+    threads: int,
+    get_parts: Callable[[mmap.mmap], list[Part] | None],
+) -> bool:
+    """Decompress the parts of an archive with a pool of threads and write
+    the data in order to targetname. If targetname is None, the archive
+    is only tested.
+    @return: False if the archive must be decompressed by one thread, e.g.
+        if it has only one part, a part is too large or when decompressing
+        fails. Errors are then reported by the caller.
+    """
+    with open(archive, 'rb') as fileobj:
+        if os.fstat(fileobj.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            parts = get_parts(data)
+            if not parts or any(is_large_part(part) for part in parts):
+                return False
+            groups = group_parts(parts)
+            if len(groups) < 2:
+                return False
+
+            def decompress_group(group: list[Part]) -> bytes:
+                result = bytearray()
+                for part in group:
+                    limit = min(MaxPartOutput, MaxGroupOutput - len(result))
+                    if part.size is not None:
+                        limit = min(limit, part.size)
+                    result += part.decompress(data[part.start : part.end], limit)
+                return bytes(result)
+
+            results = map_ordered(decompress_group, groups, threads)
+            try:
+                if targetname is None:
+                    collections.deque(results, maxlen=0)
+                else:
+                    with open(targetname, 'wb') as targetfile:
+                        for result in results:
+                            targetfile.write(result)
+            except Exception:
+                # corrupt data or a wrong GZIP or BZIP2 boundary
+                return False
+            finally:
+                # wait for running threads before the archive is unmapped
+                results.close()
+    return True
+
+
+def is_large_part(part: Part) -> bool:
+    """Check if a part is too large to be decompressed in memory."""
+    if part.size is not None and part.size > MaxPartOutput:
+        return True
+    return part.end - part.start > MaxPartSize
+
+
+def group_parts(parts: list[Part]) -> list[list[Part]]:
+    """Group consecutive parts to groups of at least GroupSize compressed
+    bytes or GroupOutputSize uncompressed bytes.
+    """
+    groups = []
+    group: list[Part] = []
+    size = output = 0
+    for part in parts:
+        group.append(part)
+        size += part.end - part.start
+        output += part.size or 0
+        if size >= GroupSize or output >= GroupOutputSize:
+            groups.append(group)
+            group = []
+            size = output = 0
+    if group:
+        groups.append(group)
+    return groups
+
+
+def get_magic_parts(
+    data: mmap.mmap, magic: re.Pattern[bytes], decompress: Callable[..., bytes]
+) -> list[Part] | None:
+    """Get the parts of an archive starting at the given magic bytes.
+    @return: the parts, or None if the archive does not start with magic bytes
+    """
+    starts = [match.start() for match in magic.finditer(data)]
+    if not starts or starts[0] != 0:
+        return None
+    ends = starts[1:] + [len(data)]
+    return [Part(start, end, decompress) for start, end in zip(starts, ends)]
+
+
+def get_gzip_members(data: mmap.mmap) -> list[Part] | None:
+    """Get the candidate members of a GZIP archive. The uncompressed size
+    of a member is read from its trailer, which is checked when the member
+    is decompressed. The last member can be padded with zeros and has no
+    known size.
+    """
+    parts = get_magic_parts(data, GzipMagic, decompress_gzip_member)
+    if parts is None:
+        return None
+    return [
+        part._replace(size=_uint(data[part.end - 4 : part.end]))
+        for part in parts[:-1]
+    ] + parts[-1:]
+
+
+def decompress_gzip_member(data: bytes, max_length: int = -1) -> bytes:
+    """Decompress exactly one GZIP member, optionally padded with zeros
+    like gzip(1) accepts.
+    @raises: PartError if the data has more or less than one member
+    """
+    decompressor = zlib.decompressobj(wbits=31)
+    result = decompress_limited(decompressor, data, max_length)
+    if decompressor.unused_data.strip(b'\0'):
+        raise PartError()
+    return result
+
+
+def decompress_limited(decompressor: Any, data: bytes, max_length: int) -> bytes:
+    """Decompress data with a decompressor object of the zlib, bz2, lzma
+    or zstd module up to the end of its stream.
+    @raises: PartError if the stream does not end in the data or if it
+        decompresses to more than max_length bytes, unless max_length
+        is negative
+    """
+    if max_length < 0:
+        result = decompressor.decompress(data)
+    else:
+        # one more byte to detect larger output
+        result = decompressor.decompress(data, max_length + 1)
+        if len(result) > max_length:
+            raise PartError()
+    if not decompressor.eof:
+        raise PartError()
+    return result
+
+
+def get_bzip2_streams(data: mmap.mmap) -> list[Part] | None:
+    """Get the candidate streams of a BZIP2 archive."""
+    return get_magic_parts(data, Bzip2Magic, decompress_bzip2_stream)
+
+
+def decompress_bzip2_stream(data: bytes, max_length: int = -1) -> bytes:
+    """Decompress exactly one BZIP2 stream.
+    @raises: PartError if the data has more or less than one stream
+    """
+    decompressor = bz2.BZ2Decompressor()
+    result = decompress_limited(decompressor, data, max_length)
+    if decompressor.unused_data:
+        raise PartError()
+    return result
+
+
+def get_xz_blocks(data: mmap.mmap) -> list[Part] | None:
+    """Get the blocks of all streams of an XZ archive from the stream
+    indexes, which are read from the end of the archive.
+    @return: the blocks, or None if the archive is not a valid XZ archive
+    """
+    streams = get_xz_streams(data)
+    if streams is None:
+        return None
+    parts: list[Part] = []
+    for start, header, records in streams:
+        offset = start + 12
+        for unpadded, size in records:
+            decompress = functools.partial(decompress_xz_block, header, unpadded, size)
+            end = offset + _padded(unpadded)
+            parts.append(Part(offset, end, decompress, size))
+            offset += _padded(unpadded)
+    return parts
+
+
+def get_xz_size(data: mmap.mmap) -> int | None:
+    """Get the uncompressed size of an XZ archive from the stream indexes.
+    @return: the size, or None if the archive is not a valid XZ archive
+    """
+    streams = get_xz_streams(data)
+    if streams is None:
+        return None
+    return sum(size for _, _, records in streams for _, size in records)
+
+
+def get_xz_streams(
+    data: mmap.mmap,
+) -> list[tuple[int, bytes, list[tuple[int, int]]]] | None:
+    """Get the streams of an XZ archive from the stream indexes, which are
+    read from the end of the archive.
+    @return: tuples (stream start, stream header, index records) in archive
+        order, or None if the archive is not a valid XZ archive
+    """
+    streams: list[tuple[int, bytes, list[tuple[int, int]]]] = []
+    end = len(data)
+    while end > 0:
+        # skip stream padding
+        while end >= 4 and data[end - 4 : end] == b'\0\0\0\0':
+            end -= 4
+        if end == 0:
+            break
+        # the smallest stream has a header, an empty index and a footer
+        if end < 32:
+            return None
+        footer = data[end - 12 : end]
+        if footer[10:] != XzFooterMagic or zlib.crc32(footer[4:10]) != _uint(
+            footer[0:4]
+        ):
+            return None
+        index_start = end - 12 - (_uint(footer[4:8]) + 1) * 4
+        if index_start < 12:
+            return None
+        records = parse_xz_index(data[index_start : end - 12])
+        if records is None:
+            return None
+        start = index_start - sum(_padded(unpadded) for unpadded, _ in records) - 12
+        if start < 0:
+            return None
+        header = data[start : start + 12]
+        if header[:6] != XzHeaderMagic or header[6:8] != footer[8:10]:
+            return None
+        streams.insert(0, (start, header, records))
+        end = start
+    return streams
+
+
+def parse_xz_index(index: bytes) -> list[tuple[int, int]] | None:
+    """Parse the records of an XZ index.
+    @return: pairs of (unpadded size, uncompressed size) of the blocks,
+        or None if the index is invalid
+    """
+    if len(index) < 8 or index[0] != 0:
+        return None
+    if zlib.crc32(index[:-4]) != _uint(index[-4:]):
+        return None
+    try:
+        count, pos = _read_varint(index, 1)
+        records = []
+        for _ in range(count):
+            unpadded, pos = _read_varint(index, pos)
+            size, pos = _read_varint(index, pos)
+            records.append((unpadded, size))
+    except IndexError:
+        return None
+    if _padded(pos) != len(index) - 4:
+        return None
+    return records
+
+
+def decompress_xz_block(
+    header: bytes, unpadded: int, size: int, data: bytes, max_length: int = -1
+) -> bytes:
+    """Decompress one block of an XZ stream with the given stream header.
+    The block is wrapped in a new stream with an index for this block,
+    so the lzma module checks the block sizes and its integrity check.
+    """
+    index = b'\0' + _varint(1) + _varint(unpadded) + _varint(size)
+    index += b'\0' * (_padded(len(index)) - len(index))
+    index += zlib.crc32(index).to_bytes(4, 'little')
+    footer = (len(index) // 4 - 1).to_bytes(4, 'little') + header[6:8]
+    footer = zlib.crc32(footer).to_bytes(4, 'little') + footer + XzFooterMagic
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+    return decompress_limited(decompressor, header + data + index + footer, max_length)
+
+
+def get_zstd_frames(
+    data: mmap.mmap, decompressor: Callable[[], Any]
+) -> list[Part] | None:
+    """Get the frames of a ZSTD archive by reading the frame and block
+    headers. Skippable frames have no data and are left out.
+    @param decompressor: the ZstdDecompressor class of the zstd module
+    @return: the frames, or None if the archive is not a valid ZSTD archive
+    """
+    frames = parse_zstd_frames(data)
+    if frames is None:
+        return None
+    decompress = functools.partial(decompress_zstd_frame, decompressor)
+    return [Part(start, end, decompress, size) for start, end, size in frames]
+
+
+def decompress_zstd_frame(
+    decompressor: Callable[[], Any], data: bytes, max_length: int = -1
+) -> bytes:
+    """Decompress exactly one ZSTD frame.
+    @raises: PartError if the data has more or less than one frame
+    """
+    zstd_decompressor = decompressor()
+    result = decompress_limited(zstd_decompressor, data, max_length)
+    if zstd_decompressor.unused_data:
+        raise PartError()
+    return result
+
+
+def get_zstd_size(data: mmap.mmap) -> int | None:
+    """Get the uncompressed size of a ZSTD archive from the content sizes
+    in the frame headers.
+    @return: the size, or None if the archive is not a valid ZSTD archive
+        or a frame header has no content size
+    """
+    frames = parse_zstd_frames(data)
+    if frames is None or any(size is None for _, _, size in frames):
+        return None
+    return sum(size for _, _, size in frames if size is not None)
+
+
+def parse_zstd_frames(data: mmap.mmap) -> list[tuple[int, int, int | None]] | None:
+    """Parse the frame and block headers of a ZSTD archive. Skippable frames
+    have no data and are left out.
+    @return: tuples (frame start, frame end, content size or None), or None
+        if the archive is not a valid ZSTD archive
+    """
+    frames: list[tuple[int, int, int | None]] = []
+    pos = 0
+    size = len(data)
+    while pos < size:
+        if pos + 8 > size:
+            return None
+        magic = _uint(data[pos : pos + 4])
+        if magic in ZstdSkippableMagic:
+            pos += 8 + _uint(data[pos + 4 : pos + 8])
+            continue
+        if magic != ZstdMagic:
+            return None
+        start = pos
+        descriptor = data[pos + 4]
+        # the reserved bit must be zero
+        if descriptor & 0x08:
+            return None
+        single_segment = (descriptor >> 5) & 1
+        pos += 5 + (1 - single_segment) + (0, 1, 2, 4)[descriptor & 3]
+        size_bytes = (single_segment, 2, 4, 8)[descriptor >> 6]
+        content_size = None
+        if size_bytes:
+            content_size = _uint(data[pos : pos + size_bytes])
+            if size_bytes == 2:
+                # two byte content sizes are stored minus 256
+                content_size += 256
+        pos += size_bytes
+        while True:
+            if pos + 3 > size:
+                return None
+            block_header = _uint(data[pos : pos + 3])
+            block_type = (block_header >> 1) & 3
+            if block_type == 3:
+                return None
+            # RLE blocks store one byte
+            pos += 3 + (1 if block_type == 1 else block_header >> 3)
+            if block_header & 1:
+                break
+        if descriptor & 0x04:
+            # content checksum
+            pos += 4
+        if pos > size:
+            return None
+        frames.append((start, pos, content_size))
+    return frames
+
+
+def _uint(data: bytes) -> int:
+    """Get an unsigned little endian integer."""
+    return int.from_bytes(data, 'little')
+
+
+def _padded(size: int) -> int:
+    """Get a size padded to a multiple of four bytes."""
+    return (size + 3) & ~3
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Read a variable length integer of the XZ format.
+    @return: the integer and the position after it
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _varint(value: int) -> bytes:
+    """Encode a variable length integer of the XZ format."""
+    result = bytearray()
+    while value >= 0x80:
+        result.append(value & 0x7F | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
@@ -0,0 +1,308 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Persistent cache for program lookups and program capability probes.
+
+Finding out what an archive program supports (e.g. running `7z i` or
+`tar --force-local --help`) needs additional program runs for each patool
+invocation. The results are stored in a JSON file in the user cache directory.
+Each executable entry records the modification time, size and inode of the
+executable, so that the stored results are discarded when the executable changes.
+Each found program records the modification times of the search path
+directories before the one it was found in, so that it is searched again
+when a program is installed in one of these directories.
+Changes are written once when the process exits, or by flush().
+
+Set the environment variable PATOOL_CACHE_DIR to use another cache directory,
+and PATOOL_NO_CACHE to disable the cache.
+"""
+
+import io
+import json
+import os
+import threading
+from collections.abc import Callable
+from typing import Any
+from .log import log_warning
+
+# increase this when the layout of the cache data changes
+CacheVersion: int = 2
+
+CapabilitiesFilename: str = "capabilities.json"
+
+# cache data of the capabilities file, loaded on first use
+_capabilities: dict[str, Any] | None = None
+# True if the loaded cache data has changes that are not written yet
+_changed = False
+# True if flush() is registered to run at exit
+_registered = False
+_lock = threading.RLock()
+
+
+def is_enabled() -> bool:
+    """Check if the persistent cache should be used."""
+    return not os.environ.get("PATOOL_NO_CACHE")
+
+
+def get_cache_dir() -> str:
+    """Return the directory for cache files of patool."""
+    if os.environ.get("PATOOL_CACHE_DIR"):
+        return os.environ["PATOOL_CACHE_DIR"]
+    if os.name == 'nt':
+        basedir = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        basedir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+            os.path.join("~", ".cache")
+        )
+    return os.path.join(basedir, "patool")
+
+
+def get_capabilities_file() -> str:
+    """Return the filename of the capabilities cache."""
+    return os.path.join(get_cache_dir(), CapabilitiesFilename)
+
+
+def get_file_id(filename: str) -> list[int] | None:
+    """Return identity data of a file, or None if it could not be determined.
+    The identity consists of the modification time, size and inode of the file.
+    """
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def get_dir_ids(path: str, directory: str) -> list[list[Any]]:
+    """Return the directories of the search path before the given directory
+    with their modification times, or None for directories that do not
+    exist.
+    """
+    directory = os.path.normcase(os.path.normpath(directory))
+    dir_ids: list[list[Any]] = []
+    for entry in path.split(os.pathsep):
+        if entry and os.path.normcase(os.path.normpath(entry)) == directory:
+            break
+        try:
+            mtime = os.stat(entry).st_mtime_ns if entry else None
+        except OSError:
+            mtime = None
+        dir_ids.append([entry, mtime])
+    return dir_ids
+
+
+def new_capabilities() -> dict[str, Any]:
+    """Return empty capabilities cache data."""
+    return {"version": CacheVersion, "programs": {}, "executables": {}}
+
+
+def read_json(filename: str, compressed: bool = False) -> Any:
+    """Read JSON data from filename, optionally GZIP compressed. Return None
+    if the file does not exist or has invalid contents.
+    """
+    try:
+        if compressed:
+            import gzip  # noqa: PLC0415
+
+            fd = gzip.open(filename, "rt", encoding="utf-8")
+        else:
+            fd = open(filename, encoding="utf-8")
+        with fd:
+            return json.load(fd)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError) as err:
+        log_warning(f"ignoring invalid cache file {filename}: {err}")
+        return None
+
+
+def write_json(filename: str, data: Any, compressed: bool = False) -> None:
+    """Write JSON data atomically to filename, optionally GZIP compressed.
+    Errors are logged as warnings.
+    """
+    import gzip  # noqa: PLC0415
+    import tempfile  # noqa: PLC0415
+
+    directory = os.path.dirname(filename)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, "wb") as rawfile:
+                if compressed:
+                    fo = gzip.open(rawfile, "wt", encoding="utf-8")
+                else:
+                    fo = io.TextIOWrapper(rawfile, encoding="utf-8")
+                with fo:
+                    json.dump(data, fo, separators=(",", ":"))
+            os.replace(tmpname, filename)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
+    except OSError as err:
+        log_warning(f"could not write cache file {filename}: {err}")
+
+
+def get_capabilities() -> dict[str, Any]:
+    """Return the capabilities cache data, loading it on first use."""
+    global _capabilities  # noqa PLW0603
+    with _lock:
+        if _capabilities is None:
+            data = read_json(get_capabilities_file())
+            if (
+                not isinstance(data, dict)
+                or data.get("version") != CacheVersion
+                or not isinstance(data.get("programs"), dict)
+                or not isinstance(data.get("executables"), dict)
+            ):
+                data = new_capabilities()
+            _capabilities = data
+        return _capabilities
+
+
+def save_capabilities() -> None:
+    """Mark the capabilities cache data as changed. The data is written
+    to disk by flush(), which runs when the process exits.
+    """
+    global _changed, _registered  # noqa PLW0603
+    with _lock:
+        _changed = True
+        if not _registered:
+            import atexit  # noqa: PLC0415
+
+            atexit.register(flush)
+            _registered = True
+
+
+def flush() -> None:
+    """Write changes of the capabilities cache data to disk."""
+    global _changed  # noqa PLW0603
+    with _lock:
+        if _changed and _capabilities is not None:
+            write_json(get_capabilities_file(), _capabilities)
+        _changed = False
+
+
+def get_executable(exe: str) -> dict[str, Any] | None:
+    """Return the valid cache entry for given executable, or None if the
+    executable is not cached, has been changed or the entry is invalid.
+    """
+    entry = get_capabilities()["executables"].get(exe)
+    if (
+        not isinstance(entry, dict)
+        or not isinstance(entry.get("probes"), dict)
+        or entry.get("id") != get_file_id(exe)
+    ):
+        return None
+    return entry
+
+
+def lookup_program(program: str, path: str) -> str | None:
+    """Return the cached executable for program found in the given search path,
+    or None if there is no valid cache entry.
+    """
+    if not is_enabled():
+        return None
+    with _lock:
+        programs = get_capabilities()["programs"].get(path)
+        entry = programs.get(program) if isinstance(programs, dict) else None
+        if not isinstance(entry, dict) or not isinstance(entry.get("exe"), str):
+            return None
+        exe = entry["exe"]
+        dir_ids = get_dir_ids(path, os.path.dirname(exe))
+        if entry.get("dirs") != dir_ids or get_executable(exe) is None:
+            return None
+        return exe
+
+
+def store_program(program: str, path: str, exe: str) -> None:
+    """Store the executable found for program in the given search path."""
+    if not is_enabled():
+        return
+    with _lock:
+        data = get_capabilities()
+        dir_ids = get_dir_ids(path, os.path.dirname(exe))
+        programs = data["programs"].get(path)
+        if not isinstance(programs, dict):
+            programs = data["programs"][path] = {}
+        programs[program] = {"exe": exe, "dirs": dir_ids}
+        _get_or_create_executable(data, exe)
+        save_capabilities()
+
+
+def _get_or_create_executable(data: dict[str, Any], exe: str) -> dict[str, Any]:
+    """Return the valid cache entry for exe, replacing invalid entries."""
+    entry = get_executable(exe)
+    if entry is None:
+        entry = {"id": get_file_id(exe), "probes": {}}
+        data["executables"][exe] = entry
+    return entry
+
+
+def probe(exe: str, name: str, func: Callable[[], Any]) -> Any:
+    """Return the cached result of the probe with given name for an executable.
+    If there is no valid cached result, call func() and store its result.
+    The result must be serializable with JSON.
+    """
+    if not is_enabled():
+        return func()
+    with _lock:
+        entry = get_executable(exe)
+        if entry is not None and name in entry["probes"]:
+            return entry["probes"][name]
+    # run the probe outside of the lock since it could take a while
+    result = func()
+    with _lock:
+        data = get_capabilities()
+        _get_or_create_executable(data, exe)["probes"][name] = result
+        save_capabilities()
+    return result
+
+
+def clear() -> None:
+    """Remove all cached data."""
+    global _capabilities, _changed  # noqa PLW0603
+    with _lock:
+        _capabilities = None
+        _changed = False
+        try:
+            os.remove(get_capabilities_file())
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            log_warning(f"could not remove cache file: {err}")
+
+
+def print_cache() -> None:
+    """Print information about the cached data to stdout."""
+    print("Capabilities cache file:", get_capabilities_file())
+    if not is_enabled():
+        print("The cache is disabled by the PATOOL_NO_CACHE environment variable.")
+        return
+    with _lock:
+        data = get_capabilities()
+        print("Executables:")
+        for exe in sorted(data["executables"]):
+            entry = get_executable(exe)
+            if entry is None:
+                print(f"   {exe} (outdated)")
+                continue
+            print(f"   {exe}")
+            for name, result in sorted(entry["probes"].items()):
+                print(f"      {name}: {result}")
+        for path, programs in sorted(data["programs"].items()):
+            print("Programs found in", path)
+            for program in sorted(programs):
+                exe = lookup_program(program, path)
+                print(f"   {program:>8}: {exe or '(outdated)'}")
@@ -0,0 +1,158 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Detect files that do not shrink when they are compressed.
+
+Files in compressed formats like JPEG images, videos or archives are
+detected by their file signature. Other files are detected by the byte
+entropy of their first bytes, which is close to 8 bits per byte for
+compressed or encrypted data.
+"""
+
+import collections
+import math
+from . import signature
+
+# Number of bytes to sample from the start of a file.
+SampleSize: int = 64 * 1024
+
+# Files smaller than this are always compressed since storing them
+# saves almost no time.
+MinSize: int = 4 * 1024
+
+# Byte entropy in bits per byte from which data is incompressible.
+EntropyThreshold: float = 7.8
+
+# Signatures of compressed media formats: (offset, magic bytes, mime)
+MediaSignatures: tuple[tuple[int, bytes, str], ...] = (
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+    # MP4, MOV, M4A and HEIC files
+    (4, b"ftyp", "video/mp4"),
+    (0, b"\x1a\x45\xdf\xa3", "video/x-matroska"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"wOFF", "font/woff"),
+    (0, b"wOF2", "font/woff2"),
+)
+
+# MIME types of archive signatures with compressed data
+CompressedMimes: frozenset[str] = frozenset(
+    (
+        "application/gzip",
+        "application/vnd.ms-cab-compressed",
+        "application/vnd.rar",
+        "application/x-7z-compressed",
+        "application/x-ace",
+        "application/x-alzip",
+        "application/x-arj",
+        "application/x-bzip2",
+        "application/x-bzip3",
+        "application/x-compress",
+        "application/x-debian-package",
+        "application/x-freearc",
+        "application/x-lrzip",
+        "application/x-lz4",
+        "application/x-lzip",
+        "application/x-lzop",
+        "application/x-rpm",
+        "application/x-rzip",
+        "application/x-xz",
+        "application/zip",
+        "application/zpaq",
+        "application/zstd",
+        "audio/flac",
+        "audio/x-ape",
+        "audio/x-shn",
+    )
+)
+
+# File name extensions of compressed formats, for archive programs that
+# store files by their name extension.
+IncompressibleExtensions: tuple[str, ...] = (
+    "7z",
+    "apk",
+    "bz2",
+    "docx",
+    "flac",
+    "gif",
+    "gz",
+    "jar",
+    "jpeg",
+    "jpg",
+    "lz",
+    "lz4",
+    "lzma",
+    "mkv",
+    "mov",
+    "mp3",
+    "mp4",
+    "ogg",
+    "png",
+    "rar",
+    "tgz",
+    "webm",
+    "webp",
+    "woff",
+    "woff2",
+    "xlsx",
+    "xz",
+    "zip",
+    "zst",
+)
+
+
+def get_incompressible_reason(filename: str) -> str | None:
+    """Check if a file is incompressible.
+    @return: the reason why the file is incompressible, or None if it
+        should be compressed
+    """
+    with open(filename, "rb") as fileobj:
+        data = fileobj.read(SampleSize)
+    if len(data) < MinSize:
+        return None
+    mime = detect_compressed(data)
+    if mime is not None:
+        return f"{mime} data"
+    entropy = get_entropy(data)
+    if entropy >= EntropyThreshold:
+        return f"entropy {entropy:.2f} bits per byte"
+    return None
+
+
+def detect_compressed(data: bytes) -> str | None:
+    """Detect the MIME type of compressed data from its first bytes.
+    @return: the MIME type, or None if the data is not in a compressed format
+    """
+    for offset, magic, mime in MediaSignatures:
+        if data.startswith(magic, offset):
+            return mime
+    mime = signature.detect(data, -1)
+    if mime in CompressedMimes:
+        return mime
+    return None
+
+
+def get_entropy(data: bytes) -> float:
+    """Get the Shannon entropy of data in bits per byte."""
+    if not data:
+        return 0.0
+    size = len(data)
+    return -sum(
+        count / size * math.log2(count / size)
+        for count in collections.Counter(data).values()
+    )
@@ -20,15 +20,19 @@ The script will call the main_cli() function below on start.
 Usage:
 patool
    [global-options]
-   {extract|list|create|repack|diff|search|formats}
+   {extract|list|create|cat|index|repack|diff|search|formats|cache}
    [sub-command-options]
    <command-args>
 """
 
 import sys
 import argparse
+import contextlib
+import shutil
 from . import (
     extract_archive,
+    index_archive,
+    open_member,
     list_archive,
     test_archive,
     create_archive,
@@ -36,7 +40,13 @@ from . import (
     search_archive,
     repack_archive,
     list_formats,
+    warm_cache,
+    CompressionMethods,
+    DefaultSpaceMargin,
+    collect_stats,
+    report_progress,
 )
+from . import cache, listcache, parallel, progress, stats
 from .util import PatoolError
 from .log import log_error, log_internal_error
 from .configuration import App
@@ -45,18 +55,22 @@ from .configuration import App
 def run_extract(args: argparse.Namespace) -> int:
     """Extract files from archive(s)."""
     res = 0
-    for archive in args.archive:
-        try:
-            extract_archive(
-                archive,
-                verbosity=args.verbosity,
-                interactive=args.interactive,
-                outdir=args.outdir,
-                password=args.password,
-                format=args.format,
-            )
-        except PatoolError as msg:
-            log_error(f"error extracting {archive}: {msg}")
+    for result in parallel.run_archives(
+        extract_archive,
+        args.archive,
+        jobs=args.jobs,
+        verbosity=args.verbosity,
+        interactive=args.interactive,
+        outdir=args.outdir,
+        password=args.password,
+        format=args.format,
+        threads=args.threads,
+        members=args.members,
+        incremental=args.incremental,
+        space_margin=args.space_margin,
+    ):
+        if result.error is not None:
+            log_error(f"error extracting {result.archive}: {result.error}")
             res += 1
     return res
 
@@ -64,21 +78,22 @@ def run_extract(args: argparse.Namespace) -> int:
 def run_list(args: argparse.Namespace) -> int:
     """List files in archive(s)."""
     res = 0
-    for archive in args.archive:
-        try:
-            verbosity = args.verbosity
-            # increase default verbosity since the listing output should be visible
-            if verbosity == 0:
-                verbosity = 1
-            list_archive(
-                archive,
-                verbosity=verbosity,
-                interactive=args.interactive,
-                password=args.password,
-                format=args.format,
-            )
-        except PatoolError as msg:
-            log_error(f"error listing {archive}: {msg}")
+    verbosity = args.verbosity
+    # increase default verbosity since the listing output should be visible
+    if verbosity == 0:
+        verbosity = 1
+    for result in parallel.run_archives(
+        list_archive,
+        args.archive,
+        jobs=args.jobs,
+        verbosity=verbosity,
+        interactive=args.interactive,
+        password=args.password,
+        format=args.format,
+        cached=args.cached,
+    ):
+        if result.error is not None:
+            log_error(f"error listing {result.archive}: {result.error}")
             res += 1
     return res
 
@@ -86,17 +101,30 @@ def run_list(args: argparse.Namespace) -> int:
 def run_test(args: argparse.Namespace) -> int:
     """Test files in archive(s)."""
     res = 0
+    for result in parallel.run_archives(
+        test_archive,
+        args.archive,
+        jobs=args.jobs,
+        verbosity=args.verbosity,
+        interactive=args.interactive,
+        password=args.password,
+        format=args.format,
+        threads=args.threads,
+    ):
+        if result.error is not None:
+            log_error(f"error testing {result.archive}: {result.error}")
+            res += 1
+    return res
+
+
+def run_index(args: argparse.Namespace) -> int:
+    """Index TAR archive(s) for reading single members."""
+    res = 0
     for archive in args.archive:
         try:
-            test_archive(
-                archive,
-                verbosity=args.verbosity,
-                interactive=args.interactive,
-                password=args.password,
-                format=args.format,
-            )
+            index_archive(archive, verbosity=args.verbosity, format=args.format)
         except PatoolError as msg:
-            log_error(f"error testing {archive}: {msg}")
+            log_error(f"error indexing {archive}: {msg}")
             res += 1
     return res
 
@@ -112,6 +140,9 @@ def run_create(args: argparse.Namespace) -> int:
             interactive=args.interactive,
             password=args.password,
             format=args.format,
+            threads=args.threads,
+            method=args.method,
+            level=args.level,
         )
     except PatoolError as msg:
         log_error(f"error creating {args.archive}: {msg}")
@@ -119,6 +150,26 @@ def run_create(args: argparse.Namespace) -> int:
     return res
 
 
+def run_cat(args: argparse.Namespace) -> int:
+    """Write the contents of an archive member to standard output."""
+    res = 0
+    try:
+        with open_member(
+            args.archive,
+            name=args.member,
+            verbosity=args.verbosity,
+            password=args.password,
+            format=args.format,
+        ) as fileobj:
+            sys.stdout.flush()
+            shutil.copyfileobj(fileobj, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+    except PatoolError as msg:
+        log_error(f"error reading {args.archive}: {msg}")
+        res = 1
+    return res
+
+
 def run_diff(args: argparse.Namespace) -> int:
     """Show differences between two archives."""
     try:
@@ -127,6 +178,7 @@ def run_diff(args: argparse.Namespace) -> int:
             args.archive2,
             verbosity=args.verbosity,
             interactive=args.interactive,
+            summary=args.summary,
         )
     except PatoolError as msg:
         log_error(
@@ -145,6 +197,9 @@ def run_search(args: argparse.Namespace) -> int:
             verbosity=args.verbosity,
             interactive=args.interactive,
             password=args.password,
+            stream=args.stream,
+            max_count=args.max_count,
+            jobs=args.jobs,
         )
     except PatoolError as msg:
         log_error(f"error searching {args.archive}: {msg}")
@@ -174,6 +229,31 @@ def run_formats(args: argparse.Namespace) -> int:
     return 0
 
 
+def run_cache(args: argparse.Namespace) -> int:
+    """Show, fill or clear the capabilities and listing cache."""
+    res = 0
+    if args.archive and args.action != 'clear':
+        log_error("archive arguments are only supported by the clear action")
+        return 1
+    if args.action == 'clear':
+        if args.archive:
+            for archive in args.archive:
+                try:
+                    listcache.invalidate(archive)
+                except OSError as msg:
+                    log_error(f"error invalidating {archive}: {msg}")
+                    res += 1
+        else:
+            cache.clear()
+            listcache.clear()
+    elif args.action == 'warm':
+        warm_cache()
+    cache.print_cache()
+    if cache.is_enabled():
+        listcache.print_listings()
+    return res
+
+
 def run_version(args: argparse.Namespace) -> int:
     """Print version number."""
     print(App)
@@ -185,6 +265,7 @@ EXAMPLES
   patool extract archive.zip otherarchive.rar
   patool --verbose test dist.tar.gz
   patool list package.deb
+  patool index linux-6.1.tar.xz
   patool --verbose create myfiles.zip file1.txt dir/
   patool diff release1.0.tar.xz release2.0.zip
   patool search "def urlopen" python-3.3.tar.gz
@@ -197,6 +278,66 @@ VERSION
 """
 
 
+def jobs_type(value: str) -> int:
+    """Parse the number of parallel jobs."""
+    jobs = int(value)
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {jobs}")
+    return jobs
+
+
+def positive_int_type(value: str) -> int:
+    """Parse a positive integer."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def add_jobs_argument(
+    parser: argparse.ArgumentParser,
+    help_text: str = "number of archives to handle in parallel (default: number of CPUs); parallel jobs do not query for user input",
+) -> None:
+    """Add the --jobs option to a command parser."""
+    parser.add_argument('--jobs', '-j', type=jobs_type, help=help_text)
+
+
+def threads_type(value: str) -> int:
+    """Parse the number of compression threads."""
+    threads = int(value)
+    if threads < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {threads}")
+    return threads
+
+
+def level_type(value: str) -> int:
+    """Parse a compression level."""
+    level = int(value)
+    if not 0 <= level <= 9:
+        raise argparse.ArgumentTypeError(f"must be 0 to 9, got {level}")
+    return level
+
+
+def space_margin_type(value: str) -> float | None:
+    """Parse the disk space margin, or 'none' to disable the check."""
+    if value.lower() == 'none':
+        return None
+    margin = float(value)
+    if margin < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {margin}")
+    return margin
+
+
+def add_threads_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --threads option to a command parser."""
+    parser.add_argument(
+        '--threads',
+        '-T',
+        type=threads_type,
+        help="prefer compression programs using multiple threads and use the given number of threads; 0 uses the number of CPUs",
+    )
+
+
 def create_argparser() -> argparse.ArgumentParser:
     """Construct and return an argument parser."""
     epilog = Examples + "\n" + Version
@@ -229,6 +370,25 @@ def create_argparser() -> argparse.ArgumentParser:
         action='store_false',
         help="don't query for user input (i.e. passwords or when overwriting duplicate files); use with care since overwriting files or ignoring passwords could be unintended",
     )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        '--stats',
+        action='store_const',
+        const='text',
+        help="print the time of each phase of the archive operations and the CPU time and memory usage of archive programs to standard error",
+    )
+    group.add_argument(
+        '--stats-json',
+        action='store_const',
+        const='json',
+        dest='stats',
+        help="like --stats, but print the statistics as one JSON line",
+    )
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help="show the progress of archive operations with the bytes read and written, the rate and the estimated remaining time on standard error; archives handled by parallel jobs are not shown",
+    )
     subparsers = parser.add_subparsers(
         help='the archive command; type "patool COMMAND -h" for command-specific help',
         dest='command',
@@ -244,6 +404,27 @@ def create_argparser() -> argparse.ArgumentParser:
         '--format',
         help="archive format (e.g., 7z, tar, rar) - auto detected if not provided",
     )
+    parser_extract.add_argument(
+        '--member',
+        action='append',
+        dest='members',
+        metavar='GLOB',
+        help="only extract archive members matching this name or glob pattern; can be given multiple times",
+    )
+    parser_extract.add_argument(
+        '--incremental',
+        action='store_true',
+        help="skip members that are already extracted to the output directory, e.g. after an interrupted extraction; needs --outdir",
+    )
+    parser_extract.add_argument(
+        '--space-margin',
+        type=space_margin_type,
+        default=DefaultSpaceMargin,
+        metavar='FRACTION',
+        help="fail before extracting if the extracted size plus this fraction of it is larger than the free disk space; 'none' disables the check (default: %(default)s)",
+    )
+    add_jobs_argument(parser_extract)
+    add_threads_argument(parser_extract)
     parser_extract.add_argument('archive', nargs='+', help="an archive file")
     # list
     parser_list = subparsers.add_parser(
@@ -254,6 +435,12 @@ def create_argparser() -> argparse.ArgumentParser:
         '--format',
         help="archive format (e.g., 7z, tar, rar) - auto detected if not provided",
     )
+    parser_list.add_argument(
+        '--cached',
+        action='store_true',
+        help="use the persistent listing cache; archives are only listed again when they change",
+    )
+    add_jobs_argument(parser_list)
     parser_list.add_argument('archive', nargs='+', help="an archive file")
     # create
     parser_create = subparsers.add_parser('create', help='create an archive')
@@ -262,6 +449,18 @@ def create_argparser() -> argparse.ArgumentParser:
         '--format',
         help="archive format (e.g., 7z, tar, rar) - auto detected if not provided",
     )
+    add_threads_argument(parser_create)
+    parser_create.add_argument(
+        '--method',
+        choices=CompressionMethods,
+        help="compression method of the archive members; only programs supporting it are used",
+    )
+    parser_create.add_argument(
+        '--level',
+        type=level_type,
+        metavar='0-9',
+        help="compression level from 0 (fastest) to 9 (best compression)",
+    )
     parser_create.add_argument(
         'archive',
         help="the archive file; the file extension determines the archive program",
@@ -278,7 +477,34 @@ def create_argparser() -> argparse.ArgumentParser:
         '--format',
         help="archive format (e.g., 7z, tar, rar) - auto detected if not provided",
     )
+    add_jobs_argument(parser_test)
+    add_threads_argument(parser_test)
     parser_test.add_argument('archive', nargs='+', help='an archive file')
+    # cat
+    parser_cat = subparsers.add_parser(
+        'cat', help='write the contents of an archive member to standard output'
+    )
+    parser_cat.add_argument('--password', help="password for encrypted files")
+    parser_cat.add_argument(
+        '--format',
+        help="archive format (e.g., 7z, tar, rar) - auto detected if not provided",
+    )
+    parser_cat.add_argument('archive', help='the archive file')
+    parser_cat.add_argument(
+        'member',
+        nargs='?',
+        help='the member name; can be omitted for archives with only one file',
+    )
+    # index
+    parser_index = subparsers.add_parser(
+        'index',
+        help='write an index of TAR archives to extract single members faster',
+    )
+    parser_index.add_argument(
+        '--format',
+        help="archive format (e.g., 7z, tar, rar) - auto detected if not provided",
+    )
+    parser_index.add_argument('archive', nargs='+', help='a TAR archive file')
     # repack
     parser_repack = subparsers.add_parser(
         'repack', help='repack an archive to a different format'
@@ -291,15 +517,53 @@ def create_argparser() -> argparse.ArgumentParser:
     )
     parser_diff.add_argument('archive1', help='the first archive file')
     parser_diff.add_argument('archive2', help='the second archive file')
+    parser_diff.add_argument(
+        '--summary',
+        action='store_true',
+        help="only list added (A), removed (D) and changed (M) members without reading their contents",
+    )
     # search
     parser_search = subparsers.add_parser(
         'search', help="search contents of archive members"
     )
     parser_search.add_argument('--password', help="password for encrypted files")
+    parser_search.add_argument(
+        '--stream',
+        action='store_true',
+        help="search archive members while decompressing them instead of extracting the archive; skips binary members",
+    )
+    parser_search.add_argument(
+        '--max-count',
+        '-m',
+        type=positive_int_type,
+        metavar='NUM',
+        help="stop searching a member after NUM matching lines",
+    )
+    add_jobs_argument(
+        parser_search,
+        help_text="number of ZIP archive members to search in parallel with --stream (default: number of CPUs)",
+    )
     parser_search.add_argument('pattern', help='the grep(1) compatible search pattern')
     parser_search.add_argument('archive', help='the archive file')
     # formats
     subparsers.add_parser('formats', help="show supported archive formats")
+    # cache
+    parser_cache = subparsers.add_parser(
+        'cache',
+        help="show or update the cache of archive program capabilities and listings",
+    )
+    parser_cache.add_argument(
+        'action',
+        nargs='?',
+        default='show',
+        choices=('show', 'warm', 'clear'),
+        help="show the cache contents (the default), warm the cache by checking all archive programs, or clear the cache",
+    )
+    parser_cache.add_argument(
+        'archive',
+        nargs='*',
+        help="with clear, only remove the cached listings of these archives",
+    )
     # version
     subparsers.add_parser('version', help="print version information")
     # optional bash completion
@@ -312,6 +576,18 @@ def create_argparser() -> argparse.ArgumentParser:
     return parser
 
 
+def print_stats(collected: stats.Stats, command: str, format: str) -> None:
+    """Print statistics of a command to stderr as text or JSON line."""
+    if format == 'json':
+        import json  # noqa: PLC0415
+
+        data = {'command': command, **collected.as_dict()}
+        print(json.dumps(data), file=sys.stderr)
+    else:
+        print(f"{command} statistics:", file=sys.stderr)
+        print(collected.format_text(), file=sys.stderr)
+
+
 def main(args=None) -> int:
     """Parse options and execute commands."""
     res = 0
@@ -320,8 +596,16 @@ def main(args=None) -> int:
         pargs = argparser.parse_args(args=args)
         if pargs.quiet:
             pargs.verbosity = -pargs.quiet
-        # run subcommand function
-        res = globals()[f"run_{pargs.command}"](pargs)
+        context = collect_stats() if pargs.stats else contextlib.nullcontext()
+        if pargs.progress:
+            reporter = report_progress(progress.ProgressBar())
+        else:
+            reporter = contextlib.nullcontext()
+        with context as collected, reporter:
+            # run subcommand function
+            res = globals()[f"run_{pargs.command}"](pargs)
+        if collected is not None:
+            print_stats(collected, pargs.command, pargs.stats)
     except KeyboardInterrupt:
         log_error("aborted")
         res = 1
@@ -0,0 +1,294 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Compare archives by their member listings before reading any content.
+
+Members with the same type, size and CRC32 checksum are equal. Without
+checksums, members with the same type, size and modification time are
+equal, unless all files of both archives have the same modification time
+like in reproducible builds with a fixed SOURCE_DATE_EPOCH. Only the
+remaining members are extracted and compared with the diff(1) program.
+"""
+
+import glob
+import os
+import sys
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple
+from . import fileutil, util
+from .entries import ArchiveEntry, EntryDirectory
+
+
+class Changes(NamedTuple):
+    """The member names that differ between two archives."""
+
+    # names of members only in the second archive
+    added: list[str]
+    # names of members only in the first archive
+    removed: list[str]
+    # pairs of (first, second) names of members that differ or whose
+    # metadata is not sufficient to compare them
+    changed: list[tuple[str, str]]
+
+
+def diff_archives(
+    archive1: str,
+    archive2: str,
+    summary: bool = False,
+    verbosity: int = 0,
+    interactive: bool = True,
+) -> int:
+    """Show the differences between two archives, either as a summary of
+    added, removed and changed members or with diff(1).
+    @return: 0 if the archives are the same, else 1
+    """
+    try:
+        entries1 = get_entries(archive1, verbosity)
+        entries2 = get_entries(archive2, verbosity)
+    except util.PatoolError:
+        if summary:
+            raise
+        # the member listing is not supported, compare all content
+        return diff_extracted(archive1, archive2, interactive)
+    root1 = get_root(entries1)
+    root2 = get_root(entries2)
+    if root1 is not None and root2 is not None:
+        # when both archives only have one top level member, compare those
+        changes = compare_entries(
+            get_relative_entries(entries1, root1),
+            get_relative_entries(entries2, root2),
+        )
+    else:
+        root1 = root2 = ""
+        changes = compare_entries(entries1, entries2)
+    if not (changes.added or changes.removed or changes.changed):
+        return 0
+    if summary:
+        write_summary(changes)
+        return 1
+    return diff_members(
+        archive1,
+        archive2,
+        (root1, root2),
+        changes,
+        (count_files(entries1), count_files(entries2)),
+        interactive,
+    )
+
+
+def get_entries(archive: str, verbosity: int) -> dict[str, ArchiveEntry]:
+    """Get the archive entries by their names without leading "./" and
+    trailing slashes.
+    """
+    from . import _iter_archive  # noqa: PLC0415
+
+    entries = {}
+    for entry in _iter_archive(archive, verbosity=verbosity - 1):
+        name = entry.name.removeprefix("./").rstrip("/")
+        if name:
+            entries[name] = entry
+    return entries
+
+
+def get_relative_entries(
+    entries: dict[str, ArchiveEntry], root: str
+) -> dict[str, ArchiveEntry]:
+    """Get the entries by their names relative to the given top level member.
+    The top level member itself has the empty name.
+    """
+    relative = {"": entries.get(root, ArchiveEntry(root, type=EntryDirectory))}
+    prefix = root + "/"
+    for name, entry in entries.items():
+        if name.startswith(prefix):
+            relative[name[len(prefix) :]] = entry
+    return relative
+
+
+def count_files(entries: dict[str, ArchiveEntry]) -> int:
+    """Count the entries that are not directories."""
+    return sum(1 for entry in entries.values() if entry.type != EntryDirectory)
+
+
+def get_root(names: Iterable[str]) -> str | None:
+    """Get the top level member name all given names share, or None."""
+    roots = {name.partition("/")[0] for name in names}
+    return roots.pop() if len(roots) == 1 else None
+
+
+def compare_entries(
+    entries1: dict[str, ArchiveEntry], entries2: dict[str, ArchiveEntry]
+) -> Changes:
+    """Compare the entries of two archives by their names and metadata.
+    Directories are only compared by name, like diff(1) does.
+    """
+    changes = Changes([], [], [])
+    use_mtime = has_distinct_mtimes([*entries1.values(), *entries2.values()])
+    for key in sorted(entries1.keys() | entries2.keys()):
+        entry1 = entries1.get(key)
+        entry2 = entries2.get(key)
+        if entry1 is not None and entry1.type == EntryDirectory:
+            entry1 = None
+        if entry2 is not None and entry2.type == EntryDirectory:
+            entry2 = None
+        if entry1 is None and entry2 is not None:
+            changes.added.append(entry2.name)
+        elif entry2 is None and entry1 is not None:
+            changes.removed.append(entry1.name)
+        elif entry1 is not None and entry2 is not None:
+            if not is_same_entry(entry1, entry2, use_mtime):
+                changes.changed.append((entry1.name, entry2.name))
+    return changes
+
+
+def has_distinct_mtimes(entries: Sequence[ArchiveEntry]) -> bool:
+    """Check if the files have more than one modification time, so that
+    equal modification times indicate unchanged files.
+    """
+    mtimes = {entry.mtime for entry in entries if entry.type != EntryDirectory}
+    return len(mtimes) > 1
+
+
+def is_same_entry(
+    entry1: ArchiveEntry, entry2: ArchiveEntry, use_mtime: bool = True
+) -> bool:
+    """Check if two entries are equal by their metadata. Without
+    checksums, the modification times are compared if use_mtime is True.
+    Entries with unknown sizes are never equal.
+    """
+    if entry1.type != entry2.type:
+        return False
+    if entry1.size is None or entry1.size != entry2.size:
+        return False
+    if entry1.crc is not None and entry2.crc is not None:
+        return entry1.crc == entry2.crc
+    if use_mtime and entry1.mtime is not None and entry2.mtime is not None:
+        return entry1.mtime == entry2.mtime
+    return False
+
+
+def write_summary(changes: Changes) -> None:
+    """Write one line for each added (A), removed (D) or changed (M) member."""
+    lines = [f"A {name}" for name in changes.added]
+    lines.extend(f"D {name}" for name in changes.removed)
+    lines.extend(f"M {name}" for dummy, name in changes.changed)
+    for line in sorted(lines, key=lambda line: line[2:]):
+        sys.stdout.write(f"{line}\n")
+    sys.stdout.flush()
+
+
+def diff_members(
+    archive1: str,
+    archive2: str,
+    roots: tuple[str, str],
+    changes: Changes,
+    num_files: tuple[int, int],
+    interactive: bool,
+) -> int:
+    """Extract the changed members of both archives and compare them
+    with diff(1).
+    """
+    diff = get_diff_program()
+    names1 = changes.removed + [name for name, dummy in changes.changed]
+    names2 = changes.added + [name for dummy, name in changes.changed]
+    tmpdir1 = fileutil.tmpdir()
+    try:
+        extract_members(archive1, tmpdir1, names1, num_files[0], interactive)
+        tmpdir2 = fileutil.tmpdir()
+        try:
+            extract_members(archive2, tmpdir2, names2, num_files[1], interactive)
+            diffpath1 = get_diffpath(tmpdir1, roots[0])
+            diffpath2 = get_diffpath(tmpdir2, roots[1])
+            return util.run_checked(
+                [diff, "-urN", diffpath1, diffpath2], verbosity=1, ret_ok=(0, 1)
+            )
+        finally:
+            fileutil.rmtree(tmpdir2)
+    finally:
+        fileutil.rmtree(tmpdir1)
+
+
+def extract_members(
+    archive: str, outdir: str, names: Sequence[str], num_files: int, interactive: bool
+) -> None:
+    """Extract the archive members with the given names. If all files are
+    selected, the whole archive is extracted.
+    """
+    from . import _extract_archive  # noqa: PLC0415
+
+    if not names:
+        return
+    if len(names) >= num_files:
+        # this also supports archive programs without member selection,
+        # e.g. for single file archives
+        members = None
+    else:
+        # names are matched as glob patterns
+        members = [glob.escape(name) for name in names]
+    _extract_archive(
+        archive, outdir=outdir, members=members, verbosity=-1, interactive=interactive
+    )
+
+
+def get_diffpath(tmpdir: str, root: str) -> str:
+    """Get the path to compare in an extraction directory. A missing path
+    is created since diff(1) only treats files as empty when they are absent.
+    """
+    path = os.path.join(tmpdir, root) if root else tmpdir
+    if not os.path.exists(path):
+        os.makedirs(path)
+    return path
+
+
+def diff_extracted(archive1: str, archive2: str, interactive: bool) -> int:
+    """Extract both archives in temporary directories and compare them
+    recursively with diff(1).
+    """
+    from . import _extract_archive  # noqa: PLC0415
+
+    diff = get_diff_program()
+    tmpdir1 = fileutil.tmpdir()
+    try:
+        path1 = _extract_archive(
+            archive1, outdir=tmpdir1, verbosity=-1, interactive=interactive
+        )
+        entries1 = os.listdir(tmpdir1)
+        tmpdir2 = fileutil.tmpdir()
+        try:
+            path2 = _extract_archive(
+                archive2, outdir=tmpdir2, verbosity=-1, interactive=interactive
+            )
+            entries2 = os.listdir(tmpdir2)
+            if len(entries1) == 1 and len(entries2) == 1:
+                # when both archives only have one single entry, compare those
+                diffpath1 = os.path.join(path1, entries1[0])
+                diffpath2 = os.path.join(path2, entries2[0])
+            else:
+                diffpath1 = path1
+                diffpath2 = path2
+            return util.run_checked(
+                [diff, "-urN", diffpath1, diffpath2], verbosity=1, ret_ok=(0, 1)
+            )
+        finally:
+            fileutil.rmtree(tmpdir2)
+    finally:
+        fileutil.rmtree(tmpdir1)
+
+
+def get_diff_program() -> str:
+    """Get the diff(1) program or raise PatoolError if it is not installed."""
+    diff = util.find_program("diff")
+    if not diff:
+        msg = "The diff(1) program is required for showing archive differences, please install it."
+        raise util.PatoolError(msg)
+    return diff
@@ -0,0 +1,188 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Archive entry records and helper functions to parse archive listings."""
+
+import fnmatch
+import stat
+import time
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple
+
+# Types of archive entries
+EntryFile: str = "file"
+EntryDirectory: str = "dir"
+EntrySymlink: str = "symlink"
+EntryHardlink: str = "hardlink"
+EntryOther: str = "other"
+
+
+class ArchiveEntry(NamedTuple):
+    """A member of an archive. Values that an archive format or program
+    does not provide are None.
+    """
+
+    # the member name, directories can end with a slash
+    name: str
+    # the uncompressed size in bytes
+    size: int | None = None
+    # the compressed size in bytes
+    compressed_size: int | None = None
+    # the modification time in seconds since the epoch
+    mtime: float | None = None
+    # the permission bits, e.g. 0o644
+    mode: int | None = None
+    # one of EntryFile, EntryDirectory, EntrySymlink, EntryHardlink or EntryOther
+    type: str = EntryFile
+    # the CRC32 checksum of the uncompressed data
+    crc: int | None = None
+
+
+def is_dir_name(name: str) -> bool:
+    """Check if a member name denotes a directory."""
+    return name.endswith("/")
+
+
+def select_members(
+    entries: Iterable[ArchiveEntry], patterns: Sequence[str]
+) -> list[str]:
+    """Get the names of archive members matching one of the given glob
+    patterns. Members inside of a matching directory are selected, too.
+    The wildcard "*" also matches slashes.
+    """
+    patterns = [pattern.rstrip("/") for pattern in patterns]
+    # patterns without wildcards are looked up without matching each one
+    literals = {pattern for pattern in patterns if not _has_wildcards(pattern)}
+    wildcards = [pattern for pattern in patterns if _has_wildcards(pattern)]
+    names = []
+    for entry in entries:
+        parts = entry.name.rstrip("/").split("/")
+        # check the member name and the names of its parent directories
+        paths = ["/".join(parts[:i]) for i in range(len(parts), 0, -1)]
+        if any(path in literals for path in paths) or any(
+            fnmatch.fnmatchcase(path, p) for path in paths for p in wildcards
+        ):
+            names.append(entry.name)
+    return names
+
+
+def _has_wildcards(pattern: str) -> bool:
+    """Check if a glob pattern has wildcard characters."""
+    return any(char in pattern for char in "*?[")
+
+
+def parse_mode(value: str) -> tuple[int | None, str]:
+    """Parse a mode string like "-rw-r--r--" of ls(1) output.
+    @return: tuple (permission bits, entry type)
+    """
+    if len(value) < 10:
+        return None, EntryFile
+    mode = 0
+    for char, bit in zip(value[1:10], _ModeBits, strict=True):
+        # upper case S and T mark special bits without the execute bit
+        if char not in "-ST":
+            mode |= bit
+    if value[3] in "sS":
+        mode |= stat.S_ISUID
+    if value[6] in "sS":
+        mode |= stat.S_ISGID
+    if value[9] in "tT":
+        mode |= stat.S_ISVTX
+    return mode, _ModeTypes.get(value[0], EntryOther)
+
+
+# permission bits in the order of ls(1) mode strings
+_ModeBits: tuple[int, ...] = (
+    stat.S_IRUSR,
+    stat.S_IWUSR,
+    stat.S_IXUSR,
+    stat.S_IRGRP,
+    stat.S_IWGRP,
+    stat.S_IXGRP,
+    stat.S_IROTH,
+    stat.S_IWOTH,
+    stat.S_IXOTH,
+)
+
+# entry types of the first character in ls(1) mode strings
+_ModeTypes: dict[str, str] = {
+    "-": EntryFile,
+    "d": EntryDirectory,
+    "l": EntrySymlink,
+    "h": EntryHardlink,
+}
+
+
+def get_mode_string(mode: int | None, entry_type: str) -> str:
+    """Get a mode string like "-rw-r--r--" of ls(1) output.
+    Unknown permission bits are shown as question marks.
+    """
+    type_char = next(
+        (char for char, value in _ModeTypes.items() if value == entry_type), "?"
+    )
+    if mode is None:
+        return type_char + "?" * len(_ModeBits)
+    return type_char + "".join(
+        char if mode & bit else "-"
+        for char, bit in zip("rwxrwxrwx", _ModeBits, strict=True)
+    )
+
+
+def format_entry(entry: ArchiveEntry) -> str:
+    """Format an archive entry as a listing line with mode string, size,
+    modification time and name.
+    """
+    size = "" if entry.size is None else str(entry.size)
+    if entry.mtime is None:
+        mtime = ""
+    else:
+        mtime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.mtime))
+    mode = get_mode_string(entry.mode, entry.type)
+    return f"{mode} {size:>12} {mtime:19} {entry.name}"
+
+
+def get_mode_type(mode: int) -> str:
+    """Get the entry type for st_mode values."""
+    if stat.S_ISDIR(mode):
+        return EntryDirectory
+    if stat.S_ISLNK(mode):
+        return EntrySymlink
+    if stat.S_ISREG(mode) or not stat.S_IFMT(mode):
+        return EntryFile
+    return EntryOther
+
+
+def parse_datetime(value: str, format: str) -> float | None:
+    """Parse a local date and time string.
+    @return: seconds since the epoch or None if the value is invalid
+    """
+    # cut off fractions of seconds that strptime cannot parse
+    value, _sep, fraction = value.partition(".")
+    try:
+        timestamp = time.mktime(time.strptime(value, format))
+    except (ValueError, OverflowError):
+        return None
+    if fraction.isdigit():
+        timestamp += float(f"0.{fraction}")
+    return timestamp
+
+
+def dos_datetime(date_time: tuple[int, int, int, int, int, int]) -> float | None:
+    """Convert a ZIP date time tuple in local time to seconds since the epoch."""
+    import datetime  # noqa: PLC0415
+
+    try:
+        return datetime.datetime(*date_time).timestamp()
+    except (ValueError, OverflowError):
+        return None
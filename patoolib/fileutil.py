@@ -18,10 +18,9 @@ import os
 import sys
 import shutil
 import stat
-import tempfile
 from collections.abc import Sequence, Callable
 from .log import log_info, log_warning, log_error
-from .util import PatoolError
+from .util import PatoolError, command_runner
 
 
 def check_existing_filename(filename: str, onlyfiles: bool = True) -> None:
@@ -76,7 +75,13 @@ def get_filesize(filename: str) -> int:
 
 def tmpdir(dir: str | None = None, prefix: str = "Unpack_") -> str:
     """Return a temporary directory for extraction."""
-    return tempfile.mkdtemp(suffix="", prefix=prefix, dir=dir)
+    import tempfile  # noqa: PLC0415
+
+    directory = tempfile.mkdtemp(suffix="", prefix=prefix, dir=dir)
+    runner = command_runner.get()
+    if runner is not None:
+        runner.add_tmpdir(directory)
+    return directory
 
 
 def stripext(filename: str) -> str:
@@ -139,6 +144,15 @@ def link_or_copy(src: str, dst: str, verbosity: int = 0) -> None:
             raise PatoolError(f"error copying {src} -> {dst}") from err
 
 
+def get_cwd_path(cwd: str | None, filename: str) -> str:
+    """Get the path of a filename that is relative to the directory cwd.
+    If cwd is None, the filename is relative to the current working directory.
+    """
+    if cwd is None:
+        return filename
+    return os.path.join(cwd, filename)
+
+
 def chdir(directory: str) -> str | None:
     """Remember and return current directory before calling os.chdir().
     If the current directory could not be determined, return None.
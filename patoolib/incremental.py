@@ -0,0 +1,289 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Incremental extraction that skips members which are already extracted.
+
+A journal file in the output directory records the archive size and
+modification time, the archive entries and the size and modification time
+of each extracted file. When the archive did not change and all files are
+unchanged, nothing is extracted and the archive is not even listed.
+Otherwise members are skipped when a file with the member size and
+CRC32 checksum exists, or with the member size and modification time
+if the archive listing has no checksums. Only the remaining members are
+extracted.
+
+Before extracting, the journal lists the pending members. An interrupted
+extraction can replace those files on the next run, while other existing
+files are never overwritten.
+"""
+
+import glob
+import os
+import stat
+import zlib
+from collections.abc import Sequence
+from typing import Any
+from . import cache, log, util
+from .entries import ArchiveEntry, EntryDirectory, EntryFile, select_members
+
+# increase this when the layout of the journal data changes
+JournalVersion: int = 1
+
+# Maximum difference in seconds between the listed and the extracted
+# modification time, since ZIP archives store times in two second steps.
+MtimeTolerance: float = 2.0
+
+# read files in chunks of this size for CRC32 checksums
+ReadSize: int = 1024 * 1024
+
+
+def get_journal_file(archive: str, outdir: str) -> str:
+    """Get the journal file of an archive in the output directory."""
+    return os.path.join(outdir, f".patool-{os.path.basename(archive)}.journal")
+
+
+def get_archive_id(archive: str) -> list[Any]:
+    """Get the absolute path, size and modification time of an archive."""
+    st = os.stat(archive)
+    return [os.path.abspath(archive), st.st_size, st.st_mtime_ns]
+
+
+def read_journal(filename: str) -> dict[str, Any] | None:
+    """Read a journal file.
+    @return: the journal, or None if there is no valid journal
+    """
+    data = cache.read_json(filename)
+    if not isinstance(data, dict) or data.get("version") != JournalVersion:
+        return None
+    return data
+
+
+def is_current(
+    journal: dict[str, Any], archive: str, members: Sequence[str] | None
+) -> bool:
+    """Check if a journal is for the current archive and member patterns."""
+    return journal["id"] == get_archive_id(archive) and journal["members"] == (
+        None if members is None else list(members)
+    )
+
+
+def write_journal(
+    filename: str,
+    archive: str,
+    members: Sequence[str] | None,
+    entries: list[ArchiveEntry],
+    files: dict[str, list[int]],
+    pending: list[str],
+) -> None:
+    """Write the journal of an archive. It is complete if no members are pending."""
+    data = {
+        "version": JournalVersion,
+        "id": get_archive_id(archive),
+        "members": None if members is None else list(members),
+        "complete": not pending,
+        "entries": [list(entry) for entry in entries],
+        "files": files,
+        "pending": pending,
+    }
+    cache.write_json(filename, data)
+
+
+def get_crc(filename: str) -> int:
+    """Get the CRC32 checksum of a file."""
+    crc = 0
+    with open(filename, 'rb') as fileobj:
+        while data := fileobj.read(ReadSize):
+            crc = zlib.crc32(data, crc)
+    return crc
+
+
+def get_path(outdir: str, entry: ArchiveEntry) -> str | None:
+    """Get the extracted path of an entry, or None if it is outside of the
+    output directory.
+    """
+    path = os.path.normpath(os.path.join(outdir, entry.name))
+    if os.path.commonpath([os.path.abspath(outdir), os.path.abspath(path)]) != (
+        os.path.abspath(outdir)
+    ):
+        return None
+    return path
+
+
+def is_extracted(outdir: str, entry: ArchiveEntry, recorded: list[int] | None) -> bool:
+    """Check if an archive entry is already extracted. Recorded are the size
+    and modification time of the file after its last extraction.
+    """
+    path = get_path(outdir, entry)
+    if path is None:
+        return False
+    if entry.type == EntryDirectory:
+        return os.path.isdir(path)
+    if entry.type != EntryFile:
+        return os.path.lexists(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if not stat.S_ISREG(st.st_mode):
+        return False
+    if entry.size is not None and st.st_size != entry.size:
+        return False
+    if recorded == [st.st_size, st.st_mtime_ns]:
+        # the file is unchanged since it has been extracted
+        return True
+    if entry.crc is not None:
+        # not all archive programs keep the modification time
+        return get_crc(path) == entry.crc
+    return entry.mtime is not None and abs(st.st_mtime - entry.mtime) <= MtimeTolerance
+
+
+def get_file_stats(outdir: str, entries: list[ArchiveEntry]) -> dict[str, list[int]]:
+    """Get the size and modification time of the extracted files."""
+    files = {}
+    for entry in entries:
+        path = get_path(outdir, entry)
+        if entry.type != EntryFile or path is None:
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        files[entry.name] = [st.st_size, st.st_mtime_ns]
+    return files
+
+
+def remove_owned(
+    archive: str, outdir: str, todo: list[ArchiveEntry], owned: set[str]
+) -> None:
+    """Remove files of members that are extracted again. Only files that
+    have been extracted or were pending in an earlier extraction are
+    removed.
+    """
+    for entry in todo:
+        path = get_path(outdir, entry)
+        if path is None or entry.type == EntryDirectory or not os.path.lexists(path):
+            continue
+        if entry.name not in owned:
+            msg = f"`{path}' exists and has not been extracted from {archive}"
+            raise util.PatoolError(msg)
+        if os.path.isdir(path) and not os.path.islink(path):
+            msg = f"`{path}' is a directory, but {archive} has a file with this name"
+            raise util.PatoolError(msg)
+        os.remove(path)
+
+
+def extract_archive(
+    archive: str,
+    outdir: str,
+    verbosity: int = 0,
+    interactive: bool = True,
+    program: str | None = None,
+    format: str | None = None,
+    password: str | None = None,
+    threads: int | None = None,
+    members: Sequence[str] | None = None,
+) -> str:
+    """Extract the members of an archive that are not yet extracted to
+    the output directory.
+    @return: the output directory
+    """
+    from . import _extract_archive, _iter_archive  # noqa: PLC0415
+
+    journal_file = get_journal_file(archive, outdir)
+    journal = read_journal(journal_file)
+    # the files that have been extracted or were pending before
+    owned: set[str] = set()
+    files: dict[str, list[int]] = {}
+    if journal is not None:
+        owned.update(journal["files"], journal["pending"])
+        if not is_current(journal, archive, members):
+            journal = None
+        else:
+            files = journal["files"]
+    if journal is not None and journal["complete"]:
+        # the archive has not changed since the last extraction
+        entries = [ArchiveEntry(*values) for values in journal["entries"]]
+    else:
+        entries = list(
+            _iter_archive(
+                archive, verbosity=verbosity - 1, format=format, password=password
+            )
+        )
+        if members is not None:
+            names = set(select_members(entries, members))
+            entries = [entry for entry in entries if entry.name in names]
+            if not entries:
+                msg = f"no members of {archive} match " + ", ".join(map(repr, members))
+                raise util.PatoolError(msg)
+    todo = [
+        entry
+        for entry in entries
+        if not is_extracted(outdir, entry, files.get(entry.name))
+    ]
+    if not todo:
+        if journal is None or not journal["complete"]:
+            write_journal(
+                journal_file,
+                archive,
+                members,
+                entries,
+                get_file_stats(outdir, entries),
+                [],
+            )
+        if verbosity >= 0:
+            log.log_info(
+                f"... all {len(entries)} members of {archive} are already "
+                f"extracted to `{outdir}'."
+            )
+        return outdir
+    names = [entry.name for entry in todo]
+    remove_owned(archive, outdir, todo, owned)
+    todo_names = set(names)
+    done = [entry for entry in entries if entry.name not in todo_names]
+    write_journal(
+        journal_file, archive, members, entries, get_file_stats(outdir, done), names
+    )
+    if verbosity >= 0:
+        log.log_info(
+            f"... extracting {len(todo)} of {len(entries)} members of {archive}."
+        )
+    if members is None and len(todo) == len(entries):
+        # this also supports archive programs without member selection
+        patterns = None
+    else:
+        # directories are not selected, since that selects all their members
+        patterns = [
+            glob.escape(entry.name) for entry in todo if entry.type != EntryDirectory
+        ]
+    if patterns is None or patterns:
+        _extract_archive(
+            archive,
+            verbosity=verbosity,
+            interactive=interactive,
+            outdir=outdir,
+            program=program,
+            format=format,
+            password=password,
+            threads=threads,
+            members=patterns,
+        )
+    for entry in todo:
+        path = get_path(outdir, entry)
+        if entry.type == EntryDirectory and path is not None:
+            # create empty directories
+            os.makedirs(path, exist_ok=True)
+    write_journal(
+        journal_file, archive, members, entries, get_file_stats(outdir, entries), []
+    )
+    return outdir
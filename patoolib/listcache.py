@@ -0,0 +1,209 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Persistent cache of archive member listings.
+
+Listing an archive runs an archive program or decompresses the archive.
+When the cache is used, the member entries are stored in a GZIP compressed
+JSON file in the "listings" subdirectory of the cache directory. The file
+name consists of the device, inode, size and modification time of the
+archive, so a changed archive is listed again. Like the capabilities
+cache, the listing cache is disabled by the PATOOL_NO_CACHE environment
+variable.
+
+The least recently used listings are removed when the size of all listings
+exceeds MaxCacheSize, which can be changed with the environment variable
+PATOOL_LISTING_CACHE_SIZE in megabytes.
+"""
+
+import os
+from collections.abc import Iterable, Iterator
+from . import cache, log
+from .entries import ArchiveEntry
+
+# increase this when the layout of the listing data changes
+ListingVersion: int = 1
+
+ListingsDirname: str = "listings"
+
+ListingSuffix: str = ".json.gz"
+
+# the default maximum size of all cached listings in bytes
+MaxCacheSize: int = 64 * 1024 * 1024
+
+
+def get_listings_dir() -> str:
+    """Get the directory of the cached listings."""
+    return os.path.join(cache.get_cache_dir(), ListingsDirname)
+
+
+def get_max_cache_size() -> int:
+    """Get the maximum size of all cached listings in bytes."""
+    value = os.environ.get("PATOOL_LISTING_CACHE_SIZE")
+    if value:
+        try:
+            return int(value) * 1024 * 1024
+        except ValueError:
+            log.log_warning(f"ignoring invalid PATOOL_LISTING_CACHE_SIZE {value!r}")
+    return MaxCacheSize
+
+
+def get_archive_prefix(archive: str) -> str:
+    """Get the listing file name prefix of all versions of an archive."""
+    st = os.stat(archive)
+    return f"{st.st_dev:x}-{st.st_ino:x}-"
+
+
+def get_listing_file(archive: str) -> str:
+    """Get the listing file of the current version of an archive."""
+    st = os.stat(archive)
+    key = f"{get_archive_prefix(archive)}{st.st_size:x}-{st.st_mtime_ns:x}"
+    return os.path.join(get_listings_dir(), key + ListingSuffix)
+
+
+def read_listing(
+    archive: str, format: str, compression: str | None
+) -> list[ArchiveEntry] | None:
+    """Read the cached entries of an archive.
+    @return: the entries, or None if the archive listing is not cached
+    """
+    if not cache.is_enabled():
+        return None
+    filename = get_listing_file(archive)
+    data = cache.read_json(filename, compressed=True)
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != ListingVersion
+        or data.get("format") != format
+        or data.get("compression") != compression
+    ):
+        return None
+    try:
+        # the modification time of listing files orders them by their last use
+        os.utime(filename)
+    except OSError:
+        pass
+    return [ArchiveEntry(*values) for values in data["entries"]]
+
+
+def write_listing(
+    archive: str, format: str, compression: str | None, entries: list[ArchiveEntry]
+) -> None:
+    """Store the entries of an archive, replacing listings of older versions
+    of the archive. Errors are logged as warnings.
+    """
+    if not cache.is_enabled():
+        return
+    filename = get_listing_file(archive)
+    remove_listings(get_archive_prefix(archive))
+    data = {
+        "version": ListingVersion,
+        "format": format,
+        "compression": compression,
+        "entries": [list(entry) for entry in entries],
+    }
+    cache.write_json(filename, data, compressed=True)
+    evict(get_max_cache_size())
+
+
+def iter_listing(
+    archive: str, format: str, compression: str | None, entries: Iterable[ArchiveEntry]
+) -> Iterator[ArchiveEntry]:
+    """Generate archive entries and store them when all entries have been
+    generated without errors.
+    """
+    listing = []
+    for entry in entries:
+        listing.append(entry)
+        yield entry
+    write_listing(archive, format, compression, listing)
+
+
+def get_listing_files() -> list[tuple[str, os.stat_result]]:
+    """Get the cached listing files and their status."""
+    directory = get_listings_dir()
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    files = []
+    for name in names:
+        if not name.endswith(ListingSuffix):
+            continue
+        filename = os.path.join(directory, name)
+        try:
+            files.append((filename, os.stat(filename)))
+        except FileNotFoundError:
+            # removed by another process
+            pass
+    return files
+
+
+def evict(max_size: int) -> None:
+    """Remove the least recently used listings until all listings have at
+    most the given size in bytes.
+    """
+    files = get_listing_files()
+    size = sum(st.st_size for filename, st in files)
+    for filename, st in sorted(files, key=lambda item: item[1].st_mtime_ns):
+        if size <= max_size:
+            break
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            log.log_warning(f"could not remove cache file: {err}")
+            continue
+        size -= st.st_size
+
+
+def remove_listings(prefix: str) -> int:
+    """Remove the listings whose file names start with prefix.
+    @return: the number of removed listings
+    """
+    removed = 0
+    for filename, st in get_listing_files():
+        if os.path.basename(filename).startswith(prefix):
+            try:
+                os.remove(filename)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as err:
+                log.log_warning(f"could not remove cache file: {err}")
+    return removed
+
+
+def invalidate(archive: str) -> int:
+    """Remove the cached listings of an archive.
+    @return: the number of removed listings
+    """
+    return remove_listings(get_archive_prefix(archive))
+
+
+def clear() -> None:
+    """Remove all cached listings."""
+    remove_listings("")
+
+
+def print_listings() -> None:
+    """Print the number and size of the cached listings to stdout."""
+    files = get_listing_files()
+    size = sum(st.st_size for filename, st in files)
+    print("Listing cache directory:", get_listings_dir())
+    print(
+        f"   {len(files)} listings with {size} bytes, "
+        f"at most {get_max_cache_size()} bytes"
+    )
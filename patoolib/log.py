@@ -19,7 +19,6 @@ import sys
 import time
 import locale
 import logging
-import platform
 from . import configuration
 
 
@@ -80,6 +79,8 @@ EnvKeys = ("LANGUAGE", "LC_ALL", "LC_CTYPE", "LANG")
 
 def log_internal_error() -> None:
     """Print internal error message."""
+    import platform  # noqa: PLC0415
+
     now = time.localtime()
     env = os.linesep.join(
         [f"{key}={os.getenv(key)!r}" for key in EnvKeys if os.getenv(key) is not None]
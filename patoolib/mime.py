@@ -16,30 +16,33 @@
 
 import functools
 import os
-import mimetypes
-import subprocess
 from collections.abc import Sequence
-from . import ArchiveMimetypes, ArchiveCompressions
+from typing import TYPE_CHECKING
+from . import ArchiveMimetypes, ArchiveCompressions, signature
 from .log import log_error, log_warning, log_info
 from .util import find_program, backtick
 
+if TYPE_CHECKING:
+    import mimetypes
 
-# internal MIME database
-mimedb: mimetypes.MimeTypes | None = None
 
+@functools.cache
+def get_mimedb() -> "mimetypes.MimeTypes | None":
+    """Get the internal MIME database. It is initialized on first use,
+    since reading the MIME types files of the system takes time.
+    """
+    import mimetypes  # noqa: PLC0415
 
-def init_mimedb() -> None:
-    """Initialize the internal MIME database."""
-    global mimedb  # noqa PLW0603
     try:
         mimedb = mimetypes.MimeTypes(strict=False)
     except Exception as msg:
         log_error(f"could not initialize MIME database: {msg}")
-        return
+        return None
     add_mimedb_data(mimedb)
+    return mimedb
 
 
-def add_mimedb_data(mimedb: mimetypes.MimeTypes) -> None:
+def add_mimedb_data(mimedb: "mimetypes.MimeTypes") -> None:
     """Add missing encodings and mimetypes to MIME database."""
     mimedb.encodings_map['.bz2'] = 'bzip2'
     mimedb.encodings_map['.lzma'] = 'lzma'
@@ -91,7 +94,9 @@ def add_mimedb_data(mimedb: mimetypes.MimeTypes) -> None:
     add_mimetype(mimedb, "application/zstd", ".zst")
 
 
-def add_mimetype(mimedb: mimetypes.MimeTypes, mimetype: str, extension: str) -> None:
+def add_mimetype(
+    mimedb: "mimetypes.MimeTypes", mimetype: str, extension: str
+) -> None:
     """Add or replace a mimetype to be used with the given extension."""
     # If extension is already a common type, strict=True must be used.
     strict = extension in mimedb.types_map[True]
@@ -102,12 +107,17 @@ def add_mimetype(mimedb: mimetypes.MimeTypes, mimetype: str, extension: str) ->
 
 @functools.cache
 def guess_mime(filename: str) -> tuple[str | None, str | None]:
-    """Guess the MIME type of given filename using file(1) and if that
-    fails by looking at the filename extension with the Python mimetypes
-    module.
+    """Guess the MIME type of given filename by looking at the file signature,
+    using file(1) if the signature is not known and if that fails by looking
+    at the filename extension with the Python mimetypes module.
 
     The result of this function is cached.
     """
+    mime, encoding = guess_mime_signature(filename)
+    if mime is not None:
+        # known signatures need no check of the file extension, so the
+        # MIME database is not initialized
+        return mime, encoding
     mime, encoding = guess_mime_file(filename)
     if mime is None:
         # fall back to guessing archive type by file extension
@@ -118,12 +128,37 @@ def guess_mime(filename: str) -> tuple[str | None, str | None]:
         if mime2 != mime:
             log_info(
                 f"Different MIME types detected for {filename}: "
-                f"{mime} by file(1), {mime2} by extension. Preferring {mime}."
+                f"{mime} by file content, {mime2} by extension. Preferring {mime}."
             )
     assert mime is not None or encoding is None
     return mime, encoding
 
 
+def guess_mime_signature(filename: str) -> tuple[str | None, str | None]:
+    """Determine MIME type of filename by looking at the file signature.
+    If the contents of a compressed file cannot be decompressed (e.g.
+    because the decompression module is not available), the result is
+    None so that file(1) is used instead.
+    @return: tuple (mime, encoding)
+    """
+    mime, encoding = None, None
+    if os.path.isfile(filename):
+        try:
+            mime, encoding = signature.guess_mime(filename)
+        except OSError as err:
+            log_warning(f"error reading {filename}: {err}")
+            return None, None
+    if (
+        mime in Mime2Encoding
+        and encoding is None
+        and not signature.can_decompress(Mime2Encoding[mime])
+    ):
+        mime = None
+    if mime not in ArchiveMimetypes:
+        mime, encoding = None, None
+    return mime, encoding
+
+
 Encoding2Mime: dict[str, str] = {
     'gzip': "application/gzip",
     'bzip2': "application/x-bzip2",
@@ -150,6 +185,7 @@ def guess_mime_mimedb(filename: str) -> tuple[str | None, str | None]:
     @return: tuple (mime, encoding)
     """
     mime, encoding = None, None
+    mimedb = get_mimedb()
     if mimedb is not None:
         mime, encoding = mimedb.guess_type(filename, strict=False)
     if mimedb is not None and mime is None and encoding is None:
@@ -197,6 +233,8 @@ def guess_mime_file(filename: str) -> tuple[str | None, str | None]:
                 "--no-sandbox",
                 filename,
             ]
+            import subprocess  # noqa: PLC0415
+
             try:
                 outparts = backtick(cmd).strip().split(";")
                 mime2 = outparts[0].split(" ", 1)[0]
@@ -313,5 +351,3 @@ def guess_mime_file_text(file_prog: str, filename: str) -> str | None:
             return mime
     return None
 
-
-init_mimedb()
@@ -0,0 +1,216 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Run an archive command for multiple archives in parallel.
+
+Each archive is handled in a worker process of a bounded process pool.
+The output of a worker (including the output of archive programs it runs)
+is captured in temporary files and printed when the archive has been
+handled, so that the output of different archives does not interleave.
+"""
+
+import contextlib
+import os
+import sys
+import threading
+from collections.abc import Callable, Iterable, Iterator, Sized
+from typing import Any, NamedTuple
+from . import cache, stats
+from .util import PatoolError
+
+# lock shared by all worker processes, set by _init_worker()
+_worker_lock: Any = None
+
+# lock for threads of processes that are no worker processes
+_thread_lock = threading.Lock()
+
+
+class ArchiveResult(NamedTuple):
+    """The result of handling one archive."""
+
+    # the archive filename
+    archive: str
+    # the return value of the archive function, None on errors
+    result: Any
+    # the error message, or None if the archive was handled successfully
+    error: str | None
+
+
+def get_jobs(jobs: int | None) -> int:
+    """Return the number of parallel jobs to use. If jobs is None,
+    the number of CPUs is used.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs < 1:
+        raise PatoolError(f"invalid number of jobs {jobs}, must be at least 1")
+    return jobs
+
+
+def worker_lock() -> contextlib.AbstractContextManager:
+    """Return a lock to serialize file system changes between worker
+    processes, e.g. choosing and renaming output directories.
+    Outside of worker processes, the lock serializes these changes between
+    threads calling the library.
+    """
+    if _worker_lock is None:
+        return _thread_lock
+    return _worker_lock
+
+
+def _init_worker(lock: Any) -> None:
+    """Initialize a worker process."""
+    global _worker_lock  # noqa PLW0603
+    _worker_lock = lock
+
+
+def run_archives(
+    func: Callable[..., Any],
+    archives: Iterable[str],
+    jobs: int | None = None,
+    **kwargs,
+) -> Iterator[ArchiveResult]:
+    """Call func(archive, **kwargs) for each archive with the given number of
+    parallel jobs. The results are generated in the order the archives
+    have been handled.
+    With more than one job the archive function is called in worker
+    processes with interactive=False, since parallel jobs cannot ask for
+    user input. The statistics of the worker processes are added to the
+    statistics collected by the caller.
+    """
+    jobs = get_jobs(jobs)
+    if isinstance(archives, Sized):
+        # do not start more workers than needed, and run single archives
+        # in this process
+        jobs = min(jobs, len(archives))
+    if jobs <= 1:
+        for archive in archives:
+            yield _run_archive(func, archive, kwargs)
+        return
+    # worker processes are only needed with multiple jobs
+    import concurrent.futures  # noqa: PLC0415
+    import multiprocessing  # noqa: PLC0415
+
+    kwargs["interactive"] = False
+    current_stats = stats.current.get()
+    # limit the number of submitted jobs so that large or lazy iterables
+    # are not consumed at once
+    max_pending = jobs * 2
+    archives = iter(archives)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(multiprocessing.Lock(),)
+    ) as executor:
+        pending: set[concurrent.futures.Future] = set()
+        try:
+            while True:
+                for archive in archives:
+                    pending.add(
+                        executor.submit(
+                            _run_archive_captured,
+                            func,
+                            archive,
+                            kwargs,
+                            current_stats is not None,
+                        )
+                    )
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    result, stdout, stderr, worker_stats = future.result()
+                    _write_output(stdout, stderr)
+                    if worker_stats is not None:
+                        current_stats.merge(worker_stats)
+                    yield result
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
+def _run_archive(
+    func: Callable[..., Any], archive: str, kwargs: dict[str, Any]
+) -> ArchiveResult:
+    """Call the archive function and catch patool errors."""
+    try:
+        return ArchiveResult(archive, func(archive, **kwargs), None)
+    except PatoolError as msg:
+        return ArchiveResult(archive, None, str(msg))
+
+
+def _run_archive_captured(
+    func: Callable[..., Any],
+    archive: str,
+    kwargs: dict[str, Any],
+    collect_stats: bool = False,
+) -> tuple[ArchiveResult, bytes, bytes, stats.Stats | None]:
+    """Call the archive function in a worker process and capture all output
+    written to the stdout and stderr file descriptors.
+    @return: tuple (result, stdout data, stderr data, statistics or None)
+    """
+    import tempfile  # noqa: PLC0415
+
+    context = stats.collect() if collect_stats else contextlib.nullcontext()
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        saved_fds = _redirect_output(out.fileno(), err.fileno())
+        try:
+            with context as worker_stats:
+                result = _run_archive(func, archive, kwargs)
+            # worker processes do not run exit handlers
+            cache.flush()
+        finally:
+            _restore_output(saved_fds)
+        out.seek(0)
+        err.seek(0)
+        return result, out.read(), err.read(), worker_stats
+
+
+def _redirect_output(out_fd: int, err_fd: int) -> tuple[int, int]:
+    """Redirect the stdout and stderr file descriptors.
+    @return: copies of the original file descriptors
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_fds = (os.dup(1), os.dup(2))
+    os.dup2(out_fd, 1)
+    os.dup2(err_fd, 2)
+    return saved_fds
+
+
+def _restore_output(saved_fds: tuple[int, int]) -> None:
+    """Restore the stdout and stderr file descriptors."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for fd, saved_fd in zip((1, 2), saved_fds, strict=True):
+        os.dup2(saved_fd, fd)
+        os.close(saved_fd)
+
+
+def _write_output(stdout: bytes, stderr: bytes) -> None:
+    """Write captured output of a worker process."""
+    # log messages come first, they announce the archive being handled
+    for stream, data in ((sys.stderr, stderr), (sys.stdout, stdout)):
+        if not data:
+            continue
+        stream.flush()
+        buffer = getattr(stream, "buffer", None)
+        if buffer is not None:
+            buffer.write(data)
+            buffer.flush()
+        else:
+            stream.write(data.decode(errors="replace"))
+            stream.flush()
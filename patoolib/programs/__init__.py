@@ -14,9 +14,38 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Standard archive functions for singlefile archives."""
 
+import os
 from collections.abc import Sequence
 from .. import fileutil, util
 
+# Options of compression programs to use the given number of threads.
+ThreadOptions: dict[str, tuple[str, ...]] = {
+    'lbzip2': ('-n', '{}'),
+    'pbzip2': ('-p{}',),
+    'pigz': ('-p', '{}'),
+    'plzip': ('--threads={}',),
+    'xz': ('--threads={}',),
+    'zstd': ('--threads={}',),
+}
+
+# Programs that only use multiple threads for compression.
+CompressionOnlyThreadPrograms: tuple[str, ...] = ('zstd',)
+
+
+def get_thread_options(
+    cmd: str, threads: int | None, decompress: bool = False
+) -> list[str]:
+    """Get options for program cmd to use the given number of threads.
+    Programs that do not support multiple threads get no options.
+    """
+    if not threads:
+        return []
+    progname = fileutil.stripext(os.path.basename(cmd).lower())
+    if decompress and progname in CompressionOnlyThreadPrograms:
+        return []
+    options = ThreadOptions.get(progname, ())
+    return [option.format(threads) for option in options]
+
 
 def extract_singlefile_standard(
     archive: str,
@@ -25,11 +54,13 @@ def extract_singlefile_standard(
     verbosity: int,
     interactive: bool,
     outdir: str,
+    threads: int | None = None,
 ) -> tuple[Sequence[str], dict[str, bool]]:
     """Standard routine to extract a singlefile archive (like gzip)."""
     cmdlist = [util.shell_quote(cmd)]
     if verbosity > 1:
         cmdlist.append('-v')
+    cmdlist.extend(get_thread_options(cmd, threads, decompress=True))
     outfile = fileutil.get_single_outfile(outdir, archive)
     cmdlist.extend(
         ['-c', '-d', '--', util.shell_quote(archive), '>', util.shell_quote(outfile)]
@@ -37,6 +68,20 @@ def extract_singlefile_standard(
     return (cmdlist, {'shell': True})
 
 
+def open_singlefile_standard(
+    archive: str,
+    compression: str | None,
+    cmd: str,
+    verbosity: int,
+    interactive: bool,
+    name: str,
+) -> Sequence[str]:
+    """Standard routine to write the contents of a singlefile archive
+    (like gzip) to standard output.
+    """
+    return [cmd, '-c', '-d', '--', archive]
+
+
 def test_singlefile_standard(
     archive: str, compression: str | None, cmd: str, verbosity: int, interactive: bool
 ) -> Sequence[str]:
@@ -55,11 +100,13 @@ def create_singlefile_standard(
     verbosity: int,
     interactive: bool,
     filenames: Sequence[str],
+    threads: int | None = None,
 ) -> tuple[Sequence[str], dict[str, bool]]:
     """Standard routine to create a singlefile archive (like gzip)."""
     cmdlist = [util.shell_quote(cmd)]
     if verbosity > 1:
         cmdlist.append('-v')
+    cmdlist.extend(get_thread_options(cmd, threads))
     cmdlist.extend(['-c', '--'])
     cmdlist.extend([util.shell_quote(x) for x in filenames])
     cmdlist.extend(['>', util.shell_quote(archive)])
@@ -15,17 +15,26 @@
 """Archive commands for the bzip2 program."""
 
 from .. import util
-from . import extract_singlefile_standard, test_singlefile_standard
+from . import (
+    extract_singlefile_standard,
+    open_singlefile_standard,
+    test_singlefile_standard,
+    get_thread_options,
+)
 
 extract_bzip2 = extract_singlefile_standard
+open_bzip2 = open_singlefile_standard
 test_bzip2 = test_singlefile_standard
 
 
-def create_bzip2(archive, compression, cmd, verbosity, interactive, filenames):
+def create_bzip2(
+    archive, compression, cmd, verbosity, interactive, filenames, threads=None
+):
     """Create a BZIP2 archive."""
     cmdlist = [util.shell_quote(cmd)]
     if verbosity > 1:
         cmdlist.append('-v')
+    cmdlist.extend(get_thread_options(cmd, threads))
     cmdlist.extend(['-c', '-z', '--'])
     cmdlist.extend([util.shell_quote(x) for x in filenames])
     cmdlist.extend(['>', util.shell_quote(archive)])
@@ -14,11 +14,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the clzip program."""
 
-from . import extract_singlefile_standard, test_singlefile_standard
+from . import (
+    extract_singlefile_standard,
+    open_singlefile_standard,
+    test_singlefile_standard,
+)
 from .. import util
 
 
 extract_lzip = extract_singlefile_standard
+open_lzip = open_singlefile_standard
 test_lzip = test_singlefile_standard
 
 
@@ -14,7 +14,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the gzip program."""
 
-from . import extract_singlefile_standard, test_singlefile_standard
+from . import (
+    extract_singlefile_standard,
+    open_singlefile_standard,
+    test_singlefile_standard,
+    get_thread_options,
+)
 from .. import util, fileutil, log
 import os
 import subprocess
@@ -22,11 +27,14 @@ import subprocess
 test_gzip = test_compress = test_singlefile_standard
 
 
-def extract_gzip(archive, compression, cmd, verbosity, interactive, outdir):
+def extract_gzip(
+    archive, compression, cmd, verbosity, interactive, outdir, threads=None
+):
     """Extract given gzip archive."""
     cmdlist = [util.shell_quote(cmd)]
     if verbosity > 1:
         cmdlist.append('-v')
+    cmdlist.extend(get_thread_options(cmd, threads, decompress=True))
     outfile = get_original_filename(cmd, outdir, archive)
     cmdlist.extend(
         ['-c', '-d', '--', util.shell_quote(archive), '>', util.shell_quote(outfile)]
@@ -35,6 +43,7 @@ def extract_gzip(archive, compression, cmd, verbosity, interactive, outdir):
 
 
 extract_compress = extract_singlefile_standard
+open_gzip = open_compress = open_singlefile_standard
 
 
 def get_original_filename(cmd, outdir, archive):
@@ -59,11 +68,14 @@ def get_original_filename(cmd, outdir, archive):
     return outfile
 
 
-def create_gzip(archive, compression, cmd, verbosity, interactive, filenames):
+def create_gzip(
+    archive, compression, cmd, verbosity, interactive, filenames, threads=None
+):
     """Create a GZIP archive."""
     cmdlist = [util.shell_quote(cmd)]
     if verbosity > 1:
         cmdlist.append('-v')
+    cmdlist.extend(get_thread_options(cmd, threads))
     cmdlist.extend(['-c', '--'])
     cmdlist.extend([util.shell_quote(x) for x in filenames])
     cmdlist.extend(['>', util.shell_quote(archive)])
@@ -43,6 +43,19 @@ from .p7zip import (
     test_rar,
     test_cab,
     test_7z,
+    iter_zip,
+    iter_rar,
+    iter_cab,
+    iter_rpm,
+    iter_7z,
+    open_bzip2,
+    open_gzip,
+    open_zip,
+    open_compress,
+    open_rar,
+    open_cab,
+    open_rpm,
+    open_7z,
     create_7z,
     create_zip,
     create_gzip,
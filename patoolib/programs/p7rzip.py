@@ -18,7 +18,7 @@
 """
 
 # ruff: noqa: F401
-from .p7zip import create_7z
+from .p7zip import create_7z, iter_7z, open_7z
 
 
 def extract_7z(archive, compression, cmd, verbosity, interactive, outdir):
@@ -16,9 +16,18 @@
 
 
 def extract_7z(
-    archive, compression, cmd, verbosity, interactive, outdir, password=None
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    outdir,
+    password=None,
+    members=None,
 ):
-    """Extract a 7z archive."""
+    """Extract a 7z archive.
+    If members is given, only the members with those names are extracted.
+    """
     cmdlist = [cmd, 'x']
     if not interactive:
         cmdlist.append('-y')
@@ -26,7 +35,13 @@ def extract_7z(
         cmdlist.append(f'-p{password}')
     elif not interactive:
         cmdlist.append('-p-')
-    cmdlist.extend(['-aou', f'-o{outdir}', '--', archive])
+    cmdlist.extend(['-aou', f'-o{outdir}'])
+    if members:
+        # do not match member names as wildcards
+        cmdlist.append('-spd')
+    cmdlist.extend(['--', archive])
+    if members:
+        cmdlist.extend(members)
     return cmdlist
 
 
@@ -77,6 +92,115 @@ list_bzip2 = list_gzip = list_zip = list_compress = list_rar = list_cab = list_c
 ) = list_wim = list_7z
 
 
+def open_7z(archive, compression, cmd, verbosity, interactive, name, password=None):
+    """Write a member of a 7z archive to standard output."""
+    cmdlist = [cmd, 'e', '-so', '-y']
+    if password:
+        cmdlist.append(f'-p{password}')
+    else:
+        cmdlist.append('-p-')
+    if name:
+        # do not match the member name as wildcard
+        cmdlist.extend(['-spd', '--', archive, name])
+    else:
+        cmdlist.extend(['--', archive])
+    return cmdlist
+
+
+open_zip = open_rar = open_cab = open_chm = open_arj = open_cpio = open_rpm = (
+    open_deb
+) = open_iso = open_udf = open_vhd = open_wim = open_7z
+
+
+def open_7z_singlefile(
+    archive, compression, cmd, verbosity, interactive, name, password=None
+):
+    """Write the contents of a singlefile archive (e.g. gzip or bzip2)
+    to standard output.
+    """
+    return open_7z(archive, compression, cmd, verbosity, interactive, None, password)
+
+
+open_bzip2 = open_gzip = open_compress = open_xz = open_lzma = open_7z_singlefile
+
+
+def iter_7z(archive, compression, cmd, verbosity, interactive, password=None):
+    """Generate the members of a 7z archive by parsing the technical
+    listing of '7z l -slt'.
+    """
+    from .. import util  # noqa: PLC0415
+
+    cmdlist = [cmd, 'l', '-slt', '-y']
+    if password:
+        cmdlist.append(f'-p{password}')
+    else:
+        cmdlist.append('-p-')
+    cmdlist.extend(['--', archive])
+    return parse_7z_slt(util.iter_lines(cmdlist, verbosity=verbosity))
+
+
+iter_zip = iter_rar = iter_cab = iter_chm = iter_arj = iter_cpio = iter_rpm = (
+    iter_deb
+) = iter_iso = iter_udf = iter_vhd = iter_wim = iter_7z
+
+
+def parse_7z_slt(lines):
+    """Generate archive entries from the lines of '7z l -slt' output.
+    Members are blocks of "Key = Value" lines separated by empty lines,
+    and follow the archive properties after a line of dashes.
+    """
+    fields = None
+    for line in lines:
+        if fields is None:
+            if line.startswith('----------'):
+                fields = {}
+            continue
+        key, sep, value = line.partition(' = ')
+        if sep:
+            fields[key] = value
+        elif not line and 'Path' in fields:
+            yield get_7z_entry(fields)
+            fields = {}
+    if fields and 'Path' in fields:
+        yield get_7z_entry(fields)
+
+
+def get_7z_entry(fields):
+    """Get the archive entry for the fields of a 7z member."""
+    from ..entries import (  # noqa: PLC0415
+        ArchiveEntry,
+        EntryDirectory,
+        EntryFile,
+        parse_datetime,
+        parse_mode,
+    )
+
+    # attributes are Windows attributes optionally followed by a Unix mode,
+    # e.g. "A_ -rw-r--r--" or "D_ drwxr-xr-x"
+    attributes = fields.get('Attributes', '').split()
+    mode = None
+    entry_type = EntryFile
+    if len(attributes) > 1:
+        mode, entry_type = parse_mode(attributes[1])
+    if fields.get('Folder') == '+' or (attributes and 'D' in attributes[0]):
+        entry_type = EntryDirectory
+    crc = fields.get('CRC')
+    return ArchiveEntry(
+        name=fields['Path'],
+        size=_get_int(fields.get('Size')),
+        compressed_size=_get_int(fields.get('Packed Size')),
+        mtime=parse_datetime(fields.get('Modified', ''), '%Y-%m-%d %H:%M:%S'),
+        mode=mode,
+        type=entry_type,
+        crc=int(crc, 16) if crc else None,
+    )
+
+
+def _get_int(value):
+    """Convert a listing value to an integer, or None if it is empty."""
+    return int(value) if value and value.isdigit() else None
+
+
 def test_7z(archive, compression, cmd, verbosity, interactive, password=None):
     """Test a 7z archive."""
     cmdlist = [cmd, 't']
@@ -113,15 +237,41 @@ def create_7z(
     return cmdlist
 
 
+# 7z names of the ZIP compression methods
+ZipMethods: dict[str, str] = {
+    'store': 'Copy',
+    'deflate': 'Deflate',
+    'bzip2': 'BZip2',
+    'lzma': 'LZMA',
+}
+
+
 def create_zip(
-    archive, compression, cmd, verbosity, interactive, filenames, password=None
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    filenames,
+    password=None,
+    method=None,
+    level=None,
 ):
     """Create a ZIP archive."""
+    from ..util import PatoolError  # noqa: PLC0415
+
     cmdlist = [cmd, 'a']
     if not interactive:
         cmdlist.append('-y')
     if password:
         cmdlist.append(f'-p{password}')
+    if method is not None:
+        if method not in ZipMethods:
+            msg = f"compression method {method} is not supported by {cmd}"
+            raise PatoolError(msg)
+        cmdlist.append(f'-mm={ZipMethods[method]}')
+    if level is not None:
+        cmdlist.append(f'-mx={level}')
     cmdlist.extend(['-tzip', '--', archive])
     cmdlist.extend(filenames)
     return cmdlist
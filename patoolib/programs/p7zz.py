@@ -46,6 +46,20 @@ test_bzip2 = test_gzip = test_zip = test_compress = test_rar = test_cab = test_c
     test_vhd
 ) = test_wim = test_7z
 
+from .p7zip import open_7z, open_7z_singlefile
+
+open_zip = open_rar = open_cab = open_chm = open_arj = open_cpio = open_rpm = (
+    open_deb
+) = open_iso = open_udf = open_vhd = open_wim = open_7z
+
+open_bzip2 = open_gzip = open_compress = open_xz = open_lzma = open_7z_singlefile
+
+from .p7zip import iter_7z
+
+iter_zip = iter_rar = iter_cab = iter_chm = iter_arj = iter_cpio = iter_rpm = (
+    iter_deb
+) = iter_iso = iter_udf = iter_vhd = iter_wim = iter_7z
+
 # ruff: noqa: F401
 from .p7zip import (
     create_7z,
@@ -16,4 +16,4 @@
 
 # bzip2 and pbzip2 are compatible
 # ruff: noqa: F401
-from .bzip2 import extract_bzip2, test_bzip2, create_bzip2
+from .bzip2 import extract_bzip2, test_bzip2, create_bzip2, open_bzip2
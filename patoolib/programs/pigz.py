@@ -15,4 +15,4 @@
 """Archive commands for the pigz program."""
 
 # ruff: noqa: F401
-from .gzip import extract_gzip, test_gzip, create_gzip, list_gzip
+from .gzip import extract_gzip, test_gzip, create_gzip, list_gzip, open_gzip
@@ -16,11 +16,13 @@
 
 from . import (
     extract_singlefile_standard,
+    open_singlefile_standard,
     test_singlefile_standard,
     create_singlefile_standard,
 )
 
 
 extract_lzip = extract_singlefile_standard
+open_lzip = open_singlefile_standard
 test_lzip = test_singlefile_standard
 create_lzip = create_singlefile_standard
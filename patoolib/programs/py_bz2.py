@@ -14,22 +14,31 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the bz2 Python module."""
 
-from .. import fileutil, util
+from .. import blocks, fileutil, progress, util
+from ..stream import MemberFile
 import bz2
 
 # read in 1MB chunks
 READ_SIZE_BYTES = 1024 * 1024
 
 
-def extract_bzip2(archive, compression, cmd, verbosity, interactive, outdir):
-    """Extract a BZIP2 archive with the bz2 Python module."""
+def extract_bzip2(
+    archive, compression, cmd, verbosity, interactive, outdir, threads=None
+):
+    """Extract a BZIP2 archive with the bz2 Python module.
+    With multiple threads, the streams of the archive are decompressed
+    in parallel.
+    """
     targetname = fileutil.get_single_outfile(outdir, archive)
     try:
-        with bz2.BZ2File(archive) as bz2file:
+        if _decompress_parallel(archive, targetname, threads):
+            return
+        with open(archive, 'rb') as rawfile, bz2.BZ2File(rawfile) as bz2file:
             with open(targetname, 'wb') as targetfile:
                 data = bz2file.read(READ_SIZE_BYTES)
                 while data:
                     targetfile.write(data)
+                    progress.update(read=rawfile.tell(), written=targetfile.tell())
                     data = bz2file.read(READ_SIZE_BYTES)
     except Exception as err:
         msg = f"error extracting {archive} to {targetname}"
@@ -37,17 +46,67 @@ def extract_bzip2(archive, compression, cmd, verbosity, interactive, outdir):
     return
 
 
-def create_bzip2(archive, compression, cmd, verbosity, interactive, filenames):
-    """Create a BZIP2 archive with the bz2 Python module."""
+def test_bzip2(archive, compression, cmd, verbosity, interactive, threads=None):
+    """Test a BZIP2 archive with the bz2 Python module."""
+    try:
+        if _decompress_parallel(archive, None, threads):
+            return
+        with open(archive, 'rb') as rawfile, bz2.BZ2File(rawfile) as bz2file:
+            while bz2file.read(READ_SIZE_BYTES):
+                progress.update(read=rawfile.tell())
+    except Exception as err:
+        raise util.PatoolError(f"error testing {archive}") from err
+    return
+
+
+def _decompress_parallel(archive, targetname, threads):
+    """Decompress the streams of a BZIP2 archive with multiple threads.
+    Returns False if the archive must be decompressed by one thread.
+    """
+    if not threads or threads <= 1:
+        return False
+    return blocks.decompress_file(
+        archive, targetname, threads, blocks.get_bzip2_streams
+    )
+
+
+def open_bzip2(archive, compression, cmd, verbosity, interactive, name):
+    """Open the contents of a BZIP2 archive with the bz2 Python module."""
+    try:
+        return MemberFile(bz2.BZ2File(archive))
+    except Exception as err:
+        raise util.PatoolError(f"error opening {archive}") from err
+
+
+def create_bzip2(
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    filenames,
+    threads=None,
+    cwd=None,
+):
+    """Create a BZIP2 archive with the bz2 Python module.
+    With multiple threads, the data is compressed in blocks that are
+    written as concatenated BZIP2 streams.
+    """
     if len(filenames) > 1:
         raise util.PatoolError('multi-file compression not supported in Python bz2')
+    filename = fileutil.get_cwd_path(cwd, filenames[0])
     try:
+        if threads and threads > 1:
+            blocks.compress_file(
+                filename, archive, bz2.compress, threads, blocks.BlockSizes['bzip2']
+            )
+            return
         with bz2.BZ2File(archive, 'wb') as bz2file:
-            filename = filenames[0]
             with open(filename, 'rb') as srcfile:
                 data = srcfile.read(READ_SIZE_BYTES)
                 while data:
                     bz2file.write(data)
+                    progress.update(read=srcfile.tell())
                     data = srcfile.read(READ_SIZE_BYTES)
     except Exception as err:
         msg = f"error creating {archive}"
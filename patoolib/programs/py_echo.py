@@ -17,6 +17,7 @@ compressed archives, implemented by the Python print function.
 """
 
 from .. import fileutil
+from ..entries import ArchiveEntry
 
 
 def list_bzip2(archive, compression, cmd, verbosity, interactive):
@@ -35,6 +36,24 @@ def list_ape(archive, compression, cmd, verbosity, interactive):
 list_shn = list_flac = list_ape
 
 
+def iter_bzip2(archive, compression, cmd, verbosity, interactive):
+    """Generate the single member of a BZIP2 archive."""
+    yield ArchiveEntry(name=fileutil.stripext(archive))
+
+
+iter_bzip3 = iter_compress = iter_gzip = iter_lzma = iter_xz = iter_lzip = (
+    iter_lrzip
+) = iter_rzip = iter_zstd = iter_bzip2
+
+
+def iter_ape(archive, compression, cmd, verbosity, interactive):
+    """Generate the single member of an APE archive."""
+    yield ArchiveEntry(name=fileutil.stripext(archive) + ".wav")
+
+
+iter_shn = iter_flac = iter_ape
+
+
 def stripext(cmd, archive, verbosity, extension=""):
     """Print the name without suffix."""
     if verbosity >= 0:
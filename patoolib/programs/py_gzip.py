@@ -15,21 +15,35 @@
 """Archive commands for the gzip Python module."""
 
 # now gzip refers to the Python standard module, not the local one
+import functools
 import gzip
-from .. import fileutil, util
+import os
+from .. import blocks, fileutil, progress, util
+from ..stream import MemberFile
 
 READ_SIZE_BYTES = 1024 * 1024
 
 
-def extract_gzip(archive, compression, cmd, verbosity, interactive, outdir):
-    """Extract a GZIP archive with the gzip Python module."""
+def extract_gzip(
+    archive, compression, cmd, verbosity, interactive, outdir, threads=None
+):
+    """Extract a GZIP archive with the gzip Python module.
+    With multiple threads, the members of the archive are decompressed
+    in parallel.
+    """
     targetname = fileutil.get_single_outfile(outdir, archive)
     try:
-        with gzip.GzipFile(archive) as gzipfile:
+        if _decompress_parallel(archive, targetname, threads):
+            return
+        with (
+            open(archive, 'rb') as rawfile,
+            gzip.GzipFile(fileobj=rawfile) as gzipfile,
+        ):
             with open(targetname, 'wb') as targetfile:
                 data = gzipfile.read(READ_SIZE_BYTES)
                 while data:
                     targetfile.write(data)
+                    progress.update(read=rawfile.tell(), written=targetfile.tell())
                     data = gzipfile.read(READ_SIZE_BYTES)
     except Exception as err:
         msg = f"error extracting {archive} to {targetname}"
@@ -37,17 +51,70 @@ def extract_gzip(archive, compression, cmd, verbosity, interactive, outdir):
     return
 
 
-def create_gzip(archive, compression, cmd, verbosity, interactive, filenames):
-    """Create a GZIP archive with the gzip Python module."""
+def test_gzip(archive, compression, cmd, verbosity, interactive, threads=None):
+    """Test a GZIP archive with the gzip Python module."""
+    try:
+        if _decompress_parallel(archive, None, threads):
+            return
+        with (
+            open(archive, 'rb') as rawfile,
+            gzip.GzipFile(fileobj=rawfile) as gzipfile,
+        ):
+            while gzipfile.read(READ_SIZE_BYTES):
+                progress.update(read=rawfile.tell())
+    except Exception as err:
+        raise util.PatoolError(f"error testing {archive}") from err
+    return
+
+
+def _decompress_parallel(archive, targetname, threads):
+    """Decompress the members of a GZIP archive with multiple threads.
+    Returns False if the archive must be decompressed by one thread.
+    """
+    if not threads or threads <= 1:
+        return False
+    return blocks.decompress_file(archive, targetname, threads, blocks.get_gzip_members)
+
+
+def open_gzip(archive, compression, cmd, verbosity, interactive, name):
+    """Open the contents of a GZIP archive with the gzip Python module."""
+    try:
+        return MemberFile(gzip.GzipFile(archive))
+    except Exception as err:
+        raise util.PatoolError(f"error opening {archive}") from err
+
+
+def create_gzip(
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    filenames,
+    threads=None,
+    cwd=None,
+):
+    """Create a GZIP archive with the gzip Python module.
+    With multiple threads, the data is compressed in blocks that are
+    written as concatenated GZIP members.
+    """
     if len(filenames) > 1:
         raise util.PatoolError('multi-file compression not supported in Python gzip')
+    filename = fileutil.get_cwd_path(cwd, filenames[0])
     try:
+        if threads and threads > 1:
+            mtime = int(os.path.getmtime(filename))
+            compress = functools.partial(gzip.compress, compresslevel=9, mtime=mtime)
+            blocks.compress_file(
+                filename, archive, compress, threads, blocks.BlockSizes['gzip']
+            )
+            return
         with gzip.GzipFile(archive, 'wb') as gzipfile:
-            filename = filenames[0]
             with open(filename, 'rb') as srcfile:
                 data = srcfile.read(READ_SIZE_BYTES)
                 while data:
                     gzipfile.write(data)
+                    progress.update(read=srcfile.tell())
                     data = srcfile.read(READ_SIZE_BYTES)
     except Exception as err:
         raise util.PatoolError(f"error creating {archive}") from err
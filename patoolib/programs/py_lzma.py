@@ -14,7 +14,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the lzma Python module."""
 
-from .. import fileutil, util
+from .. import blocks, fileutil, progress, util
+from ..stream import MemberFile
 import lzma
 
 READ_SIZE_BYTES = 1024 * 1024
@@ -36,15 +37,24 @@ else:
         return {'options': {'format': format}}
 
 
-def _extract(archive, compression, cmd, format, verbosity, outdir):
-    """Extract an LZMA or XZ archive with the lzma Python module."""
+def _extract(archive, compression, cmd, format, verbosity, outdir, threads=None):
+    """Extract an LZMA or XZ archive with the lzma Python module.
+    With multiple threads, the blocks of XZ archives are decompressed
+    in parallel.
+    """
     targetname = fileutil.get_single_outfile(outdir, archive)
     try:
-        with lzma.LZMAFile(archive, **_get_lzma_options(format)) as lzmafile:
+        if _decompress_parallel(archive, targetname, format, threads):
+            return
+        with (
+            open(archive, 'rb') as rawfile,
+            lzma.LZMAFile(rawfile, **_get_lzma_options(format)) as lzmafile,
+        ):
             with open(targetname, 'wb') as targetfile:
                 data = lzmafile.read(READ_SIZE_BYTES)
                 while data:
                     targetfile.write(data)
+                    progress.update(read=rawfile.tell(), written=targetfile.tell())
                     data = lzmafile.read(READ_SIZE_BYTES)
     except Exception as err:
         msg = f"error extracting {archive} to {targetname}"
@@ -57,33 +67,118 @@ def extract_lzma(archive, compression, cmd, verbosity, interactive, outdir):
     return _extract(archive, compression, cmd, 'alone', verbosity, outdir)
 
 
-def extract_xz(archive, compression, cmd, verbosity, interactive, outdir):
+def extract_xz(
+    archive, compression, cmd, verbosity, interactive, outdir, threads=None
+):
     """Extract an XZ archive with the lzma Python module."""
-    return _extract(archive, compression, cmd, 'xz', verbosity, outdir)
+    return _extract(archive, compression, cmd, 'xz', verbosity, outdir, threads)
 
 
-def _create(archive, compression, cmd, format, verbosity, filenames):
-    """Create an LZMA or XZ archive with the lzma Python module."""
+def _test(archive, compression, cmd, format, verbosity, threads=None):
+    """Test an LZMA or XZ archive with the lzma Python module."""
+    try:
+        if _decompress_parallel(archive, None, format, threads):
+            return
+        with (
+            open(archive, 'rb') as rawfile,
+            lzma.LZMAFile(rawfile, **_get_lzma_options(format)) as lzmafile,
+        ):
+            while lzmafile.read(READ_SIZE_BYTES):
+                progress.update(read=rawfile.tell())
+    except Exception as err:
+        raise util.PatoolError(f"error testing {archive}") from err
+    return
+
+
+def test_lzma(archive, compression, cmd, verbosity, interactive):
+    """Test an LZMA archive with the lzma Python module."""
+    return _test(archive, compression, cmd, 'alone', verbosity)
+
+
+def test_xz(archive, compression, cmd, verbosity, interactive, threads=None):
+    """Test an XZ archive with the lzma Python module."""
+    return _test(archive, compression, cmd, 'xz', verbosity, threads)
+
+
+def _decompress_parallel(archive, targetname, format, threads):
+    """Decompress the blocks of an XZ archive with multiple threads.
+    Returns False if the archive must be decompressed by one thread.
+    """
+    if not threads or threads <= 1 or format != 'xz':
+        return False
+    return blocks.decompress_file(archive, targetname, threads, blocks.get_xz_blocks)
+
+
+def _open(archive, compression, cmd, format, verbosity):
+    """Open the contents of an LZMA or XZ archive with the lzma Python module."""
+    try:
+        return MemberFile(lzma.LZMAFile(archive, **_get_lzma_options(format)))
+    except Exception as err:
+        raise util.PatoolError(f"error opening {archive}") from err
+
+
+def open_lzma(archive, compression, cmd, verbosity, interactive, name):
+    """Open the contents of an LZMA archive with the lzma Python module."""
+    return _open(archive, compression, cmd, 'alone', verbosity)
+
+
+def open_xz(archive, compression, cmd, verbosity, interactive, name):
+    """Open the contents of an XZ archive with the lzma Python module."""
+    return _open(archive, compression, cmd, 'xz', verbosity)
+
+
+def _create(
+    archive, compression, cmd, format, verbosity, filenames, threads=None, cwd=None
+):
+    """Create an LZMA or XZ archive with the lzma Python module.
+    With multiple threads, XZ data is compressed in blocks that are
+    written as concatenated XZ streams. The LZMA format has no
+    concatenated streams and is always compressed by one thread.
+    """
     if len(filenames) > 1:
         raise util.PatoolError('multi-file compression not supported in Python lzma')
+    filename = fileutil.get_cwd_path(cwd, filenames[0])
     try:
+        if threads and threads > 1 and format == 'xz':
+            blocks.compress_file(
+                filename, archive, _compress_xz, threads, blocks.BlockSizes['xz']
+            )
+            return
         with lzma.LZMAFile(archive, mode='wb', **_get_lzma_options(format)) as lzmafile:
-            filename = filenames[0]
             with open(filename, 'rb') as srcfile:
                 data = srcfile.read(READ_SIZE_BYTES)
                 while data:
                     lzmafile.write(data)
+                    progress.update(read=srcfile.tell())
                     data = srcfile.read(READ_SIZE_BYTES)
     except Exception as err:
         raise util.PatoolError(f"error creating {archive}") from err
     return
 
 
-def create_lzma(archive, compression, cmd, verbosity, interactive, filenames):
-    """Create an LZMA archive with the lzma Python module."""
-    return _create(archive, compression, cmd, 'alone', verbosity, filenames)
+def _compress_xz(data):
+    """Compress data to a complete XZ stream."""
+    return lzma.compress(data, **_get_lzma_options('xz'))
 
 
-def create_xz(archive, compression, cmd, verbosity, interactive, filenames):
+def create_lzma(
+    archive, compression, cmd, verbosity, interactive, filenames, cwd=None
+):
+    """Create an LZMA archive with the lzma Python module."""
+    return _create(archive, compression, cmd, 'alone', verbosity, filenames, cwd=cwd)
+
+
+def create_xz(
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    filenames,
+    threads=None,
+    cwd=None,
+):
     """Create an XZ archive with the lzma Python module."""
-    return _create(archive, compression, cmd, 'xz', verbosity, filenames)
+    return _create(
+        archive, compression, cmd, 'xz', verbosity, filenames, threads, cwd=cwd
+    )
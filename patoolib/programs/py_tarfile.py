@@ -14,7 +14,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the tarfile Python module."""
 
-from .. import util, fileutil
+from .. import util, fileutil, progress
+from ..stream import MemberFile
+from ..entries import (
+    ArchiveEntry,
+    EntryFile,
+    EntryDirectory,
+    EntrySymlink,
+    EntryHardlink,
+    EntryOther,
+)
 import os
 import sys
 import tarfile
@@ -24,7 +33,8 @@ def list_tar(archive, compression, cmd, verbosity, interactive):
     """List a TAR archive with the tarfile Python module."""
     try:
         with tarfile.open(archive) as tfile:
-            tfile.list(verbose=verbosity > 1)
+            members = progress.iter_members(tfile, get_member_name, get_member_size)
+            tfile.list(verbose=verbosity > 1, members=members)
     except Exception as err:
         raise util.PatoolError(f"error listing {archive}") from err
     return
@@ -33,50 +43,142 @@ def list_tar(archive, compression, cmd, verbosity, interactive):
 test_tar = list_tar
 
 
-def extract_tar(archive, compression, cmd, verbosity, interactive, outdir):
-    """Extract a TAR archive with the tarfile Python module."""
+def iter_tar(archive, compression, cmd, verbosity, interactive):
+    """Generate the members of a TAR archive with the tarfile Python module.
+    The archive is read as a stream, so memory usage does not grow with the
+    number of members.
+    """
+    try:
+        with tarfile.open(archive, "r|*") as tfile:
+            for member in tfile:
+                yield get_tar_entry(member)
+                # do not keep a list of all members
+                tfile.members = []
+    except Exception as err:
+        raise util.PatoolError(f"error listing {archive}") from err
+
+
+def get_member_name(member):
+    """Get the name of a TAR member."""
+    return member.name
+
+
+def get_member_size(member):
+    """Get the data size of a TAR member."""
+    return member.size
+
+
+def get_tar_entry(member):
+    """Get the archive entry for a TAR member."""
+    if member.isfile():
+        entry_type = EntryFile
+    elif member.isdir():
+        entry_type = EntryDirectory
+    elif member.issym():
+        entry_type = EntrySymlink
+    elif member.islnk():
+        entry_type = EntryHardlink
+    else:
+        entry_type = EntryOther
+    return ArchiveEntry(
+        name=member.name + "/" if member.isdir() else member.name,
+        size=member.size,
+        mtime=float(member.mtime),
+        mode=member.mode,
+        type=entry_type,
+    )
+
+
+def extract_tar(
+    archive, compression, cmd, verbosity, interactive, outdir, members=None
+):
+    """Extract a TAR archive with the tarfile Python module.
+    If members is given, only the members with those names are extracted.
+    """
     try:
         with tarfile.open(archive) as tfile:
+            if members is not None:
+                names = {name.rstrip("/") for name in members}
+                members = [m for m in tfile.getmembers() if m.name in names]
             if sys.version_info >= (3, 12, 0, "final", 0):
-                tfile.extractall(path=outdir, filter='data')
+                if members is None:
+                    members = tfile.getmembers()
+                members = progress.iter_members(
+                    members, get_member_name, get_member_size
+                )
+                tfile.extractall(path=outdir, members=members, filter='data')
             else:
-                safe_extract(tfile, outdir)
+                safe_extract(tfile, outdir, members=members)
     except Exception as err:
         raise util.PatoolError(f"error extracting {archive}") from err
     return
 
 
-def safe_extract(tfile, path):
+def open_tar(archive, compression, cmd, verbosity, interactive, name):
+    """Open a member of a TAR archive with the tarfile Python module."""
+    tfile = None
+    try:
+        tfile = tarfile.open(archive)
+        fileobj = tfile.extractfile(name)
+        if fileobj is None:
+            raise ValueError(f"{name} is not a regular file")
+        return MemberFile(fileobj, tfile.close)
+    except Exception as err:
+        if tfile is not None:
+            tfile.close()
+        raise util.PatoolError(f"error opening {name} in {archive}") from err
+
+
+def safe_extract(tfile, path, members=None):
     """Helper function to ensure that TAR members will be extracted inside
     the given path.
     If a member will be extracted outside the path an Exception is raised.
     """
     safe_members = []
     bad_members = []
-    for member in tfile.getmembers():
+    if members is None:
+        members = tfile.getmembers()
+    for member in members:
         member_path = os.path.join(path, member.name)
         if fileutil.is_within_directory(path, member_path):
             safe_members.append(member)
         else:
             bad_members.append(member)
+    safe_members = progress.iter_members(
+        safe_members, get_member_name, get_member_size
+    )
     tfile.extractall(path, safe_members)
     if bad_members:
         filelist = ", ".join(member.name for member in bad_members)
         raise Exception(f"Unsafe tarfile entries: {filelist}.")
 
 
-def create_tar(archive, compression, cmd, verbosity, interactive, filenames):
-    """Create a TAR archive with the tarfile Python module."""
+def create_tar(
+    archive, compression, cmd, verbosity, interactive, filenames, cwd=None
+):
+    """Create a TAR archive with the tarfile Python module.
+    The filenames are relative to the directory cwd.
+    """
     mode = get_tar_mode(compression)
     try:
         with tarfile.open(archive, mode) as tfile:
             for filename in filenames:
-                tfile.add(filename)
+                tfile.add(
+                    fileutil.get_cwd_path(cwd, filename),
+                    arcname=filename,
+                    filter=report_member,
+                )
     except Exception as err:
         raise util.PatoolError(f"error creating {archive}") from err
     return
 
 
+def report_member(tarinfo):
+    """Report a TAR member that is added to an archive."""
+    progress.member(tarinfo.name, tarinfo.size)
+    return tarinfo
+
+
 def get_tar_mode(compression):
     """Determine tarfile open mode according to the given compression."""
     if compression == 'gzip':
@@ -14,12 +14,48 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the zipfile Python module."""
 
-from .. import util
+from .. import classify, fileutil, log, progress, util
+from ..stream import MemberFile
+from ..entries import (
+    ArchiveEntry,
+    EntryDirectory,
+    dos_datetime,
+    get_mode_type,
+)
+import bz2
+import collections
+import concurrent.futures
+import contextvars
+import heapq
+import stat
 import zipfile
+import zlib
 import os
 
 READ_SIZE_BYTES = 1024 * 1024
 
+# compressed in worker threads are only files up to this size, since their
+# compressed data is kept in memory until it is written to the archive
+PARALLEL_SIZE_BYTES = 16 * 1024 * 1024
+
+# ZIP compression types of the compression methods
+ZipMethods: dict[str, int] = {
+    'store': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+if hasattr(zipfile, 'ZIP_ZSTANDARD'):
+    # since Python 3.14
+    ZipMethods['zstd'] = zipfile.ZIP_ZSTANDARD
+
+# ZIP compression types that are compressed in worker threads
+ParallelCompressTypes: tuple[int, ...] = (
+    zipfile.ZIP_STORED,
+    zipfile.ZIP_DEFLATED,
+    zipfile.ZIP_BZIP2,
+)
+
 
 def list_zip(archive, compression, cmd, verbosity, interactive, password=None):
     """List member of a ZIP archive with the zipfile Python module."""
@@ -27,9 +63,12 @@ def list_zip(archive, compression, cmd, verbosity, interactive, password=None):
         with zipfile.ZipFile(archive, "r") as zfile:
             if password:
                 zfile.setpassword(pwd=password.encode())
-            for name in zfile.namelist():
+            infos = progress.iter_members(
+                zfile.infolist(), get_member_name, get_member_size
+            )
+            for info in infos:
                 if verbosity >= 0:
-                    print(name)
+                    print(info.filename)
     except Exception as err:
         raise util.PatoolError(f"error listing {archive}") from err
     return
@@ -38,37 +77,400 @@ def list_zip(archive, compression, cmd, verbosity, interactive, password=None):
 test_zip = list_zip
 
 
+def iter_zip(archive, compression, cmd, verbosity, interactive, password=None):
+    """Generate the members of a ZIP archive with the zipfile Python module."""
+    try:
+        with zipfile.ZipFile(archive, "r") as zfile:
+            for info in zfile.infolist():
+                yield get_zip_entry(info)
+    except Exception as err:
+        raise util.PatoolError(f"error listing {archive}") from err
+
+
+def get_member_name(info):
+    """Get the name of a ZIP member."""
+    return info.filename
+
+
+def get_member_size(info):
+    """Get the uncompressed size of a ZIP member."""
+    return info.file_size
+
+
+def get_zip_entry(info):
+    """Get the archive entry for a ZIP member."""
+    # the upper 16 bits of external attributes are the Unix file mode
+    unix_mode = info.external_attr >> 16
+    if info.is_dir():
+        entry_type = EntryDirectory
+    else:
+        entry_type = get_mode_type(unix_mode)
+    return ArchiveEntry(
+        name=info.filename,
+        size=info.file_size,
+        compressed_size=info.compress_size,
+        mtime=dos_datetime(info.date_time),
+        mode=stat.S_IMODE(unix_mode) if unix_mode else None,
+        type=entry_type,
+        crc=info.CRC,
+    )
+
+
 def extract_zip(
-    archive, compression, cmd, verbosity, interactive, outdir, password=None
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    outdir,
+    password=None,
+    members=None,
+    threads=None,
 ):
-    """Extract a ZIP archive with the zipfile Python module."""
+    """Extract a ZIP archive with the zipfile Python module.
+    If members is given, only the members with those names are extracted.
+    If threads is given, the members are extracted by that many threads.
+    """
     try:
         if password:
             password = password.encode()
         with zipfile.ZipFile(archive) as zfile:
-            zfile.extractall(outdir, pwd=password)
+            if threads and threads > 1:
+                if members is None:
+                    infos = zfile.infolist()
+                else:
+                    infos = [zfile.getinfo(name) for name in members]
+                extract_parallel(archive, infos, outdir, password, threads)
+            else:
+                if members is None:
+                    members = zfile.namelist()
+                infos = progress.iter_members(
+                    (zfile.getinfo(name) for name in members),
+                    get_member_name,
+                    get_member_size,
+                )
+                zfile.extractall(outdir, members=infos, pwd=password)
     except Exception as err:
         raise util.PatoolError(f"error extracting {archive}") from err
     return
 
 
-def create_zip(archive, compression, cmd, verbosity, interactive, filenames):
-    """Create a ZIP archive with the zipfile Python module."""
+def extract_parallel(archive, infos, outdir, password, threads):
+    """Extract ZIP members with a pool of threads. The zlib, bz2 and lzma
+    modules release the global interpreter lock while decompressing.
+    Each thread reads the archive with its own file handle, and all
+    directories are created before the threads start. The threads run
+    in copies of the current context, so they report the members to the
+    progress of the operation.
+    """
+    infos = plan_extraction(infos, outdir)
+    groups = balance_members(infos, threads)
+    if not groups:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                extract_members,
+                archive,
+                group,
+                outdir,
+                password,
+            )
+            for group in groups
+        ]
+        for future in futures:
+            future.result()
+
+
+def extract_members(archive, infos, outdir, password):
+    """Extract the given ZIP members with a new archive file handle."""
+    with zipfile.ZipFile(archive) as zfile:
+        for info in progress.iter_members(infos, get_member_name, get_member_size):
+            zfile.extract(info, outdir, pwd=password)
+
+
+def plan_extraction(infos, outdir):
+    """Create the directories of the given ZIP members in outdir like
+    ZipFile.extractall() does, and return the file members to extract.
+    If several members have the same path, the last one is extracted since
+    it overwrites the others with extractall().
+    """
+    files = {}
+    for info in infos:
+        path = get_extract_path(info, outdir)
+        if info.is_dir():
+            os.makedirs(path, exist_ok=True)
+            progress.member(get_member_name(info))
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        files.pop(path, None)
+        files[path] = info
+    return list(files.values())
+
+
+def get_extract_path(info, outdir):
+    """Get the path where ZipFile.extract() writes the given member."""
+    arcname = info.filename.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    # remove drive letters, empty parts, "." and ".."
+    arcname = os.path.splitdrive(arcname)[1]
+    invalid_path_parts = ('', os.path.curdir, os.path.pardir)
+    arcname = os.path.sep.join(
+        x for x in arcname.split(os.path.sep) if x not in invalid_path_parts
+    )
+    if os.path.sep == '\\':
+        # remove characters that are invalid on Windows
+        arcname = zipfile.ZipFile._sanitize_windows_name(arcname, os.path.sep)
+    if not arcname and not info.is_dir():
+        raise ValueError("Empty filename.")
+    return os.path.normpath(os.path.join(outdir, arcname))
+
+
+def balance_members(infos, threads):
+    """Distribute members to at most the given number of groups with about
+    the same total size. Members are assigned from the largest to the
+    smallest, each one to the group with the smallest total size.
+    """
+    num_groups = min(threads, len(infos))
+    if num_groups <= 1:
+        return [infos] if infos else []
+    groups = [[] for dummy in range(num_groups)]
+    # heap items are (total size, group index)
+    heap = [(0, index) for index in range(num_groups)]
+    for info in sorted(infos, key=lambda info: info.file_size, reverse=True):
+        size, index = heapq.heappop(heap)
+        groups[index].append(info)
+        heapq.heappush(heap, (size + info.file_size, index))
+    return groups
+
+
+def open_zip(archive, compression, cmd, verbosity, interactive, name, password=None):
+    """Open a member of a ZIP archive with the zipfile Python module."""
     try:
-        with zipfile.ZipFile(archive, 'w') as zfile:
-            for filename in filenames:
-                if os.path.isdir(filename):
-                    write_directory(zfile, filename)
-                else:
-                    zfile.write(filename)
+        # the archive file stays open until the member file is closed
+        with zipfile.ZipFile(archive) as zfile:
+            pwd = password.encode() if password else None
+            return MemberFile(zfile.open(name, pwd=pwd))
+    except Exception as err:
+        raise util.PatoolError(f"error opening {name} in {archive}") from err
+
+
+def create_zip(
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    filenames,
+    threads=None,
+    method=None,
+    level=None,
+    cwd=None,
+):
+    """Create a ZIP archive with the zipfile Python module.
+    The members are compressed with the given method and level. Without
+    a method, members are compressed with deflate, and incompressible files
+    like JPEG images or archives are stored.
+    If threads is given, deflate and bzip2 compressed members are
+    compressed by that many threads.
+    The filenames are relative to the directory cwd.
+    An incomplete archive is removed on errors.
+    """
+    store_incompressible = method is None
+    if method is None:
+        method = 'deflate'
+    if method not in ZipMethods:
+        msg = f"compression method {method} is not supported by the zipfile module"
+        raise util.PatoolError(msg)
+    if method == 'lzma' and level is not None:
+        # the zipfile module ignores the level of lzma
+        msg = "compression levels of lzma are not supported by the zipfile module"
+        raise util.PatoolError(msg)
+    try:
+        with zipfile.ZipFile(
+            archive, 'w', ZipMethods[method], compresslevel=level
+        ) as zfile:
+            if threads and threads > 1 and can_write_parallel(zfile):
+                write_parallel(
+                    zfile,
+                    iter_filenames(filenames, cwd),
+                    threads,
+                    store_incompressible,
+                    verbosity,
+                )
+            else:
+                for filename, arcname in iter_filenames(filenames, cwd):
+                    write_file(
+                        zfile, filename, arcname, store_incompressible, verbosity
+                    )
     except Exception as err:
+        if os.path.exists(archive):
+            os.remove(archive)
         raise util.PatoolError(f"error creating {archive}") from err
     return
 
 
-def write_directory(zfile, directory):
-    """Write recursively all directories and filenames to zipfile instance."""
-    for dirpath, dirnames, filenames in os.walk(directory):  # noqa: B007
-        zfile.write(dirpath)
-        for filename in filenames:
-            zfile.write(os.path.join(dirpath, filename))
+def iter_filenames(filenames, cwd=None):
+    """Generate the given filenames and recursively the contents of
+    given directories. The filenames are relative to the directory cwd.
+    @return: tuples (file path, archive name)
+    """
+    for arcname in filenames:
+        filename = fileutil.get_cwd_path(cwd, arcname)
+        if os.path.isdir(filename):
+            for dirpath, dirnames, dirfiles in os.walk(filename):  # noqa: B007
+                dirname = os.path.join(arcname, os.path.relpath(dirpath, filename))
+                yield dirpath, os.path.normpath(dirname)
+                for dirfile in dirfiles:
+                    yield (
+                        os.path.join(dirpath, dirfile),
+                        os.path.normpath(os.path.join(dirname, dirfile)),
+                    )
+        else:
+            yield filename, arcname
+
+
+def write_file(zfile, filename, arcname, store_incompressible, verbosity):
+    """Write a file or directory to a ZIP archive."""
+    compress_type = zfile.compression
+    if store_incompressible:
+        compress_type, reason = get_compress_type(filename, compress_type)
+        log_stored(arcname, reason, verbosity)
+    zfile.write(filename, arcname=arcname, compress_type=compress_type)
+    zinfo = zfile.filelist[-1]
+    progress.member(zinfo.filename, zinfo.file_size)
+
+
+def get_compress_type(filename, compress_type):
+    """Get the compression type of a file. Incompressible files are stored.
+    @return: tuple (compression type, reason for storing the file or None)
+    """
+    if compress_type == zipfile.ZIP_STORED or not os.path.isfile(filename):
+        return compress_type, None
+    reason = classify.get_incompressible_reason(filename)
+    if reason is None:
+        return compress_type, None
+    return zipfile.ZIP_STORED, reason
+
+
+def log_stored(filename, reason, verbosity):
+    """Report an incompressible file that is stored."""
+    if reason is not None and verbosity >= 1:
+        log.log_info(f"storing {filename} without compression: {reason}")
+
+
+def can_write_parallel(zfile):
+    """Check if members compressed in worker threads can be written to a
+    ZIP archive. The zipfile module has no public API to write compressed
+    data, so this needs some of its internals. Without them the members
+    are compressed by the main thread.
+    """
+    return (
+        zfile.compression in ParallelCompressTypes
+        and callable(getattr(zipfile.ZipInfo, 'FileHeader', None))
+        and callable(getattr(zfile, '_writecheck', None))
+        and hasattr(zfile, '_didModify')
+        and hasattr(zfile, 'start_dir')
+    )
+
+
+def write_parallel(zfile, filenames, threads, store_incompressible, verbosity):
+    """Write files to a ZIP archive and compress them with a pool of threads.
+    Filenames are tuples (file path, archive name) from iter_filenames().
+    The zlib, bz2 and lzma modules release the global interpreter lock
+    while compressing. Members are written in the order of the filenames,
+    and at most two compressed members per thread are kept in memory.
+    Directories and large files are written by the main thread.
+    """
+
+    def write_next():
+        """Write the next compressed member."""
+        arcname, future = pending.popleft()
+        zinfo, data, reason = future.result()
+        log_stored(arcname, reason, verbosity)
+        write_compressed(zfile, zinfo, data)
+        progress.member(zinfo.filename, zinfo.file_size)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = collections.deque()
+        for filename, arcname in filenames:
+            if os.path.isfile(filename) and (
+                os.path.getsize(filename) <= PARALLEL_SIZE_BYTES
+            ):
+                future = executor.submit(
+                    compress_file,
+                    filename,
+                    arcname,
+                    zfile.compression,
+                    zfile.compresslevel,
+                    store_incompressible,
+                )
+                pending.append((arcname, future))
+                if len(pending) >= 2 * threads:
+                    write_next()
+            else:
+                while pending:
+                    write_next()
+                write_file(zfile, filename, arcname, store_incompressible, verbosity)
+        while pending:
+            write_next()
+
+
+def compress_file(
+    filename, arcname, compress_type, compresslevel, store_incompressible
+):
+    """Compress a file for a ZIP archive.
+    @return: tuple (ZipInfo with sizes and CRC, compressed data,
+        reason for storing the file or None)
+    """
+    reason = None
+    if store_incompressible:
+        compress_type, reason = get_compress_type(filename, compress_type)
+    zinfo = zipfile.ZipInfo.from_file(filename, arcname)
+    zinfo.compress_type = compress_type
+    compressor = get_compressor(compress_type, compresslevel)
+    crc = 0
+    size = 0
+    chunks = []
+    with open(filename, 'rb') as fileobj:
+        while chunk := fileobj.read(READ_SIZE_BYTES):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            chunks.append(compressor.compress(chunk) if compressor else chunk)
+    if compressor:
+        chunks.append(compressor.flush())
+    data = b"".join(chunks)
+    zinfo.file_size = size
+    zinfo.CRC = crc
+    zinfo.compress_size = len(data)
+    return zinfo, data, reason
+
+
+def get_compressor(compress_type, compresslevel):
+    """Get a compressor with the same settings as ZipFile.write() uses,
+    or None for stored members.
+    """
+    if compress_type == zipfile.ZIP_DEFLATED:
+        if compresslevel is None:
+            compresslevel = zlib.Z_DEFAULT_COMPRESSION
+        return zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    if compress_type == zipfile.ZIP_BZIP2:
+        return bz2.BZ2Compressor(9 if compresslevel is None else compresslevel)
+    return None
+
+
+def write_compressed(zfile, zinfo, data):
+    """Write a compressed member to a ZIP archive like ZipFile.write() does.
+    This needs the internals checked by can_write_parallel().
+    Members written in parallel are smaller than the ZIP64 limit.
+    """
+    zinfo.header_offset = zfile.fp.tell()
+    zfile._writecheck(zinfo)
+    zfile._didModify = True
+    zfile.fp.write(zinfo.FileHeader(False))
+    zfile.fp.write(data)
+    zfile.start_dir = zfile.fp.tell()
+    zfile.filelist.append(zinfo)
+    zfile.NameToInfo[zinfo.filename] = zinfo
@@ -16,7 +16,9 @@
 Raises ImportError when neither compression.zstd nor pyzst module is found.
 """
 
-from .. import fileutil, util, log
+import functools
+from .. import blocks, fileutil, progress, util, log
+from ..stream import MemberFile
 
 # try importing a python zstd module
 try:
@@ -27,17 +29,25 @@ except ImportError:
 READ_SIZE_BYTES = 1024 * 1024
 
 
-def extract_zstd(archive, compression, cmd, verbosity, interactive, outdir):
-    """Extract a ZSTD archive with the zstd Python module."""
+def extract_zstd(
+    archive, compression, cmd, verbosity, interactive, outdir, threads=None
+):
+    """Extract a ZSTD archive with the zstd Python module.
+    With multiple threads, the frames of the archive are decompressed
+    in parallel.
+    """
     targetname = fileutil.get_single_outfile(outdir, archive)
     try:
-        with zstd.ZstdFile(archive) as zstdfile:
+        if _decompress_parallel(archive, targetname, threads):
+            return
+        with open(archive, 'rb') as rawfile, zstd.ZstdFile(rawfile) as zstdfile:
             with open(targetname, 'wb') as targetfile:
                 if verbosity >= 1:
                     log.log_info(f"extracting ZstdFile({archive}) to {targetname}")
                 data = zstdfile.read(READ_SIZE_BYTES)
                 while data:
                     targetfile.write(data)
+                    progress.update(read=rawfile.tell(), written=targetfile.tell())
                     data = zstdfile.read(READ_SIZE_BYTES)
     except Exception as err:
         msg = f"error extracting {archive} to {targetname}"
@@ -45,19 +55,70 @@ def extract_zstd(archive, compression, cmd, verbosity, interactive, outdir):
     return
 
 
-def create_zstd(archive, compression, cmd, verbosity, interactive, filenames):
-    """Create a ZSTD archive with the zstd Python module."""
+def test_zstd(archive, compression, cmd, verbosity, interactive, threads=None):
+    """Test a ZSTD archive with the zstd Python module."""
+    try:
+        if _decompress_parallel(archive, None, threads):
+            return
+        with open(archive, 'rb') as rawfile, zstd.ZstdFile(rawfile) as zstdfile:
+            while zstdfile.read(READ_SIZE_BYTES):
+                progress.update(read=rawfile.tell())
+    except Exception as err:
+        raise util.PatoolError(f"error testing {archive}") from err
+    return
+
+
+def _decompress_parallel(archive, targetname, threads):
+    """Decompress the frames of a ZSTD archive with multiple threads.
+    Returns False if the archive must be decompressed by one thread.
+    """
+    if not threads or threads <= 1:
+        return False
+    get_frames = functools.partial(
+        blocks.get_zstd_frames, decompressor=zstd.ZstdDecompressor
+    )
+    return blocks.decompress_file(archive, targetname, threads, get_frames)
+
+
+def open_zstd(archive, compression, cmd, verbosity, interactive, name):
+    """Open the contents of a ZSTD archive with the zstd Python module."""
+    try:
+        return MemberFile(zstd.ZstdFile(archive))
+    except Exception as err:
+        raise util.PatoolError(f"error opening {archive}") from err
+
+
+def create_zstd(
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    filenames,
+    threads=None,
+    cwd=None,
+):
+    """Create a ZSTD archive with the zstd Python module.
+    With multiple threads, the data is compressed in blocks that are
+    written as concatenated ZSTD frames.
+    """
     if len(filenames) > 1:
         raise util.PatoolError('multi-file compression not supported in Python zstd')
+    filename = fileutil.get_cwd_path(cwd, filenames[0])
     try:
+        if threads and threads > 1:
+            blocks.compress_file(
+                filename, archive, zstd.compress, threads, blocks.BlockSizes['zstd']
+            )
+            return
         with zstd.ZstdFile(archive, mode='wb') as zstdfile:
-            filename = filenames[0]
             with open(filename, 'rb') as srcfile:
                 if verbosity >= 1:
                     log.log_info("compressing {filename} to ZstdFile({archive})")
                 data = srcfile.read(READ_SIZE_BYTES)
                 while data:
                     zstdfile.write(data)
+                    progress.update(read=srcfile.tell())
                     data = srcfile.read(READ_SIZE_BYTES)
     except Exception as err:
         raise util.PatoolError(f"error creating {archive}") from err
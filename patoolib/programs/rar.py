@@ -59,12 +59,17 @@ def test_rar(archive, compression, cmd, verbosity, interactive, password=None):
 def create_rar(
     archive, compression, cmd, verbosity, interactive, filenames, password=None
 ):
-    """Create a RAR archive."""
+    """Create a RAR archive.
+    Files with the name extensions of compressed formats are stored.
+    """
+    from ..classify import IncompressibleExtensions  # noqa: PLC0415
+
     cmdlist = [cmd, 'a']
     if not interactive:
         cmdlist.append('-y')
     if password:
         cmdlist.append(f'-p{password}')
+    cmdlist.append('-ms' + ';'.join(IncompressibleExtensions))
     cmdlist.extend(['-r', '-m5', '--', archive])
     cmdlist.extend(filenames)
     return cmdlist
@@ -16,14 +16,32 @@
 
 import functools
 import os
-import subprocess
+import re
+from . import get_thread_options
 
 
-def extract_tar(archive, compression, cmd, verbosity, interactive, outdir):
-    """Extract a TAR archive."""
+def extract_tar(
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    outdir,
+    threads=None,
+    members=None,
+):
+    """Extract a TAR archive.
+    If members is given, only the members with those names are extracted.
+    """
     cmdlist = [cmd, '--extract']
-    cmdlist.extend(get_tar_opts(cmd, compression, verbosity))
+    cmdlist.extend(
+        get_tar_opts(cmd, compression, verbosity, threads=threads, decompress=True)
+    )
     cmdlist.extend(["--file", archive, '--directory', outdir])
+    if members:
+        # members include the contents of selected directories
+        cmdlist.extend(['--no-recursion', '--'])
+        cmdlist.extend(members)
     return cmdlist
 
 
@@ -38,32 +56,128 @@ def list_tar(archive, compression, cmd, verbosity, interactive):
 test_tar = list_tar
 
 
-def create_tar(archive, compression, cmd, verbosity, interactive, filenames):
+def open_tar(archive, compression, cmd, verbosity, interactive, name):
+    """Write a member of a TAR archive to standard output."""
+    cmdlist = [cmd, '--extract', '--to-stdout']
+    cmdlist.extend(get_tar_opts(cmd, compression, 0))
+    cmdlist.extend(["--file", archive, '--no-recursion', '--', name])
+    return cmdlist
+
+
+def iter_tar(archive, compression, cmd, verbosity, interactive):
+    """Generate the members of a TAR archive by parsing the verbose
+    listing of GNU tar.
+    """
+    from .. import util  # noqa: PLC0415
+
+    cmdlist = [cmd, '--list', '--verbose', '--full-time', '--quoting-style=literal']
+    cmdlist.extend(get_tar_opts(cmd, compression, 0))
+    cmdlist.extend(["--file", archive])
+    return parse_tar_verbose(util.iter_lines(cmdlist, verbosity=verbosity))
+
+
+# a verbose GNU tar listing line, e.g.
+# -rw-r--r-- user/group        3 2010-01-18 09:32:04 t/foo
+TarVerboseLine = re.compile(
+    r"^(?P<mode>\S{10})\s+\S+\s+(?P<size>\S+)\s+"
+    r"(?P<mtime>\d{4}-\d\d-\d\d \d\d:\d\d(?::\d\d)?)\s(?P<name>.+)$"
+)
+
+
+def parse_tar_verbose(lines):
+    """Generate archive entries from the lines of 'tar --list --verbose'
+    output. Lines that are not member lines are ignored.
+    """
+    from ..entries import (  # noqa: PLC0415
+        ArchiveEntry,
+        EntrySymlink,
+        EntryHardlink,
+        parse_datetime,
+        parse_mode,
+    )
+
+    for line in lines:
+        match = TarVerboseLine.match(line)
+        if not match:
+            continue
+        mode, entry_type = parse_mode(match.group('mode'))
+        name = match.group('name')
+        # strip link targets
+        if entry_type == EntrySymlink:
+            name = name.partition(' -> ')[0]
+        elif entry_type == EntryHardlink:
+            name = name.partition(' link to ')[0]
+        size = match.group('size')
+        mtime = match.group('mtime')
+        if mtime.count(':') == 1:
+            # some tar versions omit the seconds
+            mtime += ':00'
+        yield ArchiveEntry(
+            name=name,
+            # device files have "major,minor" numbers instead of a size
+            size=int(size) if size.isdigit() else None,
+            mtime=parse_datetime(mtime, '%Y-%m-%d %H:%M:%S'),
+            mode=mode,
+            type=entry_type,
+        )
+
+
+def create_tar(
+    archive, compression, cmd, verbosity, interactive, filenames, threads=None
+):
     """Create a TAR archive."""
     cmdlist = [cmd, '--create']
-    cmdlist.extend(get_tar_opts(cmd, compression, verbosity))
+    cmdlist.extend(get_tar_opts(cmd, compression, verbosity, threads=threads))
     cmdlist.extend(["--file", archive, '--'])
     cmdlist.extend(filenames)
     return cmdlist
 
 
 @functools.cache
-def get_tar_opts(cmd, compression, verbosity):
-    """Get tar options for cmd according to the given compression and verbosity."""
+def get_tar_opts(cmd, compression, verbosity, threads=None, decompress=False):
+    """Get tar options for cmd according to the given compression, verbosity
+    and number of compression threads.
+    """
+    from .. import util  # noqa: PLC0415
+
     cmdlist = []
     progname = os.path.basename(cmd).lower()
     if progname.endswith('.exe'):
         progname = progname[:-4]
+    # Some tar implementations (ie. Windows tar.exe, and macos)
+    # do not support --force-local
+    force_local = progname == 'tar' and util.program_supports_options(
+        cmd, ["--force-local"]
+    )
     if compression:
-        cmdlist.append(f'--{compression}')
+        compress_program = None
+        if threads and force_local:
+            # only GNU tar supports --force-local, and GNU tar adds the -d
+            # option when running a compression program for extraction
+            compress_program = get_compress_program(compression, threads, decompress)
+        if compress_program:
+            cmdlist.append(f'--use-compress-program={compress_program}')
+        else:
+            cmdlist.append(f'--{compression}')
     if verbosity > 1:
         cmdlist.append('--verbose')
-    if progname == 'tar':
-        # Some tar implementations (ie. Windows tar.exe, and macos)
-        # do not support --force-local
-        testcmdlist = [cmd, "--force-local", "--help"]
-        from .. import util  # noqa: PLC0415
-
-        if util.run(testcmdlist, stderr=subprocess.DEVNULL, verbosity=-1) == 0:
-            cmdlist.append('--force-local')
+    if force_local:
+        cmdlist.append('--force-local')
     return cmdlist
+
+
+def get_compress_program(compression, threads, decompress):
+    """Get a command line for a compression program using the given number
+    of threads, or None if no such program is available.
+    """
+    from .. import util, ParallelPrograms  # noqa: PLC0415
+
+    for program in ParallelPrograms.get(compression, ()):
+        exe = util.find_program(program)
+        # tar splits the program command line at whitespace
+        if exe and not any(c.isspace() for c in exe):
+            options = get_thread_options(exe, threads, decompress=decompress)
+            if not options:
+                continue
+            return " ".join([exe, *options])
+    return None
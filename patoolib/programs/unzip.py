@@ -14,6 +14,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the unzip program."""
 
+import re
+
 
 def _maybe_add_password(cmdlist, password):
     if password:
@@ -21,12 +23,25 @@ def _maybe_add_password(cmdlist, password):
 
 
 def extract_zip(
-    archive, compression, cmd, verbosity, interactive, outdir, password=None
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    outdir,
+    password=None,
+    members=None,
 ):
-    """Extract a ZIP archive."""
+    """Extract a ZIP archive.
+    If members is given, only the members with those names are extracted.
+    """
     cmdlist = [cmd]
     _maybe_add_password(cmdlist, password)
-    cmdlist.extend(['--', archive, '-d', outdir])
+    cmdlist.extend(['--', archive])
+    if members:
+        # unzip matches member names as wildcards
+        cmdlist.extend(re.sub(r"([\[*?])", r"[\1]", name) for name in members)
+    cmdlist.extend(['-d', outdir])
     return cmdlist
 
 
@@ -46,3 +61,67 @@ def test_zip(archive, compression, cmd, verbosity, interactive, password=None):
     _maybe_add_password(cmdlist, password)
     cmdlist.extend(['--', archive])
     return cmdlist
+
+
+def open_zip(archive, compression, cmd, verbosity, interactive, name, password=None):
+    """Write a member of a ZIP archive to standard output."""
+    cmdlist = [cmd, '-p']
+    _maybe_add_password(cmdlist, password)
+    # unzip matches member names as wildcards
+    cmdlist.extend(['--', archive, re.sub(r"([\[*?])", r"[\1]", name)])
+    return cmdlist
+
+
+def iter_zip(archive, compression, cmd, verbosity, interactive, password=None):
+    """Generate the members of a ZIP archive by parsing the zipinfo
+    listing of 'unzip -Z'.
+    """
+    from .. import util  # noqa: PLC0415
+
+    cmdlist = [cmd, '-Z', '-l', '-T', '--', archive]
+    return parse_zipinfo(util.iter_lines(cmdlist, verbosity=verbosity))
+
+
+# a zipinfo member line, e.g.
+# -rw-r--r--  3.0 unx        3 tx        5 defN 20100118.093204 t/foo
+ZipinfoLine = re.compile(
+    r"^(?P<mode>\S+)\s+\S+\s+\S+\s+(?P<size>\d+)\s+\S+\s+(?P<csize>\d+|-)"
+    r"\s+\S+\s+(?P<mtime>\d{8}\.\d{6})\s(?P<name>.+)$"
+)
+
+
+def parse_zipinfo(lines):
+    """Generate archive entries from the lines of 'unzip -Z -l -T' output.
+    Header and summary lines are ignored.
+    """
+    from ..entries import (  # noqa: PLC0415
+        ArchiveEntry,
+        EntryDirectory,
+        EntryFile,
+        is_dir_name,
+        parse_datetime,
+        parse_mode,
+    )
+
+    for line in lines:
+        match = ZipinfoLine.match(line)
+        if not match:
+            continue
+        name = match.group('name')
+        mode, entry_type = parse_mode(match.group('mode'))
+        if is_dir_name(name):
+            entry_type = EntryDirectory
+        elif mode is None:
+            # MS-DOS attributes like "-rw-a--" have no Unix mode
+            entry_type = EntryFile
+        csize = match.group('csize')
+        yield ArchiveEntry(
+            name=name,
+            size=int(match.group('size')),
+            compressed_size=int(csize) if csize.isdigit() else None,
+            mtime=parse_datetime(
+                match.group('mtime').replace('.', ''), '%Y%m%d%H%M%S'
+            ),
+            mode=mode,
+            type=entry_type,
+        )
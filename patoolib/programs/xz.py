@@ -14,11 +14,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the xz program."""
 
-from . import extract_singlefile_standard, test_singlefile_standard
+from . import (
+    extract_singlefile_standard,
+    open_singlefile_standard,
+    test_singlefile_standard,
+    get_thread_options,
+)
 from .. import fileutil, util
 
 
 extract_xz = extract_singlefile_standard
+open_xz = open_singlefile_standard
 test_xz = test_singlefile_standard
 
 
@@ -32,11 +38,14 @@ def list_xz(archive, compression, cmd, verbosity, interactive):
     return cmdlist
 
 
-def create_xz(archive, compression, cmd, verbosity, interactive, filenames):
+def create_xz(
+    archive, compression, cmd, verbosity, interactive, filenames, threads=None
+):
     """Create an XZ archive."""
     cmdlist = [util.shell_quote(cmd)]
     if verbosity > 1:
         cmdlist.append('-v')
+    cmdlist.extend(get_thread_options(cmd, threads))
     cmdlist.extend(['-c', '--'])
     cmdlist.extend([util.shell_quote(x) for x in filenames])
     cmdlist.extend(['>', util.shell_quote(archive)])
@@ -14,12 +14,44 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Archive commands for the zip program."""
 
+from ..classify import IncompressibleExtensions
+from ..util import PatoolError
 
-def create_zip(archive, compression, cmd, verbosity, interactive, filenames):
-    """Create a ZIP archive."""
+# compression methods of the -Z option
+ZipMethods: tuple[str, ...] = ('store', 'deflate', 'bzip2')
+
+# name extensions that zip stores by default, which the -n option replaces
+ZipStoreExtensions: tuple[str, ...] = ('Z', 'zip', 'zoo', 'arc', 'lzh', 'arj')
+
+
+def create_zip(
+    archive,
+    compression,
+    cmd,
+    verbosity,
+    interactive,
+    filenames,
+    method=None,
+    level=None,
+):
+    """Create a ZIP archive.
+    Without a compression method, files with the name extensions of
+    compressed formats are stored.
+    """
     cmdlist = [cmd, '-r']
     if verbosity > 1:
         cmdlist.append('-v')
+    if method is None:
+        extensions = dict.fromkeys(ZipStoreExtensions + IncompressibleExtensions)
+        suffixes = ":".join(f".{ext}" for ext in extensions)
+        cmdlist.extend(['-n', suffixes])
+    else:
+        if method not in ZipMethods:
+            msg = f"compression method {method} is not supported by {cmd}"
+            raise PatoolError(msg)
+        cmdlist.extend(['-Z', method])
+    if level is not None:
+        cmdlist.append(f'-{level}')
     cmdlist.append(archive)
     cmdlist.extend(filenames)
     return cmdlist
@@ -15,9 +15,15 @@
 """Archive commands for the zstd program."""
 
 from .. import util
-from . import extract_singlefile_standard, test_singlefile_standard
+from . import (
+    extract_singlefile_standard,
+    open_singlefile_standard,
+    test_singlefile_standard,
+    get_thread_options,
+)
 
 extract_zstd = extract_singlefile_standard
+open_zstd = open_singlefile_standard
 test_zstd = test_singlefile_standard
 
 
@@ -31,11 +37,14 @@ def list_zstd(archive, compression, cmd, verbosity, interactive):
     return cmdlist
 
 
-def create_zstd(archive, compression, cmd, verbosity, interactive, filenames):
+def create_zstd(
+    archive, compression, cmd, verbosity, interactive, filenames, threads=None
+):
     """Create a zstandard archive."""
     cmdlist = [util.shell_quote(cmd)]
     if verbosity > 1:
         cmdlist.append("-v")
+    cmdlist.extend(get_thread_options(cmd, threads))
     cmdlist.extend(["-z", "--stdout", "--"])
     cmdlist.extend([util.shell_quote(x) for x in filenames])
     cmdlist.extend([">", util.shell_quote(archive)])
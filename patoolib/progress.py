@@ -0,0 +1,461 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Progress events of archive operations.
+
+While a callback is registered with report(), the archive operations send
+it ProgressEvent tuples. The Python archive programs report the members
+and bytes of their copy loops. For all archive programs a thread samples
+the size of the output directory without the files that were in it
+before, or the size of the created archive file, and on Linux the read
+position of the archive in this process and its child processes, like
+"pv -d" does.
+
+Without a registered callback the reports only check a context variable.
+"""
+
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import Any, NamedTuple, TextIO, TypeVar
+
+T = TypeVar("T")
+
+# the minimum number of seconds between two events of an operation
+EventInterval: float = 0.2
+
+# the minimum number of seconds between two samples of the running operation
+SampleInterval: float = 0.5
+
+# the seconds between two samples are at least this many times the seconds
+# that the last sample took
+SampleCost: float = 10.0
+
+
+class ProgressEvent(NamedTuple):
+    """The progress of an archive operation."""
+
+    # the operation, e.g. "extract" or "create"
+    operation: str
+    archive: str
+    # the member that is being handled, or None if it is not known
+    member: str | None
+    # the number of members that have been handled
+    members: int
+    # the bytes read from the input, which is the archive file or for
+    # created archives the input files
+    bytes_read: int
+    # the bytes written to the extracted files or the created archive
+    bytes_written: int
+    # the size of the input in bytes, or None if it is not known
+    total: int | None
+    # the seconds since the operation started
+    elapsed: float
+    # True for the last event of the operation
+    finished: bool
+
+    @property
+    def rate(self) -> float:
+        """Get the input bytes per second, or the output bytes per second
+        if no input bytes are known.
+        """
+        if self.elapsed <= 0:
+            return 0.0
+        return (self.bytes_read or self.bytes_written) / self.elapsed
+
+    @property
+    def eta(self) -> float | None:
+        """Get the estimated seconds until the operation finishes, or None
+        if the input size or the bytes read are not known.
+        """
+        if self.finished:
+            return 0.0
+        if not self.total or not self.bytes_read:
+            return None
+        remaining = max(self.total - self.bytes_read, 0)
+        return self.elapsed * remaining / self.bytes_read
+
+
+ProgressCallback = Callable[[ProgressEvent], Any]
+
+# the progress callback of the current context, set by report()
+callback: contextvars.ContextVar[ProgressCallback | None] = contextvars.ContextVar(
+    "progress_callback", default=None
+)
+
+# the running operation of the current context
+current: contextvars.ContextVar["Operation | None"] = contextvars.ContextVar(
+    "progress_operation", default=None
+)
+
+
+class Operation:
+    """The progress of a running archive operation."""
+
+    def __init__(
+        self,
+        func: ProgressCallback,
+        name: str,
+        archive: str,
+        total: int | None,
+        output: str | None,
+        creates: bool,
+    ) -> None:
+        """Initialize the progress without any handled bytes."""
+        self.func = func
+        self.name = name
+        self.archive = archive
+        # the path of the archive in /proc/<pid>/fd links
+        self.path = os.path.realpath(archive)
+        self.total = total
+        self.output = output
+        # the size of the files that were in the output directory before
+        self.baseline = 0
+        if output is not None and not creates:
+            self.baseline = get_size(output)
+        # created archives are the output instead of the input
+        self.creates = creates
+        self.member: str | None = None
+        self.members = 0
+        # the size of the member that is being handled
+        self.member_size = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        # True if the archive program reports the written bytes, so that
+        # the output size is not sampled
+        self.reports_written = False
+        self.start = time.monotonic()
+        self.last = self.start
+        self.lock = threading.Lock()
+
+    def update(
+        self,
+        read: int | None = None,
+        written: int | None = None,
+        sampled: bool = False,
+    ) -> None:
+        """Set the bytes read and written so far."""
+        with self.lock:
+            if read is not None:
+                self.bytes_read = max(self.bytes_read, read)
+            if written is not None:
+                self.bytes_written = max(self.bytes_written, written)
+                if not sampled:
+                    self.reports_written = True
+            event = self.get_event()
+        if event is not None:
+            self.func(event)
+
+    def start_member(self, name: str, size: int) -> None:
+        """Set the member that is being handled, which has the given data
+        size. The size of the previous member is added to the bytes read
+        when creating, else to the bytes written.
+        """
+        with self.lock:
+            if self.member is not None:
+                self.end_member()
+            self.member = name
+            self.member_size = size
+            event = self.get_event()
+        if event is not None:
+            self.func(event)
+
+    def end_member(self) -> None:
+        """Count the handled member. Must be called with the lock."""
+        self.members += 1
+        if self.creates:
+            self.bytes_read += self.member_size
+        else:
+            self.bytes_written += self.member_size
+            self.reports_written = True
+        self.member_size = 0
+
+    def sample(self) -> None:
+        """Sample the read position of the archive and the output size."""
+        read = None
+        if not self.creates:
+            read = get_read_position(self.path)
+        written = None
+        if self.output is not None and not self.reports_written:
+            written = max(get_size(self.output) - self.baseline, 0)
+        self.update(read=read, written=written, sampled=True)
+
+    def finish(self, done: bool) -> None:
+        """Send the last event of the operation. If it is done, all input
+        has been read.
+        """
+        with self.lock:
+            if self.member is not None:
+                self.end_member()
+            if done and self.total is not None:
+                self.bytes_read = max(self.bytes_read, self.total)
+            event = self.get_event(finished=True)
+        self.func(event)
+
+    def get_event(self, finished: bool = False) -> ProgressEvent | None:
+        """Get the current progress, or None if the last event was sent less
+        than EventInterval seconds ago. Must be called with the lock.
+        """
+        now = time.monotonic()
+        if not finished and now - self.last < EventInterval:
+            return None
+        self.last = now
+        return ProgressEvent(
+            operation=self.name,
+            archive=self.archive,
+            member=self.member,
+            members=self.members,
+            bytes_read=self.bytes_read,
+            bytes_written=self.bytes_written,
+            total=self.total,
+            elapsed=now - self.start,
+            finished=finished,
+        )
+
+
+@contextlib.contextmanager
+def report(func: ProgressCallback) -> Iterator[None]:
+    """Send the progress of the archive operations in this context to the
+    callback.
+    """
+    token = callback.set(func)
+    try:
+        yield
+    finally:
+        callback.reset(token)
+
+
+@contextlib.contextmanager
+def operation(
+    name: str,
+    archive: str,
+    inputs: Sequence[str] | None = None,
+    cwd: str | None = None,
+    output: str | None = None,
+) -> Iterator[None]:
+    """Report the progress of an archive operation if a callback is
+    registered. The input size is the archive size, or when creating an
+    archive the size of the input files relative to cwd. The output is the
+    extraction directory or the created archive.
+    """
+    func = callback.get()
+    if func is None:
+        yield
+        return
+    creates = inputs is not None
+    if creates:
+        total = sum(get_size(get_path(cwd, filename)) for filename in inputs)
+    else:
+        total = get_size(archive)
+    progress = Operation(func, name, archive, total, output, creates)
+    token = current.set(progress)
+    stop = threading.Event()
+    thread = threading.Thread(target=sample, args=(progress, stop), daemon=True)
+    thread.start()
+    done = False
+    try:
+        yield
+        done = True
+    finally:
+        stop.set()
+        thread.join()
+        current.reset(token)
+        # the output of fast archive programs has not been sampled yet
+        progress.sample()
+        progress.finish(done)
+
+
+def sample(progress: Operation, stop: threading.Event) -> None:
+    """Sample the progress of an operation until it stops. Large output
+    directories take longer to sample, so they are sampled less often.
+    """
+    interval = SampleInterval
+    while not stop.wait(interval):
+        start = time.monotonic()
+        progress.sample()
+        interval = max(SampleInterval, SampleCost * (time.monotonic() - start))
+
+
+def update(read: int | None = None, written: int | None = None) -> None:
+    """Report the bytes read and written so far by the running operation."""
+    progress = current.get()
+    if progress is not None:
+        progress.update(read=read, written=written)
+
+
+def member(name: str, size: int = 0) -> None:
+    """Report the member that the running operation is handling."""
+    progress = current.get()
+    if progress is not None:
+        progress.start_member(name, size)
+
+
+def iter_members(
+    members: Iterable[T],
+    get_name: Callable[[T], str],
+    get_size: Callable[[T], int],
+) -> Iterator[T]:
+    """Generate the members and report each one when it is handled."""
+    progress = current.get()
+    if progress is None:
+        yield from members
+        return
+    for item in members:
+        progress.start_member(get_name(item), get_size(item))
+        yield item
+
+
+def get_path(cwd: str | None, filename: str) -> str:
+    """Get the path of a filename relative to cwd."""
+    if cwd is None:
+        return filename
+    return os.path.join(cwd, filename)
+
+
+def get_size(path: str) -> int:
+    """Get the size of a file, or the total size of the files in a
+    directory. Files that are removed meanwhile are ignored.
+    """
+    try:
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+    except OSError:
+        return 0
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for filename in files:
+            try:
+                size += os.lstat(os.path.join(root, filename)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def get_read_position(filename: str) -> int | None:
+    """Get the largest read position of a file that this process or one of
+    its child processes has opened, or None if it is not known.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    position = None
+    for pid in get_process_tree(os.getpid()):
+        fddir = f"/proc/{pid}/fd"
+        try:
+            fds = os.listdir(fddir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                if os.readlink(os.path.join(fddir, fd)) != filename:
+                    continue
+                with open(f"/proc/{pid}/fdinfo/{fd}") as fileobj:
+                    for line in fileobj:
+                        if line.startswith("pos:"):
+                            pos = int(line.split()[1])
+                            position = max(position or 0, pos)
+            except (OSError, ValueError):
+                pass
+    return position
+
+
+def get_process_tree(pid: int) -> list[int]:
+    """Get a process ID with the IDs of all its descendant processes."""
+    pids = [pid]
+    for parent in pids:
+        try:
+            tasks = os.listdir(f"/proc/{parent}/task")
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                with open(f"/proc/{parent}/task/{task}/children") as fileobj:
+                    pids.extend(int(child) for child in fileobj.read().split())
+            except (OSError, ValueError):
+                pass
+    return pids
+
+
+def format_size(size: float) -> str:
+    """Format a size in bytes with a binary unit."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = "TiB"
+    return f"{size:.1f} {unit}"
+
+
+def format_seconds(seconds: float) -> str:
+    """Format seconds as hours, minutes and seconds."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class ProgressBar:
+    """A progress callback that draws a progress bar on a terminal line."""
+
+    # the number of characters of the bar
+    width = 20
+
+    def __init__(self, fileobj: TextIO | None = None) -> None:
+        """Draw on the given file, or on stderr if it is None."""
+        self.fileobj = fileobj
+        # the length of the last drawn line
+        self.length = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, event: ProgressEvent) -> None:
+        """Draw the progress of an event, and end the line when the
+        operation has finished.
+        """
+        fileobj = self.fileobj or sys.stderr
+        with self.lock:
+            if event.finished and not self.length:
+                # nothing has been drawn for fast operations
+                return
+            line = self.format_event(event)
+            fileobj.write("\r" + line.ljust(self.length))
+            self.length = len(line)
+            if event.finished:
+                fileobj.write("\n")
+                self.length = 0
+            fileobj.flush()
+
+    def format_event(self, event: ProgressEvent) -> str:
+        """Get the progress line of an event."""
+        parts = [f"{event.operation} {os.path.basename(event.archive)}"]
+        if event.total and event.bytes_read:
+            fraction = min(event.bytes_read / event.total, 1.0)
+            filled = int(fraction * self.width)
+            bar = "#" * filled + "." * (self.width - filled)
+            parts.append(f"[{bar}] {fraction:4.0%}")
+        if event.bytes_read:
+            parts.append(f"{format_size(event.bytes_read)} read")
+        if event.bytes_written:
+            parts.append(f"{format_size(event.bytes_written)} written")
+        if event.members:
+            parts.append(f"{event.members} members")
+        parts.append(f"{format_size(event.rate)}/s")
+        eta = event.eta
+        if event.finished:
+            parts.append(f"in {format_seconds(event.elapsed)}")
+        elif eta is not None:
+            parts.append(f"ETA {format_seconds(eta)}")
+        return " ".join(parts)
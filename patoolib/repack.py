@@ -0,0 +1,321 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Repack archives without extracting them to a temporary directory.
+
+When only the compression changes, the decompressed data is piped from
+the decompressor into the compressor. Members of ZIP and TAR archives are
+copied directly from the archive reader to the archive writer. Data is
+copied in chunks, so the memory usage does not depend on the member sizes.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import stat
+import tarfile
+import time
+import zipfile
+from collections.abc import Callable
+from typing import BinaryIO
+from . import log, progress, util
+from .stream import PipeWriter
+
+# copy data in chunks of this size
+ReadSize: int = 1024 * 1024
+
+# Programs compressing standard input to standard output with the -c option,
+# in order of preference. They are used if no Python module can compress.
+CompressPrograms: dict[str, tuple[str, ...]] = {
+    'bzip2': ('lbzip2', 'pbzip2', 'bzip2'),
+    'compress': ('compress',),
+    'gzip': ('pigz', 'gzip'),
+    'lzip': ('plzip', 'lzip', 'clzip', 'pdlzip'),
+    'lzma': ('lzma',),
+    'xz': ('xz',),
+    'zstd': ('zstd',),
+}
+
+
+class StreamError(Exception):
+    """The members of an archive cannot be streamed."""
+
+
+def get_stream_compression(format: str, compression: str | None) -> str | None:
+    """Get the compression of the data stream of an archive. For single file
+    archives like GZIP this is the archive format.
+    """
+    from . import ArchiveCompressions  # noqa: PLC0415
+
+    if format in ArchiveCompressions:
+        return format
+    return compression
+
+
+def can_repack(
+    format1: str, compression1: str | None, format2: str, compression2: str | None
+) -> bool:
+    """Check if an archive can be repacked without a temporary directory."""
+    from . import ArchiveCompressions  # noqa: PLC0415
+
+    recompress = format1 == format2 == 'tar' or (
+        format1 in ArchiveCompressions and format2 in ArchiveCompressions
+    )
+    if not recompress and {format1, format2} != {'tar', 'zip'}:
+        return False
+    return can_decompress(
+        get_stream_compression(format1, compression1)
+    ) and can_compress(get_stream_compression(format2, compression2))
+
+
+def can_decompress(compression: str | None) -> bool:
+    """Check if a decompressor is available for the given compression."""
+    from . import find_stream_program  # noqa: PLC0415
+
+    if compression is None:
+        return True
+    try:
+        find_stream_program('open', compression)
+    except util.PatoolError:
+        return False
+    return True
+
+
+def can_compress(compression: str | None) -> bool:
+    """Check if a compressor is available for the given compression."""
+    if compression is None:
+        return True
+    return (
+        get_python_compressor(compression) is not None
+        or find_compress_program(compression) is not None
+    )
+
+
+def get_python_compressor(compression: str) -> Callable[[str], BinaryIO] | None:
+    """Get a function opening a file for writing with a Python compression
+    module, or None if no module supports the compression.
+    """
+    if compression == 'gzip':
+        return lambda filename: gzip.open(filename, 'wb')
+    if compression == 'bzip2':
+        return lambda filename: bz2.open(filename, 'wb')
+    if compression == 'xz':
+        return lambda filename: lzma.open(filename, 'wb', format=lzma.FORMAT_XZ)
+    if compression == 'lzma':
+        return lambda filename: lzma.open(filename, 'wb', format=lzma.FORMAT_ALONE)
+    if compression == 'zstd':
+        try:
+            from compression import zstd  # noqa: PLC0415
+        except ImportError:
+            try:
+                import pyzstd as zstd  # noqa: PLC0415  # ty: ignore[unresolved-import]
+            except ImportError:
+                return None
+        return lambda filename: zstd.ZstdFile(filename, 'w')
+    return None
+
+
+def find_compress_program(compression: str) -> str | None:
+    """Find a program compressing standard input with the given compression."""
+    for program in CompressPrograms.get(compression, ()):
+        exe = util.find_program(program)
+        if exe:
+            return exe
+    return None
+
+
+def open_reader(archive: str, compression: str | None, verbosity: int) -> BinaryIO:
+    """Open the decompressed data of an archive for reading."""
+    from . import _open_member  # noqa: PLC0415
+
+    if compression is None:
+        return open(archive, 'rb')
+    return _open_member(archive, verbosity=verbosity, format=compression)
+
+
+def open_writer(archive: str, compression: str | None, verbosity: int) -> BinaryIO:
+    """Open an archive for writing data with the given compression."""
+    if compression is None:
+        return open(archive, 'wb')
+    compressor = get_python_compressor(compression)
+    if compressor is not None:
+        return compressor(archive)
+    exe = find_compress_program(compression)
+    if exe is None:
+        raise util.PatoolError(f"no program found to compress with {compression}")
+    return PipeWriter([exe, '-c'], archive, verbosity=verbosity)
+
+
+def repack_archive(
+    archive1: str,
+    archive2: str,
+    format1: str,
+    compression1: str | None,
+    format2: str,
+    compression2: str | None,
+    verbosity: int = 0,
+) -> bool:
+    """Repack an archive without writing its members to disk.
+    @return: False if the archive could not be streamed, e.g. for hard links
+        in compressed TAR archives or encrypted ZIP members. No output archive
+        is left behind then.
+    @raises: PatoolError on errors
+    """
+    if verbosity >= 0:
+        log.log_info(f"streaming `{archive1}' -> `{archive2}'")
+    reader_compression = get_stream_compression(format1, compression1)
+    writer_compression = get_stream_compression(format2, compression2)
+    try:
+        if format1 == 'zip':
+            zip_to_tar(archive1, archive2, writer_compression, verbosity)
+        elif format2 == 'zip':
+            tar_to_zip(archive1, archive2, reader_compression, verbosity)
+        else:
+            recompress(
+                archive1, archive2, reader_compression, writer_compression, verbosity
+            )
+    except (tarfile.StreamError, StreamError) as err:
+        remove_output(archive2)
+        if verbosity >= 0:
+            log.log_info(f"... cannot stream {archive1}: {err}")
+        return False
+    except util.PatoolError:
+        remove_output(archive2)
+        raise
+    except Exception as err:
+        remove_output(archive2)
+        raise util.PatoolError(f"error repacking {archive1}") from err
+    return True
+
+
+def remove_output(archive: str) -> None:
+    """Remove an incomplete output archive."""
+    if os.path.exists(archive):
+        os.remove(archive)
+
+
+def recompress(
+    archive1: str,
+    archive2: str,
+    compression1: str | None,
+    compression2: str | None,
+    verbosity: int,
+) -> None:
+    """Pipe the decompressed data of an archive into a compressor."""
+    with open_reader(archive1, compression1, verbosity) as reader:
+        with open_writer(archive2, compression2, verbosity) as writer:
+            shutil.copyfileobj(reader, writer, ReadSize)
+
+
+def tar_to_zip(
+    archive1: str, archive2: str, compression: str | None, verbosity: int
+) -> None:
+    """Copy the members of a TAR archive to a new ZIP archive."""
+    with open_reader(archive1, compression, verbosity) as reader:
+        # hard links can only be read from seekable files
+        mode = 'r:' if reader.seekable() else 'r|'
+        with (
+            tarfile.open(fileobj=reader, mode=mode) as tfile,
+            zipfile.ZipFile(archive2, 'w', zipfile.ZIP_DEFLATED) as zfile,
+        ):
+            for member in tfile:
+                if mode == 'r|':
+                    # do not keep a list of all members
+                    tfile.members = []
+                progress.member(member.name, member.size)
+                write_zip_member(zfile, tfile, member, verbosity)
+
+
+def write_zip_member(
+    zfile: zipfile.ZipFile,
+    tfile: tarfile.TarFile,
+    member: tarfile.TarInfo,
+    verbosity: int,
+) -> None:
+    """Write a TAR member to a ZIP archive."""
+    date_time = get_zip_date_time(member.mtime)
+    mode = member.mode & 0o7777
+    if member.isdir():
+        zinfo = zipfile.ZipInfo(member.name.rstrip('/') + '/', date_time)
+        # the MS-DOS directory attribute
+        zinfo.external_attr = (stat.S_IFDIR | mode) << 16 | 0x10
+        zfile.writestr(zinfo, b'')
+    elif member.issym():
+        zinfo = zipfile.ZipInfo(member.name, date_time)
+        zinfo.external_attr = (stat.S_IFLNK | 0o777) << 16
+        zfile.writestr(zinfo, member.linkname)
+    elif member.isfile() or member.islnk():
+        zinfo = zipfile.ZipInfo(member.name, date_time)
+        zinfo.external_attr = (stat.S_IFREG | mode) << 16
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        # the size decides if ZIP64 extensions are needed
+        zinfo.file_size = member.size
+        with tfile.extractfile(member) as source, zfile.open(zinfo, 'w') as target:
+            shutil.copyfileobj(source, target, ReadSize)
+    elif verbosity >= 0:
+        log.log_warning(f"skipping {member.name}: not supported in ZIP archives")
+
+
+def get_zip_date_time(mtime: float) -> tuple[int, int, int, int, int, int]:
+    """Get the ZIP date and time of a modification time. ZIP archives only
+    store years from 1980 to 2107.
+    """
+    date_time = time.localtime(mtime)[:6]
+    if date_time[0] < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+    if date_time[0] > 2107:
+        return (2107, 12, 31, 23, 59, 58)
+    return date_time
+
+
+def zip_to_tar(
+    archive1: str, archive2: str, compression: str | None, verbosity: int
+) -> None:
+    """Copy the members of a ZIP archive to a new TAR archive."""
+    with zipfile.ZipFile(archive1) as zfile:
+        for info in zfile.infolist():
+            if info.flag_bits & 0x1:
+                raise StreamError(f"{info.filename} is encrypted")
+        with (
+            open_writer(archive2, compression, verbosity) as writer,
+            tarfile.open(fileobj=writer, mode='w|') as tfile,
+        ):
+            for info in zfile.infolist():
+                progress.member(info.filename, info.file_size)
+                write_tar_member(tfile, zfile, info)
+
+
+def write_tar_member(
+    tfile: tarfile.TarFile, zfile: zipfile.ZipFile, info: zipfile.ZipInfo
+) -> None:
+    """Write a ZIP member to a TAR archive."""
+    tinfo = tarfile.TarInfo(info.filename.rstrip('/'))
+    tinfo.mtime = int(time.mktime(info.date_time + (0, 0, -1)))
+    mode = info.external_attr >> 16
+    if info.is_dir():
+        tinfo.type = tarfile.DIRTYPE
+        tinfo.mode = (mode & 0o7777) or 0o755
+        tfile.addfile(tinfo)
+    elif stat.S_ISLNK(mode):
+        tinfo.type = tarfile.SYMTYPE
+        tinfo.mode = 0o777
+        tinfo.linkname = zfile.read(info).decode('utf-8', 'surrogateescape')
+        tfile.addfile(tinfo)
+    else:
+        tinfo.mode = (mode & 0o7777) or 0o644
+        tinfo.size = info.file_size
+        with zfile.open(info) as source:
+            tfile.addfile(tinfo, source)
@@ -0,0 +1,358 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Search archive members without extracting them to disk.
+
+Members are decompressed in chunks and searched line by line with a
+grep(1) compatible basic regular expression. Lines spanning chunk
+boundaries are joined before matching. The output has the format of
+"grep -r PATTERN ." in an extraction directory.
+"""
+
+import concurrent.futures
+import re
+import sys
+import tarfile
+import zipfile
+from collections.abc import Callable, Iterator
+from typing import BinaryIO
+from . import parallel
+from .util import PatoolError
+
+# read member data in chunks of this size
+ReadSize: int = 1024 * 1024
+
+# longer lines are truncated to this size before matching
+MaxLineSize: int = 16 * 1024 * 1024
+
+# POSIX character classes of bracket expressions
+PosixClasses: dict[str, str] = {
+    'alnum': 'a-zA-Z0-9',
+    'alpha': 'a-zA-Z',
+    'blank': ' \\t',
+    'cntrl': '\\x00-\\x1f\\x7f',
+    'digit': '0-9',
+    'graph': '\\x21-\\x7e',
+    'lower': 'a-z',
+    'print': '\\x20-\\x7e',
+    'punct': re.escape('!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'),
+    'space': ' \\t\\n\\r\\f\\v',
+    'upper': 'A-Z',
+    'xdigit': '0-9A-Fa-f',
+}
+
+# backslash sequences of basic regular expressions and their Python syntax
+BreEscapes: dict[str, str] = {
+    '(': '(',
+    ')': ')',
+    '{': '{',
+    '}': '}',
+    '|': '|',
+    '+': '+',
+    '?': '?',
+    '<': '\\b',
+    '>': '\\b',
+    'b': '\\b',
+    'B': '\\B',
+    'w': '\\w',
+    'W': '\\W',
+    's': '\\s',
+    'S': '\\S',
+}
+
+
+def bre_to_python(pattern: str) -> str:
+    """Convert a grep(1) basic regular expression (with GNU extensions)
+    to Python regular expression syntax.
+    """
+    result = []
+    i = 0
+    # the start of an expression, where "*" is literal and "^" is an anchor
+    at_start = True
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped in BreEscapes:
+                result.append(BreEscapes[escaped])
+                at_start = escaped in '(|'
+            elif escaped.isdigit():
+                # back reference
+                result.append('\\' + escaped)
+                at_start = False
+            else:
+                result.append(re.escape(escaped))
+                at_start = False
+            continue
+        i += 1
+        if char == '[':
+            end = _find_bracket_end(pattern, i)
+            if end < 0:
+                raise PatoolError(f"unmatched [ in search pattern {pattern!r}")
+            result.append(_convert_bracket(pattern[i:end]))
+            i = end + 1
+        elif char == '^' and at_start:
+            result.append('^')
+            continue
+        elif char == '*' and at_start:
+            result.append('\\*')
+        elif char == '$' and _is_end(pattern, i):
+            result.append('$')
+        elif char in '.*':
+            result.append(char)
+        else:
+            result.append(re.escape(char))
+        at_start = False
+    return ''.join(result)
+
+
+def _is_end(pattern: str, i: int) -> bool:
+    """Check if position i is the end of an expression."""
+    return i == len(pattern) or pattern[i : i + 2] in ('\\)', '\\|')
+
+
+def _find_bracket_end(pattern: str, i: int) -> int:
+    """Find the closing bracket of a bracket expression starting at i."""
+    if pattern[i : i + 1] == '^':
+        i += 1
+    if pattern[i : i + 1] == ']':
+        # a leading "]" is literal
+        i += 1
+    while i < len(pattern):
+        if pattern[i : i + 2] == '[:':
+            end = pattern.find(':]', i + 2)
+            if end >= 0:
+                i = end + 2
+                continue
+        if pattern[i] == ']':
+            return i
+        i += 1
+    return -1
+
+
+def _convert_bracket(content: str) -> str:
+    """Convert the content of a bracket expression to Python syntax."""
+    result = ['[']
+    i = 0
+    if content.startswith('^'):
+        result.append('^')
+        i = 1
+    while i < len(content):
+        if content.startswith('[:', i):
+            end = content.find(':]', i + 2)
+            name = content[i + 2 : end]
+            if end >= 0 and name in PosixClasses:
+                result.append(PosixClasses[name])
+                i = end + 2
+                continue
+        char = content[i]
+        # backslashes and brackets are literal in POSIX bracket expressions
+        result.append('\\' + char if char in '\\[]' else char)
+        i += 1
+    result.append(']')
+    return ''.join(result)
+
+
+def compile_pattern(pattern: str) -> re.Pattern[bytes]:
+    """Compile a basic regular expression to match lines of member data."""
+    regex = bre_to_python(pattern)
+    try:
+        return re.compile(regex.encode("utf-8", "surrogateescape"))
+    except re.error as err:
+        raise PatoolError(f"invalid search pattern {pattern!r}: {err}") from err
+
+
+def search_lines(
+    fileobj: BinaryIO, regex: re.Pattern[bytes], max_count: int | None = None
+) -> list[bytes]:
+    """Get the matching lines of a file object, read in chunks.
+    Binary data containing NUL bytes in any chunk is skipped like with
+    "grep -I". Lines longer than MaxLineSize are truncated to that size.
+    """
+    matches = []
+    # the start of a line that can continue in the next chunk
+    pending = bytearray()
+    while chunk := fileobj.read(ReadSize):
+        if b"\0" in chunk:
+            return []
+        lines = chunk.split(b"\n")
+        last = lines.pop()
+        if lines and pending:
+            add_line_data(pending, lines[0])
+            lines[0] = bytes(pending)
+            pending.clear()
+        for line in lines:
+            if regex.search(line, 0, MaxLineSize):
+                matches.append(line[:MaxLineSize])
+                if max_count is not None and len(matches) >= max_count:
+                    return matches
+        add_line_data(pending, last)
+    if pending and regex.search(pending):
+        matches.append(bytes(pending))
+    return matches
+
+
+def add_line_data(line: bytearray, data: bytes) -> None:
+    """Add data to the start of a line, up to MaxLineSize bytes."""
+    if len(line) < MaxLineSize:
+        line += data[: MaxLineSize - len(line)]
+
+
+def can_search(format: str, compression: str | None) -> bool:
+    """Check if archives of the given format and compression can be searched
+    without extracting them.
+    """
+    from . import ArchiveCompressions, OpenArchivePrograms  # noqa: PLC0415
+
+    if format == 'zip':
+        return compression is None
+    if format == 'tar':
+        return compression in _get_tarfile_compressions()
+    return format in ArchiveCompressions and format in OpenArchivePrograms
+
+
+def _get_tarfile_compressions() -> tuple[str | None, ...]:
+    """Get the compressions the tarfile module can read."""
+    from . import program_supports_compression  # noqa: PLC0415
+
+    compressions: list[str | None] = [None]
+    for compression in ('gzip', 'bzip2', 'lzma', 'xz', 'zstd'):
+        if program_supports_compression(
+            'extract', 'py_tarfile', 'py_tarfile', compression
+        ):
+            compressions.append(compression)
+    return tuple(compressions)
+
+
+def search_archive(
+    pattern: str,
+    archive: str,
+    format: str,
+    compression: str | None,
+    password: str | None = None,
+    max_count: int | None = None,
+    jobs: int | None = None,
+    verbosity: int = 0,
+) -> int:
+    """Search the members of an archive and print the matching lines.
+    @return: 0 if a line matched, else 1
+    """
+    regex = compile_pattern(pattern)
+    if format == 'zip':
+        results = _search_zip(archive, regex, max_count, password, jobs)
+    elif format == 'tar':
+        results = _search_tar(archive, regex, max_count)
+    else:
+        results = _search_singlefile(archive, regex, max_count, format, verbosity)
+    matched = False
+    for name, lines in results:
+        if lines:
+            matched = True
+            _write_matches(name, lines)
+    return 0 if matched else 1
+
+
+def _write_matches(name: str, lines: list[bytes]) -> None:
+    """Write matching lines like "grep -r PATTERN ." does."""
+    prefix = f"./{name}:".encode("utf-8", "surrogateescape")
+    output = getattr(sys.stdout, "buffer", None)
+    sys.stdout.flush()
+    for line in lines:
+        if output is not None:
+            output.write(prefix + line + b"\n")
+        else:
+            sys.stdout.write((prefix + line).decode(errors="replace") + "\n")
+    sys.stdout.flush()
+
+
+def _search_zip(
+    archive: str,
+    regex: re.Pattern[bytes],
+    max_count: int | None,
+    password: str | None,
+    jobs: int | None,
+) -> Iterator[tuple[str, list[bytes]]]:
+    """Search ZIP members in parallel threads. Members are decompressed
+    by zlib, bz2 and lzma which release the global interpreter lock.
+    """
+    pwd = password.encode() if password else None
+    try:
+        with zipfile.ZipFile(archive) as zfile:
+            infos = [info for info in zfile.infolist() if not info.is_dir()]
+
+            def search_member(info: zipfile.ZipInfo) -> tuple[str, list[bytes]]:
+                with zfile.open(info, pwd=pwd) as fileobj:
+                    return info.filename, search_lines(fileobj, regex, max_count)
+
+            yield from _map_ordered(search_member, infos, jobs)
+    except Exception as err:
+        raise PatoolError(f"error searching {archive}") from err
+
+
+def _map_ordered(
+    func: Callable[[zipfile.ZipInfo], tuple[str, list[bytes]]],
+    items: list[zipfile.ZipInfo],
+    jobs: int | None,
+) -> Iterator[tuple[str, list[bytes]]]:
+    """Call func for all items with the given number of threads and
+    generate the results in the order of the items.
+    """
+    jobs = parallel.get_jobs(jobs)
+    if jobs <= 1 or len(items) <= 1:
+        yield from map(func, items)
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(func, items)
+
+
+def _search_tar(
+    archive: str, regex: re.Pattern[bytes], max_count: int | None
+) -> Iterator[tuple[str, list[bytes]]]:
+    """Search TAR members in one pass over the archive stream.
+    Compressed TAR archives can only be decompressed sequentially,
+    so members are searched one after another.
+    """
+    try:
+        with tarfile.open(archive, "r|*") as tfile:
+            for member in tfile:
+                # do not keep a list of all members
+                tfile.members = []
+                if not member.isfile():
+                    continue
+                fileobj = tfile.extractfile(member)
+                if fileobj is not None:
+                    yield member.name, search_lines(fileobj, regex, max_count)
+    except Exception as err:
+        raise PatoolError(f"error searching {archive}") from err
+
+
+def _search_singlefile(
+    archive: str,
+    regex: re.Pattern[bytes],
+    max_count: int | None,
+    format: str,
+    verbosity: int,
+) -> Iterator[tuple[str, list[bytes]]]:
+    """Search the contents of a single file archive."""
+    from . import _open_member, fileutil  # noqa: PLC0415
+
+    name = fileutil.stripext(archive)
+    with _open_member(archive, name=name, verbosity=verbosity, format=format) as fileobj:
+        try:
+            yield name, search_lines(fileobj, regex, max_count)
+        except PatoolError:
+            raise
+        except Exception as err:
+            raise PatoolError(f"error searching {archive}") from err
@@ -0,0 +1,359 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Detect archive formats by their file signatures ("magic bytes").
+The first bytes of a file are read once and compared against known
+archive signatures. For compressed files the beginning of the compressed
+data is decompressed to detect archives inside (e.g. .tar.gz files).
+"""
+
+import bz2
+import lzma
+import os
+import re
+import zlib
+from collections.abc import Callable
+from typing import Any, BinaryIO
+
+# try importing a python zstd module
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import pyzstd as zstd  # ty: ignore[unresolved-import]
+    except ImportError:
+        zstd = None
+
+# the zstd modules raise their own error class for invalid data
+ZstdError: type[Exception] = getattr(zstd, "ZstdError", ValueError)
+
+# Number of bytes to read from the start of a file. ISO and UDF images
+# have their volume descriptors after 32KiB of system area.
+HeadSize: int = 64 * 1024
+
+# Maximum number of bytes to decompress for detecting archives inside
+# compressed files.
+InnerSize: int = 64 * 1024
+
+# Maximum number of compressed bytes to read for detecting archives inside
+# compressed files. BZIP2 decompresses whole blocks of up to 900KB, and
+# incompressible data takes a bit more space than that.
+InnerReadSize: int = 1024 * 1024
+
+# Simple signatures: (offset, magic bytes, mime)
+# The order is important: more specific signatures come first.
+Signatures: tuple[tuple[int, bytes, str], ...] = (
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (7, b"**ACE**", "application/x-ace"),
+    (0, b"ALZ\x01", "application/x-alzip"),
+    (0, b"MAC ", "audio/x-ape"),
+    (0, b"!<arch>\ndebian-binary", "application/x-debian-package"),
+    (0, b"!<arch>\n", "application/x-archive"),
+    (0, b"\x60\xea", "application/x-arj"),
+    (0, b"BZ3v1", "application/x-bzip3"),
+    (0, b"MSCF\x00\x00\x00\x00", "application/vnd.ms-cab-compressed"),
+    (0, b"ITSF\x03\x00\x00\x00", "application/x-chm"),
+    (0, b"\x1f\x9d", "application/x-compress"),
+    (0, b"070707", "application/x-cpio"),
+    (0, b"070701", "application/x-cpio"),
+    (0, b"070702", "application/x-cpio"),
+    (0, b"\xc7\x71", "application/x-cpio"),
+    (0, b"\x71\xc7", "application/x-cpio"),
+    (0, b"DMS!", "application/x-dms"),
+    (0, b"fLaC", "audio/flac"),
+    (0, b"ArC\x01", "application/x-freearc"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (0, b"LRZI", "application/x-lrzip"),
+    (0, b"\x04\x22\x4d\x18", "application/x-lz4"),
+    (0, b"\x02\x21\x4c\x18", "application/x-lz4"),
+    (0, b"LZIP", "application/x-lzip"),
+    (0, b"\x89LZO\x00\r\n\x1a\n", "application/x-lzop"),
+    (0, b"Rar!\x1a\x07", "application/vnd.rar"),
+    (0, b"\xed\xab\xee\xdb", "application/x-rpm"),
+    (0, b"RZIP", "application/x-rzip"),
+    (0, b"ajkg", "audio/x-shn"),
+    (0, b"conectix", "application/x-vhd"),
+    (0, b"MSWIM\x00\x00\x00", "application/x-ms-wim"),
+    (0, b"\xfd7zXZ\x00", "application/x-xz"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (0, b"PK\x05\x06", "application/zip"),
+    (0, b"PK\x07\x08", "application/zip"),
+    (20, b"\xdc\xa7\xc4\xfd", "application/x-zoo"),
+    (0, b"zPQ", "application/zpaq"),
+    (0, b"7kSt", "application/zpaq"),
+    (0, b"\x28\xb5\x2f\xfd", "application/zstd"),
+)
+
+# Map MIME types of compressed files to the compression name.
+CompressionMimes: dict[str, str] = {
+    "application/gzip": "gzip",
+    "application/x-bzip2": "bzip2",
+    "application/x-compress": "compress",
+    "application/x-lzip": "lzip",
+    "application/x-lzma": "lzma",
+    "application/x-xz": "xz",
+    "application/zstd": "zstd",
+}
+
+# Amiga disk images have a fixed size (double and high density disks).
+AdfSizes: tuple[int, ...] = (901120, 1802240)
+
+# Sector size of ISO and UDF images.
+IsoSectorSize: int = 2048
+
+
+def guess_mime(filename: str) -> tuple[str | None, str | None]:
+    """Detect the MIME type of an archive file by its file signature.
+    For compressed files, the returned MIME type is the type of the archive
+    inside the compressed data and the encoding is the compression name.
+    If no archive could be detected inside compressed data, the MIME
+    type of the compression format is returned with encoding None. If
+    the compressed data could not be decompressed, the MIME type is None.
+    @return: tuple (mime, encoding)
+    """
+    with open(filename, 'rb') as fd:
+        head = fd.read(HeadSize)
+        size = os.fstat(fd.fileno()).st_size
+        mime = detect(head, size)
+        if mime is None and size >= 512:
+            # the fixed VHD format only has a footer at the end of the file
+            fd.seek(size - 512)
+            if fd.read(8) == b"conectix":
+                mime = "application/x-vhd"
+        if mime not in CompressionMimes:
+            return mime, None
+        encoding = CompressionMimes[mime]
+        fd.seek(len(head))
+        data = decompress(encoding, head, fd)
+    if data is None:
+        # the archive inside is not known, e.g. because the first BZIP2
+        # block is larger than InnerReadSize
+        return None, None
+    inner = detect(data, -1)
+    if inner is not None and inner not in CompressionMimes:
+        return inner, encoding
+    return mime, None
+
+
+def detect(data: bytes, size: int) -> str | None:
+    """Detect the MIME type from the beginning of an archive.
+    @param data: the first bytes of the archive
+    @param size: the size of the archive, or -1 if it is not known
+    @return: the MIME type or None if no type could be detected
+    """
+    for offset, magic, mime in Signatures:
+        if data.startswith(magic, offset):
+            return mime
+    for func, mime in Detectors:
+        if func(data, size):
+            return mime
+    return None
+
+
+def is_bzip2(data: bytes, size: int) -> bool:
+    """Detect BZIP2 data by the stream header and the first block magic."""
+    return bool(re.match(rb"BZh[1-9](1AY&SY|\x17rE8P\x90)", data))
+
+
+def is_udf(data: bytes, size: int) -> bool:
+    """Detect UDF images by the NSR descriptor in the volume recognition area."""
+    return _find_volume_descriptor(data, (b"NSR02", b"NSR03"))
+
+
+def is_iso(data: bytes, size: int) -> bool:
+    """Detect ISO 9660 images by the primary volume descriptor."""
+    return _find_volume_descriptor(data, (b"CD001",))
+
+
+def _find_volume_descriptor(data: bytes, identifiers: tuple[bytes, ...]) -> bool:
+    """Search volume descriptors starting at sector 16 for given identifiers."""
+    for sector in range(16, len(data) // IsoSectorSize):
+        identifier = data[sector * IsoSectorSize + 1 : sector * IsoSectorSize + 6]
+        if identifier in identifiers:
+            return True
+        if not identifier.strip(b"\x00"):
+            # end of the volume recognition sequence
+            break
+    return False
+
+
+def is_tar(data: bytes, size: int) -> bool:
+    """Detect TAR archives by the ustar magic or the header checksum."""
+    if len(data) < 512:
+        return False
+    if data.startswith(b"ustar", 257):
+        return True
+    # old V7 TAR archives have no magic, so verify the header checksum
+    try:
+        checksum = int(data[148:156].strip(b"\x00 ") or b"-1", 8)
+    except ValueError:
+        return False
+    header = data[:148] + b" " * 8 + data[156:512]
+    return checksum == sum(header) and data[0] != 0
+
+
+def is_arc(data: bytes, size: int) -> bool:
+    """Detect ARC archives: a marker byte, a compression method and a
+    zero-terminated filename.
+    """
+    if len(data) < 15 or data[0] != 0x1A or not 1 <= data[1] <= 0x14:
+        return False
+    name = data[2:15].split(b"\x00", 1)
+    return len(name) == 2 and len(name[0]) > 0 and name[0].isascii()
+
+
+def is_lzh(data: bytes, size: int) -> bool:
+    """Detect LHA archives by the compression method at offset 2."""
+    return bool(re.match(rb"..-(lh[0-9a-z]|lz[s45])-", data, re.DOTALL))
+
+
+def is_adf(data: bytes, size: int) -> bool:
+    """Detect Amiga disk images by the DOS marker and the image size."""
+    return data.startswith(b"DOS") and len(data) > 3 and data[3] < 8 and size in AdfSizes
+
+
+def is_lzma(data: bytes, size: int) -> bool:
+    """Detect LZMA (alone) data by the default properties byte and by
+    decoding the start of the data.
+    """
+    return len(data) >= 13 and data[0] == 0x5D and bool(decompress("lzma", data))
+
+
+def is_shar(data: bytes, size: int) -> bool:
+    """Detect shell archives by the header comment."""
+    return data.startswith(b"#") and b"This is a shell archive" in data[:1024]
+
+
+def is_id3_flac(data: bytes, size: int) -> bool:
+    """Detect FLAC audio files with a leading ID3v2 tag."""
+    return data.startswith(b"fLaC", get_id3_size(data))
+
+
+def is_id3_ape(data: bytes, size: int) -> bool:
+    """Detect APE audio files with a leading ID3v2 tag."""
+    return data.startswith(b"MAC ", get_id3_size(data))
+
+
+def get_id3_size(data: bytes) -> int:
+    """Return the size of a leading ID3v2 tag including its header,
+    or zero if there is no such tag.
+    """
+    if not data.startswith(b"ID3") or len(data) < 10:
+        return 0
+    # the tag size is a 28-bit "syncsafe" integer with 7 bits per byte
+    tagsize = 0
+    for byte in data[6:10]:
+        tagsize = (tagsize << 7) | (byte & 0x7F)
+    return tagsize + 10
+
+
+# Signatures that need more checks than a simple byte comparison.
+# The order is important: UDF images also have an ISO 9660 descriptor.
+Detectors: tuple[tuple[Callable[[bytes, int], bool], str], ...] = (
+    (is_bzip2, "application/x-bzip2"),
+    (is_udf, "application/x-iso13346-image"),
+    (is_iso, "application/x-iso9660-image"),
+    (is_tar, "application/x-tar"),
+    (is_arc, "application/x-arc"),
+    (is_lzh, "application/x-lha"),
+    (is_adf, "application/x-adf"),
+    (is_lzma, "application/x-lzma"),
+    (is_shar, "application/x-shar"),
+    (is_id3_flac, "audio/flac"),
+    (is_id3_ape, "audio/x-ape"),
+)
+
+
+def can_decompress(encoding: str) -> bool:
+    """Check if data with given compression can be decompressed to detect
+    archives inside.
+    """
+    if encoding == "zstd":
+        return zstd is not None
+    return encoding in ("gzip", "bzip2", "xz", "lzma", "lzip")
+
+
+def decompress(
+    encoding: str, data: bytes, fd: BinaryIO | None = None
+) -> bytes | None:
+    """Decompress the beginning of compressed data. If a file is given,
+    more compressed data is read from it until InnerSize bytes are
+    decompressed, the compressed data ends or InnerReadSize bytes have been
+    read.
+    @return: decompressed data, or None if the data could not be decompressed
+    """
+    try:
+        if encoding == "lzip":
+            decompressor = get_lzip_decompressor(data)
+            data = data[6:]
+        else:
+            decompressor = get_decompressor(encoding)
+        if decompressor is None:
+            return None
+        result = decompressor.decompress(data, InnerSize)
+        read = len(data)
+        while (
+            fd is not None
+            and not result
+            and not decompressor.eof
+            and read < InnerReadSize
+        ):
+            data = fd.read(HeadSize)
+            if not data:
+                break
+            read += len(data)
+            result = decompressor.decompress(data, InnerSize)
+    except (EOFError, ValueError, zlib.error, lzma.LZMAError, OSError, ZstdError):
+        return None
+    if not result and not decompressor.eof:
+        return None
+    return result
+
+
+def get_decompressor(encoding: str) -> Any:
+    """Get a decompressor object for given compression, or None if it is
+    not supported. The decompressors have a decompress(data, max_length)
+    method and an eof attribute.
+    """
+    if encoding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "bzip2":
+        return bz2.BZ2Decompressor()
+    if encoding == "xz":
+        return lzma.LZMADecompressor(lzma.FORMAT_XZ)
+    if encoding == "lzma":
+        return lzma.LZMADecompressor(lzma.FORMAT_ALONE)
+    if encoding == "zstd" and zstd is not None:
+        return zstd.ZstdDecompressor()
+    return None
+
+
+def get_lzip_decompressor(data: bytes) -> lzma.LZMADecompressor | None:
+    """Get a decompressor for the lzip member data after the 6 byte header.
+    The lzip member data is a raw LZMA stream with fixed literal and position
+    properties.
+    """
+    if len(data) < 6 or not data.startswith(b"LZIP") or data[4] != 1:
+        return None
+    # the coded dictionary size is a power of two minus a fraction of it
+    dict_size = 1 << (data[5] & 0x1F)
+    dict_size -= (dict_size // 16) * ((data[5] >> 5) & 0x07)
+    lzma_filter = {
+        "id": lzma.FILTER_LZMA1,
+        "dict_size": max(dict_size, 4096),
+        "lc": 3,
+        "lp": 0,
+        "pb": 2,
+    }
+    return lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[lzma_filter])
@@ -0,0 +1,238 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Check the free disk space before extracting archives.
+
+The extracted size is read cheaply from the archive metadata: the central
+directory of ZIP archives, the ISIZE trailer of GZIP archives, the stream
+indexes of XZ archives, the frame headers of ZSTD archives and the totals
+of "7z l" for formats listed by 7-Zip. Uncompressed TAR archives are about
+as large as their extracted members. Archives of other formats are not
+checked.
+"""
+
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections.abc import Iterable
+from typing import NamedTuple
+from . import blocks, log, util
+from .progress import format_size
+
+# formats whose extracted size is read from the totals of "7z l"
+SevenZipFormats: tuple[str, ...] = ('7z', 'arj', 'cab', 'iso', 'rar', 'udf', 'wim')
+
+# 7-Zip programs listing the archives, in order of preference
+SevenZipPrograms: tuple[str, ...] = ('7zz', '7z', '7za')
+
+# the totals line of "7z l": size, optional compressed size, files and folders
+SevenZipTotals: re.Pattern[str] = re.compile(
+    r'(\d+)\s+(?:\d+\s+)?(\d+) files?(?:, (\d+) folders?)?$'
+)
+
+# the block size if the file system does not report it
+DefaultBlockSize: int = 4096
+
+
+class ExtractedSize(NamedTuple):
+    """The size of the extracted members of an archive."""
+
+    # the total uncompressed size in bytes
+    size: int
+    # the number of members, or 0 if it is not known
+    entries: int
+
+
+def get_extracted_size(
+    archive: str,
+    format: str,
+    compression: str | None,
+    password: str | None = None,
+) -> ExtractedSize | None:
+    """Get the extracted size of an archive from its metadata.
+    @return: the size, or None if it cannot be read cheaply
+    """
+    try:
+        if compression is not None:
+            size = get_uncompressed_size(archive, compression)
+            if size is None:
+                return None
+            # a compressed TAR archive has a TAR archive of this size
+            return ExtractedSize(size, 0 if format == 'tar' else 1)
+        if format == 'tar':
+            return ExtractedSize(os.path.getsize(archive), 0)
+        if format == 'zip':
+            return get_zip_size(archive)
+        if format in SevenZipFormats:
+            return get_7z_size(archive, password)
+        size = get_uncompressed_size(archive, format)
+        if size is None:
+            return None
+        return ExtractedSize(size, 1)
+    except (OSError, ValueError, zipfile.BadZipFile, util.PatoolError):
+        return None
+
+
+def get_uncompressed_size(archive: str, compression: str) -> int | None:
+    """Get the uncompressed size of a compressed file, or None if it
+    cannot be read cheaply.
+    """
+    if compression == 'gzip':
+        return get_gzip_size(archive)
+    if compression in ('xz', 'zstd'):
+        with open(archive, 'rb') as fileobj:
+            if os.fstat(fileobj.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if compression == 'xz':
+                    return blocks.get_xz_size(data)
+                return blocks.get_zstd_size(data)
+    return None
+
+
+def get_gzip_size(archive: str) -> int | None:
+    """Get the uncompressed size of a GZIP archive from the ISIZE trailer,
+    which is the size modulo 2^32 of the last member. Archives with
+    several members or larger data have a larger uncompressed size.
+    """
+    with open(archive, 'rb') as fileobj:
+        if fileobj.read(2) != b'\x1f\x8b':
+            return None
+        fileobj.seek(-4, os.SEEK_END)
+        return int.from_bytes(fileobj.read(4), 'little')
+
+
+def get_zip_size(archive: str) -> ExtractedSize:
+    """Get the extracted size of a ZIP archive from its central directory."""
+    with zipfile.ZipFile(archive) as zfile:
+        infos = zfile.infolist()
+    return ExtractedSize(sum(info.file_size for info in infos), len(infos))
+
+
+def get_7z_size(archive: str, password: str | None) -> ExtractedSize | None:
+    """Get the extracted size of an archive from the totals of "7z l", or
+    None if no 7-Zip program is installed.
+    """
+    for program in SevenZipPrograms:
+        exe = util.find_program(program)
+        if exe is not None:
+            break
+    else:
+        return None
+    # do not ask for passwords of encrypted headers
+    cmd = [exe, 'l', f'-p{password}' if password else '-p-', '--', archive]
+    return parse_7z_totals(util.iter_lines(cmd, verbosity=-2))
+
+
+def parse_7z_totals(lines: Iterable[str]) -> ExtractedSize | None:
+    """Parse the totals line of "7z l" output."""
+    result = None
+    for line in lines:
+        match = SevenZipTotals.search(line)
+        if match is not None:
+            size, files, folders = match.groups()
+            result = ExtractedSize(int(size), int(files) + int(folders or 0))
+    return result
+
+
+def get_existing_dir(path: str) -> str:
+    """Get the directory or its nearest ancestor that exists."""
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def get_required_space(
+    extracted: ExtractedSize, directory: str, margin: float
+) -> int:
+    """Get the disk space in bytes needed to extract to a directory. Each
+    member uses at least one block of the file system, and the margin is
+    a fraction of the size that is added.
+    """
+    block_size = DefaultBlockSize
+    if hasattr(os, 'statvfs'):
+        block_size = os.statvfs(directory).f_frsize or DefaultBlockSize
+    size = extracted.size + extracted.entries * block_size
+    return int(size * (1 + margin))
+
+
+def has_space(extracted: ExtractedSize, path: str, margin: float) -> bool:
+    """Check if the extracted members fit into the file system of a path."""
+    directory = get_existing_dir(path)
+    required = get_required_space(extracted, directory, margin)
+    return shutil.disk_usage(directory).free >= required
+
+
+def check_space(
+    archive: str,
+    format: str,
+    compression: str | None,
+    outdir: str,
+    margin: float,
+    password: str | None = None,
+    verbosity: int = 0,
+) -> None:
+    """Check that the extracted members of an archive fit into the file
+    system of the output directory.
+    @raises: PatoolError if the free space is too small
+    """
+    extracted = get_extracted_size(archive, format, compression, password)
+    if extracted is None:
+        if verbosity >= 1:
+            log.log_info(f"... unknown extracted size of {archive}")
+        return
+    directory = get_existing_dir(outdir)
+    required = get_required_space(extracted, directory, margin)
+    free = shutil.disk_usage(directory).free
+    if verbosity >= 1:
+        log.log_info(
+            f"... extracting {archive} needs {format_size(required)}, "
+            f"{format_size(free)} free in `{directory}'"
+        )
+    if free < required:
+        msg = (
+            f"not enough disk space to extract {archive}: needs "
+            f"{format_size(required)}, but only {format_size(free)} are free "
+            f"in `{directory}'"
+        )
+        raise util.PatoolError(msg)
+
+
+def get_scratch_dir(
+    archive: str,
+    format: str,
+    compression: str | None,
+    directories: tuple[str | None, ...],
+    margin: float,
+    password: str | None = None,
+) -> str | None:
+    """Get the first directory with enough space to extract an archive.
+    A directory of None is the default temporary directory. If the
+    extracted size is not known or no directory has enough space, the
+    first directory is returned.
+    """
+    extracted = get_extracted_size(archive, format, compression, password)
+    if extracted is not None:
+        for directory in directories:
+            path = tempfile.gettempdir() if directory is None else directory
+            if has_space(extracted, path, margin):
+                return directory
+    return directories[0]
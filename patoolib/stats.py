@@ -0,0 +1,191 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Timing and resource usage statistics of archive operations.
+
+The archive operations are divided into phases, for example guessing the
+archive format, finding the archive program, running it and cleaning up
+the output directory. While statistics are collected, the wall time of
+each phase is recorded under the names of all enclosing phases, e.g.
+"repack/extract/run". Archive programs are waited for with os.wait4(),
+which reports their CPU time and maximum resident set size. Other
+platforms only count the archive programs.
+
+Without collected statistics the phases only check a context variable.
+"""
+
+import contextlib
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+# the statistics of the current context, set by collect()
+current: contextvars.ContextVar["Stats | None"] = contextvars.ContextVar(
+    "current_stats", default=None
+)
+
+# lock for updating statistics from multiple threads
+_lock = threading.Lock()
+
+
+class Stats:
+    """Timing and resource usage statistics."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        # the wall time in seconds while the statistics were collected
+        self.wall: float = 0.0
+        # the accumulated wall time in seconds of each phase
+        self.phases: dict[str, float] = {}
+        # the number of archive programs that have been run
+        self.processes: int = 0
+        # the user and system CPU time in seconds of the archive programs
+        self.user: float = 0.0
+        self.system: float = 0.0
+        # the maximum resident set size in bytes of the archive programs
+        self.maxrss: int = 0
+        # the names of the running phases
+        self.stack: list[str] = []
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        """Add the wall time of a phase."""
+        with _lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_process(self, usage: Any = None) -> None:
+        """Add an archive program with the resource usage returned by
+        os.wait4(), or None if it is not available.
+        """
+        with _lock:
+            self.processes += 1
+            if usage is not None:
+                self.user += usage.ru_utime
+                self.system += usage.ru_stime
+                self.maxrss = max(self.maxrss, get_maxrss(usage))
+
+    def merge(self, other: "Stats") -> None:
+        """Add the phases and archive programs of other statistics."""
+        prefix = "/".join(self.stack)
+        with _lock:
+            for name, seconds in other.phases.items():
+                if prefix:
+                    name = f"{prefix}/{name}"
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+            self.processes += other.processes
+            self.user += other.user
+            self.system += other.system
+            self.maxrss = max(self.maxrss, other.maxrss)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the statistics as a dictionary that can be written as JSON."""
+        return {
+            "wall": self.wall,
+            "phases": dict(self.phases),
+            "processes": self.processes,
+            "user": self.user,
+            "system": self.system,
+            "maxrss": self.maxrss,
+        }
+
+    def format_text(self) -> str:
+        """Get a text report of the statistics."""
+        lines = [f"total time {self.wall:.3f}s"]
+        for name, seconds in self.phases.items():
+            lines.append(f"  {name:<30} {seconds:9.3f}s")
+        lines.append(
+            f"{self.processes} archive program(s): user {self.user:.3f}s, "
+            f"system {self.system:.3f}s, max RSS {self.maxrss / 1024 / 1024:.1f} MiB"
+        )
+        return "\n".join(lines)
+
+
+def get_maxrss(usage: Any) -> int:
+    """Get the maximum resident set size of a resource usage in bytes."""
+    if sys.platform == "darwin":
+        return usage.ru_maxrss
+    return usage.ru_maxrss * 1024
+
+
+@contextlib.contextmanager
+def collect() -> Iterator[Stats]:
+    """Collect the statistics of the archive operations in this context.
+    Statistics of nested contexts are also added to the enclosing statistics.
+    """
+    stats = Stats()
+    outer = current.get()
+    token = current.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.wall = time.perf_counter() - start
+        current.reset(token)
+        if outer is not None:
+            outer.merge(stats)
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record the wall time of a phase if statistics are collected."""
+    stats = current.get()
+    if stats is None:
+        yield
+        return
+    stats.stack.append(name)
+    key = "/".join(stats.stack)
+    # enclosing phases are reported before the phases they contain
+    stats.add_phase(key, 0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_phase(key, time.perf_counter() - start)
+        stats.stack.pop()
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorator recording each call of a function as phase."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def wait(process: Any) -> int:
+    """Wait for a subprocess.Popen process and return its exit code. The
+    process is added to the statistics of the current context.
+    """
+    stats = current.get()
+    if stats is None or process.returncode is not None:
+        return process.wait()
+    if hasattr(os, "wait4"):
+        pid, status, usage = os.wait4(process.pid, 0)
+        # the process has been waited for, so Popen must not wait again
+        process.returncode = os.waitstatus_to_exitcode(status)
+    else:
+        usage = None
+        process.wait()
+    stats.add_process(usage)
+    return process.returncode
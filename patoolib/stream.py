@@ -0,0 +1,183 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Readable file objects for archive members and writable file objects for
+compression programs.
+
+Members are decompressed while reading, either by a Python module or by an
+archive program writing the member data to a pipe. No temporary files are
+written.
+"""
+
+import io
+import subprocess
+from collections.abc import Callable, Sequence
+from typing import BinaryIO
+from . import stats
+from .util import PatoolError, popen, run_under_pythonw, shell_quote_nt
+from .log import log_info
+
+
+class MemberFile(io.BufferedIOBase):
+    """A readable binary file object reading from another file object.
+    Closing the member file also calls the given close functions, e.g. to
+    close the archive the member belongs to.
+    """
+
+    def __init__(self, fileobj: BinaryIO, *close_funcs: Callable[[], None]) -> None:
+        """Store the file object to read from."""
+        super().__init__()
+        self.fileobj = fileobj
+        self.close_funcs = close_funcs
+
+    def readable(self) -> bool:
+        """Member files are readable."""
+        return True
+
+    def read(self, size: int | None = -1) -> bytes:
+        """Read up to size bytes, or all data if size is negative or None."""
+        self._checkClosed()
+        return self.fileobj.read(-1 if size is None else size)
+
+    def read1(self, size: int = -1) -> bytes:
+        """Read up to size bytes with at most one read of the underlying file."""
+        self._checkClosed()
+        read1 = getattr(self.fileobj, "read1", self.fileobj.read)
+        return read1(size)
+
+    def readinto(self, buffer) -> int:
+        """Read data into the given buffer."""
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        """Close the underlying file object and call the close functions."""
+        if self.closed:
+            return
+        try:
+            self.fileobj.close()
+            for func in self.close_funcs:
+                func()
+        finally:
+            super().close()
+
+
+class PipeFile(MemberFile):
+    """A readable binary file object for the output of an archive program.
+    Reading the end of the output raises PatoolError if the program exited
+    with an error. Closing the file before the end terminates the program.
+    """
+
+    def __init__(self, cmd: Sequence[str], verbosity: int = 0) -> None:
+        """Start the archive program."""
+        if verbosity >= 0:
+            info = " ".join(map(shell_quote_nt, cmd))
+            log_info(f"running {info}")
+        kwargs = {}
+        if run_under_pythonw():
+            # prevent opening of additional consoles when running with pythonw.exe
+            kwargs["creationflags"] = (
+                subprocess.CREATE_NO_WINDOW  # pytype: disable=module-attr
+            )
+        if verbosity < -1:
+            kwargs["stderr"] = subprocess.DEVNULL
+        self.cmd = cmd
+        self.process = popen(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, **kwargs
+        )
+        super().__init__(self.process.stdout)
+
+    def read(self, size: int | None = -1) -> bytes:
+        """Read data and check the program exit code at the end of the output."""
+        data = super().read(size)
+        # reading all data or nothing at all means the output has ended
+        if size is None or size < 0 or (not data and size != 0):
+            self._check_exit()
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        """Read data and check the program exit code at the end of the output."""
+        data = super().read1(size)
+        if not data and size != 0:
+            self._check_exit()
+        return data
+
+    def _check_exit(self) -> None:
+        """Wait for the program and raise PatoolError on errors."""
+        retcode = stats.wait(self.process)
+        if retcode != 0:
+            msg = f"Command `{self.cmd}' returned non-zero exit status {retcode}"
+            raise PatoolError(msg)
+
+    def close(self) -> None:
+        """Close the output pipe and terminate the program if it still runs."""
+        if self.closed:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.kill()
+            super().close()
+        finally:
+            self.process.wait()
+
+
+class PipeWriter(io.BufferedIOBase):
+    """A writable binary file object for the input of a compression program
+    writing its output to a file. Closing the file waits for the program
+    and raises PatoolError if it exited with an error.
+    """
+
+    def __init__(self, cmd: Sequence[str], filename: str, verbosity: int = 0) -> None:
+        """Start the compression program writing to the given file."""
+        if verbosity >= 0:
+            info = " ".join(map(shell_quote_nt, cmd))
+            log_info(f"running {info} > {shell_quote_nt(filename)}")
+        kwargs = {}
+        if run_under_pythonw():
+            # prevent opening of additional consoles when running with pythonw.exe
+            kwargs["creationflags"] = (
+                subprocess.CREATE_NO_WINDOW  # pytype: disable=module-attr
+            )
+        if verbosity < -1:
+            kwargs["stderr"] = subprocess.DEVNULL
+        super().__init__()
+        self.cmd = cmd
+        with open(filename, "wb") as outfile:
+            self.process = popen(
+                cmd, stdin=subprocess.PIPE, stdout=outfile, **kwargs
+            )
+
+    def writable(self) -> bool:
+        """Pipe writers are writable."""
+        return True
+
+    def write(self, data) -> int:
+        """Write data to the program input."""
+        self._checkClosed()
+        self.process.stdin.write(data)
+        return len(data)
+
+    def close(self) -> None:
+        """Close the program input and check the program exit code."""
+        if self.closed:
+            return
+        try:
+            self.process.stdin.close()
+            retcode = stats.wait(self.process)
+        finally:
+            super().close()
+        if retcode != 0:
+            msg = f"Command `{self.cmd}' returned non-zero exit status {retcode}"
+            raise PatoolError(msg)
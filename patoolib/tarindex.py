@@ -0,0 +1,659 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Random access to the members of TAR archives with an index file.
+
+The index is stored next to the archive with the file extension
+".patoolidx". It has the offsets of all members in the uncompressed TAR
+data, and checkpoints where decompression can start in the middle of
+the archive:
+
+- GZIP: the starts of members and byte aligned deflate flush points
+  as written by pigz, each with the last 32KB of uncompressed data
+  as dictionary. Since the Python zlib module cannot start inflating
+  at a bit offset, archives without flush points only have a checkpoint
+  at the start.
+- XZ: the starts of the blocks, e.g. written by "xz --threads".
+- ZSTD: the starts of the frames, e.g. written by pzstd.
+- uncompressed TAR: every offset.
+
+Reading a member decompresses from the nearest checkpoint before it.
+The index is only written by the "index" command. It records the size
+and modification time of the archive and is ignored when the archive
+changes.
+"""
+
+import base64
+import bisect
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
+import tarfile
+import tempfile
+import zlib
+from collections.abc import Iterator, Sequence
+from typing import Any, BinaryIO, NamedTuple
+from . import blocks, log, progress, util
+from .entries import ArchiveEntry, EntryHardlink, select_members
+from .programs.py_tarfile import get_member_name, get_member_size, get_tar_entry
+
+# increase this when the layout of the index data changes
+IndexVersion: int = 1
+
+IndexSuffix: str = ".patoolidx"
+
+# Compressions of TAR archives that can be indexed. ZSTD needs
+# the compression.zstd or pyzstd module.
+IndexCompressions: tuple[str | None, ...] = (None, 'gzip', 'xz', 'zstd')
+
+# Uncompressed distance between GZIP checkpoints. A member is found by
+# decompressing at most this many bytes before it.
+CheckpointSpan: int = 4 * 1024 * 1024
+
+# The size of the deflate dictionary
+WindowSize: int = 32 * 1024
+
+# Uncompressed bytes after a deflate flush point that must decompress
+# equally from the checkpoint, since flush markers can also occur
+# inside of compressed data.
+ValidateSize: int = 64 * 1024
+
+# decompress data in chunks of this size
+ReadSize: int = 1024 * 1024
+
+# the end of an empty stored deflate block written by a flush
+FlushMarker: bytes = b'\x00\x00\xff\xff'
+
+
+class Checkpoint(NamedTuple):
+    """A position in an archive where decompression can start."""
+
+    # offset in the compressed archive
+    offset: int
+    # offset in the uncompressed TAR data
+    uoffset: int
+    # the deflate dictionary at a GZIP flush point, or None at the start
+    # of a GZIP member, XZ block or ZSTD frame
+    window: bytes | None = None
+
+
+class TarIndex(NamedTuple):
+    """The index of a TAR archive."""
+
+    compression: str | None
+    # checkpoints ordered by their offsets
+    checkpoints: list[Checkpoint]
+    # the archive entries and the offsets of their TAR headers
+    members: list[tuple[ArchiveEntry, int]]
+
+
+def can_index(format: str, compression: str | None) -> bool:
+    """Check if archives with the given format and compression can be indexed."""
+    if format != 'tar' or compression not in IndexCompressions:
+        return False
+    return compression != 'zstd' or get_zstd_module() is not None
+
+
+def get_zstd_module() -> Any:
+    """Get the Python ZSTD module, or None if it is not installed."""
+    try:
+        from compression import zstd  # noqa: PLC0415
+    except ImportError:
+        try:
+            import pyzstd as zstd  # noqa: PLC0415  # ty: ignore[unresolved-import]
+        except ImportError:
+            return None
+    return zstd
+
+
+def get_index_file(archive: str) -> str:
+    """Get the filename of the index of an archive."""
+    return archive + IndexSuffix
+
+
+def get_archive_id(archive: str) -> list[int]:
+    """Get the size and modification time of an archive."""
+    st = os.stat(archive)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def read_index(archive: str, compression: str | None) -> TarIndex | None:
+    """Read the index of an archive.
+    @return: the index, or None if there is no valid index for the archive
+    """
+    filename = get_index_file(archive)
+    try:
+        with gzip.open(filename, 'rt', encoding='utf-8') as fileobj:
+            data = json.load(fileobj)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError) as err:
+        log.log_warning(f"ignoring invalid index file {filename}: {err}")
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != IndexVersion
+        or data.get("compression") != compression
+        or data.get("id") != get_archive_id(archive)
+    ):
+        return None
+    checkpoints = [
+        Checkpoint(offset, uoffset, _decode_window(window))
+        for offset, uoffset, window in data["checkpoints"]
+    ]
+    members = [
+        (
+            ArchiveEntry(name, size=size, mtime=mtime, mode=mode, type=entry_type),
+            offset,
+        )
+        for name, size, mtime, mode, entry_type, offset in data["members"]
+    ]
+    return TarIndex(compression, checkpoints, members)
+
+
+def write_index(archive: str, index: TarIndex) -> None:
+    """Write the index of an archive atomically. Errors are logged as warnings."""
+    filename = get_index_file(archive)
+    data = {
+        "version": IndexVersion,
+        "compression": index.compression,
+        "id": get_archive_id(archive),
+        "checkpoints": [
+            [checkpoint.offset, checkpoint.uoffset, _encode_window(checkpoint.window)]
+            for checkpoint in index.checkpoints
+        ],
+        "members": [
+            [entry.name, entry.size, entry.mtime, entry.mode, entry.type, offset]
+            for entry, offset in index.members
+        ],
+    }
+    directory = os.path.dirname(os.path.abspath(filename))
+    try:
+        fd, tmpname = tempfile.mkstemp(
+            dir=directory, prefix=".tmp_", suffix=IndexSuffix
+        )
+        try:
+            with (
+                os.fdopen(fd, "wb") as rawfile,
+                gzip.open(rawfile, "wt", encoding="utf-8") as fileobj,
+            ):
+                json.dump(data, fileobj, separators=(",", ":"))
+            os.replace(tmpname, filename)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
+    except OSError as err:
+        log.log_warning(f"could not write index file {filename}: {err}")
+
+
+def _encode_window(window: bytes | None) -> str | None:
+    """Encode a deflate dictionary for JSON."""
+    if window is None:
+        return None
+    return base64.b64encode(zlib.compress(window)).decode('ascii')
+
+
+def _decode_window(value: str | None) -> bytes | None:
+    """Decode a deflate dictionary from JSON."""
+    if value is None:
+        return None
+    return zlib.decompress(base64.b64decode(value))
+
+
+def get_index(
+    archive: str, format: str, compression: str | None, password: str | None = None
+) -> TarIndex | None:
+    """Get the valid index of an archive, or None if there is none."""
+    if password is not None or not can_index(format, compression):
+        return None
+    return read_index(archive, compression)
+
+
+def index_archive(
+    archive: str, compression: str | None, verbosity: int = 0
+) -> TarIndex:
+    """Decompress a TAR archive once to build and write its index."""
+    checkpoints: list[Checkpoint] = []
+    members = []
+    try:
+        with (
+            open(archive, 'rb') as fileobj,
+            mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            chunks = iter_indexed_data(fileobj, data, compression, checkpoints)
+            with tarfile.open(fileobj=ChunkReader(chunks), mode='r|') as tfile:
+                for member in tfile:
+                    # do not keep a list of all members
+                    tfile.members = []
+                    members.append((get_tar_entry(member), member.offset))
+    except Exception as err:
+        raise util.PatoolError(f"error indexing {archive}") from err
+    index = TarIndex(compression, checkpoints, members)
+    write_index(archive, index)
+    if verbosity >= 0:
+        log.log_info(
+            f"... indexed {len(members)} members with "
+            f"{len(checkpoints)} checkpoints in {get_index_file(archive)}"
+        )
+    return index
+
+
+def iter_indexed_data(
+    fileobj: BinaryIO,
+    data: mmap.mmap,
+    compression: str | None,
+    checkpoints: list[Checkpoint],
+) -> Iterator[bytes]:
+    """Generate the uncompressed data of an archive and append the
+    checkpoints of the archive to the given list.
+    """
+    if compression is None:
+        checkpoints.append(Checkpoint(0, 0))
+        for offset in range(0, len(data), ReadSize):
+            yield data[offset : offset + ReadSize]
+    elif compression == 'gzip':
+        yield from iter_gzip_checkpoints(data, checkpoints)
+    else:
+        parts = get_parts(data, compression)
+        if parts is None:
+            # the whole archive is decompressed at once
+            checkpoints.append(Checkpoint(0, 0))
+            yield from iter_stream(open_stream(fileobj, compression))
+            return
+        uoffset = 0
+        for part in parts:
+            checkpoints.append(Checkpoint(part.start, uoffset))
+            chunk = part.decompress(data[part.start : part.end])
+            uoffset += len(chunk)
+            yield chunk
+
+
+def get_parts(data: mmap.mmap, compression: str | None) -> list[blocks.Part] | None:
+    """Get the XZ blocks or ZSTD frames of an archive.
+    @return: the parts, or None if the archive has parts that are too large
+        to be decompressed in memory
+    """
+    if compression == 'xz':
+        parts = blocks.get_xz_blocks(data)
+    else:
+        parts = blocks.get_zstd_frames(data, get_zstd_module().ZstdDecompressor)
+    if not parts or any(blocks.is_large_part(part) for part in parts):
+        return None
+    return parts
+
+
+def open_stream(fileobj: BinaryIO, compression: str | None) -> BinaryIO:
+    """Open the uncompressed data of a whole XZ or ZSTD archive."""
+    fileobj.seek(0)
+    if compression == 'xz':
+        return lzma.LZMAFile(fileobj)
+    return get_zstd_module().ZstdFile(fileobj)
+
+
+def iter_gzip_checkpoints(
+    data: mmap.mmap, checkpoints: list[Checkpoint]
+) -> Iterator[bytes]:
+    """Generate the uncompressed data of a GZIP archive and append
+    checkpoints at member starts and at deflate flush points that are
+    at least CheckpointSpan bytes apart.
+    """
+    checkpoints.append(Checkpoint(0, 0))
+    decompressor = zlib.decompressobj(wbits=31)
+    pos = uoffset = 0
+    window = b''
+    # a flush point checkpoint that is validated with the following data
+    candidate: Checkpoint | None = None
+    lookahead: list[bytes] = []
+    while pos < len(data):
+        end = min(pos + ReadSize, len(data))
+        # stop decompressing at the next flush point
+        marker = data.find(FlushMarker, pos, end)
+        if marker >= 0:
+            end = marker + len(FlushMarker)
+        for chunk in _decompress(decompressor, data[pos:end]):
+            uoffset += len(chunk)
+            window = (window + chunk)[-WindowSize:]
+            if candidate is not None:
+                lookahead.append(chunk)
+            yield chunk
+        if candidate is not None and uoffset - candidate.uoffset >= ValidateSize:
+            expected = b''.join(lookahead)[:ValidateSize]
+            if _is_valid_checkpoint(data, candidate, expected):
+                checkpoints.append(candidate)
+            candidate = None
+            lookahead = []
+        if decompressor.eof:
+            pos = end - len(decompressor.unused_data)
+            if _is_padding(data, pos):
+                return
+            # the start of the next member
+            decompressor = zlib.decompressobj(wbits=31)
+            if uoffset >= checkpoints[-1].uoffset + CheckpointSpan:
+                checkpoints.append(Checkpoint(pos, uoffset))
+                candidate = None
+                lookahead = []
+            continue
+        due = uoffset >= checkpoints[-1].uoffset + CheckpointSpan
+        flushed = data[end - len(FlushMarker) : end] == FlushMarker
+        if due and candidate is None and flushed:
+            candidate = Checkpoint(end, uoffset, window)
+        pos = end
+    raise EOFError("compressed file ended before the end-of-stream marker")
+
+
+def _is_padding(data: mmap.mmap, pos: int) -> bool:
+    """Check if the data from pos on are zero bytes, which gzip(1)
+    accepts after the last member.
+    """
+    if pos < len(data) and data[pos] != 0:
+        return False
+    while pos < len(data):
+        if data[pos : pos + ReadSize].strip(b'\0'):
+            return False
+        pos += ReadSize
+    return True
+
+
+def _decompress(decompressor: Any, data: bytes) -> Iterator[bytes]:
+    """Decompress data in chunks of at most ReadSize bytes."""
+    while not decompressor.eof:
+        chunk = decompressor.decompress(data, ReadSize)
+        data = decompressor.unconsumed_tail
+        if not chunk and not data:
+            break
+        if chunk:
+            yield chunk
+
+
+def _is_valid_checkpoint(
+    data: mmap.mmap, checkpoint: Checkpoint, expected: bytes
+) -> bool:
+    """Check that decompressing from a flush point checkpoint gives
+    the expected data.
+    """
+    decompressor = zlib.decompressobj(wbits=-15, zdict=checkpoint.window)
+    try:
+        result = decompressor.decompress(
+            data[checkpoint.offset : checkpoint.offset + ReadSize], len(expected)
+        )
+    except zlib.error:
+        return False
+    if not result or not expected.startswith(result):
+        return False
+    return len(result) == len(expected) or decompressor.eof
+
+
+def iter_gzip(fileobj: BinaryIO, checkpoint: Checkpoint) -> Iterator[bytes]:
+    """Generate the uncompressed data of a GZIP archive from a checkpoint.
+    The checksums of members that are read from a flush point are not
+    verified.
+    """
+    fileobj.seek(checkpoint.offset)
+    # a raw deflate stream without GZIP header starts at flush points
+    raw = checkpoint.window is not None
+    if raw:
+        decompressor = zlib.decompressobj(wbits=-15, zdict=checkpoint.window)
+    else:
+        decompressor = zlib.decompressobj(wbits=31)
+    data = b''
+    while True:
+        if not data:
+            data = fileobj.read(ReadSize)
+            if not data:
+                return
+        yield from _decompress(decompressor, data)
+        if not decompressor.eof:
+            data = b''
+            continue
+        data = decompressor.unused_data
+        if raw:
+            # skip the GZIP trailer
+            while len(data) < 8 and (more := fileobj.read(ReadSize)):
+                data += more
+            data = data[8:]
+            raw = False
+        # skip zero padding after the last member
+        data = data.lstrip(b'\0')
+        decompressor = zlib.decompressobj(wbits=31)
+
+
+def iter_parts(
+    data: mmap.mmap, parts: list[blocks.Part], checkpoint: Checkpoint
+) -> Iterator[bytes]:
+    """Generate the uncompressed data of an XZ or ZSTD archive from the
+    block or frame at a checkpoint.
+    """
+    starts = [part.start for part in parts]
+    for part in parts[bisect.bisect_left(starts, checkpoint.offset) :]:
+        yield part.decompress(data[part.start : part.end])
+
+
+class ChunkReader(io.RawIOBase):
+    """A readable file object for data generated in chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        """Store the chunk iterator."""
+        super().__init__()
+        self.chunks = chunks
+        self.buffer = memoryview(b'')
+        # the position in the whole data
+        self.position = 0
+
+    def readable(self) -> bool:
+        """Chunk readers are readable."""
+        return True
+
+    def read(self, size: int | None = -1) -> bytes:
+        """Read size bytes, or less at the end of the data. The tarfile
+        module does not support short reads.
+        """
+        if size is None or size < 0:
+            return self.readall()
+        result = bytearray(size)
+        pos = 0
+        with memoryview(result) as view:
+            while pos < size and (read := self.readinto(view[pos:])):
+                pos += read
+        del result[pos:]
+        return bytes(result)
+
+    def readinto(self, buffer) -> int:
+        """Read data into the given buffer."""
+        while not self.buffer:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.buffer = memoryview(chunk)
+        size = min(len(buffer), len(self.buffer))
+        buffer[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        self.position += size
+        return size
+
+    def tell(self) -> int:
+        """Get the position in the whole data."""
+        return self.position
+
+
+class IndexedFile(ChunkReader):
+    """A seekable file object for the uncompressed data of an indexed
+    TAR archive. Seeking starts decompressing at the nearest checkpoint
+    unless the new position can be reached faster by reading on.
+    """
+
+    def __init__(self, archive: str, index: TarIndex) -> None:
+        """Open the archive."""
+        self.fileobj = open(archive, 'rb')
+        try:
+            self.data = mmap.mmap(self.fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.fileobj.close()
+            raise
+        self.index = index
+        self.uoffsets = [checkpoint.uoffset for checkpoint in index.checkpoints]
+        # the XZ blocks or ZSTD frames, found on first use
+        self.parts: list[blocks.Part] | None = None
+        super().__init__(self._iter_data(index.checkpoints[0]))
+
+    def seekable(self) -> bool:
+        """Indexed files are seekable."""
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Seek to an offset in the uncompressed data."""
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("can only seek from the start or position")
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        if self.index.compression is None:
+            self.fileobj.seek(offset)
+            self.chunks = self._iter_data(Checkpoint(offset, offset))
+            self.buffer = memoryview(b'')
+            self.position = offset
+            return offset
+        i = bisect.bisect_right(self.uoffsets, offset) - 1
+        checkpoint = self.index.checkpoints[i]
+        if not checkpoint.uoffset <= self.position <= offset:
+            self.chunks = self._iter_data(checkpoint)
+            self.buffer = memoryview(b'')
+            self.position = checkpoint.uoffset
+        self._skip(offset - self.position)
+        return self.position
+
+    def _skip(self, size: int) -> None:
+        """Skip data by reading it."""
+        buffer = bytearray(min(size, ReadSize))
+        while size > 0:
+            with memoryview(buffer)[: min(size, len(buffer))] as view:
+                read = self.readinto(view)
+            if not read:
+                break
+            size -= read
+
+    def _iter_data(self, checkpoint: Checkpoint) -> Iterator[bytes]:
+        """Generate the uncompressed data from a checkpoint."""
+        compression = self.index.compression
+        if compression is None:
+            self.fileobj.seek(checkpoint.offset)
+            return iter(lambda: self.fileobj.read(ReadSize), b'')
+        if compression == 'gzip':
+            return iter_gzip(self.fileobj, checkpoint)
+        if len(self.index.checkpoints) == 1:
+            return iter_stream(open_stream(self.fileobj, compression))
+        if self.parts is None:
+            self.parts = get_parts(self.data, compression)
+            if self.parts is None:
+                raise ValueError("the archive has changed since it has been indexed")
+        return iter_parts(self.data, self.parts, checkpoint)
+
+    def close(self) -> None:
+        """Close the archive."""
+        if self.closed:
+            return
+        try:
+            self.chunks = iter(())
+            self.buffer = memoryview(b'')
+            self.data.close()
+            self.fileobj.close()
+        finally:
+            super().close()
+
+
+def iter_stream(fileobj: BinaryIO) -> Iterator[bytes]:
+    """Generate the data of a file object in chunks and close it at the end."""
+    with fileobj:
+        while chunk := fileobj.read(ReadSize):
+            yield chunk
+
+
+def read_member(tfile: tarfile.TarFile, offset: int) -> tarfile.TarInfo:
+    """Read the TAR member with the header at the given offset."""
+    tfile.fileobj.seek(offset)
+    return tfile.tarinfo.fromtarfile(tfile)
+
+
+def get_member_offsets(index: TarIndex, names: Sequence[str]) -> list[int]:
+    """Get the header offsets of the members with the given names,
+    in the order of the archive.
+    """
+    offsets = {entry.name.rstrip('/'): offset for entry, offset in index.members}
+    return sorted(offsets[name.rstrip('/')] for name in names)
+
+
+def has_member(index: TarIndex, name: str) -> bool:
+    """Check if an indexed archive has a member with the given name."""
+    name = name.rstrip('/')
+    return any(entry.name.rstrip('/') == name for entry, offset in index.members)
+
+
+def select_index_members(index: TarIndex, patterns: Sequence[str]) -> list[str]:
+    """Get the names of indexed members matching the given patterns."""
+    return select_members((entry for entry, offset in index.members), patterns)
+
+
+def has_hardlinks(index: TarIndex, names: Sequence[str]) -> bool:
+    """Check if any of the named members is a hard link. Hard links need
+    their target members, which are searched in the whole archive.
+    """
+    selected = {name.rstrip('/') for name in names}
+    return any(
+        entry.type == EntryHardlink and entry.name.rstrip('/') in selected
+        for entry, offset in index.members
+    )
+
+
+def extract_members(
+    archive: str, index: TarIndex, names: Sequence[str], outdir: str
+) -> None:
+    """Extract the named members of an indexed TAR archive."""
+    try:
+        with (
+            IndexedFile(archive, index) as fileobj,
+            tarfile.TarFile(fileobj=fileobj) as tfile,
+        ):
+            members = progress.iter_members(
+                [
+                    read_member(tfile, offset)
+                    for offset in get_member_offsets(index, names)
+                ],
+                get_member_name,
+                get_member_size,
+            )
+            tfile.extractall(path=outdir, members=members, filter='data')
+    except Exception as err:
+        raise util.PatoolError(f"error extracting {archive}") from err
+
+
+def open_member(archive: str, index: TarIndex, name: str) -> BinaryIO:
+    """Open a member of an indexed TAR archive for reading."""
+    from .stream import MemberFile  # noqa: PLC0415
+
+    indexed = None
+    try:
+        (offset,) = get_member_offsets(index, [name])
+        indexed = IndexedFile(archive, index)
+        tfile = tarfile.TarFile(fileobj=indexed)
+        fileobj = tfile.extractfile(read_member(tfile, offset))
+        if fileobj is None:
+            raise ValueError(f"{name} is not a regular file")
+        return MemberFile(fileobj, tfile.close, indexed.close)
+    except Exception as err:
+        if indexed is not None:
+            indexed.close()
+        raise util.PatoolError(f"error opening {name} in {archive}") from err
@@ -14,23 +14,40 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Utility functions."""
 
+import contextvars
 import functools
 import os
 import re
-import platform
 import sys
 import shutil
-import subprocess
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
+from typing import TYPE_CHECKING, Any
 from .log import log_info
+from . import cache, stats
+
+if TYPE_CHECKING:
+    import subprocess
 
 
 class PatoolError(Exception):
     """Raised when errors occur."""
 
 
+# The command runner of the current library call, set by the aio module.
+# Its run() method runs commands instead of subprocess.run() and returns
+# the exit code. Processes started by popen() are passed to its
+# add_process() method and temporary directories of fileutil.tmpdir() to
+# its add_tmpdir() method, so they can be killed and removed when the call
+# is cancelled.
+command_runner: contextvars.ContextVar[Any] = contextvars.ContextVar(
+    "command_runner", default=None
+)
+
+
 def backtick(cmd: Sequence[str], encoding: str = 'utf-8', check: bool = True) -> str:
     """Return decoded output from command."""
+    import subprocess  # noqa: PLC0415
+
     return subprocess.run(
         cmd, stdout=subprocess.PIPE, check=check, encoding=encoding, errors="replace"
     ).stdout
@@ -51,6 +68,8 @@ def run(
     """Run command without error checking.
     @return: command return code
     """
+    import subprocess  # noqa: PLC0415
+
     # Note that shell_quote_nt() result is not suitable for copy-paste
     # (especially on Unix systems), but it looks nicer than shell_quote().
     if verbosity >= 0:
@@ -77,10 +96,35 @@ def run(
         if kwargs.get("shell"):
             # for shell calls the command must be a string
             cmd = " ".join(cmd)
+    runner = command_runner.get()
+    if runner is not None:
+        return runner.run(cmd, **kwargs)
+    if stats.current.get() is not None:
+        # wait with stats.wait() for the resource usage of the command
+        if kwargs.pop("input", None) is not None:
+            # the input is always empty to prevent hangs of programs
+            kwargs["stdin"] = subprocess.DEVNULL
+        with popen(cmd, **kwargs) as process:
+            try:
+                return stats.wait(process)
+            except BaseException:
+                process.kill()
+                raise
     res = subprocess.run(cmd, check=False, **kwargs)
     return res.returncode
 
 
+def popen(cmd: Sequence[str], **kwargs) -> "subprocess.Popen":
+    """Start a command whose input or output is read by Python code."""
+    import subprocess  # noqa: PLC0415
+
+    process = subprocess.Popen(cmd, **kwargs)
+    runner = command_runner.get()
+    if runner is not None:
+        runner.add_process(process)
+    return process
+
+
 def run_checked(
     cmd: Sequence[str], ret_ok: Sequence[int] = (0,), interactive: bool = True, **kwargs
 ) -> int:
@@ -92,6 +136,46 @@ def run_checked(
     return retcode
 
 
+def iter_lines(cmd: Sequence[str], verbosity: int = 0) -> Iterator[str]:
+    """Run command without user input and generate the lines of its output
+    without line endings. The output is read incrementally from a pipe.
+    Closing the generator early terminates the command.
+    Raise PatoolError if the command exits with an error.
+    """
+    import subprocess  # noqa: PLC0415
+
+    if verbosity >= 0:
+        info = " ".join(map(shell_quote_nt, cmd))
+        log_info(f"running {info}")
+    kwargs = {}
+    if run_under_pythonw():
+        # prevent opening of additional consoles when running with pythonw.exe
+        kwargs["creationflags"] = (
+            subprocess.CREATE_NO_WINDOW  # pytype: disable=module-attr
+        )
+    if verbosity < -1:
+        kwargs["stderr"] = subprocess.DEVNULL
+    with popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        # keep undecodable bytes of file names
+        errors="surrogateescape",
+        text=True,
+        **kwargs,
+    ) as proc:
+        try:
+            for line in proc.stdout:
+                yield line.rstrip("\r\n")
+        except GeneratorExit:
+            proc.kill()
+            raise
+        stats.wait(proc)
+    if proc.returncode != 0:
+        msg = f"Command `{cmd}' returned non-zero exit status {proc.returncode}"
+        raise PatoolError(msg)
+
+
 def shell_quote(value: str) -> str:
     """Quote all shell metacharacters in given string value with strong
     (i.e. single) quotes, handling the single quote especially.
@@ -129,11 +213,16 @@ def p7zip_supports_rar(program: str) -> bool:
     """
     _7z = find_program(program)
     if _7z:
-        formats = backtick([_7z, "i"])
-        return bool(re.search(r" Rar\d$", formats, re.MULTILINE))
+        return cache.probe(_7z, "codec rar", lambda: _p7zip_supports_rar(_7z))
     return False
 
 
+def _p7zip_supports_rar(exe: str) -> bool:
+    """Run `7z i` to determine if the RAR codec is installed."""
+    formats = backtick([exe, "i"])
+    return bool(re.search(r" Rar\d$", formats, re.MULTILINE))
+
+
 def p7zip_supports_compress(program: str) -> bool:
     """Determine if COMPRESS (.Z) archives are supported for 7z program.
     If installed, `7z i` will print something like
@@ -144,11 +233,34 @@ def p7zip_supports_compress(program: str) -> bool:
     """
     _7z = find_program(program)
     if _7z:
-        formats = backtick([_7z, "i"])
-        return bool(re.search(r"Z\s+z\s+taz", formats, re.MULTILINE))
+        return cache.probe(
+            _7z, "format compress", lambda: _p7zip_supports_compress(_7z)
+        )
     return False
 
 
+def _p7zip_supports_compress(exe: str) -> bool:
+    """Run `7z i` to determine if COMPRESS (.Z) archives are supported."""
+    formats = backtick([exe, "i"])
+    return bool(re.search(r"Z\s+z\s+taz", formats, re.MULTILINE))
+
+
+def program_supports_options(exe: str, options: Sequence[str]) -> bool:
+    """Determine if a program accepts the given options by running
+    it with the options and --help. Most programs exit with an error code
+    on unsupported options.
+    The result is stored in the capabilities cache.
+    """
+    cmd = [exe, *options, "--help"]
+
+    def run_help() -> bool:
+        import subprocess  # noqa: PLC0415
+
+        return run(cmd, stderr=subprocess.DEVNULL, verbosity=-1) == 0
+
+    return cache.probe(exe, "options " + " ".join(options), run_help)
+
+
 def system_search_path() -> str:
     """Get the list of directories to search for executable programs."""
     path = os.environ.get("PATH", os.defpath)
@@ -178,8 +290,16 @@ def append_to_path(path: str, directory: str) -> str:
 
 @functools.cache
 def find_program(program: str) -> str | None:
-    """Look for given program."""
-    return shutil.which(program, path=system_search_path())
+    """Look for given program.
+    Found programs are stored in the capabilities cache.
+    """
+    path = system_search_path()
+    exe = cache.lookup_program(program, path)
+    if exe is None:
+        exe = shutil.which(program, path=path)
+        if exe is not None:
+            cache.store_program(program, path, exe)
+    return exe
 
 
 def get_nt_7z_dir() -> str:
@@ -226,6 +346,8 @@ def get_nt_winrar_dir() -> str:
 
 def get_peazip_addon_dir() -> str:
     """Get platform-dependen directory for PeaZip add-ons."""
+    import platform  # noqa: PLC0415
+
     if platform.system() == 'Windows':
         return 'C:\\Program Files\\PeaZip\\res\\bin\\'
     if platform.system() == 'Linux':
@@ -238,9 +360,14 @@ def get_peazip_addon_dir() -> str:
 def get_arc_format(arc_exe: str) -> str:
     """If running arc_exe without options prints "FreeArc" in its output assume
     the given arc_exe supports the freearc format. Else assume arc format support.
+    The result is stored in the capabilities cache.
     """
-    helptext = backtick([arc_exe], check=False)
-    return "freearc" if "FreeArc" in helptext else "arc"
+
+    def run_arc() -> str:
+        helptext = backtick([arc_exe], check=False)
+        return "freearc" if "FreeArc" in helptext else "arc"
+
+    return cache.probe(arc_exe, "arc format", run_arc)
 
 
 def strlist_with_or(alist: Sequence[str]) -> str:
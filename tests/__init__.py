@@ -22,7 +22,10 @@ of "magic" patterns. The contents of the magic pattern library can vary
 between distributions so the tests might not run on all systems.
 """
 
+import atexit
 import os
+import shutil
+import tempfile
 import patoolib
 import pytest
 import importlib
@@ -30,6 +33,10 @@ import importlib
 basedir = os.path.dirname(__file__)
 datadir = os.path.join(basedir, 'data')
 
+# the tests do not read or write the cache of the user
+os.environ['PATOOL_CACHE_DIR'] = tempfile.mkdtemp(prefix='patool-cache-')
+atexit.register(shutil.rmtree, os.environ['PATOOL_CACHE_DIR'], ignore_errors=True)
+
 # Python 3.x function name attribute
 fnameattr = '__name__'
 
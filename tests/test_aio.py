@@ -0,0 +1,132 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the asyncio versions of the archive functions."""
+
+import unittest
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest import mock
+from patoolib import aio, fileutil, util
+from . import basedir, datadir, needs_program
+
+# a command that runs until it is killed
+SleepCmd = [sys.executable, "-c", "import time; time.sleep(60)"]
+
+
+class AioTest(unittest.TestCase):
+    """Test class for the asyncio functions."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    @needs_program('tar')
+    def test_archive_functions(self):
+        """Test extracting, listing, testing, creating and repacking."""
+        archive = os.path.join(datadir, "t.tar")
+        outdir = os.path.join(self.tmpdir, "out")
+        created = os.path.join(self.tmpdir, "t.tar")
+        repacked = os.path.join(self.tmpdir, "t.zip")
+
+        async def run():
+            await aio.extract_archive(archive, outdir=outdir, program="tar")
+            await aio.list_archive(archive, verbosity=-1, program="tar")
+            await aio.test_archive(archive, verbosity=-1, program="tar")
+            await aio.create_archive(
+                created, [os.path.join(outdir, "t")], verbosity=-1, program="tar"
+            )
+            await aio.repack_archive(created, repacked, verbosity=-1)
+
+        # archive programs must not be run by blocking calls
+        with mock.patch.object(
+            subprocess, "run", side_effect=AssertionError("blocking call")
+        ):
+            asyncio.run(run())
+        with open(os.path.join(outdir, "t", "t.txt")) as fileobj:
+            self.assertEqual(fileobj.read(), "42")
+        self.assertTrue(os.path.isfile(created))
+        self.assertTrue(os.path.isfile(repacked))
+
+    def test_error(self):
+        """Test that errors of archive programs are raised."""
+        cmd = [sys.executable, "-c", "raise SystemExit(2)"]
+        with self.assertRaises(util.PatoolError):
+            asyncio.run(aio.run_call(util.run_checked, cmd, verbosity=-1))
+
+    def check_cancel(self, func):
+        """Cancel a call that runs a command until it is killed, and check
+        that its temporary directory is removed.
+        """
+        tmpdirs = []
+
+        def call():
+            tmpdirs.append(fileutil.tmpdir(dir=self.tmpdir))
+            func()
+
+        async def run():
+            task = asyncio.create_task(aio.run_call(call))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            start = time.monotonic()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return time.monotonic() - start
+
+        self.assertLess(asyncio.run(run()), 30)
+        self.assertEqual(len(tmpdirs), 1)
+        self.assertFalse(os.path.exists(tmpdirs[0]))
+
+    def test_cancel_run(self):
+        """Test cancelling a call running a command."""
+        self.check_cancel(lambda: util.run_checked(SleepCmd, verbosity=-1))
+
+    def test_cancel_popen(self):
+        """Test cancelling a call reading the output of a command."""
+        self.check_cancel(lambda: list(util.iter_lines(SleepCmd, verbosity=-1)))
+
+    def test_limiter(self):
+        """Test limiting the number of concurrent calls."""
+        lock = threading.Lock()
+        running = []
+        counts = []
+
+        def call():
+            with lock:
+                running.append(1)
+                counts.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+
+        async def run(limiter):
+            await asyncio.gather(
+                *(aio.run_call(call, limiter=limiter) for i in range(6))
+            )
+
+        asyncio.run(run(asyncio.Semaphore(2)))
+        self.assertEqual(len(counts), 6)
+        self.assertLessEqual(max(counts), 2)
+        with mock.patch.object(aio, "MaxConcurrency", 1):
+            counts.clear()
+            asyncio.run(run(None))
+        self.assertEqual(max(counts), 1)
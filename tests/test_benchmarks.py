@@ -0,0 +1,122 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the benchmark suite."""
+
+import unittest
+import contextlib
+import io
+import os
+from unittest import mock
+from benchmarks import corpus, run, suite, worker
+from patoolib import fileutil
+from . import basedir, needs_os
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Test class for the benchmark suite."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def test_corpus(self):
+        """Test that the corpora are reproducible."""
+        for name in ("tiny", "random"):
+            contents = []
+            for i in range(2):
+                directory = os.path.join(self.tmpdir, f"{name}{i}")
+                corpus.create_corpus(directory, name, scale=0.01)
+                filenames = []
+                for root, dirs, files in os.walk(directory):
+                    filenames.extend(os.path.join(root, f) for f in files)
+                data = []
+                for filename in sorted(filenames):
+                    with open(filename, "rb") as fileobj:
+                        data.append(fileobj.read())
+                contents.append(data)
+            self.assertEqual(contents[0], contents[1])
+        self.assertEqual(len(contents[0]), 1)
+        self.assertEqual(len(contents[0][0]), corpus.Corpora["random"][1] // 100)
+
+    def test_benchmarks(self):
+        """Test the benchmark list of a single file format."""
+        benchmarks = list(
+            suite.iter_benchmarks(
+                ["gzip"], ["tiny", "random"], suite.Operations, programs=["py_gzip"]
+            )
+        )
+        keys = [benchmark.key for benchmark in benchmarks]
+        self.assertEqual(
+            keys,
+            [
+                "create/gzip/random/py_gzip",
+                "extract/gzip/random/py_gzip",
+                "test/gzip/random/py_gzip",
+                "repack/gzip/random/-",
+                "search/gzip/random/-",
+                "diff/gzip/random/-",
+            ],
+        )
+
+    @needs_os('posix')
+    def test_run(self):
+        """Test running benchmarks and comparing them with a baseline."""
+        output = os.path.join(self.tmpdir, "benchmark.json")
+        baseline = os.path.join(self.tmpdir, "baseline.json")
+        args = [
+            "--format=zip",
+            "--corpus=tiny",
+            "--program=py_zipfile",
+            "--scale=0.01",
+            "--repeat=1",
+            f"--output={output}",
+            f"--baseline={baseline}",
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(run.main(args + ["--save-baseline"]), 0)
+        data = run.read_results(baseline)
+        self.assertEqual(
+            sorted(data["results"]),
+            [
+                f"{operation}/zip/tiny/{program}"
+                for operation, program in sorted(
+                    [(op, "py_zipfile") for op in suite.ProgramOperations]
+                    + [(op, "-") for op in suite.FormatOperations]
+                )
+            ],
+        )
+        for result in data["results"].values():
+            self.assertNotIn("error", result)
+            self.assertGreater(result["maxrss"], 0)
+        # results that are much worse than the baseline are regressions
+        results = {
+            key: dict(result, wall=result["wall"] * 3 + 1)
+            for key, result in data["results"].items()
+        }
+        regressions = run.compare_results(results, data["results"], 0.2)
+        self.assertEqual(len(regressions), len(results))
+        self.assertEqual(run.compare_results(data["results"], results, 0.2), [])
+
+    def test_worker_without_resource(self):
+        """Test measuring without the resource module, as on Windows."""
+        with mock.patch.object(worker, "resource", None):
+            self.assertEqual(worker.get_peak_memory(), 0)
+            cpu_self, cpu_children = worker.get_cpu_times()
+        self.assertGreater(cpu_self, 0)
+        self.assertGreaterEqual(cpu_children, 0)
@@ -0,0 +1,134 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the capabilities cache."""
+
+import unittest
+import os
+from unittest import mock
+from patoolib import cache, cli, fileutil
+from . import basedir
+
+
+class CacheTest(unittest.TestCase):
+    """Test class for the capabilities cache."""
+
+    def setUp(self):
+        """Use a temporary cache directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+        self.env = mock.patch.dict(os.environ, {"PATOOL_CACHE_DIR": self.tmpdir})
+        self.env.start()
+        cache.clear()
+        self.exe = os.path.join(self.tmpdir, "prog")
+        with open(self.exe, "w") as fo:
+            fo.write("#!/bin/sh\n")
+
+    def tearDown(self):
+        """Remove the temporary cache directory."""
+        cache.clear()
+        self.env.stop()
+        fileutil.rmtree(self.tmpdir)
+
+    def test_probe(self):
+        """Test that probe results are stored across cache loads."""
+        calls = []
+
+        def func():
+            calls.append(1)
+            return True
+
+        self.assertTrue(cache.probe(self.exe, "test", func))
+        self.assertTrue(cache.probe(self.exe, "test", func))
+        self.assertEqual(len(calls), 1)
+        # changes are written in one batch
+        self.assertFalse(os.path.exists(cache.get_capabilities_file()))
+        cache.flush()
+        self.assertTrue(os.path.isfile(cache.get_capabilities_file()))
+        # simulate a new process by discarding the loaded data
+        cache._capabilities = None
+        self.assertTrue(cache.probe(self.exe, "test", func))
+        self.assertEqual(len(calls), 1)
+
+    def test_probe_invalidate(self):
+        """Test that probe results are discarded when the executable changes."""
+        self.assertEqual(cache.probe(self.exe, "test", lambda: 1), 1)
+        with open(self.exe, "a") as fo:
+            fo.write("exit 0\n")
+        self.assertEqual(cache.probe(self.exe, "test", lambda: 2), 2)
+
+    def test_program(self):
+        """Test storing and looking up programs."""
+        path = self.tmpdir
+        self.assertIsNone(cache.lookup_program("prog", path))
+        cache.store_program("prog", path, self.exe)
+        cache.flush()
+        cache._capabilities = None
+        self.assertEqual(cache.lookup_program("prog", path), self.exe)
+        self.assertIsNone(cache.lookup_program("prog", "otherpath"))
+        os.remove(self.exe)
+        self.assertIsNone(cache.lookup_program("prog", path))
+
+    def test_program_earlier_dir(self):
+        """Test that programs installed earlier in the search path are found."""
+        bindir = os.path.join(self.tmpdir, "bin")
+        os.mkdir(bindir)
+        missing = os.path.join(self.tmpdir, "missing")
+        path = os.pathsep.join([bindir, missing, self.tmpdir])
+        cache.store_program("prog", path, self.exe)
+        self.assertEqual(cache.lookup_program("prog", path), self.exe)
+        # changing the directory of the program keeps the entry
+        with open(os.path.join(self.tmpdir, "other"), "w"):
+            pass
+        self.assertEqual(cache.lookup_program("prog", path), self.exe)
+        os.mkdir(missing)
+        self.assertIsNone(cache.lookup_program("prog", path))
+        cache.store_program("prog", path, self.exe)
+        mtime = os.stat(bindir).st_mtime_ns
+        with open(os.path.join(bindir, "prog"), "w"):
+            pass
+        os.utime(bindir, ns=(mtime + 1000, mtime + 1000))
+        self.assertIsNone(cache.lookup_program("prog", path))
+
+    def test_invalid_entries(self):
+        """Test that invalid cache entries are cache misses."""
+        path = self.tmpdir
+        data = cache.get_capabilities()
+        data["programs"][path] = {"prog": self.exe, "other": {"dirs": []}}
+        data["executables"][self.exe] = {"probes": {}}
+        self.assertIsNone(cache.lookup_program("prog", path))
+        self.assertIsNone(cache.lookup_program("other", path))
+        self.assertEqual(cache.probe(self.exe, "test", lambda: 1), 1)
+        data["programs"][path] = []
+        self.assertIsNone(cache.lookup_program("prog", path))
+        cache.store_program("prog", path, self.exe)
+        self.assertEqual(cache.lookup_program("prog", path), self.exe)
+        cache.flush()
+        cache._capabilities = None
+        with open(cache.get_capabilities_file(), "w") as fo:
+            fo.write('{"version": %d, "programs": []}' % cache.CacheVersion)
+        self.assertIsNone(cache.lookup_program("prog", path))
+
+    def test_disabled(self):
+        """Test that the cache can be disabled."""
+        with mock.patch.dict(os.environ, {"PATOOL_NO_CACHE": "1"}):
+            self.assertEqual(cache.probe(self.exe, "test", lambda: 1), 1)
+            self.assertEqual(cache.probe(self.exe, "test", lambda: 2), 2)
+        self.assertFalse(os.path.exists(cache.get_capabilities_file()))
+
+    def test_cli(self):
+        """Test the cache command."""
+        self.assertEqual(cli.main(args=["cache", "warm"]), 0)
+        self.assertEqual(cli.main(args=["cache"]), 0)
+        self.assertEqual(cli.main(args=["cache", "clear"]), 0)
+        self.assertFalse(os.path.exists(cache.get_capabilities_file()))
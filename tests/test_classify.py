@@ -0,0 +1,100 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test detection of incompressible files."""
+
+import unittest
+import os
+import zipfile
+import patoolib
+from patoolib import classify, fileutil
+from patoolib.programs import zip as zip_program
+from . import basedir, datadir
+
+
+class ClassifyTest(unittest.TestCase):
+    """Test class for incompressible file detection."""
+
+    def setUp(self):
+        """Create a temporary directory with test files."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+        self.files = {
+            "random.bin": os.urandom(classify.SampleSize),
+            "text.txt": b"hello world\n" * 1000,
+            "image.jpg": b"\xff\xd8\xff\xe0" + b"\0" * classify.MinSize,
+            "small.bin": os.urandom(100),
+        }
+        for name, data in self.files.items():
+            with open(os.path.join(self.tmpdir, name), "wb") as fileobj:
+                fileobj.write(data)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def get_reason(self, name):
+        """Get the reason why a test file is incompressible."""
+        return classify.get_incompressible_reason(os.path.join(self.tmpdir, name))
+
+    def test_reason(self):
+        """Test detection by file signature and entropy."""
+        self.assertIn("entropy", self.get_reason("random.bin"))
+        self.assertEqual(self.get_reason("image.jpg"), "image/jpeg data")
+        self.assertIsNone(self.get_reason("text.txt"))
+        self.assertIsNone(self.get_reason("small.bin"))
+
+    def test_archives(self):
+        """Test that compressed archives are detected."""
+        for name in ("t.zip", "t.tar.gz", "t.tar.xz", "t.tar.bz2"):
+            with open(os.path.join(datadir, name), "rb") as fileobj:
+                data = fileobj.read()
+            self.assertIsNotNone(classify.detect_compressed(data), name)
+        with open(os.path.join(datadir, "t.tar"), "rb") as fileobj:
+            self.assertIsNone(classify.detect_compressed(fileobj.read()))
+
+    def test_entropy(self):
+        """Test the byte entropy."""
+        self.assertEqual(classify.get_entropy(b""), 0.0)
+        self.assertEqual(classify.get_entropy(b"aaaa"), 0.0)
+        self.assertEqual(classify.get_entropy(bytes(range(256))), 8.0)
+
+    def test_py_zipfile(self):
+        """Incompressible files are stored in ZIP archives."""
+        archive = os.path.join(self.tmpdir, "t.zip")
+        filenames = [os.path.join(self.tmpdir, name) for name in self.files]
+        patoolib.create_archive(archive, filenames, program="py_zipfile", verbosity=-1)
+        with zipfile.ZipFile(archive) as zfile:
+            compress_types = {
+                os.path.basename(info.filename): info.compress_type
+                for info in zfile.infolist()
+            }
+        self.assertEqual(
+            compress_types,
+            {
+                "random.bin": zipfile.ZIP_STORED,
+                "text.txt": zipfile.ZIP_DEFLATED,
+                "image.jpg": zipfile.ZIP_STORED,
+                "small.bin": zipfile.ZIP_DEFLATED,
+            },
+        )
+
+    def test_zip(self):
+        """Incompressible files are stored by the zip program, in addition
+        to the name extensions zip stores by default.
+        """
+        cmdlist = zip_program.create_zip("t.zip", None, "zip", 0, False, ["t"])
+        suffixes = cmdlist[cmdlist.index("-n") + 1].split(":")
+        for ext in zip_program.ZipStoreExtensions + classify.IncompressibleExtensions:
+            self.assertIn(f".{ext}", suffixes)
+        self.assertEqual(len(suffixes), len(set(suffixes)))
@@ -44,3 +44,12 @@ class ArchiveCliTest(unittest.TestCase):
         with pytest.raises(SystemExit):
             args = ["-qv", "extract", "t.zip"]
             pargs = parser.parse_args(args=args)
+
+    def test_cli_search_options(self):
+        """Test the search count and jobs options."""
+        parser = cli.create_argparser()
+        args = ["search", "-m", "2", "-j", "3", "pattern", "t.zip"]
+        pargs = parser.parse_args(args=args)
+        self.assertEqual((pargs.max_count, pargs.jobs), (2, 3))
+        with pytest.raises(SystemExit):
+            parser.parse_args(args=["search", "-m", "0", "pattern", "t.zip"])
@@ -16,7 +16,11 @@
 
 import unittest
 import os
-from patoolib import cli, fileutil
+import zipfile
+from unittest import mock
+import patoolib
+from patoolib import cli, fileutil, util
+from patoolib.programs import py_zipfile
 from . import basedir, datadir, needs_program
 
 
@@ -35,3 +39,96 @@ class ArchiveCreateTest(unittest.TestCase):
             cli.main(args=args)
         finally:
             fileutil.rmtree(tmpdir)
+
+    def test_method_level(self):
+        """Create ZIP archives with compression methods and levels."""
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            archive = os.path.join(tmpdir, "t.zip")
+            files = [os.path.join(datadir, "t"), os.path.join(datadir, "t.txt")]
+            args = ["create", "--method", "bzip2", "--level", "9", archive, *files]
+            self.assertEqual(cli.main(args=args), 0)
+            with zipfile.ZipFile(archive) as zfile:
+                self.assertIsNone(zfile.testzip())
+                compress_types = {
+                    info.compress_type for info in zfile.infolist() if not info.is_dir()
+                }
+            self.assertEqual(compress_types, {zipfile.ZIP_BZIP2})
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    def test_method_programs(self):
+        """Only programs supporting compression methods are used."""
+        with mock.patch.object(util, "find_program", lambda program: program):
+            self.assertEqual(
+                patoolib.find_archive_program("zip", "create", keywords=["method"]),
+                "7z",
+            )
+        with self.assertRaises(util.PatoolError):
+            patoolib.find_archive_program("tar", "create", keywords=["method"])
+        with self.assertRaises(util.PatoolError):
+            patoolib.create_archive("t.zip", ["t.txt"], method="unknown")
+
+    def test_method_invalid_level(self):
+        """Unsupported levels of compression methods are errors, and
+        incomplete archives are removed.
+        """
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            archive = os.path.join(tmpdir, "t.zip")
+            files = [os.path.join(datadir, "t.txt")]
+            for method, level in (("bzip2", 0), ("lzma", 5)):
+                with self.subTest(method=method):
+                    with self.assertRaisesRegex(util.PatoolError, "level"):
+                        patoolib.create_archive(
+                            archive,
+                            files,
+                            program="py_zipfile",
+                            method=method,
+                            level=level,
+                            verbosity=-1,
+                        )
+                    self.assertFalse(os.path.exists(archive))
+            with mock.patch.object(py_zipfile, "write_file", side_effect=OSError):
+                with self.assertRaises(util.PatoolError):
+                    patoolib.create_archive(
+                        archive, files, program="py_zipfile", verbosity=-1
+                    )
+            self.assertFalse(os.path.exists(archive))
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    def test_zip_parallel(self):
+        """Compressing with threads creates the same ZIP archive."""
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            files = [os.path.join(datadir, "t"), os.path.join(datadir, "t.txt")]
+            created = {}
+            for method in (None, "bzip2", "lzma"):
+                archives = []
+                for threads in (None, 4):
+                    archive = os.path.join(tmpdir, f"t{method}{threads}.zip")
+                    patoolib.create_archive(
+                        archive,
+                        files,
+                        program="py_zipfile",
+                        threads=threads,
+                        method=method,
+                        verbosity=-1,
+                    )
+                    with open(archive, "rb") as fileobj:
+                        archives.append(fileobj.read())
+                self.assertEqual(archives[0], archives[1], method)
+                created[method] = archives[0]
+            # without the zipfile internals the members are written serially
+            archive = os.path.join(tmpdir, "serial.zip")
+            with mock.patch.object(
+                py_zipfile, "can_write_parallel", return_value=False
+            ):
+                patoolib.create_archive(
+                    archive, files, program="py_zipfile", threads=4, verbosity=-1
+                )
+            with open(archive, "rb") as fileobj:
+                self.assertEqual(fileobj.read(), created[None])
+        finally:
+            fileutil.rmtree(tmpdir)
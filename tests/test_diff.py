@@ -15,14 +15,28 @@
 """Test patool diff command."""
 
 import unittest
+import io
 import os
-from patoolib import cli
-from . import datadir, needs_program
+import sys
+import zipfile
+from unittest import mock
+import patoolib
+from patoolib import cli, compare, fileutil
+from patoolib.entries import ArchiveEntry, EntryDirectory
+from . import basedir, datadir, needs_program
 
 
 class ArchiveDiffTest(unittest.TestCase):
     """Test class for patool diff command."""
 
+    def setUp(self):
+        """Create a temporary directory for test archives."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
     @needs_program('diff')
     @needs_program('tar')
     @needs_program('unzip')
@@ -32,3 +46,84 @@ class ArchiveDiffTest(unittest.TestCase):
         archive2 = os.path.join(datadir, "t.zip")
         args = ["-vv", "--non-interactive", "diff", archive1, archive2]
         cli.main(args=args)
+
+    def make_zip(self, filename, members):
+        """Create a ZIP archive with the given member names and contents."""
+        archive = os.path.join(self.tmpdir, filename)
+        with zipfile.ZipFile(archive, "w") as zfile:
+            for name, data in members.items():
+                zfile.writestr(name, data)
+        return archive
+
+    def test_summary(self):
+        """Compare member listings of two ZIP archives."""
+        archive1 = self.make_zip("a.zip", {"r1/a.txt": "1", "r1/b.txt": "2"})
+        archive2 = self.make_zip(
+            "b.zip", {"r2/a.txt": "1", "r2/b.txt": "3", "r2/c": ""}
+        )
+        stdout = io.StringIO()
+        with mock.patch.object(sys, "stdout", stdout):
+            res = patoolib.diff_archives(
+                archive1, archive2, verbosity=-1, summary=True
+            )
+        self.assertEqual(res, 1)
+        self.assertEqual(stdout.getvalue(), "M r2/b.txt\nA r2/c\n")
+
+    def test_same_listing(self):
+        """Archives with equal member listings are not extracted."""
+        archive1 = self.make_zip("a.zip", {"a.txt": "1", "b.txt": "2"})
+        archive2 = self.make_zip("b.zip", {"a.txt": "1", "b.txt": "2"})
+        with mock.patch.object(compare, "diff_members") as diff_members:
+            res = patoolib.diff_archives(archive1, archive2, verbosity=-1)
+        self.assertEqual(res, 0)
+        diff_members.assert_not_called()
+
+    @needs_program('diff')
+    def test_changed_members(self):
+        """Only changed members are extracted and compared."""
+        archive1 = self.make_zip("a.zip", {"a.txt": "1", "b.txt": "2"})
+        archive2 = self.make_zip("b.zip", {"a.txt": "1", "b.txt": "3"})
+        with mock.patch.object(
+            compare, "extract_members", wraps=compare.extract_members
+        ) as extract_members:
+            res = patoolib.diff_archives(archive1, archive2, verbosity=-1)
+        self.assertEqual(res, 1)
+        for call in extract_members.call_args_list:
+            self.assertEqual(call.args[2], ["b.txt"])
+
+    def test_compare_entries(self):
+        """Compare entries by their metadata."""
+        entries1 = {
+            "a": ArchiveEntry("a", size=1, crc=1),
+            "b": ArchiveEntry("b", size=1, mtime=1.0),
+            "c": ArchiveEntry("c"),
+            "d/": ArchiveEntry("d/", type=EntryDirectory),
+        }
+        entries2 = {
+            "a": ArchiveEntry("a", size=1, crc=1, mtime=2.0),
+            "b": ArchiveEntry("b", size=1, mtime=2.0),
+            "c": ArchiveEntry("c"),
+            "e": ArchiveEntry("e", size=0),
+        }
+        changes = compare.compare_entries(entries1, entries2)
+        self.assertEqual(changes.added, ["e"])
+        self.assertEqual(changes.removed, [])
+        self.assertEqual(changes.changed, [("b", "b"), ("c", "c")])
+
+    def test_compare_fixed_mtime(self):
+        """Equal modification times are not compared when all files have
+        the same modification time.
+        """
+        entries1 = {
+            "a": ArchiveEntry("a", size=1, mtime=1.0),
+            "b": ArchiveEntry("b", size=1, mtime=1.0),
+        }
+        entries2 = {
+            "a": ArchiveEntry("a", size=1, mtime=1.0),
+            "b": ArchiveEntry("b", size=1, mtime=1.0),
+        }
+        changes = compare.compare_entries(entries1, entries2)
+        self.assertEqual(changes.changed, [("a", "a"), ("b", "b")])
+        entries2["b"] = ArchiveEntry("b", size=1, mtime=2.0)
+        changes = compare.compare_entries(entries1, entries2)
+        self.assertEqual(changes.changed, [("b", "b")])
@@ -0,0 +1,85 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the modules imported at startup of the command line interface."""
+
+import unittest
+import os
+import subprocess
+import sys
+from . import basedir
+
+# modules that are only imported by the commands which need them
+LazyModules = (
+    "concurrent.futures",
+    "datetime",
+    "gzip",
+    "inspect",
+    "mimetypes",
+    "multiprocessing",
+    "platform",
+    "subprocess",
+    "tarfile",
+    "tempfile",
+    "zipfile",
+    "patoolib.compare",
+    "patoolib.repack",
+    "patoolib.search",
+    "patoolib.stream",
+    "patoolib.tarindex",
+)
+
+# Maximum cumulative import time of patoolib.cli in microseconds. This is
+# about twice the usual import time, so it fails when eagerly imported
+# modules are added.
+ImportTimeBudget = 90000
+
+
+def run_python(*args):
+    """Run Python code in the parent directory of the tests and return its
+    standard output and error.
+    """
+    cmd = [sys.executable, *args]
+    proc = subprocess.run(
+        cmd,
+        cwd=os.path.dirname(basedir),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return proc.stdout, proc.stderr
+
+
+class TestImportTime(unittest.TestCase):
+    """Test class for the startup imports."""
+
+    def test_lazy_modules(self):
+        """Test that importing the command line interface skips lazy modules."""
+        code = "import sys, patoolib.cli; print('\\n'.join(sys.modules))"
+        stdout, stderr = run_python("-c", code)
+        modules = set(stdout.splitlines())
+        self.assertIn("patoolib.cli", modules)
+        for module in LazyModules:
+            self.assertNotIn(module, modules)
+
+    def test_import_time(self):
+        """Test the import time budget of the command line interface."""
+        stdout, stderr = run_python("-X", "importtime", "-c", "import patoolib.cli")
+        for line in stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == "patoolib.cli":
+                self.assertLess(int(parts[1]), ImportTimeBudget)
+                break
+        else:
+            self.fail(f"no import time of patoolib.cli in {stderr!r}")
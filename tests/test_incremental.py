@@ -0,0 +1,176 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test incremental extraction."""
+
+import unittest
+import io
+import os
+import tarfile
+import zipfile
+from unittest import mock
+import patoolib
+from patoolib import fileutil, incremental, util
+from . import basedir
+
+# archive members and their contents
+Members = {
+    "dir/a.txt": b"a" * 100,
+    "dir/b.txt": b"b" * 200,
+    "dir/sub/c.txt": b"c" * 300,
+    "d.txt": b"d",
+}
+
+
+class IncrementalTest(unittest.TestCase):
+    """Test class for incremental extraction."""
+
+    def setUp(self):
+        """Create a ZIP archive in a temporary directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+        self.archive = os.path.join(self.tmpdir, "t.zip")
+        with zipfile.ZipFile(self.archive, "w") as zfile:
+            zfile.writestr("dir/empty/", b"")
+            for name, data in Members.items():
+                zfile.writestr(name, data)
+        self.outdir = os.path.join(self.tmpdir, "out")
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def extract(self, archive=None, **kwargs):
+        """Extract the archive incrementally and return the selected members
+        of the extraction program, or None if all members were extracted.
+        """
+        calls = []
+        extract_archive = patoolib._extract_archive
+
+        def _extract_archive(*args, **kwargs):
+            calls.append(kwargs["members"])
+            return extract_archive(*args, **kwargs)
+
+        with mock.patch.object(patoolib, "_extract_archive", _extract_archive):
+            patoolib.extract_archive(
+                archive or self.archive,
+                outdir=self.outdir,
+                verbosity=-1,
+                interactive=False,
+                incremental=True,
+                **kwargs,
+            )
+        return calls
+
+    def check_files(self, members=Members):
+        """Check the extracted files."""
+        for name, data in members.items():
+            with open(os.path.join(self.outdir, name), "rb") as fileobj:
+                self.assertEqual(fileobj.read(), data)
+        self.assertTrue(os.path.isdir(os.path.join(self.outdir, "dir", "empty")))
+
+    def test_unchanged(self):
+        """Test that extracting an unchanged archive again is a no-op."""
+        self.assertEqual(self.extract(), [None])
+        self.check_files()
+
+        def find_stream_program(*args, **kwargs):
+            raise util.PatoolError("the archive should not be listed")
+
+        with mock.patch.object(patoolib, "find_stream_program", find_stream_program):
+            self.assertEqual(self.extract(), [])
+        # a changed modification time of the archive lists it again and
+        # finds the files by their checksums
+        st = os.stat(self.archive)
+        os.utime(self.archive, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(self.extract(), [])
+        self.check_files()
+
+    def test_changed_files(self):
+        """Test that missing and changed files are extracted again."""
+        self.extract()
+        os.remove(os.path.join(self.outdir, "dir", "a.txt"))
+        with open(os.path.join(self.outdir, "dir", "sub", "c.txt"), "wb") as fileobj:
+            fileobj.write(b"x" * 300)
+        os.rmdir(os.path.join(self.outdir, "dir", "empty"))
+        self.assertEqual(self.extract(), [["dir/a.txt", "dir/sub/c.txt"]])
+        self.check_files()
+
+    def test_existing_files(self):
+        """Test that existing files are skipped or never overwritten."""
+        os.makedirs(os.path.join(self.outdir, "dir"))
+        with open(os.path.join(self.outdir, "dir", "a.txt"), "wb") as fileobj:
+            fileobj.write(Members["dir/a.txt"])
+        with open(os.path.join(self.outdir, "d.txt"), "wb") as fileobj:
+            fileobj.write(b"x")
+        with self.assertRaises(util.PatoolError):
+            self.extract()
+        os.remove(os.path.join(self.outdir, "d.txt"))
+        self.assertEqual(
+            self.extract(), [["dir/b.txt", "dir/sub/c.txt", "d.txt"]]
+        )
+        self.check_files()
+
+    def test_interrupted(self):
+        """Test resuming an interrupted extraction."""
+
+        def _extract_archive(archive, outdir, **kwargs):
+            # write a partial file and fail
+            os.makedirs(os.path.join(outdir, "dir"))
+            with open(os.path.join(outdir, "dir", "a.txt"), "wb") as fileobj:
+                fileobj.write(b"a")
+            raise util.PatoolError("interrupted")
+
+        with mock.patch.object(patoolib, "_extract_archive", _extract_archive):
+            with self.assertRaises(util.PatoolError):
+                patoolib.extract_archive(
+                    self.archive, outdir=self.outdir, verbosity=-1, incremental=True
+                )
+        journal = incremental.read_journal(
+            incremental.get_journal_file(self.archive, self.outdir)
+        )
+        self.assertFalse(journal["complete"])
+        self.assertEqual(self.extract(), [None])
+        self.check_files()
+
+    def test_members(self):
+        """Test incremental extraction of selected members."""
+        self.assertEqual(self.extract(members=["dir/b*"]), [["dir/b.txt"]])
+        self.assertEqual(os.listdir(os.path.join(self.outdir, "dir")), ["b.txt"])
+        self.assertEqual(self.extract(members=["dir/b*"]), [])
+        # directories are created without selecting them
+        self.assertEqual(self.extract(), [["dir/a.txt", "dir/sub/c.txt", "d.txt"]])
+        self.check_files()
+
+    def test_tar_mtime(self):
+        """Test TAR archives without checksums, compared by modification time."""
+        archive = os.path.join(self.tmpdir, "t.tar")
+        with tarfile.open(archive, "w") as tfile:
+            for name, data in Members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = 1000000000
+                tfile.addfile(info, io.BytesIO(data))
+        self.assertEqual(self.extract(archive), [None])
+        os.remove(incremental.get_journal_file(archive, self.outdir))
+        self.assertEqual(self.extract(archive), [])
+        # the file with a changed modification time is extracted again
+        os.utime(os.path.join(self.outdir, "d.txt"), (2000000000, 2000000000))
+        self.assertEqual(self.extract(archive), [["d.txt"]])
+        mtime = os.path.getmtime(os.path.join(self.outdir, "d.txt"))
+        self.assertEqual(mtime, 1000000000)
+
+    def test_no_outdir(self):
+        """Test that incremental extraction needs an output directory."""
+        with self.assertRaises(util.PatoolError):
+            patoolib.extract_archive(self.archive, verbosity=-1, incremental=True)
@@ -0,0 +1,141 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test iterating over archive entries."""
+
+import unittest
+import os
+import patoolib
+from patoolib import entries
+from patoolib.programs import p7zip, tar, unzip
+from . import datadir, needs_program
+
+# the members of the t.* test archives
+TestNames = ["t/", "t/t.txt"]
+
+
+class IterTest(unittest.TestCase):
+    """Test class for iter_archive()."""
+
+    def iter_names(self, filename, program=None):
+        """Get the member names of a test archive."""
+        archive = os.path.join(datadir, filename)
+        return [e.name for e in patoolib.iter_archive(archive, program=program)]
+
+    def test_py_zipfile(self):
+        """Test ZIP entries with the zipfile module."""
+        archive = os.path.join(datadir, "t.zip")
+        items = list(patoolib.iter_archive(archive))
+        self.assertEqual([e.name for e in items], TestNames)
+        self.assertEqual(items[0].type, entries.EntryDirectory)
+        self.assertEqual(items[1].type, entries.EntryFile)
+        self.assertEqual(items[1].size, 2)
+        self.assertIsNotNone(items[1].crc)
+        self.assertIsNotNone(items[1].mtime)
+
+    def test_py_tarfile(self):
+        """Test TAR entries with the tarfile module."""
+        for filename in ("t.tar", "t.tar.gz", "t.tar.bz2"):
+            with self.subTest(filename=filename):
+                self.assertEqual(self.iter_names(filename), TestNames)
+
+    @needs_program('tar')
+    def test_tar(self):
+        """Test TAR entries with GNU tar."""
+        self.assertEqual(self.iter_names("t.tar.gz", program="tar"), TestNames)
+
+    @needs_program('unzip')
+    def test_unzip(self):
+        """Test ZIP entries with unzip."""
+        self.assertEqual(self.iter_names("t.zip", program="unzip"), TestNames)
+
+    @needs_program('7z')
+    def test_7z(self):
+        """Test 7z entries."""
+        self.assertEqual(self.iter_names("t.7z"), TestNames)
+
+    def test_single_file(self):
+        """Test single file compressed archives."""
+        self.assertEqual(self.iter_names("t.txt.gz"), ["t.txt"])
+
+    def test_errors(self):
+        """Test errors of unsupported formats and missing archives."""
+        with self.assertRaises(patoolib.util.PatoolError):
+            patoolib.iter_archive(os.path.join(datadir, "t.ace"))
+        with self.assertRaises(patoolib.util.PatoolError):
+            patoolib.iter_archive(os.path.join(datadir, "missing.zip"))
+
+    def test_parse_7z_slt(self):
+        """Test parsing of '7z l -slt' output."""
+        lines = [
+            "Listing archive: t.7z",
+            "",
+            "--",
+            "Path = t.7z",
+            "Type = 7z",
+            "",
+            "----------",
+            "Path = t",
+            "Size = 0",
+            "Packed Size = 0",
+            "Modified = 2010-02-19 08:49:56.1234567",
+            "Attributes = D_ drwxr-xr-x",
+            "",
+            "Path = t/t.txt",
+            "Size = 2",
+            "Packed Size = 6",
+            "Modified = 2010-02-19 08:48:58",
+            "Attributes = A_ -rw-r-----",
+            "CRC = 3224F688",
+            "",
+        ]
+        items = list(p7zip.parse_7z_slt(lines))
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[0].type, entries.EntryDirectory)
+        self.assertEqual(items[0].mode, 0o755)
+        self.assertEqual(items[1].name, "t/t.txt")
+        self.assertEqual(items[1].size, 2)
+        self.assertEqual(items[1].compressed_size, 6)
+        self.assertEqual(items[1].mode, 0o640)
+        self.assertEqual(items[1].crc, 0x3224F688)
+
+    def test_parse_zipinfo(self):
+        """Test parsing of 'unzip -Z -l -T' output."""
+        lines = [
+            "Archive:  t.zip",
+            "Zip file size: 300 bytes, number of entries: 2",
+            "drwxr-x---  3.0 unx        0 bx        0 stor 20100219.084956 t/",
+            "-rw-a--     2.0 fat        2 tx        2 stor 20100219.084858 t/t.txt",
+            "2 files, 2 bytes uncompressed, 2 bytes compressed:  0.0%",
+        ]
+        items = list(unzip.parse_zipinfo(lines))
+        self.assertEqual([e.name for e in items], TestNames)
+        self.assertEqual(items[0].mode, 0o750)
+        self.assertEqual(items[1].type, entries.EntryFile)
+        self.assertIsNone(items[1].mode)
+
+    def test_parse_tar_verbose(self):
+        """Test parsing of GNU tar verbose listings."""
+        lines = [
+            "-rw-r--r-- user/group        3 2010-01-18 09:32:04 a file",
+            "lrwxrwxrwx user/group        0 2010-01-18 09:32:04 link -> a file",
+            "hrw-r--r-- user/group        0 2010-01-18 09:32:04 hard link to a file",
+            "crw-rw-rw- root/root      1,3 2010-01-18 09:32:04 null",
+        ]
+        items = list(tar.parse_tar_verbose(lines))
+        self.assertEqual([e.name for e in items], ["a file", "link", "hard", "null"])
+        self.assertEqual(items[1].type, entries.EntrySymlink)
+        self.assertEqual(items[2].type, entries.EntryHardlink)
+        self.assertEqual(items[3].type, entries.EntryOther)
+        self.assertIsNone(items[3].size)
@@ -0,0 +1,123 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the persistent cache of archive listings."""
+
+import unittest
+import contextlib
+import io
+import os
+import shutil
+from unittest import mock
+import patoolib
+from patoolib import fileutil, listcache, util
+from patoolib.entries import ArchiveEntry, EntryDirectory, EntrySymlink, format_entry
+from . import basedir, datadir
+
+
+class ListCacheTest(unittest.TestCase):
+    """Test class for the listing cache."""
+
+    def setUp(self):
+        """Use a temporary cache directory and archive copy."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+        cachedir = os.path.join(self.tmpdir, "cache")
+        self.env = mock.patch.dict(os.environ, {"PATOOL_CACHE_DIR": cachedir})
+        self.env.start()
+        self.archive = os.path.join(self.tmpdir, "t.zip")
+        shutil.copy(os.path.join(datadir, "t.zip"), self.archive)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.env.stop()
+        fileutil.rmtree(self.tmpdir)
+
+    def iter_without_program(self):
+        """Iterate over the cached archive entries without archive programs."""
+
+        def find_stream_program(*args, **kwargs):
+            raise util.PatoolError("no program should run")
+
+        with mock.patch.object(patoolib, "find_stream_program", find_stream_program):
+            return list(patoolib.iter_archive(self.archive, cached=True))
+
+    def test_iter_cached(self):
+        """Test that cached entries are used until the archive changes."""
+        entries = list(patoolib.iter_archive(self.archive, cached=True))
+        self.assertTrue(entries)
+        self.assertEqual(self.iter_without_program(), entries)
+        self.assertEqual(len(listcache.get_listing_files()), 1)
+        # a changed archive is listed again and replaces the old listing
+        st = os.stat(self.archive)
+        os.utime(self.archive, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        with self.assertRaises(util.PatoolError):
+            self.iter_without_program()
+        entries2 = list(patoolib.iter_archive(self.archive, cached=True))
+        self.assertEqual(entries2, entries)
+        self.assertEqual(len(listcache.get_listing_files()), 1)
+
+    def test_not_cached(self):
+        """Test listings that are not stored."""
+        list(patoolib.iter_archive(self.archive))
+        self.assertEqual(listcache.get_listing_files(), [])
+        # incomplete iterations are not stored
+        next(patoolib.iter_archive(self.archive, cached=True))
+        self.assertEqual(listcache.get_listing_files(), [])
+        with mock.patch.dict(os.environ, {"PATOOL_NO_CACHE": "1"}):
+            list(patoolib.iter_archive(self.archive, cached=True))
+        self.assertEqual(listcache.get_listing_files(), [])
+
+    def test_list_cached(self):
+        """Test listing archives with the cache."""
+        entries = list(patoolib.iter_archive(self.archive))
+        expected = "".join(format_entry(entry) + "\n" for entry in entries)
+        for dummy in range(2):
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                patoolib.list_archive(self.archive, verbosity=0, cached=True)
+            self.assertEqual(output.getvalue(), expected)
+        self.assertEqual(self.iter_without_program(), entries)
+
+    def test_invalidate(self):
+        """Test removing cached listings."""
+        list(patoolib.iter_archive(self.archive, cached=True))
+        self.assertEqual(listcache.invalidate(self.archive), 1)
+        self.assertEqual(listcache.invalidate(self.archive), 0)
+        list(patoolib.iter_archive(self.archive, cached=True))
+        listcache.clear()
+        self.assertEqual(listcache.get_listing_files(), [])
+
+    def test_evict(self):
+        """Test that the least recently used listings are removed."""
+        archives = []
+        for i in range(3):
+            archive = os.path.join(self.tmpdir, f"t{i}.zip")
+            shutil.copy(self.archive, archive)
+            list(patoolib.iter_archive(archive, cached=True))
+            filename = listcache.get_listing_file(archive)
+            os.utime(filename, ns=(0, i * 10**9))
+            archives.append(archive)
+        # use the oldest listing
+        listcache.read_listing(archives[0], "zip", None)
+        size = os.path.getsize(listcache.get_listing_file(archives[0]))
+        listcache.evict(2 * size)
+        self.assertTrue(os.path.exists(listcache.get_listing_file(archives[0])))
+        self.assertFalse(os.path.exists(listcache.get_listing_file(archives[1])))
+        self.assertTrue(os.path.exists(listcache.get_listing_file(archives[2])))
+
+    def test_format_entry(self):
+        """Test formatting of listing lines."""
+        entry = ArchiveEntry("dir/", size=0, mode=0o755, type=EntryDirectory)
+        self.assertEqual(format_entry(entry), f"drwxr-xr-x {'0':>12} {'':19} dir/")
+        entry = ArchiveEntry("link", type=EntrySymlink)
+        self.assertEqual(format_entry(entry), f"l????????? {'':12} {'':19} link")
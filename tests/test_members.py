@@ -0,0 +1,118 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test extracting selected archive members."""
+
+import unittest
+import os
+from unittest import mock
+import patoolib
+from patoolib import fileutil, util
+from patoolib.entries import ArchiveEntry, select_members
+from . import basedir, datadir, needs_program
+
+
+class MembersTest(unittest.TestCase):
+    """Test class for extracting selected members."""
+
+    def setUp(self):
+        """Create a temporary output directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def extract(self, filename, members, program=None):
+        """Extract members of a test archive and return the extracted files."""
+        archive = os.path.join(datadir, filename)
+        outdir = os.path.join(self.tmpdir, f"{filename}-{program}")
+        patoolib.extract_archive(
+            archive, outdir=outdir, program=program, members=members, verbosity=-1
+        )
+        return sorted(
+            os.path.relpath(os.path.join(dirpath, name), outdir).replace(os.sep, "/")
+            for dirpath, dirnames, filenames in os.walk(outdir)
+            for name in dirnames + filenames
+        )
+
+    def test_select_members(self):
+        """Test matching member names against patterns."""
+        entries = [
+            ArchiveEntry("doc/"),
+            ArchiveEntry("doc/a.txt"),
+            ArchiveEntry("doc/sub/b.txt"),
+            ArchiveEntry("src/c.py"),
+        ]
+        self.assertEqual(
+            select_members(entries, ["*.txt"]), ["doc/a.txt", "doc/sub/b.txt"]
+        )
+        self.assertEqual(
+            select_members(entries, ["doc/"]), ["doc/", "doc/a.txt", "doc/sub/b.txt"]
+        )
+        self.assertEqual(select_members(entries, ["src/c.py", "x"]), ["src/c.py"])
+        self.assertEqual(select_members(entries, ["c.py"]), [])
+
+    def test_py_zipfile(self):
+        """Test extracting ZIP members with the zipfile module."""
+        self.assertEqual(self.extract("t.zip", ["*.txt"]), ["t", "t/t.txt"])
+
+    def test_py_tarfile(self):
+        """Test extracting TAR members with the tarfile module."""
+        self.assertEqual(
+            self.extract("t.tar.gz", ["t"], program="py_tarfile"), ["t", "t/t.txt"]
+        )
+
+    @needs_program('tar')
+    def test_tar(self):
+        """Test extracting TAR members with tar."""
+        self.assertEqual(
+            self.extract("t.tar", ["t/t.txt"], program="tar"), ["t", "t/t.txt"]
+        )
+        self.assertEqual(
+            self.extract("t.tar.bz2", ["t"], program="tar"), ["t", "t/t.txt"]
+        )
+
+    @needs_program('unzip')
+    def test_unzip(self):
+        """Test extracting ZIP members with unzip."""
+        self.assertEqual(
+            self.extract("t.zip", ["t/t.txt"], program="unzip"), ["t", "t/t.txt"]
+        )
+
+    def test_errors(self):
+        """Test unmatched members and formats without member selection."""
+        with self.assertRaises(patoolib.util.PatoolError):
+            self.extract("t.zip", ["missing"])
+        with self.assertRaises(patoolib.util.PatoolError):
+            self.extract("t.txt.gz", ["t.txt"], program="py_gzip")
+
+    def test_program_with_members(self):
+        """Test that only programs extracting selected members are used."""
+        archive = os.path.join(datadir, "t.deb")
+        with (
+            mock.patch.object(util, "find_program", lambda program: program),
+            mock.patch.object(
+                patoolib, "_select_members", return_value=["data.tar.gz"]
+            ),
+            mock.patch.object(patoolib, "run_archive_cmdlist") as run,
+        ):
+            patoolib.extract_archive(
+                archive, outdir=self.tmpdir, members=["data.tar.gz"], verbosity=-1
+            )
+            patoolib.extract_archive(archive, outdir=self.tmpdir, verbosity=-1)
+        cmdlists = [call.args[0] for call in run.call_args_list]
+        self.assertEqual(cmdlists[0][0], "7z")
+        self.assertEqual(cmdlists[0][-1], "data.tar.gz")
+        self.assertEqual(cmdlists[1][0], "dpkg-deb")
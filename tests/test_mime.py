@@ -15,10 +15,15 @@
 """Test mime detection"""
 
 import unittest
+import bz2
+import io
 import os
+import tarfile
+from unittest import mock
 import patoolib
 import patoolib.mime
-from . import needs_program, datadir
+from patoolib import fileutil
+from . import needs_program, basedir, datadir
 
 
 class TestMime(unittest.TestCase):
@@ -298,3 +303,146 @@ class TestMime(unittest.TestCase):
         self.mime_test_mimedb("t.vhd", "application/x-vhd")
         self.mime_test_mimedb("t.wim", "application/x-ms-wim")
         self.mime_test_mimedb("t.zpaq", "application/zpaq")
+
+    def mime_test_signature(self, filename, mime, encoding=None):
+        """Test that file has given mime and encoding as determined by the
+        file signature.
+        """
+        archive = os.path.join(datadir, filename)
+        self.mime_test(
+            patoolib.mime.guess_mime_signature, archive, mime, encoding, ""
+        )
+
+    def test_mime_signature(self):
+        """Test mime detection of all test archives by file signature"""
+        for filename, (mime, encoding) in SignatureCorpus.items():
+            compression = patoolib.mime.Mime2Encoding.get(mime)
+            if compression and not patoolib.signature.can_decompress(compression):
+                # detection is left to file(1)
+                mime = None
+            with self.subTest(filename=filename):
+                self.mime_test_signature(filename, mime, encoding)
+                if os.path.isfile(os.path.join(datadir, filename + ".foo")):
+                    self.mime_test_signature(filename + ".foo", mime, encoding)
+        formats = {
+            patoolib.ArchiveMimetypes[mime] for mime, _ in SignatureCorpus.values()
+        }
+        # there is no VHD test file, see test_mime_signature_vhd()
+        formats.add("vhd")
+        self.assertEqual(formats, set(patoolib.ArchiveFormats))
+
+    def test_mime_signature_uncompressed(self):
+        """Test mime detection of archives inside compressed files that need
+        external programs to decompress.
+        """
+        for filename, compression in (("t.tar.Z", "compress"), ("t.tar.zst", "zstd")):
+            if patoolib.signature.can_decompress(compression):
+                mime, encoding = "application/x-tar", compression
+            else:
+                mime, encoding = None, None
+            self.mime_test_signature(filename, mime, encoding)
+
+    def test_mime_signature_large_block(self):
+        """Test detection of archives inside compressed files whose first
+        block is larger than the start of the file that is read.
+        """
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            data = io.BytesIO()
+            with tarfile.open(fileobj=data, mode="w") as tfile:
+                tarinfo = tarfile.TarInfo("random")
+                tarinfo.size = 800 * 1024
+                tfile.addfile(tarinfo, io.BytesIO(os.urandom(tarinfo.size)))
+            archive = os.path.join(tmpdir, "t.tar.bz2")
+            with open(archive, "wb") as fileobj:
+                fileobj.write(bz2.compress(data.getvalue()))
+            self.assertGreater(
+                os.path.getsize(archive), patoolib.signature.InnerSize
+            )
+            self.assertEqual(
+                patoolib.mime.guess_mime_signature(archive),
+                ("application/x-tar", "bzip2"),
+            )
+            # the first block is not read completely
+            with mock.patch.object(
+                patoolib.signature, "InnerReadSize", patoolib.signature.HeadSize
+            ):
+                self.assertEqual(
+                    patoolib.signature.guess_mime(archive), (None, None)
+                )
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    def test_mime_signature_vhd(self):
+        """Test detection of VHD images by header and footer signature"""
+        self.assertEqual(
+            patoolib.signature.detect(b"conectix" + b"\x00" * 504, 512),
+            "application/x-vhd",
+        )
+
+    def test_mime_signature_text(self):
+        """Test that text files are not detected as archives"""
+        for filename in ("t.txt", "t2.txt", "t.wav", "t.flac.wav"):
+            self.mime_test_signature(filename, None)
+
+
+# Test archives with their expected MIME type and encoding. Most archives
+# have a copy with an additional .foo extension.
+SignatureCorpus: dict[str, tuple[str, str | None]] = {
+    "t .7z": ("application/x-7z-compressed", None),
+    "t.ace": ("application/x-ace", None),
+    "t.adf": ("application/x-adf", None),
+    "t.alz": ("application/x-alzip", None),
+    "t.ape": ("audio/x-ape", None),
+    "t.apk": ("application/zip", None),
+    "t.arc": ("application/x-arc", None),
+    "t.arj": ("application/x-arj", None),
+    "t.cab": ("application/vnd.ms-cab-compressed", None),
+    "t.cba": ("application/x-ace", None),
+    "t.cbr": ("application/vnd.rar", None),
+    "t.cbt": ("application/x-tar", None),
+    "t.cbz": ("application/zip", None),
+    "t.chm": ("application/x-chm", None),
+    "t.cpio": ("application/x-cpio", None),
+    "t.deb": ("application/x-debian-package", None),
+    "t.dms": ("application/x-dms", None),
+    "t.epub": ("application/zip", None),
+    "t.flac": ("audio/flac", None),
+    "t.freearc.arc": ("application/x-freearc", None),
+    "t.iso": ("application/x-iso9660-image", None),
+    "t.jar": ("application/zip", None),
+    "t.lha": ("application/x-lha", None),
+    "t.lzh": ("application/x-lha", None),
+    "t.rar": ("application/vnd.rar", None),
+    "t.rar.gz": ("application/vnd.rar", "gzip"),
+    "t.rpm": ("application/x-rpm", None),
+    "t.shar": ("application/x-shar", None),
+    "t.shn": ("audio/x-shn", None),
+    "t.tar": ("application/x-tar", None),
+    "t.tar.bz2": ("application/x-tar", "bzip2"),
+    "t.tar.gz": ("application/x-tar", "gzip"),
+    "t.tar.lz": ("application/x-tar", "lzip"),
+    "t.tar.lzma": ("application/x-tar", "lzma"),
+    "t.tar.xz": ("application/x-tar", "xz"),
+    "t.taz": ("application/x-tar", "gzip"),
+    "t.tbz2": ("application/x-tar", "bzip2"),
+    "t.tgz": ("application/x-tar", "gzip"),
+    "t.txt.Z": ("application/x-compress", None),
+    "t.txt.a": ("application/x-archive", None),
+    "t.txt.bz2": ("application/x-bzip2", None),
+    "t.txt.bz3": ("application/x-bzip3", None),
+    "t.txt.gz": ("application/gzip", None),
+    "t.txt.lrz": ("application/x-lrzip", None),
+    "t.txt.lz": ("application/x-lzip", None),
+    "t.txt.lz4": ("application/x-lz4", None),
+    "t.txt.lzma": ("application/x-lzma", None),
+    "t.txt.lzo": ("application/x-lzop", None),
+    "t.txt.rz": ("application/x-rzip", None),
+    "t.txt.xz": ("application/x-xz", None),
+    "t.txt.zst": ("application/zstd", None),
+    "t.udf": ("application/x-iso13346-image", None),
+    "t.wim": ("application/x-ms-wim", None),
+    "t.zip": ("application/zip", None),
+    "t.zoo": ("application/x-zoo", None),
+    "t.zpaq": ("application/zpaq", None),
+}
@@ -0,0 +1,84 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test parallel handling of multiple archives."""
+
+import unittest
+import os
+import patoolib
+from patoolib import cli, fileutil
+from . import basedir, datadir, needs_program
+
+
+class ParallelTest(unittest.TestCase):
+    """Test class for parallel archive commands."""
+
+    def setUp(self):
+        """Create a temporary output directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    @needs_program('tar')
+    def test_extract_archives(self):
+        """Test extracting archives with the same contents in parallel."""
+        names = ("t.zip", "t.tar", "t.cbz", "t.cbt")
+        archives = [os.path.join(datadir, name) for name in names]
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir)
+        try:
+            results = patoolib.extract_archives(archives, jobs=2, verbosity=-1)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(sorted(result.archive for result in results), sorted(archives))
+        for result in results:
+            self.assertIsNone(result.error)
+        # all archives contain a directory "t", each must get its own target
+        self.assertEqual(len(os.listdir(self.tmpdir)), len(archives))
+
+    def test_test_archives_errors(self):
+        """Test that errors are reported for each archive."""
+        archives = [
+            os.path.join(datadir, "t.zip"),
+            os.path.join(datadir, "nonexisting.zip"),
+            os.path.join(datadir, "t.txt"),
+        ]
+        results = patoolib.test_archives(iter(archives), jobs=2, verbosity=-1)
+        errors = [result.archive for result in results if result.error is not None]
+        self.assertEqual(sorted(errors), sorted(archives[1:]))
+
+    def test_jobs(self):
+        """Test invalid job numbers."""
+        with self.assertRaises(patoolib.util.PatoolError):
+            patoolib.list_archives([], jobs=0)
+        parser = cli.create_argparser()
+        self.assertEqual(parser.parse_args(["list", "-j", "3", "t.zip"]).jobs, 3)
+        self.assertIsNone(parser.parse_args(["list", "t.zip"]).jobs)
+        with self.assertRaises(SystemExit):
+            parser.parse_args(["test", "--jobs", "0", "t.zip"])
+
+    def test_cli(self):
+        """Test counting errors of parallel commands."""
+        args = [
+            "-q",
+            "test",
+            "--jobs",
+            "2",
+            os.path.join(datadir, "t.zip"),
+            os.path.join(datadir, "nonexisting.zip"),
+            os.path.join(datadir, "nonexisting.tar"),
+        ]
+        self.assertEqual(cli.main(args=args), 2)
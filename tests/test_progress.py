@@ -0,0 +1,181 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the progress events of archive operations."""
+
+import unittest
+import contextlib
+import io
+import os
+import sys
+from unittest import mock
+import patoolib
+from patoolib import cli, fileutil, progress
+from . import basedir, datadir, needs_program
+
+
+class TestProgress(unittest.TestCase):
+    """Test class for the progress events of archive operations."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def test_members(self):
+        """Test the members reported by a Python module."""
+        archive = os.path.join(datadir, "t.zip")
+        events = []
+        with patoolib.report_progress(events.append):
+            patoolib.extract_archive(
+                archive, outdir=self.tmpdir, verbosity=-1, program="py_zipfile"
+            )
+        event = events[-1]
+        self.assertTrue(event.finished)
+        self.assertEqual(event.operation, "extract")
+        self.assertEqual(event.archive, archive)
+        self.assertEqual(event.members, 2)
+        self.assertEqual(event.total, os.path.getsize(archive))
+        self.assertEqual(event.bytes_read, event.total)
+        self.assertEqual(event.eta, 0.0)
+        self.assertIsNone(progress.current.get())
+
+    def test_members_threads(self):
+        """Test the members reported by threads extracting a ZIP archive."""
+        archive = os.path.join(datadir, "t.zip")
+        events = []
+        with (
+            mock.patch.object(progress, "EventInterval", 0),
+            patoolib.report_progress(events.append),
+        ):
+            patoolib.extract_archive(
+                archive,
+                outdir=self.tmpdir,
+                verbosity=-1,
+                program="py_zipfile",
+                threads=2,
+            )
+        self.assertIn("t/t.txt", [event.member for event in events])
+        event = events[-1]
+        self.assertTrue(event.finished)
+        self.assertEqual(event.members, 2)
+
+    def test_copy_loop(self):
+        """Test the bytes reported by the copy loops of a Python module."""
+        filename = os.path.join(self.tmpdir, "data")
+        with open(filename, "wb") as fileobj:
+            fileobj.write(os.urandom(3 * 1024 * 1024))
+        archive = os.path.join(self.tmpdir, "data.gz")
+        events = []
+        with (
+            mock.patch.object(progress, "EventInterval", 0),
+            patoolib.report_progress(events.append),
+        ):
+            patoolib.create_archive(
+                archive, [filename], verbosity=-1, program="py_gzip"
+            )
+            patoolib.test_archive(archive, verbosity=-1, program="py_gzip")
+        created = [event for event in events if event.operation == "create"]
+        tested = [event for event in events if event.operation == "test"]
+        for operation_events in (created, tested):
+            self.assertGreater(len(operation_events), 2)
+            values = [event.bytes_read for event in operation_events]
+            self.assertEqual(values, sorted(values))
+            self.assertTrue(operation_events[-1].finished)
+        self.assertEqual(created[-1].total, os.path.getsize(filename))
+        self.assertEqual(created[-1].bytes_written, os.path.getsize(archive))
+        self.assertIsNotNone(created[1].eta)
+        self.assertEqual(tested[-1].total, os.path.getsize(archive))
+
+    @needs_program('tar')
+    def test_program(self):
+        """Test the sampled output size of an archive program."""
+        archive = os.path.join(datadir, "t.tar")
+        events = []
+        with patoolib.report_progress(events.append):
+            patoolib.extract_archive(
+                archive, outdir=self.tmpdir, verbosity=-1, program="tar"
+            )
+        event = events[-1]
+        self.assertTrue(event.finished)
+        self.assertEqual(event.bytes_written, progress.get_size(self.tmpdir))
+        self.assertGreater(event.bytes_written, 0)
+
+    @needs_program('tar')
+    def test_program_outdir(self):
+        """Test that the files in the output directory are not counted."""
+        filename = os.path.join(self.tmpdir, "existing")
+        with open(filename, "wb") as fileobj:
+            fileobj.write(b"x" * 1024 * 1024)
+        archive = os.path.join(datadir, "t.tar")
+        events = []
+        with patoolib.report_progress(events.append):
+            patoolib.extract_archive(
+                archive, outdir=self.tmpdir, verbosity=-1, program="tar"
+            )
+        event = events[-1]
+        self.assertEqual(
+            event.bytes_written,
+            progress.get_size(self.tmpdir) - os.path.getsize(filename),
+        )
+        self.assertGreater(event.bytes_written, 0)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "needs /proc")
+    def test_read_position(self):
+        """Test the read position of an open file."""
+        filename = os.path.realpath(os.path.join(datadir, "t.zip"))
+        self.assertIsNone(progress.get_read_position(filename))
+        with open(filename, "rb", buffering=0) as fileobj:
+            fileobj.read(10)
+            self.assertEqual(progress.get_read_position(filename), 10)
+
+    def test_progress_bar(self):
+        """Test drawing a progress bar."""
+        output = io.StringIO()
+        bar = progress.ProgressBar(output)
+        event = progress.ProgressEvent(
+            operation="extract",
+            archive="/tmp/t.zip",
+            member="t/a",
+            members=1,
+            bytes_read=512 * 1024,
+            bytes_written=2 * 1024 * 1024,
+            total=1024 * 1024,
+            elapsed=2.0,
+            finished=False,
+        )
+        bar(event)
+        bar(event._replace(bytes_read=1024 * 1024, members=2, finished=True))
+        lines = output.getvalue().split("\r")
+        self.assertEqual(
+            lines[1],
+            "extract t.zip [##########..........]  50% 512.0 KiB read "
+            "2.0 MiB written 1 members 256.0 KiB/s ETA 0:00:02",
+        )
+        # the last line overwrites the previous line and ends it
+        self.assertEqual(len(lines[2]), len(lines[1]) + 1)
+        self.assertTrue(lines[2].rstrip().endswith(" in 0:00:02"))
+        self.assertTrue(lines[2].endswith("\n"))
+
+    def test_cli(self):
+        """Test the progress option of the command line."""
+        archive = os.path.join(datadir, "t.zip")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(cli.main(["--progress", "-q", "test", archive]), 0)
+        # fast operations draw no progress bar
+        self.assertEqual(stderr.getvalue(), "")
@@ -15,9 +15,14 @@
 """Test patool repack command"""
 
 import unittest
+import io
 import os
-from patoolib import fileutil, cli
-from . import datadir, needs_program, needs_one_program
+import tarfile
+from unittest import mock
+import patoolib
+from patoolib import fileutil, cli, repack
+from patoolib.entries import EntryDirectory
+from . import basedir, datadir, needs_program, needs_one_program
 
 
 class ArchiveRepackTest(unittest.TestCase):
@@ -55,3 +60,85 @@ class ArchiveRepackTest(unittest.TestCase):
         """Test repacking a ZIP and GZIP TAR file in the same format."""
         self.repack('t.tar.gz', 't1.tar.gz')
         self.repack('t.zip', 't1.zip')
+
+
+class StreamRepackTest(unittest.TestCase):
+    """Test class for repacking without a temporary directory."""
+
+    def setUp(self):
+        """Create a temporary output directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def repack(self, archive1, name2):
+        """Repack an archive without extracting it and return the members
+        of the new archive with their contents.
+        """
+        archive2 = os.path.join(self.tmpdir, name2)
+        with mock.patch.object(
+            fileutil, "tmpdir", side_effect=AssertionError("extracted")
+        ):
+            patoolib.repack_archive(archive1, archive2, verbosity=-1)
+        members = {}
+        for entry in patoolib.iter_archive(archive2):
+            if entry.type == EntryDirectory:
+                members[entry.name.rstrip("/")] = None
+            else:
+                with patoolib.open_member(archive2, entry.name) as fileobj:
+                    members[entry.name] = fileobj.read()
+        return members
+
+    def test_tar_to_zip(self):
+        """Test copying TAR members to a ZIP archive."""
+        members = self.repack(os.path.join(datadir, "t.tar.gz"), "t.zip")
+        self.assertEqual(members, {"t": None, "t/t.txt": b"42"})
+
+    def test_zip_to_tar(self):
+        """Test copying ZIP members to a compressed TAR archive."""
+        members = self.repack(os.path.join(datadir, "t.zip"), "t.tar.xz")
+        self.assertEqual(members, {"t": None, "t/t.txt": b"42"})
+
+    def test_recompress(self):
+        """Test piping decompressed data into a compressor."""
+        members = self.repack(os.path.join(datadir, "t.tar.gz"), "t.tar.bz2")
+        self.assertEqual(members, {"t": None, "t/t.txt": b"42"})
+        members = self.repack(os.path.join(datadir, "t.txt.gz"), "t.txt.xz")
+        self.assertEqual(members, {"t.txt": b"42"})
+
+    @needs_program('xz')
+    def test_compress_program(self):
+        """Test compressing with a program reading standard input."""
+        with mock.patch.object(repack, "get_python_compressor", return_value=None):
+            members = self.repack(os.path.join(datadir, "t.txt.gz"), "t.txt.xz")
+        self.assertEqual(members, {"t.txt": b"42"})
+
+    def test_hardlink_stream(self):
+        """Hard links in TAR streams cannot be copied."""
+        archive1 = os.path.join(self.tmpdir, "links.tar.gz")
+        with tarfile.open(archive1, "w:gz") as tfile:
+            info = tarfile.TarInfo("a.txt")
+            info.size = 2
+            tfile.addfile(info, io.BytesIO(b"42"))
+            info = tarfile.TarInfo("b.txt")
+            info.type = tarfile.LNKTYPE
+            info.linkname = "a.txt"
+            tfile.addfile(info)
+        archive2 = os.path.join(self.tmpdir, "links.zip")
+        res = repack.repack_archive(
+            archive1, archive2, "tar", "gzip", "zip", None, verbosity=-1
+        )
+        self.assertFalse(res)
+        self.assertFalse(os.path.exists(archive2))
+
+    def test_encrypted_zip(self):
+        """Encrypted ZIP members are not streamed."""
+        archive1 = os.path.join(datadir, "p.zip")
+        archive2 = os.path.join(self.tmpdir, "p.tar.gz")
+        res = repack.repack_archive(
+            archive1, archive2, "zip", None, "tar", "gzip", verbosity=-1
+        )
+        self.assertFalse(res)
+        self.assertFalse(os.path.exists(archive2))
@@ -15,8 +15,11 @@
 """Test patool search command"""
 
 import unittest
+import io
 import os
-from patoolib import cli
+import sys
+from unittest import mock
+from patoolib import cli, search
 from . import datadir, needs_program
 
 
@@ -43,3 +46,67 @@ class ArchiveSearchTest(unittest.TestCase):
         """Utility function to run the cli search"""
         args = ["-vv", "--non-interactive", "search", pattern, archive]
         cli.main(args=args)
+
+    def search_stream(self, *args):
+        """Run the cli search in streaming mode and return the exit code
+        and the output.
+        """
+        stdout = io.TextIOWrapper(io.BytesIO())
+        with mock.patch.object(sys, "stdout", stdout):
+            res = cli.main(args=["-q", "search", "--stream", *args])
+            stdout.flush()
+            return res, stdout.buffer.getvalue()
+
+    def test_search_stream(self):
+        """Search archives without extracting them."""
+        for filename, name in (
+            ("t.zip", "t/t.txt"),
+            ("t.tar.bz2", "t/t.txt"),
+            ("t.txt.xz", "t.txt"),
+        ):
+            with self.subTest(filename=filename):
+                archive = os.path.join(datadir, filename)
+                res, output = self.search_stream("4[[:digit:]]", archive)
+                self.assertEqual(res, 0)
+                self.assertEqual(output, f"./{name}:42\n".encode())
+                res, output = self.search_stream("43", archive)
+                self.assertEqual(res, 1)
+                self.assertEqual(output, b"")
+
+    def test_bre_to_python(self):
+        """Test conversion of basic regular expressions."""
+        self.assertEqual(search.bre_to_python(r"a\(b\|c\)*"), "a(b|c)*")
+        self.assertEqual(search.bre_to_python("a(b)+?{1}"), r"a\(b\)\+\?\{1\}")
+        self.assertEqual(search.bre_to_python(r"x\{2,3\}$"), "x{2,3}$")
+        self.assertEqual(search.bre_to_python("*a^b$c"), r"\*a\^b\$c")
+        self.assertEqual(search.bre_to_python("^*"), r"^\*")
+        self.assertEqual(search.bre_to_python(r"[]a\]"), r"[\]a\\]")
+        self.assertEqual(search.bre_to_python("[^[:digit:]x]"), "[^0-9x]")
+
+    def test_search_lines(self):
+        """Test matching lines across chunk boundaries."""
+        data = b"abc\n" * 10 + b"x" * 100 + b"match\nabc\nmatch"
+        regex = search.compile_pattern("match")
+        with mock.patch.object(search, "ReadSize", 7):
+            lines = search.search_lines(io.BytesIO(data), regex)
+            self.assertEqual(lines, [b"x" * 100 + b"match", b"match"])
+            lines = search.search_lines(io.BytesIO(data), regex, max_count=1)
+            self.assertEqual(len(lines), 1)
+        # binary data is skipped
+        self.assertEqual(search.search_lines(io.BytesIO(b"\0match"), regex), [])
+        with mock.patch.object(search, "ReadSize", 7):
+            data = b"match\n" * 3 + b"\0"
+            self.assertEqual(search.search_lines(io.BytesIO(data), regex), [])
+
+    def test_search_long_lines(self):
+        """Test that long lines are truncated."""
+        regex = search.compile_pattern("match")
+        data = b"match" + b"x" * 100 + b"match\nmatch" + b"y" * 100
+        with (
+            mock.patch.object(search, "ReadSize", 7),
+            mock.patch.object(search, "MaxLineSize", 20),
+        ):
+            lines = search.search_lines(io.BytesIO(data), regex)
+            self.assertEqual(lines, [b"match" + b"x" * 15, b"match" + b"y" * 15])
+            data = b"x" * 100 + b"match\n"
+            self.assertEqual(search.search_lines(io.BytesIO(data), regex), [])
@@ -0,0 +1,131 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the disk space check before extracting archives."""
+
+import unittest
+import lzma
+import os
+import shutil
+from unittest import mock
+import patoolib
+from patoolib import cli, fileutil, space
+from patoolib.util import PatoolError
+from . import basedir, datadir
+
+
+class TestSpace(unittest.TestCase):
+    """Test class for the disk space check."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def test_extracted_size(self):
+        """Test reading the extracted size from the archive metadata."""
+        sizes = {
+            "t.zip": (2, 2),
+            "t.txt.gz": (2, 1),
+            "t.txt.xz": (2, 1),
+            "t.txt.zst": (2, 1),
+            "t.tar": (10240, 0),
+            "t.tar.gz": (10240, 0),
+            "t.tar.xz": (10240, 0),
+            "t.tar.zst": (10240, 0),
+            "t.tar.bz2": None,
+        }
+        for filename, size in sizes.items():
+            with self.subTest(filename=filename):
+                archive = os.path.join(datadir, filename)
+                format, compression = patoolib.get_archive_format(archive)
+                self.assertEqual(
+                    space.get_extracted_size(archive, format, compression), size
+                )
+
+    def test_xz_streams(self):
+        """Test the extracted size of concatenated XZ streams."""
+        archive = os.path.join(self.tmpdir, "t.xz")
+        with open(archive, "wb") as fileobj:
+            fileobj.write(lzma.compress(b"a" * 1000))
+            fileobj.write(lzma.compress(b"b" * 234))
+        self.assertEqual(space.get_extracted_size(archive, "xz", None), (1234, 1))
+
+    def test_7z_totals(self):
+        """Test parsing the totals of 7z l."""
+        lines = [
+            "   Date      Time    Attr         Size   Compressed  Name",
+            "------------------- ----- ------------ ------------  ----------",
+            "2020-01-01 12:00:00 ....A        12345         6789  t/a",
+            "------------------- ----- ------------ ------------  ----------",
+            "2020-01-01 12:00:00              12345         6789  2 files, 1 folders",
+        ]
+        self.assertEqual(space.parse_7z_totals(lines), (12345, 3))
+        self.assertEqual(
+            space.parse_7z_totals(["                    100  1 files"]), (100, 1)
+        )
+        self.assertIsNone(space.parse_7z_totals(lines[:3]))
+
+    def test_check_space(self):
+        """Test failing before extracting to a full file system."""
+        archive = os.path.join(datadir, "t.zip")
+        outdir = os.path.join(self.tmpdir, "out")
+        with mock.patch.object(shutil, "disk_usage", return_value=mock.Mock(free=1000)):
+            with self.assertRaisesRegex(PatoolError, "not enough disk space"):
+                patoolib.extract_archive(archive, outdir=outdir, verbosity=-1)
+            self.assertFalse(os.path.exists(outdir))
+            # the check can be disabled
+            patoolib.extract_archive(
+                archive, outdir=outdir, verbosity=-1, space_margin=None
+            )
+        self.assertTrue(os.path.isdir(outdir))
+
+    def test_required_space(self):
+        """Test the margin and the block size of each member."""
+        extracted = space.ExtractedSize(10000, 2)
+        with mock.patch.object(space, "DefaultBlockSize", 1000):
+            required = space.get_required_space(extracted, self.tmpdir, 0.5)
+        block_size = 1000
+        if hasattr(os, "statvfs"):
+            block_size = os.statvfs(self.tmpdir).f_frsize
+        self.assertEqual(required, int((10000 + 2 * block_size) * 1.5))
+
+    def test_scratch_dir(self):
+        """Test choosing the first directory with enough space."""
+        archive = os.path.join(datadir, "t.zip")
+        directories = (None, self.tmpdir)
+
+        def has_space(extracted, path, margin):
+            return path == self.tmpdir
+
+        with mock.patch.object(space, "has_space", side_effect=has_space):
+            self.assertEqual(
+                space.get_scratch_dir(archive, "zip", None, directories, 0.1),
+                self.tmpdir,
+            )
+        with mock.patch.object(space, "has_space", return_value=False):
+            self.assertIsNone(
+                space.get_scratch_dir(archive, "zip", None, directories, 0.1)
+            )
+
+    def test_cli(self):
+        """Test the space margin option."""
+        self.assertIsNone(cli.space_margin_type("none"))
+        self.assertEqual(cli.space_margin_type("0.5"), 0.5)
+        parser = cli.create_argparser()
+        args = parser.parse_args(["extract", "t.zip"])
+        self.assertEqual(args.space_margin, patoolib.DefaultSpaceMargin)
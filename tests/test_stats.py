@@ -0,0 +1,115 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the timing and resource usage statistics."""
+
+import unittest
+import contextlib
+import io
+import json
+import os
+from unittest import mock
+import patoolib
+from patoolib import cli, fileutil, repack, stats, util
+from . import basedir, datadir, needs_program
+
+
+class TestStats(unittest.TestCase):
+    """Test class for the statistics of archive operations."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def test_phases(self):
+        """Test the phases of an extraction with a Python module."""
+        archive = os.path.join(datadir, "t.zip")
+        with patoolib.collect_stats() as collected:
+            patoolib.extract_archive(
+                archive, outdir=self.tmpdir, verbosity=-1, program="py_zipfile"
+            )
+        self.assertEqual(
+            list(collected.phases),
+            [
+                "extract",
+                "extract/format",
+                "extract/space",
+                "extract/program",
+                "extract/run",
+            ],
+        )
+        self.assertGreaterEqual(collected.wall, collected.phases["extract"])
+        self.assertGreaterEqual(
+            collected.phases["extract"], collected.phases["extract/run"]
+        )
+        self.assertEqual(collected.processes, 0)
+        self.assertIsNone(stats.current.get())
+
+    @needs_program('tar')
+    def test_processes(self):
+        """Test the resource usage of archive programs."""
+        archive = os.path.join(datadir, "t.tar")
+        with patoolib.collect_stats() as collected:
+            patoolib.test_archive(archive, verbosity=-1, program="tar")
+            # output lines of programs are read from a pipe
+            list(util.iter_lines(["tar", "--list", "--file", archive], verbosity=-1))
+        self.assertEqual(collected.processes, 2)
+        if hasattr(os, "wait4"):
+            self.assertGreater(collected.maxrss, 0)
+        self.assertIn("test/run", collected.phases)
+
+    def test_nested(self):
+        """Test the phases of a repack with a temporary directory."""
+        archive = os.path.join(datadir, "t.zip")
+        archive_new = os.path.join(self.tmpdir, "t.tar")
+        with (
+            mock.patch.object(repack, "can_repack", return_value=False),
+            patoolib.collect_stats() as outer,
+        ):
+            with patoolib.collect_stats() as collected:
+                patoolib.repack_archive(archive, archive_new, verbosity=-1)
+        for name in ("repack/format", "repack/extract/run", "repack/create/run"):
+            self.assertIn(name, collected.phases)
+        # nested statistics are added to the enclosing statistics
+        self.assertEqual(outer.phases, collected.phases)
+
+    def test_parallel(self):
+        """Test the statistics of archives handled in worker processes."""
+        archives = [os.path.join(datadir, "t.zip")] * 2
+        with patoolib.collect_stats() as collected:
+            results = patoolib.test_archives(
+                archives, jobs=2, verbosity=-1, program="py_zipfile"
+            )
+        self.assertEqual([result.error for result in results], [None, None])
+        self.assertIn("test/run", collected.phases)
+
+    def test_cli(self):
+        """Test printing the statistics as text and JSON line."""
+        archive = os.path.join(datadir, "t.zip")
+        for option in ("--stats", "--stats-json"):
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(cli.main([option, "-q", "test", archive]), 0)
+            output = stderr.getvalue()
+            if option == "--stats":
+                self.assertTrue(output.startswith("test statistics:\n"))
+                self.assertIn("test/run", output)
+            else:
+                data = json.loads(output)
+                self.assertEqual(data["command"], "test")
+                self.assertIn("test/run", data["phases"])
@@ -0,0 +1,89 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test reading archive members as file objects."""
+
+import unittest
+import io
+import os
+import sys
+from unittest import mock
+import patoolib
+from patoolib import cli
+from . import datadir, needs_program, needs_one_program
+
+# the contents of t.txt in the test archives
+TestData = b"42"
+
+
+class StreamTest(unittest.TestCase):
+    """Test class for open_member()."""
+
+    def read(self, filename, name=None, program=None):
+        """Read a member of a test archive."""
+        archive = os.path.join(datadir, filename)
+        with patoolib.open_member(archive, name, program=program) as fileobj:
+            return fileobj.read()
+
+    def test_py_zipfile(self):
+        """Test ZIP members with the zipfile module."""
+        self.assertEqual(self.read("t.zip", "t/t.txt"), TestData)
+        # the only file member is found without a name
+        self.assertEqual(self.read("t.zip"), TestData)
+
+    def test_py_tarfile(self):
+        """Test TAR members with the tarfile module."""
+        self.assertEqual(self.read("t.tar.gz", "t/t.txt"), TestData)
+
+    def test_py_singlefile(self):
+        """Test single file archives with Python modules."""
+        for filename in ("t.txt.gz", "t.txt.bz2", "t.txt.xz", "t.txt.lzma"):
+            with self.subTest(filename=filename):
+                self.assertEqual(self.read(filename), TestData)
+
+    @needs_program('tar')
+    def test_tar(self):
+        """Test TAR members with tar."""
+        self.assertEqual(self.read("t.tar.bz2", "t/t.txt", program="tar"), TestData)
+
+    @needs_program('unzip')
+    def test_unzip(self):
+        """Test ZIP members with unzip."""
+        self.assertEqual(self.read("t.zip", "t/t.txt", program="unzip"), TestData)
+
+    @needs_one_program(('7z', '7zz'))
+    def test_7z(self):
+        """Test 7z members."""
+        self.assertEqual(self.read("t.7z", "t/t.txt"), TestData)
+
+    @needs_program('gzip')
+    def test_gzip(self):
+        """Test GZIP archives with gzip."""
+        self.assertEqual(self.read("t.txt.gz", program="gzip"), TestData)
+
+    @needs_program('tar')
+    def test_errors(self):
+        """Test missing members."""
+        with self.assertRaises(patoolib.util.PatoolError):
+            self.read("t.zip", "t/missing")
+        with self.assertRaises(patoolib.util.PatoolError):
+            self.read("t.tar", "t/missing", program="tar")
+
+    def test_cli(self):
+        """Test the cat command."""
+        stdout = io.TextIOWrapper(io.BytesIO())
+        archive = os.path.join(datadir, "t.zip")
+        with mock.patch.object(sys, "stdout", stdout):
+            self.assertEqual(cli.main(args=["cat", archive, "t/t.txt"]), 0)
+            self.assertEqual(stdout.buffer.getvalue(), TestData)
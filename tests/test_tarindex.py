@@ -0,0 +1,232 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the index of TAR archives."""
+
+import unittest
+import base64
+import gzip
+import io
+import os
+import random
+import subprocess
+import tarfile
+import zlib
+from unittest import mock
+import patoolib
+from patoolib import fileutil, tarindex, util
+from . import basedir, needs_program
+
+# the size of the test archive members
+MemberSize = 200 * 1024
+
+
+class TarIndexTest(unittest.TestCase):
+    """Test class for indexed TAR archives."""
+
+    def setUp(self):
+        """Create a TAR archive in a temporary directory."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+        self.patches = [
+            mock.patch.object(tarindex, "CheckpointSpan", 256 * 1024),
+        ]
+        for patch in self.patches:
+            patch.start()
+        rand = random.Random(42)
+        self.members = {
+            f"dir/file{i}.txt": base64.b64encode(rand.randbytes(MemberSize * 3 // 4))
+            for i in range(12)
+        }
+        fileobj = io.BytesIO()
+        with tarfile.open(fileobj=fileobj, mode="w", format=tarfile.GNU_FORMAT) as tfile:
+            for name, data in self.members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tfile.addfile(info, io.BytesIO(data))
+            # a member with a long name
+            name = "dir/" + "x" * 200
+            self.members[name] = b"long name"
+            info = tarfile.TarInfo(name)
+            info.size = len(self.members[name])
+            tfile.addfile(info, io.BytesIO(self.members[name]))
+        self.data = fileobj.getvalue()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        for patch in self.patches:
+            patch.stop()
+        fileutil.rmtree(self.tmpdir)
+
+    def write_archive(self, filename, data):
+        """Write archive data to a file in the temporary directory."""
+        archive = os.path.join(self.tmpdir, filename)
+        with open(archive, "wb") as fileobj:
+            fileobj.write(data)
+        return archive
+
+    def write_flushed_gzip(self, filename, flush_size):
+        """Write a GZIP archive with deflate flush points like pigz."""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        chunks = []
+        for i in range(0, len(self.data), flush_size):
+            chunks.append(compressor.compress(self.data[i : i + flush_size]))
+            chunks.append(compressor.flush(zlib.Z_SYNC_FLUSH))
+        chunks.append(compressor.flush())
+        return self.write_archive(filename, b"".join(chunks))
+
+    def write_members_gzip(self, filename, member_size, padding=b""):
+        """Write a GZIP archive with multiple members like bgzip."""
+        chunks = [
+            gzip.compress(self.data[i : i + member_size], mtime=0)
+            for i in range(0, len(self.data), member_size)
+        ]
+        return self.write_archive(filename, b"".join(chunks) + padding)
+
+    def check_index(self, archive, compression, min_checkpoints):
+        """Index an archive and check reading members with the index."""
+        patoolib.index_archive(archive, verbosity=-1)
+        index = tarindex.read_index(archive, compression)
+        self.assertIsNotNone(index)
+        self.assertGreaterEqual(len(index.checkpoints), min_checkpoints)
+        self.assertEqual(
+            [entry.name for entry, offset in index.members], list(self.members)
+        )
+        self.check_members(archive)
+        return index
+
+    def check_members(self, archive):
+        """Check extracting and opening members of an archive."""
+        outdir = os.path.join(self.tmpdir, "out")
+        names = ["dir/file10.txt", "dir/file3.txt", "dir/" + "x" * 200]
+        patoolib.extract_archive(
+            archive, outdir=outdir, members=names, verbosity=-1, interactive=False
+        )
+        for name in names:
+            with open(os.path.join(outdir, name), "rb") as fileobj:
+                self.assertEqual(fileobj.read(), self.members[name])
+        self.assertEqual(len(os.listdir(os.path.join(outdir, "dir"))), len(names))
+        fileutil.rmtree(outdir)
+        # read in reverse order to seek back to earlier checkpoints
+        for name in reversed(list(self.members)):
+            with patoolib.open_member(archive, name, verbosity=-1) as fileobj:
+                self.assertEqual(fileobj.read(), self.members[name])
+
+    def test_tar(self):
+        """Test indexing an uncompressed TAR archive."""
+        archive = self.write_archive("t.tar", self.data)
+        self.check_index(archive, None, 1)
+
+    def test_gzip_flush_points(self):
+        """Test checkpoints at deflate flush points of a GZIP archive."""
+        archive = self.write_flushed_gzip("t.tar.gz", 64 * 1024)
+        index = self.check_index(archive, "gzip", 8)
+        self.assertTrue(all(cp.window for cp in index.checkpoints[1:]))
+
+    def test_gzip_members(self):
+        """Test checkpoints at the members of a GZIP archive."""
+        # gzip(1) ignores trailing zero bytes
+        archive = self.write_members_gzip("t.tar.gz", 100 * 1024, b"\0" * 10)
+        index = self.check_index(archive, "gzip", 8)
+        self.assertTrue(all(cp.window is None for cp in index.checkpoints))
+
+    def test_gzip_no_flush_points(self):
+        """Test a GZIP archive without checkpoints after the start."""
+        archive = self.write_archive("t.tar.gz", gzip.compress(self.data))
+        self.check_index(archive, "gzip", 1)
+
+    def test_gzip_flush_marker_in_data(self):
+        """Test that flush markers inside compressed data are no checkpoints."""
+        # stored blocks contain the marker bytes from the member data
+        self.members = {"file": tarindex.FlushMarker * (MemberSize // 2)}
+        fileobj = io.BytesIO()
+        with tarfile.open(fileobj=fileobj, mode="w") as tfile:
+            info = tarfile.TarInfo("file")
+            info.size = len(self.members["file"])
+            tfile.addfile(info, io.BytesIO(self.members["file"]))
+        self.data = fileobj.getvalue()
+        compressor = zlib.compressobj(0, zlib.DEFLATED, 31)
+        data = compressor.compress(self.data) + compressor.flush()
+        archive = self.write_archive("t.tar.gz", data)
+        patoolib.index_archive(archive, verbosity=-1)
+        index = tarindex.read_index(archive, "gzip")
+        self.assertEqual(len(index.checkpoints), 1)
+        with patoolib.open_member(archive, "file", verbosity=-1) as fileobj:
+            self.assertEqual(fileobj.read(), self.members["file"])
+
+    @needs_program('xz')
+    def test_xz_blocks(self):
+        """Test checkpoints at the blocks of an XZ archive."""
+        archive = self.write_archive("t.tar", self.data)
+        subprocess.run(["xz", "--block-size=100000", archive], check=True)
+        index = self.check_index(archive + ".xz", "xz", 8)
+        self.assertTrue(all(cp.window is None for cp in index.checkpoints))
+
+    @needs_program('xz')
+    def test_xz_single_block(self):
+        """Test an XZ archive with one block."""
+        archive = self.write_archive("t.tar", self.data)
+        subprocess.run(["xz", archive], check=True)
+        self.check_index(archive + ".xz", "xz", 1)
+
+    def test_list_no_index(self):
+        """Test that listing a TAR archive does not write an index."""
+        archive = self.write_flushed_gzip("t.tar.gz", 64 * 1024)
+        patoolib.list_archive(archive, verbosity=-1, interactive=False)
+        self.assertFalse(os.path.exists(tarindex.get_index_file(archive)))
+
+    def test_changed_archive(self):
+        """Test that the index of a changed archive is ignored."""
+        archive = self.write_members_gzip("t.tar.gz", 100 * 1024)
+        patoolib.index_archive(archive, verbosity=-1)
+        self.assertIsNotNone(tarindex.read_index(archive, "gzip"))
+        archive = self.write_archive("t.tar.gz", gzip.compress(self.data))
+        self.assertIsNone(tarindex.read_index(archive, "gzip"))
+        self.check_members(archive)
+        with open(tarindex.get_index_file(archive), "wb") as fileobj:
+            fileobj.write(b"invalid")
+        self.assertIsNone(tarindex.read_index(archive, "gzip"))
+
+    def test_hardlink(self):
+        """Test that members with hard links are extracted without the index."""
+        fileobj = io.BytesIO()
+        with tarfile.open(fileobj=fileobj, mode="w") as tfile:
+            info = tarfile.TarInfo("file")
+            info.size = 4
+            tfile.addfile(info, io.BytesIO(b"data"))
+            info = tarfile.TarInfo("link")
+            info.type = tarfile.LNKTYPE
+            info.linkname = "file"
+            tfile.addfile(info)
+        archive = self.write_archive("t.tar.gz", gzip.compress(fileobj.getvalue()))
+        patoolib.index_archive(archive, verbosity=-1)
+        index = tarindex.read_index(archive, "gzip")
+        self.assertTrue(tarindex.has_hardlinks(index, ["link"]))
+        self.assertFalse(tarindex.has_hardlinks(index, ["file"]))
+        outdir = os.path.join(self.tmpdir, "out")
+        patoolib.extract_archive(
+            archive,
+            outdir=outdir,
+            members=["file", "link"],
+            verbosity=-1,
+            interactive=False,
+        )
+        with open(os.path.join(outdir, "link"), "rb") as fileobj:
+            self.assertEqual(fileobj.read(), b"data")
+
+    def test_not_indexable(self):
+        """Test indexing an archive that is no TAR archive."""
+        archive = self.write_archive("t.gz", gzip.compress(b"data"))
+        with self.assertRaises(util.PatoolError):
+            patoolib.index_archive(archive, verbosity=-1)
+        self.assertFalse(os.path.exists(tarindex.get_index_file(archive)))
@@ -0,0 +1,368 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test multithreaded compression programs."""
+
+import unittest
+import bz2
+import gzip
+import lzma
+import os
+import subprocess
+import warnings
+import zipfile
+from unittest import mock
+import patoolib
+from patoolib import blocks, fileutil, util
+from patoolib.programs import get_thread_options, py_zipfile
+from . import basedir, datadir, needs_program, needs_codec
+
+
+class ThreadsTest(unittest.TestCase):
+    """Test class for the threads option."""
+
+    def test_thread_options(self):
+        """Test thread options of compression programs."""
+        self.assertEqual(get_thread_options("/usr/bin/pigz", 4), ["-p", "4"])
+        self.assertEqual(get_thread_options("pbzip2.exe", 4), ["-p4"])
+        self.assertEqual(get_thread_options("xz", 2), ["--threads=2"])
+        self.assertEqual(get_thread_options("zstd", 2), ["--threads=2"])
+        self.assertEqual(get_thread_options("zstd", 2, decompress=True), [])
+        self.assertEqual(get_thread_options("gzip", 2), [])
+        self.assertEqual(get_thread_options("xz", None), [])
+
+    def test_prefer_parallel_programs(self):
+        """Test that parallel programs are preferred when threads are given."""
+        with mock.patch.object(util, "find_program", lambda program: program):
+            self.assertEqual(patoolib.find_archive_program("gzip", "create"), "7z")
+            self.assertEqual(
+                patoolib.find_archive_program("gzip", "create", threads=2), "pigz"
+            )
+            self.assertEqual(
+                patoolib.find_archive_program(
+                    "gzip", "create", program="gzip", threads=2
+                ),
+                "gzip",
+            )
+
+    def test_get_threads(self):
+        """Test the number of threads."""
+        self.assertIsNone(patoolib.get_threads(None))
+        self.assertEqual(patoolib.get_threads(3), 3)
+        self.assertGreaterEqual(patoolib.get_threads(0), 1)
+        with self.assertRaises(util.PatoolError):
+            patoolib.get_threads(-1)
+
+    @needs_codec('tar', 'xz')
+    def test_tar_xz(self):
+        """Test creating and extracting a TAR XZ archive with threads."""
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            archive = os.path.join(tmpdir, "t.tar.xz")
+            patoolib.create_archive(
+                archive, [os.path.join(datadir, "t.txt")], verbosity=-1, threads=2
+            )
+            outdir = os.path.join(tmpdir, "out")
+            patoolib.extract_archive(archive, outdir=outdir, verbosity=-1, threads=0)
+            self.assertTrue(os.listdir(outdir))
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    @needs_program('zstd')
+    def test_zstd(self):
+        """Test creating and extracting a ZSTD archive with threads."""
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            archive = os.path.join(tmpdir, "t.txt.zst")
+            patoolib.create_archive(
+                archive,
+                [os.path.join(datadir, "t.txt")],
+                verbosity=-1,
+                program="zstd",
+                threads=2,
+            )
+            outdir = os.path.join(tmpdir, "out")
+            patoolib.extract_archive(
+                archive, outdir=outdir, verbosity=-1, program="zstd", threads=2
+            )
+            self.assertEqual(os.listdir(outdir), ["t.txt"])
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    def test_zip_parallel(self):
+        """Test extracting a ZIP archive with threads like extractall()."""
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            archive = os.path.join(tmpdir, "t.zip")
+            with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zfile:
+                zfile.writestr("d/", b"")
+                for i in range(20):
+                    zfile.writestr(f"d/sub{i % 3}/f{i}.txt", b"x" * i * 1000)
+                zfile.writestr("../up.txt", b"up")
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    zfile.writestr("dup.txt", b"first")
+                    zfile.writestr("dup.txt", b"second")
+            outdir1 = os.path.join(tmpdir, "out1")
+            outdir2 = os.path.join(tmpdir, "out2")
+            with zipfile.ZipFile(archive) as zfile:
+                zfile.extractall(outdir1)
+            self.assertEqual(
+                patoolib.find_archive_program("zip", "extract", threads=4),
+                "py_zipfile",
+            )
+            patoolib.extract_archive(archive, outdir=outdir2, verbosity=-1, threads=4)
+            self.assertEqual(get_tree(outdir2), get_tree(outdir1))
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    def test_balance_members(self):
+        """Test distributing members to threads by their sizes."""
+        infos = []
+        for size in (10, 1, 5, 5, 1):
+            info = zipfile.ZipInfo(f"f{len(infos)}")
+            info.file_size = size
+            infos.append(info)
+        groups = py_zipfile.balance_members(infos, 2)
+        self.assertEqual(
+            sorted(sum(info.file_size for info in group) for group in groups),
+            [11, 11],
+        )
+        self.assertEqual(len(py_zipfile.balance_members(infos[:1], 4)), 1)
+        self.assertEqual(py_zipfile.balance_members([], 4), [])
+
+    def test_compress_blocks(self):
+        """Test compressing single file archives in blocks with threads."""
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            filename = os.path.join(tmpdir, "data.txt")
+            data = b"".join(b"line %d\n" % i for i in range(100000))
+            with open(filename, "wb") as fileobj:
+                fileobj.write(data)
+            block_sizes = dict.fromkeys(blocks.BlockSizes, 64 * 1024)
+            for program, ext, decompress, exe in (
+                ("py_gzip", "gz", gzip.decompress, "gzip"),
+                ("py_bz2", "bz2", bz2.decompress, "bzip2"),
+                ("py_lzma", "xz", lzma.decompress, "xz"),
+            ):
+                with self.subTest(program=program):
+                    archive = os.path.join(tmpdir, f"data.txt.{ext}")
+                    with mock.patch.dict(blocks.BlockSizes, block_sizes):
+                        patoolib.create_archive(
+                            archive,
+                            [filename],
+                            verbosity=-1,
+                            program=program,
+                            threads=3,
+                        )
+                    with open(archive, "rb") as fileobj:
+                        self.assertEqual(decompress(fileobj.read()), data)
+                    exe = util.find_program(exe)
+                    if exe:
+                        output = subprocess.check_output([exe, "-dc", archive])
+                        self.assertEqual(output, data)
+                    os.remove(archive)
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    def test_compress_blocks_order(self):
+        """Test that blocks are written in order and empty files are valid."""
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            filename = os.path.join(tmpdir, "data")
+            archive = os.path.join(tmpdir, "data.gz")
+            with open(filename, "wb") as fileobj:
+                fileobj.write(bytes(range(256)) * 10)
+            blocks.compress_file(filename, archive, bytes, 4, 7)
+            with open(archive, "rb") as fileobj:
+                self.assertEqual(fileobj.read(), bytes(range(256)) * 10)
+            open(filename, "wb").close()
+            blocks.compress_file(filename, archive, gzip.compress, 4, 7)
+            with open(archive, "rb") as fileobj:
+                self.assertEqual(gzip.decompress(fileobj.read()), b"")
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    def test_decompress_parts(self):
+        """Test extracting and testing single file archives with
+        multiple members, streams or blocks with threads.
+        """
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            data = b"".join(b"line %d\n" % i for i in range(100000))
+            chunks = [data[i : i + 100000] for i in range(0, len(data), 100000)]
+            archives = {
+                "py_gzip": b"".join(gzip.compress(chunk) for chunk in chunks),
+                "py_bz2": b"".join(bz2.compress(chunk) for chunk in chunks),
+                "py_lzma": b"".join(lzma.compress(chunk) for chunk in chunks),
+            }
+            for program, compressed in archives.items():
+                with self.subTest(program=program):
+                    ext = {"py_gzip": "gz", "py_bz2": "bz2", "py_lzma": "xz"}[program]
+                    archive = os.path.join(tmpdir, f"data.txt.{ext}")
+                    with open(archive, "wb") as fileobj:
+                        fileobj.write(compressed)
+                    outdir = os.path.join(tmpdir, program)
+                    with mock.patch.object(blocks, "GroupSize", 1):
+                        patoolib.test_archive(
+                            archive, verbosity=-1, program=program, threads=3
+                        )
+                        patoolib.extract_archive(
+                            archive,
+                            outdir=outdir,
+                            verbosity=-1,
+                            program=program,
+                            threads=3,
+                        )
+                    with open(os.path.join(outdir, "data.txt"), "rb") as fileobj:
+                        self.assertEqual(fileobj.read(), data)
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    @needs_program('xz')
+    def test_xz_blocks(self):
+        """Test decompressing the blocks of an XZ stream with threads."""
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            data = b"".join(b"line %d\n" % i for i in range(100000))
+            archive = os.path.join(tmpdir, "data.xz")
+            compressed = subprocess.run(
+                ["xz", "-c", "--block-size=100000"],
+                input=data,
+                stdout=subprocess.PIPE,
+                check=True,
+            ).stdout
+            with open(archive, "wb") as fileobj:
+                # a second stream with stream padding
+                fileobj.write(compressed + b"\0" * 4 + lzma.compress(b"end"))
+            target = os.path.join(tmpdir, "data")
+            with mock.patch.object(blocks, "GroupSize", 1):
+                self.assertTrue(
+                    blocks.decompress_file(archive, target, 3, blocks.get_xz_blocks)
+                )
+            with open(target, "rb") as fileobj:
+                self.assertEqual(fileobj.read(), data + b"end")
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    @needs_program('zstd')
+    def test_zstd_frames(self):
+        """Test finding the frames of a ZSTD archive."""
+        frames = [
+            subprocess.run(
+                ["zstd", "-c", *options],
+                input=content,
+                stdout=subprocess.PIPE,
+                check=True,
+            ).stdout
+            for content, options in (
+                (b"x" * 300000, []),
+                (bytes(range(256)) * 1000, ["--no-check"]),
+                (b"", []),
+            )
+        ]
+        compressed = b"".join(frames)
+        parts = blocks.get_zstd_frames(compressed, decompressor=object)
+        ends = [part.end for part in parts]
+        self.assertEqual(ends, [sum(map(len, frames[: i + 1])) for i in range(3)])
+        self.assertIsNone(blocks.get_zstd_frames(compressed[:-1], object))
+
+    def test_decompress_wrong_boundary(self):
+        """Test that GZIP magic bytes inside of compressed data fall back
+        to decompressing with one thread, and that errors are reported.
+        """
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            data = b"a\x1f\x8b\x08\x00b" * 1000
+            archive = os.path.join(tmpdir, "data.txt.gz")
+            with open(archive, "wb") as fileobj:
+                fileobj.write(gzip.compress(data, compresslevel=0))
+                fileobj.write(gzip.compress(data))
+            target = os.path.join(tmpdir, "data")
+            with mock.patch.object(blocks, "GroupSize", 1):
+                self.assertFalse(
+                    blocks.decompress_file(archive, target, 3, blocks.get_gzip_members)
+                )
+                outdir = os.path.join(tmpdir, "out")
+                patoolib.extract_archive(
+                    archive, outdir=outdir, verbosity=-1, program="py_gzip", threads=3
+                )
+                with open(os.path.join(outdir, "data.txt"), "rb") as fileobj:
+                    self.assertEqual(fileobj.read(), data + data)
+                with open(archive, "r+b") as fileobj:
+                    fileobj.seek(-10, os.SEEK_END)
+                    fileobj.write(b"broken")
+                with self.assertRaises(util.PatoolError):
+                    patoolib.test_archive(
+                        archive, verbosity=-1, program="py_gzip", threads=3
+                    )
+        finally:
+            fileutil.rmtree(tmpdir)
+
+    def test_decompress_large_parts(self):
+        """Test that parts which decompress to more than MaxPartOutput bytes
+        fall back to decompressing with one thread, with known sizes of
+        GZIP members and unknown sizes of BZIP2 streams.
+        """
+        tmpdir = fileutil.tmpdir(dir=basedir)
+        try:
+            data = b"\0" * 100000
+            archives = {
+                "py_gzip": ("gz", blocks.get_gzip_members, gzip.compress),
+                "py_bz2": ("bz2", blocks.get_bzip2_streams, bz2.compress),
+            }
+            for program, (ext, get_parts, compress) in archives.items():
+                with self.subTest(program=program):
+                    archive = os.path.join(tmpdir, f"data.txt.{ext}")
+                    with open(archive, "wb") as fileobj:
+                        for _ in range(4):
+                            fileobj.write(compress(data))
+                    target = os.path.join(tmpdir, "data")
+                    with mock.patch.multiple(
+                        blocks, GroupSize=1, MaxPartOutput=len(data)
+                    ):
+                        self.assertTrue(
+                            blocks.decompress_file(archive, target, 3, get_parts)
+                        )
+                    with mock.patch.multiple(
+                        blocks, GroupSize=1, MaxPartOutput=len(data) - 1
+                    ):
+                        self.assertFalse(
+                            blocks.decompress_file(archive, target, 3, get_parts)
+                        )
+                        outdir = os.path.join(tmpdir, program)
+                        patoolib.extract_archive(
+                            archive,
+                            outdir=outdir,
+                            verbosity=-1,
+                            program=program,
+                            threads=3,
+                        )
+                    with open(os.path.join(outdir, "data.txt"), "rb") as fileobj:
+                        self.assertEqual(fileobj.read(), data * 4)
+        finally:
+            fileutil.rmtree(tmpdir)
+
+
+def get_tree(directory):
+    """Get the relative paths and file contents in a directory."""
+    tree = {}
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for name in dirnames:
+            tree[os.path.relpath(os.path.join(dirpath, name), directory)] = None
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as fileobj:
+                tree[os.path.relpath(path, directory)] = fileobj.read()
+    return tree
@@ -0,0 +1,136 @@
+# Copyright (C) 2026 Bastian Kleineidam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test calling the library from multiple threads."""
+
+import unittest
+import concurrent.futures
+import os
+from unittest import mock
+import patoolib
+from patoolib import fileutil, repack
+from . import basedir, datadir
+
+# the number of library calls of each kind
+Calls = 8
+
+
+class ThreadSafeTest(unittest.TestCase):
+    """Test class for concurrent library calls."""
+
+    def setUp(self):
+        """Create a temporary directory with files to archive."""
+        self.tmpdir = fileutil.tmpdir(dir=basedir)
+        self.srcdir = os.path.join(self.tmpdir, "src")
+        os.makedirs(os.path.join(self.srcdir, "sub"))
+        for name in ("a.txt", os.path.join("sub", "b.txt")):
+            with open(os.path.join(self.srcdir, name), "w") as fileobj:
+                fileobj.write(name * 100)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        fileutil.rmtree(self.tmpdir)
+
+    def get_names(self, archive):
+        """Get the sorted member names of an archive."""
+        names = (entry.name.rstrip("/") for entry in patoolib.iter_archive(archive))
+        return sorted(names)
+
+    def extract(self, i):
+        """Extract an archive to a new directory."""
+        archive = os.path.join(datadir, "t.zip" if i % 2 else "t.tar")
+        outdir = os.path.join(self.tmpdir, f"extract{i}")
+        os.mkdir(outdir)
+        patoolib.extract_archive(archive, outdir=outdir, verbosity=-1, interactive=False)
+        with open(os.path.join(outdir, "t", "t.txt")) as fileobj:
+            self.assertEqual(fileobj.read(), "42")
+
+    def create(self, i):
+        """Create an archive of the source directory."""
+        name = f"create{i}.zip" if i % 2 else f"create{i}.tar"
+        archive = os.path.join(self.tmpdir, name)
+        patoolib.create_archive(archive, [self.srcdir], verbosity=-1, interactive=False)
+        self.assertEqual(len(self.get_names(archive)), 4)
+
+    def repack(self, i):
+        """Repack an archive with a temporary directory."""
+        archive = os.path.join(datadir, "t.zip" if i % 2 else "t.tar")
+        name = f"repack{i}.tar" if i % 2 else f"repack{i}.zip"
+        archive_new = os.path.join(self.tmpdir, name)
+        patoolib.repack_archive(archive, archive_new, verbosity=-1, interactive=False)
+        self.assertEqual(self.get_names(archive_new), self.get_names(archive))
+
+    def test_mixed_calls(self):
+        """Test concurrent extract, create and repack calls."""
+        cwd = os.getcwd()
+        funcs = [self.extract, self.create, self.repack]
+        with (
+            mock.patch.object(os, "chdir", side_effect=AssertionError("chdir")),
+            mock.patch.object(repack, "can_repack", return_value=False),
+            concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor,
+        ):
+            futures = [
+                executor.submit(func, i) for i in range(Calls) for func in funcs
+            ]
+            for future in futures:
+                future.result()
+        self.assertEqual(os.getcwd(), cwd)
+
+    def test_outdir_names(self):
+        """Test that concurrent extractions to the current working directory
+        choose different output names.
+        """
+        archive = os.path.join(datadir, "t.zip")
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                futures = [
+                    executor.submit(
+                        patoolib.extract_archive,
+                        archive,
+                        verbosity=-1,
+                        interactive=False,
+                    )
+                    for i in range(Calls)
+                ]
+                targets = [future.result() for future in futures]
+        finally:
+            os.chdir(cwd)
+        # each extraction of the directory "t" must get its own target
+        self.assertEqual(len(set(targets)), Calls)
+
+    def test_create_cwd(self):
+        """Test creating archives with filenames relative to a directory."""
+        programs = (
+            ("tar", "py_tarfile", ["a.txt", "sub"]),
+            ("zip", "py_zipfile", ["a.txt", "sub"]),
+            ("gzip", "py_gzip", ["a.txt"]),
+            ("bzip2", "py_bz2", ["a.txt"]),
+            ("xz", "py_lzma", ["a.txt"]),
+        )
+        for format, program, filenames in programs:
+            archive = os.path.join(self.tmpdir, f"t.{program}")
+            patoolib._create_archive(
+                archive,
+                filenames,
+                verbosity=-1,
+                program=program,
+                format=format,
+                cwd=self.srcdir,
+            )
+            self.assertTrue(os.path.isfile(archive))
+            if len(filenames) > 1:
+                names = self.get_names(archive)
+                self.assertEqual(names, ["a.txt", "sub", "sub/b.txt"])